@@ -0,0 +1,106 @@
+"""Measure the cost of a loss plot update against the number of plotted points.
+
+The incremental update of `TBPlotWidget` (ring buffers, persistent and decimated
+curves) is compared to clearing the plot and re-plotting all points.
+
+Example
+-------
+QT_QPA_PLATFORM=offscreen python benchmarks/loss_plot_benchmark.py
+    --points 1000 10000 100000 1000000
+"""
+
+import argparse
+import time
+from functools import partial
+
+import numpy as np
+import pyqtgraph as pg
+from qtpy.QtWidgets import QApplication
+
+from careamics_napari.widgets import TBPlotWidget
+
+
+def _time_update(widget: TBPlotWidget, update, repeats: int) -> float:
+    """Average duration, in ms, of an update followed by a repaint."""
+    start = time.perf_counter()
+    for i in range(repeats):
+        update(i)
+        widget.graphics_widget.grab()
+
+    return 1000 * (time.perf_counter() - start) / repeats
+
+
+def _incremental(
+    widget: TBPlotWidget,
+    positions: np.ndarray,
+    losses: np.ndarray,
+    n_points: int,
+    chunk: int,
+    i: int,
+) -> None:
+    """Add the i-th chunk of points after the first `n_points` points."""
+    new = slice(n_points + i * chunk, n_points + (i + 1) * chunk)
+    widget.add_batch_losses(np.stack([positions[new], losses[new]]))
+
+
+def _replot(
+    widget: TBPlotWidget,
+    positions: np.ndarray,
+    losses: np.ndarray,
+    n_points: int,
+    chunk: int,
+    i: int,
+) -> None:
+    """Clear the plot and re-plot all points up to the i-th chunk."""
+    end = n_points + (i + 1) * chunk
+    widget.plot.clear()
+    widget.plot.plot(positions[:end], losses[:end], pen=pg.mkPen(color=(204, 221, 255)))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--points", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--chunk", type=int, default=100, help="Points per update.")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument(
+        "--skip-replot",
+        action="store_true",
+        help="Do not measure the full re-plot, slow for large number of points.",
+    )
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841
+    rng = np.random.default_rng(42)
+
+    print(f"{'points':>10} {'incremental (ms)':>18} {'re-plot (ms)':>14}")
+    for n_points in args.points:
+        positions = np.arange(n_points + args.chunk * args.repeats) / 1000
+        losses = np.exp(-positions / positions[-1]) + 0.1 * rng.random(len(positions))
+
+        # incremental update
+        widget = TBPlotWidget(min_width=300, min_height=250)
+        widget.native.resize(300, 250)
+        widget.add_batch_losses(np.stack([positions[:n_points], losses[:n_points]]))
+        incremental = partial(
+            _incremental, widget, positions, losses, n_points, args.chunk
+        )
+        incremental_time = _time_update(widget, incremental, args.repeats)
+
+        # clear and re-plot all points, as previously done at each epoch
+        replot_time = float("nan")
+        if not args.skip_replot:
+            widget = TBPlotWidget(min_width=300, min_height=250)
+            widget.native.resize(300, 250)
+            widget.plot.setDownsampling(auto=False)
+            widget.plot.setClipToView(False)
+            replot = partial(_replot, widget, positions, losses, n_points, args.chunk)
+            replot_time = _time_update(widget, replot, args.repeats)
+
+        print(f"{n_points:>10} {incremental_time:>18.2f} {replot_time:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the epoch time and the validation loss of the training precisions.
+
+Noise2Void is trained on the SEM sample data (downloaded on first use) with each
+precision, on the CPU.
+
+Example
+-------
+python benchmarks/precision_benchmark.py --epochs 3
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+from careamics import CAREamist
+from pytorch_lightning import Callback
+
+from careamics_napari.careamics_utils.configuration import (
+    SUPPORTED_PRECISIONS,
+    create_configuration,
+)
+from careamics_napari.signals import TrainingSignal
+
+
+class _EpochTimer(Callback):
+    """Record the duration of the training epochs."""
+
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+
+    def on_train_epoch_start(self, trainer, pl_module) -> None:
+        self._start = time.perf_counter()
+
+    def on_train_epoch_end(self, trainer, pl_module) -> None:
+        self.durations.append(time.perf_counter() - self._start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--patch-size", type=int, default=64)
+    parser.add_argument(
+        "--random", action="store_true", help="Use random data instead of SEM."
+    )
+    parser.add_argument("--precisions", nargs="+", default=list(SUPPORTED_PRECISIONS))
+    args = parser.parse_args()
+
+    if args.random:
+        train = np.random.default_rng(42).random((512, 512), dtype=np.float32)
+        val = np.random.default_rng(43).random((256, 256), dtype=np.float32)
+    else:
+        from careamics_napari.sample_data import _load_sem_n2v
+
+        (train, _), (val, _) = _load_sem_n2v()
+
+    print(f"{'precision':>12} {'epoch time (s)':>16} {'val loss':>10}")
+    for precision in args.precisions:
+        signal = TrainingSignal(  # type: ignore
+            load_from_disk=False,
+            axes="YX",
+            n_epochs=args.epochs,
+            batch_size=args.batch_size,
+            patch_size_xy=args.patch_size,
+            precision=precision,
+        )
+        config = create_configuration(signal)
+        timer = _EpochTimer()
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            careamist = CAREamist(config, work_dir=work_dir, callbacks=[timer])
+            careamist.train(train_source=train, val_source=val)
+
+            val_loss = float(careamist.trainer.callback_metrics["val_loss"])
+
+        # the first epoch includes the warm-up
+        epoch_time = np.median(timer.durations[1:] or timer.durations)
+        print(f"{precision:>12} {epoch_time:>16.2f} {val_loss:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
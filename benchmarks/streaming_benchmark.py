@@ -0,0 +1,95 @@
+"""Replay a stack at a target frame rate through the streaming denoiser.
+
+Example
+-------
+python benchmarks/streaming_benchmark.py --stack recording.tif --model model.zip
+    --fps 30 --policy drop_oldest
+"""
+
+import argparse
+import time
+
+import numpy as np
+import tifffile
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import StreamingDenoiser, StreamingPolicy
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack", help="TYX tiff stack, random if not provided.")
+    parser.add_argument("--model", help="Checkpoint or BMZ model, untrained if not.")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--buffer-size", type=int, default=8)
+    parser.add_argument(
+        "--policy",
+        choices=[p.value for p in StreamingPolicy],
+        default=StreamingPolicy.DROP_OLDEST.value,
+    )
+    args = parser.parse_args()
+
+    if args.stack is not None:
+        stack = tifffile.imread(args.stack)
+    else:
+        stack = np.random.default_rng(42).random(
+            (args.frames, args.size, args.size), dtype=np.float32
+        )
+
+    if args.model is not None:
+        careamist = CAREamist(args.model)
+    else:
+        config = create_n2v_configuration(
+            experiment_name="streaming_benchmark",
+            data_type="array",
+            axes="SYX",
+            patch_size=[64, 64],
+            batch_size=2,
+            num_epochs=1,
+        )
+        careamist = CAREamist(config)
+        careamist.cfg.data_config.set_means_and_stds(
+            [float(stack.mean())], [float(stack.std())]
+        )
+
+    period = 1 / args.fps
+    with StreamingDenoiser(
+        careamist,
+        buffer_size=args.buffer_size,
+        batch_size=args.batch_size,
+        policy=StreamingPolicy(args.policy),
+    ) as denoiser:
+        # warm up the model
+        denoiser.push(stack[0])
+        while denoiser.n_denoised == 0:
+            time.sleep(0.01)
+        denoiser.reset_statistics()
+
+        start = time.perf_counter()
+        for i, frame in enumerate(stack):
+            time.sleep(max(0.0, start + i * period - time.perf_counter()))
+            denoiser.push(frame)
+        replay = time.perf_counter() - start
+
+    total = time.perf_counter() - start
+    latencies = denoiser.latency_percentiles((50, 90, 99))
+    n_frames = len(stack)
+
+    print(f"Frames: {n_frames}, target {args.fps:.1f} fps, replayed in {replay:.2f} s")
+    print(
+        f"Denoised: {denoiser.n_denoised} ({denoiser.n_denoised / total:.1f} fps), "
+        f"dropped: {denoiser.n_dropped} ({args.policy})"
+    )
+    print(
+        "Latency (ms): "
+        + ", ".join(f"p{p:g} {1000 * v:.1f}" for p, v in latencies.items())
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,72 @@ __all__ = [
     "get_algorithm",
     "create_configuration",
     "UpdaterCallBack",
+    "EarlyStoppingCallBack",
+    "TimeBudgetCallBack",
+    "BackgroundCheckpointIO",
+    "configure_checkpointing",
+    "wait_for_checkpoints",
+    "weights_hash",
+    "ProfilerCallBack",
+    "PredictionCache",
+    "StreamingDenoiser",
+    "StreamingPolicy",
+    "ThroughputMeter",
+    "AutoTuneResult",
+    "auto_tune",
+    "ValidationSplitCallBack",
+    "find_last_checkpoint",
+    "WEIGHTS_SUFFIX",
+    "save_weights",
+    "load_weights",
+    "crop_test_input",
+    "export_bmz",
+    "is_onnx_available",
+    "verify_bmz",
+    "StatisticsCache",
+    "ForegroundPatchCallBack",
+    "ChunkCache",
+    "ChunkedDataModule",
+    "ChunkedPatchDataset",
+    "is_chunked",
+    "open_chunked",
+    "PackedDataModule",
+    "PackedFiles",
+    "pack_files",
+    "patch_scores",
+    "select_patches",
+    "StreamingStatistics",
+    "file_statistics",
 ]
 
 
 from .algorithms import get_algorithm, get_available_algorithms
+from .autotune import AutoTuneResult, auto_tune
+from .bmz_export import crop_test_input, export_bmz, is_onnx_available, verify_bmz
 from .callback import UpdaterCallBack
+from .checkpointing import (
+    BackgroundCheckpointIO,
+    configure_checkpointing,
+    wait_for_checkpoints,
+    weights_hash,
+)
+from .chunked_dataset import (
+    ChunkCache,
+    ChunkedDataModule,
+    ChunkedPatchDataset,
+    is_chunked,
+    open_chunked,
+)
+from .compact_model import WEIGHTS_SUFFIX, load_weights, save_weights
 from .configuration import create_configuration
+from .early_stopping import EarlyStoppingCallBack
+from .packed_cache import PackedDataModule, PackedFiles, pack_files
+from .patch_index import ForegroundPatchCallBack, patch_scores, select_patches
+from .prediction_cache import PredictionCache
+from .profiler_callback import ProfilerCallBack
+from .resume import ValidationSplitCallBack, find_last_checkpoint
+from .statistics_cache import StatisticsCache
+from .streaming import StreamingDenoiser, StreamingPolicy
+from .streaming_statistics import StreamingStatistics, file_statistics
+from .throughput import ThroughputMeter
+from .time_budget import TimeBudgetCallBack
@@ -0,0 +1,488 @@
+"""Short training probe choosing the batch size and the learning rate."""
+
+import itertools
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Optional, Union, cast
+
+import numpy as np
+import torch
+from careamics import Configuration
+from careamics.lightning import FCNModule, TrainDataModule
+from careamics.utils.torch_utils import get_optimizer
+from numpy.typing import NDArray
+from torch.utils.data import default_collate
+
+from .chunked_dataset import ChunkedDataModule, is_chunked
+from .packed_cache import PackedDataModule, PackedFiles
+
+MAX_BATCH_SIZE = 512
+"""Largest batch size tried by the probe."""
+
+MIN_SPEEDUP = 1.05
+"""Minimum throughput gain for a larger batch size to be selected on CPU."""
+
+LR_RANGE = (1e-7, 1.0)
+"""Range of learning rates explored by the LR range test."""
+
+LR_STEPS = 60
+"""Maximum number of steps of the LR range test."""
+
+MIN_LOSS_DECREASE = 0.9
+"""Relative loss decrease required for the LR range test to be conclusive."""
+
+
+@dataclass
+class AutoTuneResult:
+    """Result of the auto-tuning probe."""
+
+    batch_size: int
+    """Largest batch size fitting the memory budget."""
+
+    learning_rate: float
+    """Learning rate chosen from the LR range test."""
+
+    patches_per_second: float
+    """Throughput measured with the selected batch size."""
+
+    duration: float
+    """Duration of the probe, in seconds."""
+
+    def to_dict(self) -> dict[str, float]:
+        """Return the result as a dictionary.
+
+        Returns
+        -------
+        dict of {str: float}
+            Result.
+        """
+        return asdict(self)
+
+
+def auto_tune(
+    config: Configuration,
+    train_data: Union[str, NDArray],
+    train_data_target: Optional[Union[str, NDArray]] = None,
+    time_budget: float = 60,
+    memory_fraction: float = 0.8,
+    device: Optional[torch.device] = None,
+) -> AutoTuneResult:
+    """Find the largest batch size fitting in memory and a good learning rate.
+
+    Training patches are drawn from the training data, then a copy of the model is
+    trained for a few steps with increasing batch sizes (doubling from the
+    configured one) until the peak GPU memory exceeds `memory_fraction` of the
+    device memory, or on CPU until the throughput stops improving. A LR range test
+    is then run with the selected batch size: the learning rate grows
+    exponentially at each step, and the learning rate at the minimum of the
+    smoothed loss, divided by 10, is selected.
+
+    Half of the time budget is allocated to each stage, and the probe stops early
+    if the budget is exceeded.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration, not modified.
+    train_data : str or numpy.ndarray
+        Training data, path, array, chunked array (see `is_chunked`) or packed
+        files.
+    train_data_target : str or numpy.ndarray or None, default=None
+        Training target, path or array.
+    time_budget : float, default=60
+        Maximum duration of the probe, in seconds.
+    memory_fraction : float, default=0.8
+        Fraction of the GPU memory that the training can use.
+    device : torch.device or None, default=None
+        Device used for the probe, the first GPU if available by default.
+
+    Returns
+    -------
+    AutoTuneResult
+        Selected batch size and learning rate, throughput and probe duration.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    if device is None:
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    config = config.model_copy(deep=True)
+    samples = _sample_patches(
+        config, train_data, train_data_target, max_samples=MAX_BATCH_SIZE
+    )
+
+    batch_size, patches_per_second = _find_batch_size(
+        config,
+        samples,
+        device,
+        memory_fraction,
+        deadline=start + time_budget / 2,
+    )
+    learning_rate = _find_learning_rate(
+        config, samples, batch_size, device, deadline=deadline
+    )
+
+    if device.type == "cuda":
+        torch.cuda.empty_cache()
+
+    return AutoTuneResult(
+        batch_size=batch_size,
+        learning_rate=learning_rate,
+        patches_per_second=patches_per_second,
+        duration=time.perf_counter() - start,
+    )
+
+
+def _sample_patches(
+    config: Configuration,
+    train_data: Union[str, NDArray],
+    train_data_target: Optional[Union[str, NDArray]],
+    max_samples: int,
+) -> list[Any]:
+    """Extract training samples, as produced by the CAREamics datasets.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    train_data : str or numpy.ndarray
+        Training data, path, array, chunked array (see `is_chunked`) or packed
+        files.
+    train_data_target : str or numpy.ndarray or None
+        Training target, path or array.
+    max_samples : int
+        Maximum number of samples.
+
+    Returns
+    -------
+    list of Any
+        Samples, e.g. (masked patch, patch, mask) tuples for Noise2Void.
+    """
+    datamodule_class: Any = TrainDataModule
+    if is_chunked(train_data):
+        datamodule_class = ChunkedDataModule
+    elif isinstance(train_data, PackedFiles):
+        datamodule_class = PackedDataModule
+
+    datamodule = datamodule_class(
+        data_config=config.data_config,
+        train_data=train_data,
+        train_data_target=train_data_target,
+        val_minimum_split=1,
+    )
+    datamodule.prepare_data()
+    datamodule.setup()
+
+    samples = list(itertools.islice(iter(datamodule.train_dataset), max_samples))
+    if len(samples) == 0:
+        raise ValueError("No training patches could be extracted.")
+
+    return samples
+
+
+def _batches(samples: list[Any], batch_size: int, device: torch.device) -> Any:
+    """Cycle over the samples, yielding batches on the device.
+
+    Parameters
+    ----------
+    samples : list of Any
+        Samples.
+    batch_size : int
+        Batch size.
+    device : torch.device
+        Device.
+
+    Yields
+    ------
+    Any
+        Batch.
+    """
+    rng = np.random.default_rng(42)
+    while True:
+        indices = rng.choice(len(samples), size=batch_size, replace=False)
+        batch = default_collate([samples[i] for i in indices])
+        yield [
+            b.to(device) if isinstance(b, torch.Tensor) else b
+            for b in (batch if isinstance(batch, (tuple, list)) else [batch])
+        ]
+
+
+def _step(
+    module: FCNModule, optimizer: torch.optim.Optimizer, batch: list[Any]
+) -> float:
+    """Run a training step.
+
+    Parameters
+    ----------
+    module : FCNModule
+        CAREamics Lightning module.
+    optimizer : torch.optim.Optimizer
+        Optimizer.
+    batch : list of Any
+        Batch.
+
+    Returns
+    -------
+    float
+        Loss.
+    """
+    # same as `FCNModule.training_step`, without logging
+    x, *targets = batch
+    if module.use_n2v and module.n2v_preprocess is not None:
+        x, *aux = module.n2v_preprocess(x)
+    else:
+        aux = []
+
+    loss = module.loss_func(module.model(x), *aux, *targets)
+
+    optimizer.zero_grad(set_to_none=True)
+    loss.backward()
+    optimizer.step()
+
+    return loss.item()
+
+
+def _is_out_of_memory(error: Exception) -> bool:
+    """Whether an exception was raised because the memory was exhausted.
+
+    Parameters
+    ----------
+    error : Exception
+        Exception.
+
+    Returns
+    -------
+    bool
+        Whether the memory was exhausted.
+    """
+    return isinstance(error, (MemoryError, torch.cuda.OutOfMemoryError)) or (
+        isinstance(error, RuntimeError) and "out of memory" in str(error)
+    )
+
+
+def _create_optimizer(
+    config: Configuration, module: FCNModule, lr: float
+) -> torch.optim.Optimizer:
+    """Create the configured optimizer with a given learning rate.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    module : FCNModule
+        CAREamics Lightning module.
+    lr : float
+        Learning rate.
+
+    Returns
+    -------
+    torch.optim.Optimizer
+        Optimizer.
+    """
+    optimizer_config = config.algorithm_config.optimizer
+    parameters = {**optimizer_config.parameters, "lr": lr}
+    optimizer = cast(type[torch.optim.Optimizer], get_optimizer(optimizer_config.name))
+    return optimizer(module.model.parameters(), **parameters)
+
+
+def _measure_throughput(
+    config: Configuration,
+    samples: list[Any],
+    batch_size: int,
+    device: torch.device,
+    memory_budget: Optional[float],
+    n_steps: int = 3,
+) -> Optional[float]:
+    """Measure the training throughput of a batch size.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    samples : list of Any
+        Training samples.
+    batch_size : int
+        Batch size.
+    device : torch.device
+        Device.
+    memory_budget : float or None
+        Maximum GPU memory, in bytes, None on CPU.
+    n_steps : int, default=3
+        Number of measured steps, after a warm-up step.
+
+    Returns
+    -------
+    float or None
+        Throughput in patches per second, None if the batch size does not fit
+        in memory.
+    """
+    module = FCNModule(algorithm_config=config.algorithm_config).to(device)
+    optimizer = _create_optimizer(config, module, lr=1e-4)
+    batches = _batches(samples, batch_size, device)
+
+    try:
+        if device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(device)
+
+        _step(module, optimizer, next(batches))  # warm-up
+
+        start = time.perf_counter()
+        for _ in range(n_steps):
+            _step(module, optimizer, next(batches))
+        if device.type == "cuda":
+            torch.cuda.synchronize(device)
+        duration = time.perf_counter() - start
+
+    except Exception as e:
+        if _is_out_of_memory(e):
+            return None
+        raise
+
+    finally:
+        del module, optimizer
+        if device.type == "cuda":
+            torch.cuda.empty_cache()
+
+    if (
+        memory_budget is not None
+        and torch.cuda.max_memory_allocated(device) > memory_budget
+    ):
+        return None
+
+    return n_steps * batch_size / duration
+
+
+def _find_batch_size(
+    config: Configuration,
+    samples: list[Any],
+    device: torch.device,
+    memory_fraction: float,
+    deadline: float,
+) -> tuple[int, float]:
+    """Find the largest batch size fitting in the memory budget.
+
+    The batch size is doubled from the configured one, or halved if the
+    configured one does not fit.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    samples : list of Any
+        Training samples.
+    device : torch.device
+        Device.
+    memory_fraction : float
+        Fraction of the GPU memory that the training can use.
+    deadline : float
+        Time (`time.perf_counter`) at which the search stops.
+
+    Returns
+    -------
+    tuple of (int, float)
+        Batch size and measured throughput in patches per second.
+    """
+    memory_budget = (
+        memory_fraction * torch.cuda.get_device_properties(device).total_memory
+        if device.type == "cuda"
+        else None
+    )
+    max_batch_size = min(MAX_BATCH_SIZE, len(samples))
+
+    # find a batch size that fits, starting from the configured one
+    batch_size = min(config.data_config.batch_size, max_batch_size)
+    throughput = _measure_throughput(config, samples, batch_size, device, memory_budget)
+    while throughput is None and batch_size > 1:
+        batch_size //= 2
+        throughput = _measure_throughput(
+            config, samples, batch_size, device, memory_budget
+        )
+
+    if throughput is None:
+        raise MemoryError("A single patch does not fit in memory.")
+
+    # increase it while it fits, and on CPU while it is faster
+    best = (batch_size, throughput)
+    while 2 * batch_size <= max_batch_size and time.perf_counter() < deadline:
+        batch_size *= 2
+        throughput = _measure_throughput(
+            config, samples, batch_size, device, memory_budget
+        )
+
+        if throughput is None:
+            break
+        elif memory_budget is None and throughput < MIN_SPEEDUP * best[1]:
+            break
+
+        best = (batch_size, throughput)
+
+    return best
+
+
+def _find_learning_rate(
+    config: Configuration,
+    samples: list[Any],
+    batch_size: int,
+    device: torch.device,
+    deadline: float,
+) -> float:
+    """Run a LR range test.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    samples : list of Any
+        Training samples.
+    batch_size : int
+        Batch size.
+    device : torch.device
+        Device.
+    deadline : float
+        Time (`time.perf_counter`) at which the test stops.
+
+    Returns
+    -------
+    float
+        Learning rate, the configured one if the test was inconclusive.
+    """
+    default_lr = config.algorithm_config.optimizer.parameters.get("lr", 1e-4)
+
+    module = FCNModule(algorithm_config=config.algorithm_config).to(device)
+    optimizer = _create_optimizer(config, module, lr=LR_RANGE[0])
+    factor = (LR_RANGE[1] / LR_RANGE[0]) ** (1 / (LR_STEPS - 1))
+
+    learning_rates: list[float] = []
+    losses: list[float] = []
+    smoothed = 0.0
+    batches = _batches(samples, batch_size, device)
+    for step in range(LR_STEPS):
+        lr = LR_RANGE[0] * factor**step
+        for group in optimizer.param_groups:
+            group["lr"] = lr
+
+        loss = _step(module, optimizer, next(batches))
+        if not math.isfinite(loss):
+            break
+
+        # exponential moving average with bias correction
+        smoothed = 0.9 * smoothed + 0.1 * loss
+        learning_rates.append(lr)
+        losses.append(smoothed / (1 - 0.9 ** (step + 1)))
+
+        # stop once the loss diverges
+        if losses[-1] > 4 * min(losses) or time.perf_counter() > deadline:
+            break
+
+    del module, optimizer
+
+    # the test was too short to observe a minimum, or the loss did not decrease
+    if (
+        len(losses) < 10
+        or int(np.argmin(losses)) == len(losses) - 1
+        or min(losses) > MIN_LOSS_DECREASE * losses[0]
+    ):
+        return default_lr
+
+    return learning_rates[int(np.argmin(losses))] / 10
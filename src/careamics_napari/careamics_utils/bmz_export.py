@@ -0,0 +1,271 @@
+"""Export of the CAREamics models to the BioImage Model Zoo format.
+
+On top of the PyTorch state dictionary exported by CAREamics, the archives can
+include TorchScript and ONNX weights, which do not require CAREamics to be
+installed and allow the consumers to choose the fastest runtime.
+"""
+
+import copy
+import importlib.util
+import os
+import re
+import tempfile
+import warnings
+import zipfile
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+import torch
+from bioimageio.core import test_model
+from bioimageio.spec import load_model_description, save_bioimageio_package
+from bioimageio.spec.model.v0_5 import (
+    OnnxWeightsDescr,
+    TorchscriptWeightsDescr,
+    Version,
+)
+from careamics import CAREamist
+from careamics.dataset.dataset_utils import reshape_array
+
+ONNX_OPSET = 17
+"""ONNX opset version of the exported weights."""
+
+
+def is_onnx_available() -> bool:
+    """Whether the `onnx` package, required to export ONNX weights, is installed.
+
+    Returns
+    -------
+    bool
+        Whether ONNX weights can be exported.
+    """
+    return importlib.util.find_spec("onnx") is not None
+
+
+def crop_test_input(array: Any, axes: str, patch_size: list[int]) -> np.ndarray:
+    """Crop a small test input from an image.
+
+    The first sample and time point are kept, with all channels, and the spatial
+    dimensions are cropped to the patch size, which is compatible with the depth
+    of the UNet. Lazy arrays (e.g. dask or Zarr) are only read within the crop.
+
+    Parameters
+    ----------
+    array : Any
+        Image, with axes `axes`, as an array-like supporting slicing.
+    axes : str
+        Axes of the image, as in the CAREamics configuration.
+    patch_size : list of int
+        Patch size, ZYX or YX.
+
+    Returns
+    -------
+    numpy.ndarray
+        Crop with the same axes as the image.
+    """
+    spatial_axes = [axis for axis in axes if axis in "ZYX"]
+    crop_sizes = dict(zip(spatial_axes, patch_size))
+
+    slices = []
+    for axis in axes:
+        if axis in "ST":
+            slices.append(slice(0, 1))
+        elif axis in crop_sizes:
+            slices.append(slice(0, crop_sizes[axis]))
+        else:
+            slices.append(slice(None))
+
+    return np.ascontiguousarray(array[tuple(slices)])
+
+
+def export_bmz(
+    careamist: CAREamist,
+    path: Union[str, Path],
+    name: str,
+    input_array: np.ndarray,
+    authors: list[dict],
+    general_description: str,
+    data_description: str,
+    torchscript: bool = True,
+    onnx: bool = False,
+) -> Path:
+    """Export a model to the BioImage Model Zoo format and verify the archive.
+
+    The test output is predicted from `input_array`, which should be a small
+    crop (see `crop_test_input`). After writing the archive, it is reloaded and
+    the test of each weight format is run.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    path : str or pathlib.Path
+        Path to the archive, the ".zip" suffix is added if missing.
+    name : str
+        Name of the model, characters other than letters, numbers, dashes,
+        underscores and parentheses are replaced by underscores.
+    input_array : numpy.ndarray
+        Test input, with the axes of the configuration.
+    authors : list of dict
+        Authors of the model, e.g. `[{"name": "Jane Doe"}]`.
+    general_description : str
+        Description of the model.
+    data_description : str
+        Description of the training data.
+    torchscript : bool, default=True
+        Whether to include TorchScript weights.
+    onnx : bool, default=False
+        Whether to include ONNX weights.
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the archive.
+
+    Raises
+    ------
+    ImportError
+        If ONNX weights are requested but `onnx` is not installed.
+    ValueError
+        If the test of a weight format fails.
+    """
+    if onnx and not is_onnx_available():
+        raise ImportError("Exporting ONNX weights requires the `onnx` package.")
+
+    path = Path(path)
+    if path.suffix != ".zip":
+        path = path.with_name(path.name + ".zip")
+    name = re.sub(r"[^\w\-()]", "_", name)
+
+    # state dictionary, tested by CAREamics
+    careamist.export_to_bmz(
+        path_to_archive=path,
+        friendly_model_name=name,
+        input_array=input_array,
+        authors=authors,
+        general_description=general_description,
+        data_description=data_description,
+    )
+
+    if torchscript or onnx:
+        network = copy.deepcopy(careamist.model.model).cpu().eval()
+        example = reshape_array(input_array, careamist.cfg.data_config.axes)
+        _add_weights(
+            path,
+            network,
+            torch.from_numpy(example[:1].astype(np.float32)),
+            torchscript,
+            onnx,
+        )
+
+    verify_bmz(path)
+
+    return path
+
+
+def _add_weights(
+    path: Path,
+    network: torch.nn.Module,
+    example: torch.Tensor,
+    torchscript: bool,
+    onnx: bool,
+) -> None:
+    """Add TorchScript and ONNX weights to an archive.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the archive.
+    network : torch.nn.Module
+        Network, in evaluation mode.
+    example : torch.Tensor
+        Example input of the network, SC(Z)YX.
+    torchscript : bool
+        Whether to add TorchScript weights.
+    onnx : bool
+        Whether to add ONNX weights.
+    """
+    description = load_model_description(path)
+
+    with tempfile.TemporaryDirectory() as tmpdirname, torch.no_grad():
+        temp_path = Path(tmpdirname)
+
+        if torchscript:
+            traced = torch.jit.trace(network, example)
+            traced.save(str(temp_path / "weights_torchscript.pt"))
+            description.weights.torchscript = TorchscriptWeightsDescr(
+                source=temp_path / "weights_torchscript.pt",
+                pytorch_version=Version(torch.__version__),
+                parent="pytorch_state_dict",
+            )
+
+        if onnx:
+            # all dimensions but the channels can vary
+            dynamic_axes = {i: f"axis_{i}" for i in range(example.ndim) if i != 1}
+            torch.onnx.export(
+                network,
+                (example,),
+                str(temp_path / "weights.onnx"),
+                input_names=["input"],
+                output_names=["output"],
+                dynamic_axes={"input": dynamic_axes, "output": dynamic_axes},
+                opset_version=ONNX_OPSET,
+            )
+            description.weights.onnx = OnnxWeightsDescr(
+                source=temp_path / "weights.onnx",
+                opset_version=ONNX_OPSET,
+                parent="pytorch_state_dict",
+            )
+
+        # the sources of the description are read from the archive, which is
+        # replaced only once the new archive is written
+        save_bioimageio_package(description, output_path=temp_path / path.name)
+        os.replace(temp_path / path.name, path)
+
+
+def verify_bmz(path: Union[str, Path]) -> None:
+    """Reload an archive and run the test of each of its weight formats.
+
+    ONNX weights are only tested if `onnxruntime` is installed.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path to the archive.
+
+    Raises
+    ------
+    ValueError
+        If the test of a weight format fails.
+    """
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        # the TorchScript weights cannot be loaded from within the archive
+        with zipfile.ZipFile(path) as archive:
+            archive.extractall(tmpdirname)
+        description = load_model_description(Path(tmpdirname) / "rdf.yaml")
+
+        weights = description.weights
+        for weight_format in ("pytorch_state_dict", "torchscript", "onnx"):
+            if getattr(weights, weight_format) is None:
+                continue
+
+            if (
+                weight_format == "onnx"
+                and importlib.util.find_spec("onnxruntime") is None
+            ):
+                warnings.warn(
+                    "The ONNX weights cannot be tested, `onnxruntime` is not "
+                    "installed.",
+                    stacklevel=2,
+                )
+                continue
+
+            summary = test_model(description, weight_format=weight_format)
+            if summary.status == "failed":
+                errors = [
+                    error.msg for detail in summary.details for error in detail.errors
+                ]
+                raise ValueError(
+                    f"Test of the {weight_format} weights of {path} failed: "
+                    + "; ".join(errors)
+                )
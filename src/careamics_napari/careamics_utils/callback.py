@@ -1,9 +1,13 @@
 """PyTorch Lightning callback used to update GUI with progress."""
 
+import time
+from datetime import datetime
+from pathlib import Path
 from queue import Queue
-from typing import Any
+from typing import Any, Optional, Union
 
 import numpy as np
+import torch
 from pytorch_lightning import LightningModule, Trainer
 from pytorch_lightning.callbacks import Callback
 from typing_extensions import Self
@@ -14,6 +18,15 @@ from careamics_napari.signals import (
     TrainUpdate,
     TrainUpdateType,
 )
+from careamics_napari.utils import ContrastLimitsEstimator
+
+from .throughput import ThroughputMeter
+
+THROUGHPUT_INTERVAL = 1.0
+"""Minimum time, in seconds, between two throughput updates."""
+
+BATCH_LOSS_INTERVAL = 0.5
+"""Minimum time, in seconds, between two updates of the batch losses."""
 
 
 class UpdaterCallBack(Callback):
@@ -25,6 +38,9 @@ class UpdaterCallBack(Callback):
         Training queue used to pass updates between threads.
     prediction_queue : Queue
         Prediction queue used to pass updates between threads.
+    log_dir : str or pathlib.Path or None, default=None
+        Directory in which the throughput of each training run is saved, not saved
+        if None.
 
     Attributes
     ----------
@@ -32,9 +48,18 @@ class UpdaterCallBack(Callback):
         Training queue used to pass updates between threads.
     prediction_queue : Queue
         Prediction queue used to pass updates between threads.
+    contrast_limits : ContrastLimitsEstimator
+        Streaming estimator of the prediction contrast limits.
+    throughput : ThroughputMeter
+        Data loading and compute times of the training batches.
     """
 
-    def __init__(self: Self, training_queue: Queue, prediction_queue: Queue) -> None:
+    def __init__(
+        self: Self,
+        training_queue: Queue,
+        prediction_queue: Queue,
+        log_dir: Optional[Union[str, Path]] = None,
+    ) -> None:
         """Initialize the callback.
 
         Parameters
@@ -43,10 +68,22 @@ class UpdaterCallBack(Callback):
             Training queue used to pass updates between threads.
         prediction_queue : Queue
             Prediction queue used to pass updates between threads.
+        log_dir : str or pathlib.Path or None, default=None
+            Directory in which the throughput of each training run is saved, not
+            saved if None.
         """
         # TODO: the training queue should be optional in case of prediction only
         self.training_queue = training_queue
         self.prediction_queue = prediction_queue
+        self.log_dir = None if log_dir is None else Path(log_dir)
+        self.contrast_limits = ContrastLimitsEstimator()
+        self.throughput = ThroughputMeter()
+
+        self._last_throughput_update = 0.0
+
+        # position in epochs and detached loss of the batches not yet sent
+        self._batch_losses: list[tuple[float, torch.Tensor]] = []
+        self._last_loss_update = 0.0
 
     def get_train_queue(self) -> Queue:
         """Return the training queue.
@@ -78,6 +115,20 @@ class UpdaterCallBack(Callback):
         pl_module : LightningModule
             PyTorch Lightning module.
         """
+        self.throughput.reset()
+        self._batch_losses.clear()
+
+        self.training_queue.put(TrainUpdate(TrainUpdateType.SAVED_EPOCHS, 0))
+        self.training_queue.put(TrainUpdate(TrainUpdateType.STOP_REASON, ""))
+
+        # only sent by the time budget callback, registered after this one
+        self.training_queue.put(TrainUpdate(TrainUpdateType.REMAINING_BUDGET, -1))
+        self.training_queue.put(TrainUpdate(TrainUpdateType.PROJECTED_EPOCHS, -1))
+
+        # only sent by the foreground patch callback, registered after this one
+        self.training_queue.put(TrainUpdate(TrainUpdateType.PATCHES_KEPT, -1))
+        self.training_queue.put(TrainUpdate(TrainUpdateType.EPOCH_TIME_SAVED, -1))
+
         # compute the number of batches
         len_dataloader = len(trainer.train_dataloader)  # type: ignore
 
@@ -105,6 +156,8 @@ class UpdaterCallBack(Callback):
         pl_module : LightningModule
             PyTorch Lightning module.
         """
+        self.throughput.start_epoch(time.perf_counter())
+
         self.training_queue.put(
             TrainUpdate(TrainUpdateType.EPOCH, trainer.current_epoch)
         )
@@ -119,6 +172,10 @@ class UpdaterCallBack(Callback):
         pl_module : LightningModule
             PyTorch Lightning module.
         """
+        self.throughput.end_epoch(time.perf_counter())
+        self._put_throughput(trainer, remaining_batches=0, force=True)
+        self._put_batch_losses(force=True)
+
         metrics = trainer.progress_bar_metrics
 
         if "train_loss_epoch" in metrics:
@@ -147,8 +204,142 @@ class UpdaterCallBack(Callback):
         batch_idx : int
             Index of the batch.
         """
+        self.throughput.start_batch(time.perf_counter())
+
         self.training_queue.put(TrainUpdate(TrainUpdateType.BATCH, batch_idx))
 
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Method called at the end of each batch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        outputs : Any
+            Outputs of the training step.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        """
+        # the asynchronous GPU operations are only waited for before reporting the
+        # throughput, so that the reported time includes them without stalling the
+        # GPU pipeline at every batch
+        now = time.perf_counter()
+        if (
+            pl_module.device.type == "cuda"
+            and now - self._last_throughput_update >= THROUGHPUT_INTERVAL
+        ):
+            torch.cuda.synchronize(pl_module.device)
+            now = time.perf_counter()
+
+        self.throughput.end_batch(
+            now, trainer.current_epoch, batch_idx, _batch_size(batch)
+        )
+        n_batches = len(trainer.train_dataloader)  # type: ignore
+        self._put_throughput(trainer, remaining_batches=n_batches - batch_idx - 1)
+
+        loss = outputs.get("loss") if isinstance(outputs, dict) else outputs
+        if isinstance(loss, torch.Tensor):
+            # the losses are only transferred to the CPU when sent, to avoid
+            # synchronizing at every batch
+            self._batch_losses.append(
+                (trainer.current_epoch + (batch_idx + 1) / n_batches, loss.detach())
+            )
+            self._put_batch_losses()
+
+    def on_train_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if self.log_dir is not None and len(self.throughput.records) > 0:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.throughput.save(self.log_dir / f"throughput_{timestamp}")
+
+        # report why the training stopped before its last epoch
+        saved_epochs = max(0, (trainer.max_epochs or 0) - trainer.current_epoch)
+        if saved_epochs > 0:
+            self.training_queue.put(
+                TrainUpdate(TrainUpdateType.SAVED_EPOCHS, saved_epochs)
+            )
+            self.training_queue.put(
+                TrainUpdate(TrainUpdateType.STOP_REASON, _stop_reason(trainer))
+            )
+
+    def _put_throughput(
+        self, trainer: Trainer, remaining_batches: int, force: bool = False
+    ) -> None:
+        """Send the throughput statistics, at most every `THROUGHPUT_INTERVAL`.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        remaining_batches : int
+            Number of batches remaining in the current epoch.
+        force : bool, default=False
+            Whether to send the statistics regardless of the time since the last
+            update.
+        """
+        now = time.perf_counter()
+        if not force and now - self._last_throughput_update < THROUGHPUT_INTERVAL:
+            return
+        self._last_throughput_update = now
+
+        remaining_epochs = max(0, (trainer.max_epochs or 0) - trainer.current_epoch - 1)
+
+        for update_type, value in (
+            (TrainUpdateType.PATCHES_PER_SECOND, self.throughput.patches_per_second),
+            (
+                TrainUpdateType.ETA,
+                self.throughput.eta(remaining_batches, remaining_epochs),
+            ),
+            (TrainUpdateType.DATA_SHARE, self.throughput.data_share),
+        ):
+            self.training_queue.put(TrainUpdate(update_type, value))
+
+    def _put_batch_losses(self, force: bool = False) -> None:
+        """Send the batch losses, at most every `BATCH_LOSS_INTERVAL`.
+
+        Parameters
+        ----------
+        force : bool, default=False
+            Whether to send the losses regardless of the time since the last
+            update.
+        """
+        now = time.perf_counter()
+        if len(self._batch_losses) == 0 or (
+            not force and now - self._last_loss_update < BATCH_LOSS_INTERVAL
+        ):
+            return
+        self._last_loss_update = now
+
+        positions, losses = zip(*self._batch_losses)
+        self._batch_losses.clear()
+
+        values = torch.stack(losses).float().cpu().numpy()
+        self.training_queue.put(
+            TrainUpdate(
+                TrainUpdateType.BATCH_LOSS,
+                np.stack([np.asarray(positions, dtype=np.float64), values]),
+            )
+        )
+
     def on_predict_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
         """Method called at the beginning of the prediction.
 
@@ -167,6 +358,8 @@ class UpdaterCallBack(Callback):
         else:
             n_batches = int(n_batches)
 
+        self.contrast_limits.reset()
+
         self.prediction_queue.put(
             PredictionUpdate(
                 PredictionUpdateType.MAX_SAMPLES,
@@ -200,3 +393,96 @@ class UpdaterCallBack(Callback):
         self.prediction_queue.put(
             PredictionUpdate(PredictionUpdateType.SAMPLE_IDX, batch_idx)
         )
+
+    def on_predict_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+        dataloader_idx: int = 0,
+    ) -> None:
+        """Method called at the end of each prediction batch.
+
+        The denormalized outputs are used to update the contrast limits estimate.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        outputs : Any
+            Batch predictions, with tiling information if the prediction is tiled.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        dataloader_idx : int, default=0
+            Index of the dataloader.
+        """
+        # tiled predictions are returned along with the tiling information
+        if isinstance(outputs, (tuple, list)):
+            outputs = outputs[0]
+
+        if isinstance(outputs, np.ndarray):
+            self.contrast_limits.update(outputs)
+
+    def on_predict_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of the prediction.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self.prediction_queue.put(
+            PredictionUpdate(
+                PredictionUpdateType.CONTRAST_LIMITS,
+                self.contrast_limits.get_contrast_limits(),
+            )
+        )
+
+
+def _stop_reason(trainer: Trainer) -> str:
+    """Describe why the training stopped before its last epoch.
+
+    Parameters
+    ----------
+    trainer : Trainer
+        PyTorch Lightning trainer.
+
+    Returns
+    -------
+    str
+        Reason of the stop.
+    """
+    # callbacks stopping the training expose the reason as `stop_reason`
+    for callback in trainer.callbacks:  # type: ignore
+        reason = getattr(callback, "stop_reason", "")
+        if isinstance(reason, str) and reason != "":
+            return reason
+
+    return "Stopped by the user"
+
+
+def _batch_size(batch: Any) -> int:
+    """Number of patches in a batch.
+
+    Parameters
+    ----------
+    batch : Any
+        Batch, a tensor or a sequence starting with the input tensor.
+
+    Returns
+    -------
+    int
+        Number of patches, 0 if it cannot be determined.
+    """
+    if isinstance(batch, (tuple, list)) and len(batch) > 0:
+        batch = batch[0]
+
+    return len(batch) if hasattr(batch, "__len__") else 0
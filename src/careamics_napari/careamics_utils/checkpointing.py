@@ -0,0 +1,234 @@
+"""Background writing and retention of the training checkpoints."""
+
+import hashlib
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import torch
+from careamics import CAREamist
+from lightning_utilities.core.apply_func import apply_to_collection
+from pytorch_lightning import Trainer
+from pytorch_lightning.callbacks import ModelCheckpoint
+from pytorch_lightning.plugins.io import TorchCheckpointIO
+from typing_extensions import Self
+
+LAST_K_FILENAME = "epoch_{epoch:04d}"
+"""File name of the checkpoints kept for the last epochs."""
+
+
+class BackgroundCheckpointIO(TorchCheckpointIO):
+    """Checkpoint IO writing the checkpoints in a background thread.
+
+    The tensors of the checkpoint are copied to the CPU before returning, so that
+    the training can continue updating the weights while the checkpoint is
+    serialized. Checkpoints are written to a temporary file, then renamed, so
+    that a checkpoint file is never partially written. Writes and removals are
+    applied in order by a single thread, and loading a checkpoint waits for the
+    pending writes.
+    """
+
+    def __init__(self: Self) -> None:
+        """Initialize the checkpoint IO."""
+        super().__init__()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: list[Future] = []
+
+    def save_checkpoint(
+        self,
+        checkpoint: dict[str, Any],
+        path: Union[str, Path],
+        storage_options: Optional[Any] = None,
+    ) -> None:
+        """Copy the checkpoint to the CPU and write it in the background.
+
+        Parameters
+        ----------
+        checkpoint : dict of {str: Any}
+            Model and trainer state.
+        path : str or pathlib.Path
+            Path to the checkpoint file.
+        storage_options : Any or None, default=None
+            Not supported.
+        """
+        if storage_options is not None:
+            raise TypeError(
+                f"`storage_options` is not supported by {self.__class__.__name__}."
+            )
+
+        snapshot = apply_to_collection(
+            checkpoint, torch.Tensor, lambda t: t.detach().to("cpu", copy=True)
+        )
+        self._submit(_write_checkpoint, snapshot, Path(path))
+
+    def load_checkpoint(
+        self,
+        path: Union[str, Path],
+        map_location: Optional[Callable] = lambda storage, loc: storage,
+    ) -> dict[str, Any]:
+        """Load a checkpoint, once the pending writes are done.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the checkpoint file.
+        map_location : Callable or None
+            Remapping of the storage locations, see `torch.load`.
+
+        Returns
+        -------
+        dict of {str: Any}
+            Loaded checkpoint.
+        """
+        self.wait()
+        return super().load_checkpoint(path, map_location=map_location)
+
+    def remove_checkpoint(self, path: Union[str, Path]) -> None:
+        """Remove a checkpoint, after the pending writes.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path to the checkpoint file.
+        """
+        self._submit(super().remove_checkpoint, path)
+
+    def wait(self: Self) -> None:
+        """Wait for the pending writes and removals, raising their errors."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def teardown(self) -> None:
+        """Wait for the pending writes and stop the writing thread."""
+        try:
+            self.wait()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _submit(self: Self, function: Callable, *args: Any) -> None:
+        """Run a function in the writing thread.
+
+        Parameters
+        ----------
+        function : Callable
+            Function.
+        *args : Any
+            Arguments of the function.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="checkpoint_writer"
+            )
+
+        # raise the errors of the finished writes
+        for future in [future for future in self._pending if future.done()]:
+            self._pending.remove(future)
+            future.result()
+
+        self._pending.append(self._executor.submit(function, *args))
+
+
+def _write_checkpoint(checkpoint: dict[str, Any], path: Path) -> None:
+    """Write a checkpoint to a temporary file, then rename it.
+
+    Parameters
+    ----------
+    checkpoint : dict of {str: Any}
+        Checkpoint.
+    path : pathlib.Path
+        Path to the checkpoint file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    torch.save(checkpoint, temporary)
+    os.replace(temporary, path)
+
+
+def configure_checkpointing(
+    careamist: CAREamist, top_k: int = 3, last_k: int = 0
+) -> None:
+    """Write the checkpoints in the background and set their retention.
+
+    The `top_k` checkpoints with the lowest validation loss are kept by the
+    CAREamics checkpoint callback, as well as `last.ckpt`. If `last_k` is
+    positive, the checkpoints of the last `last_k` epochs are also kept.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    top_k : int, default=3
+        Number of checkpoints with the lowest validation loss kept.
+    last_k : int, default=0
+        Number of checkpoints of the last epochs kept.
+    """
+    trainer = careamist.trainer
+    if not isinstance(trainer.strategy.checkpoint_io, BackgroundCheckpointIO):
+        trainer.strategy.checkpoint_io = BackgroundCheckpointIO()
+
+    checkpoint_callback = trainer.checkpoint_callback
+    if isinstance(checkpoint_callback, ModelCheckpoint):
+        checkpoint_callback.save_top_k = top_k
+
+        # name the top-k checkpoints after their epoch, since their file names
+        # can not be deduplicated against the ones still being written
+        name = careamist.cfg.experiment_name
+        checkpoint_callback.filename = f"{name}_{{epoch:04d}}"
+
+    last_callbacks = [
+        callback
+        for callback in trainer.callbacks  # type: ignore
+        if isinstance(callback, ModelCheckpoint) and callback.monitor == "epoch"
+    ]
+    if len(last_callbacks) > 0:
+        last_callbacks[0].save_top_k = last_k
+    elif last_k > 0:
+        trainer.callbacks.append(  # type: ignore
+            ModelCheckpoint(
+                dirpath=careamist.work_dir / "checkpoints",
+                filename=LAST_K_FILENAME,
+                monitor="epoch",
+                mode="max",
+                save_top_k=last_k,
+                auto_insert_metric_name=False,
+            )
+        )
+
+
+def wait_for_checkpoints(trainer: Trainer) -> None:
+    """Wait for the checkpoints being written in the background.
+
+    Parameters
+    ----------
+    trainer : Trainer
+        PyTorch Lightning trainer.
+    """
+    checkpoint_io = trainer.strategy.checkpoint_io
+    if isinstance(checkpoint_io, BackgroundCheckpointIO):
+        checkpoint_io.wait()
+
+
+def weights_hash(model: torch.nn.Module) -> str:
+    """Compute a hash of the weights of a model.
+
+    Parameters
+    ----------
+    model : torch.nn.Module
+        Model.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest.
+    """
+    digest = hashlib.blake2b()
+    for name, tensor in sorted(model.state_dict().items()):
+        array = tensor.detach().cpu().contiguous()
+        digest.update(f"{name}{tuple(array.shape)}{array.dtype}".encode())
+        digest.update(array.reshape(-1).view(torch.uint8).numpy().tobytes())
+
+    return digest.hexdigest()
@@ -0,0 +1,895 @@
+"""Training on chunked arrays (Zarr, OME-Zarr and dask) without loading them.
+
+Patches are sampled at random positions and read from the chunks overlapping
+them, which are kept in a least recently used cache. Consecutive patches are
+drawn around the same chunk, so that most reads hit the cache.
+"""
+
+import math
+from collections import OrderedDict
+from itertools import product
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import dask.array as da
+import numpy as np
+import pytorch_lightning as pl
+import zarr
+from careamics.config import DataConfig
+from careamics.config.transformations import NormalizeModel
+from careamics.transforms import Compose
+from torch.utils.data import DataLoader, IterableDataset, get_worker_info
+from typing_extensions import Self
+
+from .streaming_statistics import StreamingStatistics
+
+CACHE_BYTES = 512 * 2**20
+"""Default maximum size of the chunk cache of each dataset, in bytes."""
+
+MAX_PATCHES_PER_EPOCH = 10_000
+"""Maximum number of training patches per epoch."""
+
+MAX_VAL_PATCHES = 1_000
+"""Maximum number of validation patches."""
+
+PATCHES_PER_CHUNK = 8
+"""Number of consecutive patches drawn around the same chunk."""
+
+STATISTICS_CHUNKS = 64
+"""Number of random chunks from which the normalization statistics are estimated."""
+
+VAL_SEED = 42
+"""Seed of the validation patches, identical at each epoch."""
+
+
+def is_zarr_path(source: Any) -> bool:
+    """Whether a source is the path to a Zarr store.
+
+    Parameters
+    ----------
+    source : Any
+        Data source.
+
+    Returns
+    -------
+    bool
+        Whether the source is a Zarr path.
+    """
+    if not isinstance(source, (str, Path)):
+        return False
+
+    path = Path(source)
+    return path.suffix == ".zarr" or any(
+        (path / name).exists() for name in (".zarray", ".zgroup")
+    )
+
+
+def is_chunked(source: Any) -> bool:
+    """Whether a source is a chunked array, read lazily during training.
+
+    Parameters
+    ----------
+    source : Any
+        Data source.
+
+    Returns
+    -------
+    bool
+        Whether the source is a Zarr path, a Zarr array or a dask array.
+    """
+    return is_zarr_path(source) or isinstance(source, (zarr.Array, da.Array))
+
+
+def open_chunked(source: Union[str, Path, zarr.Array, da.Array]) -> Any:
+    """Open a chunked array.
+
+    Zarr groups are opened at the full resolution level of their OME-Zarr
+    multiscales, or at their first array.
+
+    Parameters
+    ----------
+    source : str or pathlib.Path or zarr.Array or dask.array.Array
+        Zarr path, Zarr array or dask array.
+
+    Returns
+    -------
+    zarr.Array or dask.array.Array
+        Array.
+
+    Raises
+    ------
+    ValueError
+        If the Zarr group contains no array.
+    """
+    if not is_zarr_path(source):
+        return source
+
+    store = zarr.open(str(source), mode="r")
+    if isinstance(store, zarr.Array):
+        return store
+
+    multiscales = store.attrs.get("multiscales", [])
+    if len(multiscales) > 0:
+        return store[multiscales[0]["datasets"][0]["path"]]
+
+    arrays = list(store.array_keys())
+    if len(arrays) == 0:
+        raise ValueError(f"No array found in the Zarr group {source}.")
+
+    return store[arrays[0]]
+
+
+def chunked_fingerprint(source: Any) -> str:
+    """Identify a chunked array without reading its content.
+
+    Parameters
+    ----------
+    source : Any
+        Zarr path, Zarr array or dask array.
+
+    Returns
+    -------
+    str
+        Identifier of the array.
+    """
+    if isinstance(source, da.Array):
+        # dask names are tokens of the computation graph
+        return source.name
+
+    array = open_chunked(source)
+    store = getattr(array.store, "path", repr(array.store))
+    return f"{store}/{array.path}:{array.shape}:{array.chunks}:{array.dtype.str}"
+
+
+def _chunk_edges(array: Any) -> list[np.ndarray]:
+    """Compute the chunk boundaries along each axis.
+
+    Parameters
+    ----------
+    array : Any
+        Zarr array, dask array or numpy array (a single chunk).
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Chunk boundaries, starting at 0 and ending at the size of each axis.
+    """
+    chunks = getattr(array, "chunks", None)
+    if chunks is None:
+        chunks = array.shape
+
+    edges = []
+    for size, chunk in zip(array.shape, chunks):
+        if isinstance(chunk, tuple):
+            # dask, chunk sizes
+            edges.append(np.concatenate([[0], np.cumsum(chunk)]))
+        else:
+            # zarr, regular chunks
+            edges.append(np.append(np.arange(0, size, max(chunk, 1)), size))
+
+    return edges
+
+
+def _channels_first(block: np.ndarray, axes: str) -> np.ndarray:
+    """Flatten a block to its pixels per channel.
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        Block, with axes `axes`.
+    axes : str
+        Axes of the block.
+
+    Returns
+    -------
+    numpy.ndarray
+        Pixels, with shape (C, N).
+    """
+    if "C" in axes:
+        block = np.moveaxis(block, axes.index("C"), 0)
+    else:
+        block = block[np.newaxis]
+
+    return block.reshape(block.shape[0], -1)
+
+
+def _reorder(block: np.ndarray, axes: str) -> np.ndarray:
+    """Reorder a patch to C(Z)YX, dropping the S and T axes.
+
+    Parameters
+    ----------
+    block : numpy.ndarray
+        Patch, with axes `axes` and a single sample along S and T.
+    axes : str
+        Axes of the patch.
+
+    Returns
+    -------
+    numpy.ndarray
+        Patch, C(Z)YX.
+    """
+    order = [axes.index(axis) for axis in "STCZYX" if axis in axes]
+    block = block.transpose(order)
+
+    n_samples = sum(axis in "ST" for axis in axes)
+    block = block.reshape(block.shape[n_samples:])
+    if "C" not in axes:
+        block = block[np.newaxis]
+
+    return block.astype(np.float32)
+
+
+def _patch_transform(data_config: DataConfig) -> Compose:
+    """Create the normalization and augmentations of the patches.
+
+    Parameters
+    ----------
+    data_config : DataConfig
+        CAREamics data configuration, with normalization statistics.
+
+    Returns
+    -------
+    Compose
+        Patch transform, as in the CAREamics datasets.
+    """
+    return Compose(
+        transform_list=[
+            NormalizeModel(
+                image_means=data_config.image_means,
+                image_stds=data_config.image_stds,
+                target_means=data_config.target_means,
+                target_stds=data_config.target_stds,
+            )
+        ]
+        + list(data_config.transforms),
+    )
+
+
+class ChunkCache:
+    """Least recently used cache of the chunks of an array.
+
+    Parameters
+    ----------
+    array : Any
+        Zarr array, dask array or numpy array.
+    max_bytes : int, default=CACHE_BYTES
+        Maximum size of the cached chunks, in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        Number of chunk reads served by the cache.
+    misses : int
+        Number of chunk reads from the array.
+    """
+
+    def __init__(self: Self, array: Any, max_bytes: int = CACHE_BYTES) -> None:
+        """Initialize the cache.
+
+        Parameters
+        ----------
+        array : Any
+            Zarr array, dask array or numpy array.
+        max_bytes : int, default=CACHE_BYTES
+            Maximum size of the cached chunks, in bytes.
+        """
+        self.array = array
+        self.max_bytes = max_bytes
+        self.edges = _chunk_edges(array)
+
+        self.hits = 0
+        self.misses = 0
+        self._chunks: OrderedDict[tuple[int, ...], np.ndarray] = OrderedDict()
+        self._bytes = 0
+
+    def chunk_range(self: Self, axis: int, start: int, stop: int) -> range:
+        """Indices of the chunks overlapping an interval along an axis.
+
+        Parameters
+        ----------
+        axis : int
+            Axis.
+        start : int
+            Start of the interval.
+        stop : int
+            End of the interval, excluded.
+
+        Returns
+        -------
+        range
+            Chunk indices.
+        """
+        edges = self.edges[axis]
+        first = int(np.searchsorted(edges, start, side="right")) - 1
+        last = int(np.searchsorted(edges, stop, side="left"))
+        return range(first, last)
+
+    def read(self: Self, region: tuple[slice, ...]) -> np.ndarray:
+        """Read a region of the array, from the chunks overlapping it.
+
+        Parameters
+        ----------
+        region : tuple of slice
+            Region, with explicit starts and stops along every axis.
+
+        Returns
+        -------
+        numpy.ndarray
+            Content of the region.
+        """
+        out = np.empty([s.stop - s.start for s in region], dtype=self.array.dtype)
+
+        ranges = [
+            self.chunk_range(axis, s.start, s.stop) for axis, s in enumerate(region)
+        ]
+        for index in product(*ranges):
+            chunk = self._chunk(index)
+
+            source, destination = [], []
+            for edges, i, s in zip(self.edges, index, region):
+                low, high = max(s.start, edges[i]), min(s.stop, edges[i + 1])
+                source.append(slice(low - edges[i], high - edges[i]))
+                destination.append(slice(low - s.start, high - s.start))
+
+            out[tuple(destination)] = chunk[tuple(source)]
+
+        return out
+
+    def _chunk(self: Self, index: tuple[int, ...]) -> np.ndarray:
+        """Get a chunk, from the cache or from the array.
+
+        Parameters
+        ----------
+        index : tuple of int
+            Chunk index along each axis.
+
+        Returns
+        -------
+        numpy.ndarray
+            Chunk.
+        """
+        chunk = self._chunks.get(index)
+        if chunk is not None:
+            self.hits += 1
+            self._chunks.move_to_end(index)
+            return chunk
+
+        self.misses += 1
+        chunk = np.asarray(
+            self.array[
+                tuple(
+                    slice(edges[i], edges[i + 1]) for edges, i in zip(self.edges, index)
+                )
+            ]
+        )
+
+        # chunks larger than the cache are not cached
+        if chunk.nbytes <= self.max_bytes:
+            self._chunks[index] = chunk
+            self._bytes += chunk.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._chunks.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+        return chunk
+
+
+class ChunkedPatchDataset(IterableDataset):
+    """Dataset of random patches read from the chunks of a lazy array.
+
+    Positions are drawn at random within `bounds`: a random chunk is chosen,
+    and `PATCHES_PER_CHUNK` patches starting within it are read through a chunk
+    cache before choosing another one. S and T axes are sampled, and all
+    channels are kept. Patches are normalized and transformed as in the
+    CAREamics datasets.
+
+    If the normalization statistics are not set in the configuration, they are
+    estimated from `STATISTICS_CHUNKS` random chunks, and set in it.
+
+    Parameters
+    ----------
+    data_config : DataConfig
+        CAREamics data configuration.
+    array : Any
+        Zarr path, Zarr array or dask array, with the axes of the configuration.
+    target : Any or None, default=None
+        Target, with the same shape as `array`.
+    bounds : dict of {str: tuple of (int, int)} or None, default=None
+        Interval of the axes in which the patches are sampled, by default the
+        whole array.
+    n_patches : int or None, default=None
+        Number of patches per epoch, by default the number of non-overlapping
+        patches in the bounds, up to `MAX_PATCHES_PER_EPOCH`.
+    seed : int or None, default=None
+        Seed of the patch positions, which are then identical at each epoch.
+    cache_bytes : int, default=CACHE_BYTES
+        Maximum size of the chunk cache, in bytes.
+    """
+
+    def __init__(
+        self: Self,
+        data_config: DataConfig,
+        array: Any,
+        target: Optional[Any] = None,
+        bounds: Optional[dict[str, tuple[int, int]]] = None,
+        n_patches: Optional[int] = None,
+        seed: Optional[int] = None,
+        cache_bytes: int = CACHE_BYTES,
+    ) -> None:
+        """Initialize the dataset.
+
+        Parameters
+        ----------
+        data_config : DataConfig
+            CAREamics data configuration.
+        array : Any
+            Zarr path, Zarr array or dask array, with the axes of the
+            configuration.
+        target : Any or None, default=None
+            Target, with the same shape as `array`.
+        bounds : dict of {str: tuple of (int, int)} or None, default=None
+            Interval of the axes in which the patches are sampled, by default
+            the whole array.
+        n_patches : int or None, default=None
+            Number of patches per epoch, by default the number of
+            non-overlapping patches in the bounds, up to `MAX_PATCHES_PER_EPOCH`.
+        seed : int or None, default=None
+            Seed of the patch positions, which are then identical at each epoch.
+        cache_bytes : int, default=CACHE_BYTES
+            Maximum size of the chunk cache, in bytes.
+
+        Raises
+        ------
+        ValueError
+            If the array does not match the axes, the target does not match the
+            array, or the bounds are smaller than the patch size.
+        """
+        self.data_config = data_config
+        self.axes = data_config.axes
+        self.array = open_chunked(array)
+        self.target = open_chunked(target) if target is not None else None
+        self.seed = seed
+
+        if self.array.ndim != len(self.axes):
+            raise ValueError(
+                f"Array of shape {self.array.shape} does not match the axes "
+                f"{self.axes}."
+            )
+        if self.target is not None and self.target.shape != self.array.shape:
+            raise ValueError(
+                f"Target of shape {self.target.shape} does not match the array of "
+                f"shape {self.array.shape}."
+            )
+
+        spatial_axes = [axis for axis in "ZYX" if axis in self.axes]
+        self.patch_size = dict(zip(spatial_axes, data_config.patch_size))
+
+        self.bounds = {
+            axis: (0, size) for axis, size in zip(self.axes, self.array.shape)
+        }
+        self.bounds.update(bounds or {})
+        for axis, size in self.patch_size.items():
+            start, stop = self.bounds[axis]
+            if stop - start < size:
+                raise ValueError(
+                    f"Axis {axis} spans {stop - start} pixels, less than the patch "
+                    f"size {size}."
+                )
+
+        grid = math.prod(
+            (stop - start) // self.patch_size.get(axis, 1)
+            for axis, (start, stop) in self.bounds.items()
+            if axis != "C"
+        )
+        self.n_patches = (
+            n_patches if n_patches is not None else min(grid, MAX_PATCHES_PER_EPOCH)
+        )
+
+        self.cache = ChunkCache(self.array, cache_bytes)
+        self.target_cache = (
+            ChunkCache(self.target, cache_bytes) if self.target is not None else None
+        )
+
+        # normalization
+        if data_config.image_means is None:
+            image_stats = self._estimate_statistics(self.array)
+            target_stats = (
+                self._estimate_statistics(self.target)
+                if self.target is not None
+                else None
+            )
+            data_config.set_means_and_stds(
+                image_means=image_stats.means,
+                image_stds=image_stats.stds,
+                target_means=target_stats.means if target_stats else None,
+                target_stds=target_stats.stds if target_stats else None,
+            )
+
+        self.patch_transform = _patch_transform(data_config)
+
+    def __len__(self: Self) -> int:
+        """Number of patches per epoch.
+
+        Returns
+        -------
+        int
+            Number of patches.
+        """
+        return self.n_patches
+
+    def __iter__(self: Self) -> Any:
+        """Iterate over random patches, split between the dataloader workers.
+
+        Yields
+        ------
+        tuple of numpy.ndarray
+            Transformed patch, and target if any.
+        """
+        info = get_worker_info()
+        n_workers, worker_id = (1, 0) if info is None else (info.num_workers, info.id)
+        count = len(range(worker_id, self.n_patches, n_workers))
+
+        rng = np.random.default_rng(
+            None if self.seed is None else (self.seed, worker_id)
+        )
+
+        produced = 0
+        while produced < count:
+            chunk = self._random_chunk(rng)
+            for _ in range(min(PATCHES_PER_CHUNK, count - produced)):
+                region = self._random_region(rng, chunk)
+                yield self._patch(region)
+                produced += 1
+
+    def get_data_statistics(self: Self) -> tuple[list[float], list[float]]:
+        """Return the normalization statistics of the data.
+
+        Returns
+        -------
+        tuple of (list of float, list of float)
+            Per-channel means and standard deviations.
+
+        Raises
+        ------
+        ValueError
+            If the statistics are not set in the data configuration.
+        """
+        means, stds = self.data_config.image_means, self.data_config.image_stds
+        if means is None or stds is None:
+            raise ValueError("The normalization statistics have not been computed.")
+
+        return means, stds
+
+    def _random_chunk(
+        self: Self, rng: np.random.Generator
+    ) -> dict[str, tuple[int, int]]:
+        """Choose a random chunk overlapping the bounds.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Random generator.
+
+        Returns
+        -------
+        dict of {str: tuple of (int, int)}
+            Interval of the chunk within the bounds, along each axis but C.
+        """
+        chunk = {}
+        for i, axis in enumerate(self.axes):
+            if axis == "C":
+                continue
+
+            start, stop = self.bounds[axis]
+            edges = self.cache.edges[i]
+            index = rng.choice(self.cache.chunk_range(i, start, stop))
+            chunk[axis] = (max(start, int(edges[index])), min(stop, edges[index + 1]))
+
+        return chunk
+
+    def _random_region(
+        self: Self, rng: np.random.Generator, chunk: dict[str, tuple[int, int]]
+    ) -> tuple[slice, ...]:
+        """Choose a random patch starting within a chunk.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Random generator.
+        chunk : dict of {str: tuple of (int, int)}
+            Interval of the chunk along each axis but C.
+
+        Returns
+        -------
+        tuple of slice
+            Region of the patch.
+        """
+        region = []
+        for axis, size in zip(self.axes, self.array.shape):
+            if axis == "C":
+                region.append(slice(0, size))
+                continue
+
+            low, high = chunk[axis]
+            width = self.patch_size.get(axis, 1)
+
+            # the patch must end within the bounds
+            last = self.bounds[axis][1] - width
+            position = int(rng.integers(min(low, last), min(high - 1, last) + 1))
+            region.append(slice(position, position + width))
+
+        return tuple(region)
+
+    def _patch(self: Self, region: tuple[slice, ...]) -> Any:
+        """Read and transform a patch.
+
+        Parameters
+        ----------
+        region : tuple of slice
+            Region of the patch.
+
+        Returns
+        -------
+        Any
+            Transformed patch, and target if any.
+        """
+        patch = _reorder(self.cache.read(region), self.axes)
+        if self.target_cache is not None:
+            target = _reorder(self.target_cache.read(region), self.axes)
+            return self.patch_transform(patch=patch, target=target)
+
+        return self.patch_transform(patch=patch)
+
+    def _estimate_statistics(self: Self, array: Any) -> StreamingStatistics:
+        """Estimate the per-channel statistics from random chunks.
+
+        Parameters
+        ----------
+        array : Any
+            Zarr array or dask array.
+
+        Returns
+        -------
+        StreamingStatistics
+            Statistics.
+        """
+        edges = _chunk_edges(array)
+        counts = [len(e) - 1 for e in edges]
+
+        rng = np.random.default_rng(0)
+        if math.prod(counts) <= STATISTICS_CHUNKS:
+            indices: Any = product(*(range(count) for count in counts))
+        else:
+            indices = (
+                tuple(int(rng.integers(count)) for count in counts)
+                for _ in range(STATISTICS_CHUNKS)
+            )
+
+        statistics: Optional[StreamingStatistics] = None
+        for index in indices:
+            chunk = np.asarray(
+                array[tuple(slice(e[i], e[i + 1]) for e, i in zip(edges, index))]
+            )
+            pixels = _channels_first(chunk, self.axes)
+            if statistics is None:
+                statistics = StreamingStatistics(pixels.shape[0])
+            statistics.update(pixels)
+
+        assert statistics is not None
+        return statistics
+
+
+def split_bounds(
+    shape: tuple[int, ...], axes: str, patch_size: list[int], val_percentage: float
+) -> tuple[dict[str, tuple[int, int]], dict[str, tuple[int, int]]]:
+    """Split an array into training and validation regions.
+
+    The last samples (S or T axis) are used for validation, or, with a single
+    sample, the end of the largest spatial axis.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the array.
+    axes : str
+        Axes of the array.
+    patch_size : list of int
+        Patch size, ZYX or YX.
+    val_percentage : float
+        Fraction of the array used for validation.
+
+    Returns
+    -------
+    tuple of (dict, dict)
+        Bounds of the training and validation regions.
+
+    Raises
+    ------
+    ValueError
+        If the array is too small to be split.
+    """
+    sizes = dict(zip(axes, shape))
+    spatial_axes = [axis for axis in "ZYX" if axis in axes]
+    patch = dict(zip(spatial_axes, patch_size))
+
+    for axis in "ST":
+        if sizes.get(axis, 0) >= 2:
+            n_val = min(max(1, round(sizes[axis] * val_percentage)), sizes[axis] - 1)
+            break
+    else:
+        candidates = [a for a in spatial_axes if sizes[a] >= 2 * patch[a]]
+        if len(candidates) == 0:
+            raise ValueError(
+                f"Array of shape {shape} is too small to extract validation "
+                f"patches, provide validation data."
+            )
+        axis = max(candidates, key=lambda a: sizes[a])
+        n_val = max(patch[axis], round(sizes[axis] * val_percentage))
+        n_val = min(n_val, sizes[axis] - patch[axis])
+
+    split = sizes[axis] - n_val
+    return {axis: (0, split)}, {axis: (split, sizes[axis])}
+
+
+class ChunkedDataModule(pl.LightningDataModule):
+    """Training data module sampling patches from chunked arrays.
+
+    Drop-in replacement of the CAREamics `TrainDataModule` for Zarr stores,
+    OME-Zarr images and dask arrays, which are never loaded in memory. Without
+    validation data, a region at the end of the training data is held out for
+    validation (see `split_bounds`).
+
+    Parameters
+    ----------
+    data_config : DataConfig
+        CAREamics data configuration.
+    train_data : Any
+        Zarr path, Zarr array or dask array.
+    val_data : Any or None, default=None
+        Validation data, split from the training data if None.
+    train_data_target : Any or None, default=None
+        Training target.
+    val_data_target : Any or None, default=None
+        Validation target.
+    val_percentage : float, default=0.1
+        Fraction of the training data used for validation.
+    val_minimum_split : int, default=5
+        Minimum number of validation patches.
+    cache_bytes : int, default=CACHE_BYTES
+        Maximum size of the chunk cache of each dataset, in bytes.
+    """
+
+    # created by `setup`, subclasses can use other datasets with the same methods
+    train_dataset: Any
+    val_dataset: Any
+
+    def __init__(
+        self: Self,
+        data_config: DataConfig,
+        train_data: Any,
+        val_data: Optional[Any] = None,
+        train_data_target: Optional[Any] = None,
+        val_data_target: Optional[Any] = None,
+        val_percentage: float = 0.1,
+        val_minimum_split: int = 5,
+        cache_bytes: int = CACHE_BYTES,
+    ) -> None:
+        """Initialize the data module.
+
+        Parameters
+        ----------
+        data_config : DataConfig
+            CAREamics data configuration.
+        train_data : Any
+            Zarr path, Zarr array or dask array.
+        val_data : Any or None, default=None
+            Validation data, split from the training data if None.
+        train_data_target : Any or None, default=None
+            Training target.
+        val_data_target : Any or None, default=None
+            Validation target.
+        val_percentage : float, default=0.1
+            Fraction of the training data used for validation.
+        val_minimum_split : int, default=5
+            Minimum number of validation patches.
+        cache_bytes : int, default=CACHE_BYTES
+            Maximum size of the chunk cache of each dataset, in bytes.
+        """
+        super().__init__()
+        self.data_config = data_config
+        self.batch_size = data_config.batch_size
+        self.train_data = train_data
+        self.val_data = val_data
+        self.train_data_target = train_data_target
+        self.val_data_target = val_data_target
+        self.val_percentage = val_percentage
+        self.val_minimum_split = val_minimum_split
+        self.cache_bytes = cache_bytes
+
+    def setup(self: Self, *args: Any, **kwargs: Any) -> None:
+        """Create the training and validation datasets.
+
+        Parameters
+        ----------
+        *args : Any
+            Unused.
+        **kwargs : Any
+            Unused.
+        """
+        train_bounds: Optional[dict[str, tuple[int, int]]] = None
+        if self.val_data is None:
+            array = open_chunked(self.train_data)
+            train_bounds, val_bounds = split_bounds(
+                array.shape,
+                self.data_config.axes,
+                self.data_config.patch_size,
+                self.val_percentage,
+            )
+
+        self.train_dataset = ChunkedPatchDataset(
+            self.data_config,
+            self.train_data,
+            self.train_data_target,
+            bounds=train_bounds,
+            cache_bytes=self.cache_bytes,
+        )
+
+        if self.val_data is not None:
+            self.val_dataset = ChunkedPatchDataset(
+                self.data_config,
+                self.val_data,
+                self.val_data_target,
+                seed=VAL_SEED,
+                cache_bytes=self.cache_bytes,
+            )
+        else:
+            self.val_dataset = ChunkedPatchDataset(
+                self.data_config,
+                self.train_data,
+                self.train_data_target,
+                bounds=val_bounds,
+                seed=VAL_SEED,
+                cache_bytes=self.cache_bytes,
+            )
+
+        n_val = min(max(len(self.val_dataset), self.val_minimum_split), MAX_VAL_PATCHES)
+        self.val_dataset.n_patches = n_val
+
+    def get_data_statistics(self: Self) -> tuple[list[float], list[float]]:
+        """Return the normalization statistics of the training data.
+
+        Returns
+        -------
+        tuple of (list of float, list of float)
+            Per-channel means and standard deviations.
+        """
+        return self.train_dataset.get_data_statistics()
+
+    def train_dataloader(self: Self) -> DataLoader:
+        """Create the training dataloader.
+
+        Returns
+        -------
+        DataLoader
+            Training dataloader.
+        """
+        params = self.data_config.train_dataloader_params.copy()
+
+        # iterable datasets cannot be shuffled, the patches are random
+        params.pop("shuffle", None)
+
+        return DataLoader(self.train_dataset, batch_size=self.batch_size, **params)
+
+    def val_dataloader(self: Self) -> DataLoader:
+        """Create the validation dataloader.
+
+        Returns
+        -------
+        DataLoader
+            Validation dataloader.
+        """
+        return DataLoader(
+            self.val_dataset,
+            batch_size=self.batch_size,
+            **self.data_config.val_dataloader_params,
+        )
@@ -0,0 +1,101 @@
+"""Compact export of the CAREamics models, with only their weights and configuration."""
+
+import json
+from pathlib import Path
+from typing import Optional, Union
+
+import torch
+from careamics import CAREamist
+from careamics.config import Configuration
+from pytorch_lightning.callbacks import Callback
+
+WEIGHTS_SUFFIX = ".pt"
+"""Suffix of the compact model files."""
+
+
+def save_weights(
+    careamist: CAREamist, path: Union[str, Path], half: bool = False
+) -> Path:
+    """Save the weights and the configuration of a model.
+
+    Contrary to the checkpoints, the optimizer and trainer states are not saved,
+    and the floating point weights can be converted to float16 to further halve
+    the file size. The models are loaded back with `load_weights`.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    path : str or pathlib.Path
+        Path to the model file, the `WEIGHTS_SUFFIX` is added if missing.
+    half : bool, default=False
+        Whether to save the floating point weights in float16.
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the saved model.
+    """
+    path = Path(path)
+    if path.suffix != WEIGHTS_SUFFIX:
+        path = path.with_name(path.name + WEIGHTS_SUFFIX)
+
+    state_dict = {}
+    for name, tensor in careamist.model.state_dict().items():
+        tensor = tensor.detach().cpu()
+        if half and tensor.is_floating_point():
+            tensor = tensor.half()
+        state_dict[name] = tensor
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(
+        {
+            "careamics_config": json.dumps(
+                careamist.cfg.model_dump(mode="json", exclude_none=True)
+            ),
+            "state_dict": state_dict,
+        },
+        path,
+    )
+
+    return path
+
+
+def load_weights(
+    path: Union[str, Path],
+    work_dir: Optional[Union[str, Path]] = None,
+    callbacks: Optional[list[Callback]] = None,
+) -> CAREamist:
+    """Load a model saved by `save_weights`.
+
+    Float16 weights are converted back to the precision of the model.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path to the model file.
+    work_dir : str or pathlib.Path or None, default=None
+        Working directory of the CAREamist, the current directory if None.
+    callbacks : list of Callback or None, default=None
+        Callbacks passed to the CAREamist.
+
+    Returns
+    -------
+    CAREamist
+        CAREamist instance with the loaded weights.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a model saved by `save_weights`.
+    """
+    # only tensors and strings are stored, the file can be loaded safely
+    saved = torch.load(path, map_location="cpu", weights_only=True)
+    if not isinstance(saved, dict) or "careamics_config" not in saved:
+        raise ValueError(f"{path} is not a CAREamics weights file.")
+
+    config = Configuration(**json.loads(saved["careamics_config"]))
+    careamist = CAREamist(config, work_dir=work_dir, callbacks=callbacks)
+    careamist.model.load_state_dict(saved["state_dict"])
+
+    return careamist
@@ -1,7 +1,12 @@
 """Utility to create CAREamics configurations from user-set settings."""
 
-from typing import Union
+import os
+import warnings
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Literal, Optional, Union, cast
 
+import torch
 from careamics import Configuration
 from careamics.config import (
     create_care_configuration,
@@ -13,6 +18,149 @@ from careamics.config.transformations import XYFlipModel, XYRandomRotate90Model
 
 from careamics_napari.signals import TrainingSignal
 
+from .early_stopping import EarlyStoppingCallBack
+
+Precision = Literal["32", "16-mixed", "bf16-mixed"]
+"""Numerical precisions available for training."""
+
+SUPPORTED_PRECISIONS: tuple[Precision, ...] = ("32", "16-mixed", "bf16-mixed")
+"""Numerical precisions available for training."""
+
+MAX_AUTO_WORKERS = 8
+"""Maximum number of dataloader workers chosen automatically."""
+
+
+def available_cores() -> int:
+    """Number of CPU cores available to the process.
+
+    Returns
+    -------
+    int
+        Number of cores.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def auto_num_workers() -> int:
+    """Choose a number of dataloader workers from the number of CPU cores.
+
+    Half of the cores, up to `MAX_AUTO_WORKERS`, are used for the workers. The
+    torch threads of the main process are lowered during training to fit in the
+    remaining cores (see `limit_torch_threads`).
+
+    Returns
+    -------
+    int
+        Number of workers, 0 to load the data in the main process.
+    """
+    return min(MAX_AUTO_WORKERS, available_cores() // 2)
+
+
+def torch_num_threads(num_workers: int) -> int:
+    """Number of torch threads leaving a core to each dataloader worker.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of dataloader workers.
+
+    Returns
+    -------
+    int
+        Number of torch intra-op threads, at least 1.
+    """
+    return max(1, min(torch.get_num_threads(), available_cores() - num_workers))
+
+
+@contextmanager
+def limit_torch_threads(num_workers: int) -> Iterator[None]:
+    """Lower the torch threads so that they fit next to the dataloader workers.
+
+    The number of threads is restored on exit.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of dataloader workers.
+
+    Yields
+    ------
+    None
+        Nothing.
+    """
+    n_threads = torch.get_num_threads()
+    torch.set_num_threads(torch_num_threads(num_workers))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(n_threads)
+
+
+def oversubscription_warning(num_workers: int) -> Optional[str]:
+    """Check whether the dataloader workers would oversubscribe the CPU.
+
+    Each worker uses a core, in addition to the threads used by torch in the main
+    process, which are lowered during training (see `limit_torch_threads`) but
+    never below one.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of dataloader workers, -1 for automatic.
+
+    Returns
+    -------
+    str or None
+        Warning message, None if the CPU is not oversubscribed.
+    """
+    if num_workers < 0:
+        num_workers = auto_num_workers()
+
+    n_cores = available_cores()
+    n_threads = torch_num_threads(num_workers)
+    if num_workers > 0 and num_workers + n_threads > n_cores:
+        return (
+            f"{num_workers} dataloader workers and {n_threads} torch threads exceed "
+            f"the {n_cores} available CPU cores, which may slow down training. "
+            f"Consider reducing the number of workers."
+        )
+
+    return None
+
+
+def create_dataloader_params(
+    signal: TrainingSignal,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Create the training and validation dataloader parameters.
+
+    Parameters
+    ----------
+    signal : TrainingSignal
+        Signal containing user-set training parameters.
+
+    Returns
+    -------
+    tuple of (dict, dict)
+        Training and validation dataloader parameters.
+    """
+    num_workers = signal.num_workers if signal.num_workers >= 0 else auto_num_workers()
+
+    params: dict[str, Any] = {
+        "num_workers": num_workers,
+        # pinned memory only speeds up the transfers to the GPU
+        "pin_memory": signal.pin_memory and torch.cuda.is_available(),
+    }
+
+    # only valid with worker processes
+    if num_workers > 0:
+        params["prefetch_factor"] = signal.prefetch_factor
+        params["persistent_workers"] = signal.persistent_workers
+
+    return {"shuffle": True, **params}, params
+
 
 def create_configuration(signal: TrainingSignal) -> Configuration:
     """Create a CAREamics configuration from a TrainingSignal.
@@ -30,8 +178,14 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
     Raises
     ------
     ValueError
-        If the algorithm is not supported.
+        If the algorithm or the precision is not supported.
     """
+    if signal.precision not in SUPPORTED_PRECISIONS:
+        raise ValueError(
+            f"Unsupported precision: {signal.precision} (expected one of "
+            f"{', '.join(SUPPORTED_PRECISIONS)})."
+        )
+
     # experiment name
     if signal.experiment_name == "":
         experiment_name = f"{signal.algorithm}_{signal.axes}"
@@ -54,6 +208,13 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
         "num_channels_init": signal.num_conv_filters,
     }
 
+    # dataloaders
+    message = oversubscription_warning(signal.num_workers)
+    if message is not None:
+        warnings.warn(message, stacklevel=2)
+
+    train_dataloader_params, val_dataloader_params = create_dataloader_params(signal)
+
     # augmentations
     augs: list[Union[XYFlipModel, XYRandomRotate90Model]] = []
     if signal.x_flip or signal.y_flip:
@@ -64,7 +225,7 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
 
     # create configuration
     if signal.algorithm == SupportedAlgorithm.N2V:
-        return create_n2v_configuration(
+        config = create_n2v_configuration(
             experiment_name=experiment_name,
             data_type="tiff" if signal.load_from_disk else "array",
             axes=signal.axes,
@@ -77,9 +238,11 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
             use_n2v2=signal.use_n2v2,
             logger="tensorboard",
             model_params=model_params,
+            train_dataloader_params=train_dataloader_params,
+            val_dataloader_params=val_dataloader_params,
         )
     elif signal.algorithm == SupportedAlgorithm.N2N:
-        return create_n2n_configuration(
+        config = create_n2n_configuration(
             experiment_name=experiment_name,
             data_type="tiff" if signal.load_from_disk else "array",
             axes=signal.axes,
@@ -92,9 +255,11 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
             independent_channels=signal.independent_channels,
             logger="tensorboard",
             model_params=model_params,
+            train_dataloader_params=train_dataloader_params,
+            val_dataloader_params=val_dataloader_params,
         )
     elif signal.algorithm == SupportedAlgorithm.CARE:
-        return create_care_configuration(
+        config = create_care_configuration(
             experiment_name=experiment_name,
             data_type="tiff" if signal.load_from_disk else "array",
             axes=signal.axes,
@@ -107,6 +272,47 @@ def create_configuration(signal: TrainingSignal) -> Configuration:
             independent_channels=signal.independent_channels,
             logger="tensorboard",
             model_params=model_params,
+            train_dataloader_params=train_dataloader_params,
+            val_dataloader_params=val_dataloader_params,
         )
     else:
         raise ValueError(f"Unsupported algorithm: {signal.algorithm}")
+
+    # precision of the trainer, mixed precisions run the forward pass in half
+    # precision while keeping the weights in float32 (validated above)
+    config.training_config.precision = cast(Precision, signal.precision)
+
+    config.algorithm_config.optimizer.parameters["lr"] = signal.learning_rate
+
+    # the learning rate is reduced when the validation loss stops improving
+    config.algorithm_config.lr_scheduler.parameters = {
+        "factor": signal.lr_plateau_factor,
+        "patience": signal.lr_plateau_patience,
+    }
+
+    return config
+
+
+def create_early_stopping(signal: TrainingSignal) -> Optional[EarlyStoppingCallBack]:
+    """Create the early stopping callback selected in the training signal.
+
+    The early stopping of the CAREamics configuration is not used, since CAREamics
+    fails to instantiate it.
+
+    Parameters
+    ----------
+    signal : TrainingSignal
+        Training signal.
+
+    Returns
+    -------
+    EarlyStoppingCallBack or None
+        Early stopping callback, None if early stopping is not selected.
+    """
+    if not signal.early_stopping:
+        return None
+
+    return EarlyStoppingCallBack(
+        patience=signal.early_stopping_patience,
+        min_delta=signal.early_stopping_min_delta,
+    )
@@ -0,0 +1,119 @@
+"""PyTorch Lightning callback stopping the training when the loss plateaus."""
+
+import math
+from typing import Any
+
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from typing_extensions import Self
+
+
+class EarlyStoppingCallBack(Callback):
+    """PyTorch Lightning callback stopping the training when a metric plateaus.
+
+    CAREamics defines its own early stopping callback from the configuration and
+    refuses external `EarlyStopping` instances, this plain callback is used
+    instead. Its state is saved in the checkpoints, so that resumed trainings
+    keep counting the validations without improvement.
+
+    Parameters
+    ----------
+    patience : int
+        Number of validations without improvement before stopping the training.
+    min_delta : float, default=0.0
+        Minimum decrease of the metric counted as an improvement.
+    monitor : str, default="val_loss"
+        Name of the monitored metric, minimized.
+
+    Attributes
+    ----------
+    stop_reason : str
+        Reason of the stop, empty if the training was not stopped.
+    """
+
+    def __init__(
+        self: Self, patience: int, min_delta: float = 0.0, monitor: str = "val_loss"
+    ) -> None:
+        """Initialize the callback.
+
+        Parameters
+        ----------
+        patience : int
+            Number of validations without improvement before stopping the training.
+        min_delta : float, default=0.0
+            Minimum decrease of the metric counted as an improvement.
+        monitor : str, default="val_loss"
+            Name of the monitored metric, minimized.
+        """
+        self.patience = patience
+        self.min_delta = min_delta
+        self.monitor = monitor
+
+        self.stop_reason = ""
+        self.best = math.inf
+        self.wait = 0
+
+    def setup(self, trainer: Trainer, pl_module: LightningModule, stage: str) -> None:
+        """Method called before each training, and before loading checkpoints.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        stage : str
+            Stage, e.g. "fit".
+        """
+        if stage == "fit":
+            self.stop_reason = ""
+            self.best = math.inf
+            self.wait = 0
+
+    def state_dict(self: Self) -> dict[str, Any]:
+        """Return the state saved in the checkpoints.
+
+        Returns
+        -------
+        dict of {str: Any}
+            Best value and number of validations without improvement.
+        """
+        return {"best": self.best, "wait": self.wait}
+
+    def load_state_dict(self: Self, state_dict: dict[str, Any]) -> None:
+        """Restore the state from a checkpoint.
+
+        Parameters
+        ----------
+        state_dict : dict of {str: Any}
+            Saved state.
+        """
+        self.best = state_dict["best"]
+        self.wait = state_dict["wait"]
+
+    def on_validation_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of each validation.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if trainer.sanity_checking or self.monitor not in trainer.callback_metrics:
+            return
+
+        value = float(trainer.callback_metrics[self.monitor])
+        if value < self.best - self.min_delta:
+            self.best = value
+            self.wait = 0
+            return
+
+        self.wait += 1
+        if self.wait >= self.patience:
+            trainer.should_stop = True
+            self.stop_reason = (
+                f"Early stopping, {self.monitor} did not improve by more than "
+                f"{self.min_delta:g} in {self.patience} validations"
+            )
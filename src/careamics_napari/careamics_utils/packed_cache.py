@@ -0,0 +1,603 @@
+"""Training cache packing many image files into a single memory-mapped array.
+
+Folders of many small files spend most of each epoch opening and decoding them.
+The files are instead decoded once into a `.npy` file of the working directory,
+and the patches are read from its memory map, at the cost of the disk space of
+the decoded images.
+"""
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+import tifffile
+from careamics.config import DataConfig
+from careamics.dataset.dataset_utils import list_files
+from torch.utils.data import IterableDataset, get_worker_info
+from typing_extensions import Self
+
+from .chunked_dataset import (
+    MAX_PATCHES_PER_EPOCH,
+    MAX_VAL_PATCHES,
+    VAL_SEED,
+    ChunkedDataModule,
+    _channels_first,
+    _patch_transform,
+    _reorder,
+    split_bounds,
+)
+from .streaming_statistics import StreamingStatistics
+
+PACKED_CACHE_DIR = "packed_cache"
+"""Folder of the working directory in which the files are packed."""
+
+
+class PackedFiles:
+    """Image files decoded into a single memory-mapped array.
+
+    The images are flattened and concatenated in a `.npy` file, next to a JSON
+    index recording the path, shape and offset of each image, as well as the
+    statistics of all images. Only the paths are pickled, and the array is
+    mapped again in each process.
+
+    Parameters
+    ----------
+    index_path : str or pathlib.Path
+        Path to the JSON index of the packed files.
+
+    Attributes
+    ----------
+    axes : str
+        Axes of the images.
+    paths : list of str
+        Paths to the source files.
+    shapes : list of tuple of int
+        Shapes of the images.
+    offsets : list of int
+        Offsets of the images in the packed array, in elements.
+    statistics : StreamingStatistics or None
+        Statistics of all images, None if they are empty.
+    """
+
+    def __init__(self: Self, index_path: Union[str, Path]) -> None:
+        """Load the index of packed files.
+
+        Parameters
+        ----------
+        index_path : str or pathlib.Path
+            Path to the JSON index of the packed files.
+        """
+        self.index_path = Path(index_path)
+
+        index = json.loads(self.index_path.read_text())
+        self.source: str = index["source"]
+        self.axes: str = index["axes"]
+        self.paths: list[str] = [entry["path"] for entry in index["images"]]
+        self.shapes: list[tuple[int, ...]] = [
+            tuple(entry["shape"]) for entry in index["images"]
+        ]
+        self.offsets: list[int] = [entry["offset"] for entry in index["images"]]
+        self.statistics: Optional[StreamingStatistics] = (
+            StreamingStatistics.from_dict(index["statistics"])
+            if index["statistics"] is not None
+            else None
+        )
+
+        self._array: Optional[np.ndarray] = None
+
+    @property
+    def key(self: Self) -> str:
+        """Identifier of the source files and their versions.
+
+        Returns
+        -------
+        str
+            Hexadecimal digest.
+        """
+        return self.index_path.stem
+
+    @property
+    def data_path(self: Self) -> Path:
+        """Path to the packed array.
+
+        Returns
+        -------
+        pathlib.Path
+            Path to the `.npy` file.
+        """
+        return self.index_path.with_suffix(".npy")
+
+    def __len__(self: Self) -> int:
+        """Number of images.
+
+        Returns
+        -------
+        int
+            Number of images.
+        """
+        return len(self.shapes)
+
+    def __getstate__(self: Self) -> dict[str, Any]:
+        """Return the state to pickle, without the memory map.
+
+        Returns
+        -------
+        dict of {str: Any}
+            State.
+        """
+        state = self.__dict__.copy()
+        state["_array"] = None
+        return state
+
+    def image(self: Self, index: int) -> np.ndarray:
+        """Return an image, as a view of the memory map.
+
+        Parameters
+        ----------
+        index : int
+            Index of the image.
+
+        Returns
+        -------
+        numpy.ndarray
+            Read-only image.
+        """
+        if self._array is None:
+            self._array = np.load(self.data_path, mmap_mode="r")
+
+        offset, shape = self.offsets[index], self.shapes[index]
+        return self._array[offset : offset + math.prod(shape)].reshape(shape)
+
+
+def _packing_key(files: list[Path], axes: str) -> str:
+    """Identify files by their paths, sizes and modification times.
+
+    Parameters
+    ----------
+    files : list of pathlib.Path
+        Files.
+    axes : str
+        Axes of the files.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(axes.encode())
+    for file in files:
+        stat = file.stat()
+        digest.update(f"{file.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    return digest.hexdigest()
+
+
+def pack_files(
+    source: Union[str, Path], axes: str, directory: Union[str, Path]
+) -> tuple[PackedFiles, bool]:
+    """Decode TIFF files into a memory-mapped array, or reuse a previous packing.
+
+    The packing is identified by the paths, sizes and modification times of the
+    files, so that it is rebuilt when they change. Previous packings of the same
+    source are then removed.
+
+    Parameters
+    ----------
+    source : str or pathlib.Path
+        TIFF file, or folder of TIFF files.
+    axes : str
+        Axes of the files.
+    directory : str or pathlib.Path
+        Directory of the packed files.
+
+    Returns
+    -------
+    tuple of (PackedFiles, bool)
+        Packed files, and whether a previous packing was reused.
+
+    Raises
+    ------
+    ValueError
+        If the number of dimensions of a file does not match the axes, or if the
+        numbers of channels of the files differ.
+    """
+    directory = Path(directory)
+    files = list_files(source, "tiff")
+    key = _packing_key(files, axes)
+
+    index_path = directory / f"{key}.json"
+    if index_path.exists() and index_path.with_suffix(".npy").exists():
+        return PackedFiles(index_path), True
+
+    # shapes are read from the headers to allocate the array before decoding
+    shapes, dtypes = [], []
+    for file in files:
+        with tifffile.TiffFile(file) as tiff:
+            series = tiff.series[0]
+            if len(series.shape) != len(axes):
+                raise ValueError(
+                    f"{file} has {len(series.shape)} dimensions, which does not "
+                    f"match the axes {axes}."
+                )
+            shapes.append(series.shape)
+            dtypes.append(series.dtype)
+
+    sizes = [math.prod(shape) for shape in shapes]
+    offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int).tolist()
+
+    directory.mkdir(parents=True, exist_ok=True)
+    temporary = directory / f".{key}.{os.getpid()}.npy"
+    array = np.lib.format.open_memmap(
+        temporary, mode="w+", dtype=np.result_type(*dtypes), shape=(offsets[-1],)
+    )
+
+    statistics: Optional[StreamingStatistics] = None
+    try:
+        for file, offset, size in zip(files, offsets, sizes):
+            image = tifffile.imread(file)
+            array[offset : offset + size] = image.ravel()
+
+            pixels = _channels_first(image, axes)
+            if statistics is None:
+                statistics = StreamingStatistics(pixels.shape[0])
+            elif pixels.shape[0] != statistics.n_channels:
+                raise ValueError(
+                    f"{file} has {pixels.shape[0]} channels, other files have "
+                    f"{statistics.n_channels}."
+                )
+            statistics.update(pixels)
+    except BaseException:
+        # the partial array can be as large as the dataset
+        del array
+        temporary.unlink(missing_ok=True)
+        raise
+
+    array.flush()
+    del array
+    os.replace(temporary, index_path.with_suffix(".npy"))
+
+    # the index is written last, its presence marks a complete packing
+    resolved_source = str(Path(source).resolve())
+    index = {
+        "source": resolved_source,
+        "axes": axes,
+        "images": [
+            {"path": str(file), "shape": list(shape), "offset": offset}
+            for file, shape, offset in zip(files, shapes, offsets)
+        ],
+        "statistics": statistics.to_dict() if statistics is not None else None,
+    }
+    temporary = directory / f".{key}.{os.getpid()}.json"
+    temporary.write_text(json.dumps(index))
+    os.replace(temporary, index_path)
+
+    # remove the outdated packings of the same source
+    for other in directory.glob("*.json"):
+        if other == index_path:
+            continue
+        try:
+            outdated = json.loads(other.read_text())["source"] == resolved_source
+        except (OSError, ValueError, KeyError):
+            continue
+        if outdated:
+            other.unlink(missing_ok=True)
+            other.with_suffix(".npy").unlink(missing_ok=True)
+
+    return PackedFiles(index_path), False
+
+
+def split_images(
+    shapes: list[tuple[int, ...]],
+    axes: str,
+    patch_size: list[int],
+    val_percentage: float,
+) -> tuple[list[tuple[int, dict]], list[tuple[int, dict]]]:
+    """Split packed images into training and validation regions.
+
+    The last images are used for validation, or, with a single image, a region
+    at its end (see `split_bounds`).
+
+    Parameters
+    ----------
+    shapes : list of tuple of int
+        Shapes of the images.
+    axes : str
+        Axes of the images.
+    patch_size : list of int
+        Patch size, ZYX or YX.
+    val_percentage : float
+        Fraction of the images used for validation.
+
+    Returns
+    -------
+    tuple of (list, list)
+        Training and validation regions, as image indices and bounds.
+    """
+    if len(shapes) == 1:
+        train_bounds, val_bounds = split_bounds(
+            shapes[0], axes, patch_size, val_percentage
+        )
+        return [(0, train_bounds)], [(0, val_bounds)]
+
+    n_val = min(max(1, round(len(shapes) * val_percentage)), len(shapes) - 1)
+    split = len(shapes) - n_val
+    return (
+        [(i, {}) for i in range(split)],
+        [(i, {}) for i in range(split, len(shapes))],
+    )
+
+
+class PackedPatchDataset(IterableDataset):
+    """Dataset of random patches read from packed images.
+
+    Each patch is drawn from a random image, with a probability proportional to
+    its number of patch positions, at a random position. S and T axes are
+    sampled, and all channels are kept. Images smaller than the patch size are
+    ignored. Patches are normalized and transformed as in the CAREamics
+    datasets.
+
+    If the normalization statistics are not set in the configuration, they are
+    set to the statistics of the packed images.
+
+    Parameters
+    ----------
+    data_config : DataConfig
+        CAREamics data configuration.
+    images : PackedFiles
+        Packed images, with the axes of the configuration.
+    targets : PackedFiles or None, default=None
+        Packed targets, with the same shapes as the images.
+    regions : list of tuple of (int, dict) or None, default=None
+        Regions in which the patches are sampled, as image indices and intervals
+        of the axes, by default the whole images.
+    n_patches : int or None, default=None
+        Number of patches per epoch, by default the number of non-overlapping
+        patches in the regions, up to `MAX_PATCHES_PER_EPOCH`.
+    seed : int or None, default=None
+        Seed of the patch positions, which are then identical at each epoch.
+    """
+
+    def __init__(
+        self: Self,
+        data_config: DataConfig,
+        images: PackedFiles,
+        targets: Optional[PackedFiles] = None,
+        regions: Optional[list[tuple[int, dict[str, tuple[int, int]]]]] = None,
+        n_patches: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the dataset.
+
+        Parameters
+        ----------
+        data_config : DataConfig
+            CAREamics data configuration.
+        images : PackedFiles
+            Packed images, with the axes of the configuration.
+        targets : PackedFiles or None, default=None
+            Packed targets, with the same shapes as the images.
+        regions : list of tuple of (int, dict) or None, default=None
+            Regions in which the patches are sampled, as image indices and
+            intervals of the axes, by default the whole images.
+        n_patches : int or None, default=None
+            Number of patches per epoch, by default the number of
+            non-overlapping patches in the regions, up to
+            `MAX_PATCHES_PER_EPOCH`.
+        seed : int or None, default=None
+            Seed of the patch positions, which are then identical at each epoch.
+
+        Raises
+        ------
+        ValueError
+            If the images do not match the axes, the targets do not match the
+            images, or no region is larger than the patch size.
+        """
+        self.data_config = data_config
+        self.axes = data_config.axes
+        self.images = images
+        self.targets = targets
+        self.seed = seed
+
+        if images.axes != self.axes:
+            raise ValueError(
+                f"Images packed with axes {images.axes} do not match the axes "
+                f"{self.axes}."
+            )
+        if targets is not None and targets.shapes != images.shapes:
+            raise ValueError("Targets do not have the same shapes as the images.")
+
+        spatial_axes = [axis for axis in "ZYX" if axis in self.axes]
+        self.patch_size = dict(zip(spatial_axes, data_config.patch_size))
+
+        if regions is None:
+            regions = [(i, {}) for i in range(len(images))]
+
+        self.regions: list[tuple[int, dict[str, tuple[int, int]]]] = []
+        positions, grid = [], 0
+        for index, region_bounds in regions:
+            bounds = {
+                axis: (0, size) for axis, size in zip(self.axes, images.shapes[index])
+            }
+            bounds.update(region_bounds)
+
+            spans = {
+                axis: stop - start
+                for axis, (start, stop) in bounds.items()
+                if axis != "C"
+            }
+            if any(spans[axis] < size for axis, size in self.patch_size.items()):
+                continue
+
+            self.regions.append((index, bounds))
+            positions.append(
+                math.prod(
+                    span - self.patch_size.get(axis, 1) + 1
+                    for axis, span in spans.items()
+                )
+            )
+            grid += math.prod(
+                span // self.patch_size.get(axis, 1) for axis, span in spans.items()
+            )
+
+        if len(self.regions) == 0:
+            raise ValueError(
+                f"No image is larger than the patch size {data_config.patch_size}."
+            )
+
+        self.weights = np.asarray(positions, dtype=float) / sum(positions)
+        self.n_patches = (
+            n_patches if n_patches is not None else min(grid, MAX_PATCHES_PER_EPOCH)
+        )
+
+        # normalization
+        if data_config.image_means is None and images.statistics is not None:
+            target_stats = targets.statistics if targets is not None else None
+            data_config.set_means_and_stds(
+                image_means=images.statistics.means,
+                image_stds=images.statistics.stds,
+                target_means=target_stats.means if target_stats else None,
+                target_stds=target_stats.stds if target_stats else None,
+            )
+
+        self.patch_transform = _patch_transform(data_config)
+
+    def __len__(self: Self) -> int:
+        """Number of patches per epoch.
+
+        Returns
+        -------
+        int
+            Number of patches.
+        """
+        return self.n_patches
+
+    def __iter__(self: Self) -> Any:
+        """Iterate over random patches, split between the dataloader workers.
+
+        Yields
+        ------
+        tuple of numpy.ndarray
+            Transformed patch, and target if any.
+        """
+        info = get_worker_info()
+        n_workers, worker_id = (1, 0) if info is None else (info.num_workers, info.id)
+        count = len(range(worker_id, self.n_patches, n_workers))
+
+        rng = np.random.default_rng(
+            None if self.seed is None else (self.seed, worker_id)
+        )
+
+        for _ in range(count):
+            index, bounds = self.regions[rng.choice(len(self.regions), p=self.weights)]
+
+            region = []
+            for axis in self.axes:
+                start, stop = bounds[axis]
+                if axis == "C":
+                    region.append(slice(start, stop))
+                    continue
+
+                width = self.patch_size.get(axis, 1)
+                position = int(rng.integers(start, stop - width + 1))
+                region.append(slice(position, position + width))
+
+            patch = _reorder(self.images.image(index)[tuple(region)], self.axes)
+            if self.targets is not None:
+                target = _reorder(self.targets.image(index)[tuple(region)], self.axes)
+                yield self.patch_transform(patch=patch, target=target)
+            else:
+                yield self.patch_transform(patch=patch)
+
+    def get_data_statistics(self: Self) -> tuple[list[float], list[float]]:
+        """Return the normalization statistics of the data.
+
+        Returns
+        -------
+        tuple of (list of float, list of float)
+            Per-channel means and standard deviations.
+
+        Raises
+        ------
+        ValueError
+            If the statistics are not set in the data configuration.
+        """
+        means, stds = self.data_config.image_means, self.data_config.image_stds
+        if means is None or stds is None:
+            raise ValueError("The normalization statistics have not been computed.")
+
+        return means, stds
+
+
+class PackedDataModule(ChunkedDataModule):
+    """Training data module sampling patches from packed files.
+
+    Drop-in replacement of the CAREamics `TrainDataModule` for files packed by
+    `pack_files`. Without validation data, the last images are held out for
+    validation (see `split_images`).
+
+    Parameters
+    ----------
+    data_config : DataConfig
+        CAREamics data configuration.
+    train_data : PackedFiles
+        Packed training images.
+    val_data : PackedFiles or None, default=None
+        Packed validation images, split from the training images if None.
+    train_data_target : PackedFiles or None, default=None
+        Packed training targets.
+    val_data_target : PackedFiles or None, default=None
+        Packed validation targets.
+    val_percentage : float, default=0.1
+        Fraction of the training images used for validation.
+    val_minimum_split : int, default=5
+        Minimum number of validation patches.
+    cache_bytes : int, default=CACHE_BYTES
+        Unused, the operating system caches the memory-mapped images.
+    """
+
+    train_data: PackedFiles
+    val_data: Optional[PackedFiles]
+    train_data_target: Optional[PackedFiles]
+    val_data_target: Optional[PackedFiles]
+    train_dataset: PackedPatchDataset
+    val_dataset: PackedPatchDataset
+
+    def setup(self: Self, *args: Any, **kwargs: Any) -> None:
+        """Create the training and validation datasets.
+
+        Parameters
+        ----------
+        *args : Any
+            Unused.
+        **kwargs : Any
+            Unused.
+        """
+        train_regions, val_regions = None, None
+        if self.val_data is None:
+            train_regions, val_regions = split_images(
+                self.train_data.shapes,
+                self.data_config.axes,
+                self.data_config.patch_size,
+                self.val_percentage,
+            )
+            val_data, val_target = self.train_data, self.train_data_target
+        else:
+            val_data, val_target = self.val_data, self.val_data_target
+
+        self.train_dataset = PackedPatchDataset(
+            self.data_config,
+            self.train_data,
+            self.train_data_target,
+            regions=train_regions,
+        )
+        self.val_dataset = PackedPatchDataset(
+            self.data_config, val_data, val_target, regions=val_regions, seed=VAL_SEED
+        )
+
+        n_val = min(max(len(self.val_dataset), self.val_minimum_split), MAX_VAL_PATCHES)
+        self.val_dataset.n_patches = n_val
@@ -0,0 +1,314 @@
+"""Selection of the informative training patches, skipping empty background."""
+
+import hashlib
+import time
+from pathlib import Path
+from queue import Queue
+from typing import Any, Optional
+
+import numpy as np
+from careamics.dataset import InMemoryDataset
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from skimage.filters import threshold_otsu
+from typing_extensions import Self
+
+from careamics_napari.signals import TrainUpdate, TrainUpdateType
+
+PATCH_INDEX_DIR = "patch_index"
+"""Folder of the working directory in which the patch indices are cached."""
+
+SCORE_BLOCK = 1024
+"""Number of patches whose scores are computed at once."""
+
+
+def patch_scores(patches: np.ndarray) -> np.ndarray:
+    """Compute the informativeness score of each patch.
+
+    The score is the standard deviation of the patch pixels, all channels
+    included, and is low for flat background patches.
+
+    Parameters
+    ----------
+    patches : numpy.ndarray
+        Patches, with the patches along the first axis.
+
+    Returns
+    -------
+    numpy.ndarray
+        Score of each patch.
+    """
+    flat = patches.reshape(len(patches), -1)
+
+    # computed by blocks to bound the memory of the temporary arrays
+    scores = np.empty(len(patches), dtype=np.float32)
+    for start in range(0, len(patches), SCORE_BLOCK):
+        block = flat[start : start + SCORE_BLOCK]
+        scores[start : start + SCORE_BLOCK] = block.std(axis=1, dtype=np.float64)
+
+    return scores
+
+
+def select_patches(
+    scores: np.ndarray, background_fraction: float = 0.1, seed: int = 42
+) -> np.ndarray:
+    """Select the foreground patches, and a random share of the background.
+
+    Foreground and background are separated by an Otsu threshold on the scores.
+    Keeping some background patches shows the network what the background looks
+    like.
+
+    Parameters
+    ----------
+    scores : numpy.ndarray
+        Score of each patch, see `patch_scores`.
+    background_fraction : float, default=0.1
+        Fraction of the background patches kept.
+    seed : int, default=42
+        Seed of the random selection of the background patches.
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask of the kept patches.
+    """
+    if len(scores) == 0 or scores.min() == scores.max():
+        return np.ones(len(scores), dtype=bool)
+
+    foreground = scores > threshold_otsu(scores)
+    rng = np.random.default_rng(seed)
+    background = ~foreground & (rng.random(len(scores)) < background_fraction)
+
+    return foreground | background
+
+
+def _index_key(datamodule: Any, n_patches: int) -> Optional[str]:
+    """Compute the cache key of the patch index of a training data module.
+
+    Only training files with an explicit validation set are cached, since the
+    patches are then always the same. Files are identified by their paths, sizes
+    and modification times, while arrays would have to be hashed, which is as
+    costly as computing the scores.
+
+    Parameters
+    ----------
+    datamodule : Any
+        CAREamics training data module.
+    n_patches : int
+        Number of training patches.
+
+    Returns
+    -------
+    str or None
+        Hexadecimal digest, None if the index should not be cached.
+    """
+    if getattr(datamodule, "val_data", None) is None:
+        return None
+
+    sources = [getattr(datamodule, "train_data", None)]
+    sources.append(getattr(datamodule, "train_data_target", None))
+    if any(isinstance(source, np.ndarray) for source in sources):
+        return None
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{datamodule.data_config.patch_size}:{n_patches}".encode())
+    for source in sources:
+        if source is None:
+            continue
+
+        path = Path(source)
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file():
+                stat = file.stat()
+                digest.update(
+                    f"{file.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+                )
+
+    return digest.hexdigest()
+
+
+class ForegroundPatchCallBack(Callback):
+    """PyTorch Lightning callback training only on the informative patches.
+
+    Once the training patches are extracted, the ones with a low score (see
+    `patch_scores`) are removed from the training set, except for a random share
+    of them (see `select_patches`). The scores of training files are cached in
+    the working directory, and reused as long as the files, the patch size and
+    the validation split do not change.
+
+    The fraction of the patches kept, and the time saved per epoch, estimated from
+    the measured duration of the training steps (validation excluded), are sent
+    to the training queue. Only patches extracted in memory are selected,
+    data streamed from files too large to fit in memory is left untouched.
+
+    Parameters
+    ----------
+    training_queue : Queue
+        Training queue used to pass updates between threads.
+    background_fraction : float, default=0.1
+        Fraction of the background patches kept.
+
+    Attributes
+    ----------
+    kept : float
+        Fraction of the training patches kept, -1 before the selection.
+    """
+
+    def __init__(
+        self: Self, training_queue: Queue, background_fraction: float = 0.1
+    ) -> None:
+        """Initialize the callback.
+
+        Parameters
+        ----------
+        training_queue : Queue
+            Training queue used to pass updates between threads.
+        background_fraction : float, default=0.1
+            Fraction of the background patches kept.
+        """
+        self.training_queue = training_queue
+        self.background_fraction = background_fraction
+
+        self.kept = -1.0
+        self._epoch_start = 0.0
+        self._validation_start = 0.0
+        self._validation_time = 0.0
+
+    def setup(self, trainer: Trainer, pl_module: LightningModule, stage: str) -> None:
+        """Method called once the data module is set up, selecting the patches.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        stage : str
+            Stage, only the "fit" stage is considered.
+        """
+        self.kept = -1.0
+        if stage != "fit":
+            return
+
+        dataset = getattr(getattr(trainer, "datamodule", None), "train_dataset", None)
+        if not isinstance(dataset, InMemoryDataset):
+            self.training_queue.put(
+                TrainUpdate(
+                    TrainUpdateType.DEBUG,
+                    "Foreground patch selection skipped, the patches are not "
+                    "extracted in memory.",
+                )
+            )
+            return
+
+        scores = self._scores(trainer, dataset)
+        mask = select_patches(scores, self.background_fraction)
+
+        dataset.data = dataset.data[mask]
+        if dataset.data_targets is not None:
+            dataset.data_targets = dataset.data_targets[mask]
+        self.kept = float(mask.mean())
+
+    def _scores(self: Self, trainer: Trainer, dataset: InMemoryDataset) -> np.ndarray:
+        """Load the scores of the patches from the cache, or compute them.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        dataset : InMemoryDataset
+            Training dataset.
+
+        Returns
+        -------
+        numpy.ndarray
+            Score of each patch.
+        """
+        key = _index_key(getattr(trainer, "datamodule", None), len(dataset.data))
+        if key is None:
+            return patch_scores(dataset.data)
+
+        path = Path(trainer.default_root_dir) / PATCH_INDEX_DIR / f"{key}.npy"
+        if path.exists():
+            scores = np.load(path)
+            if len(scores) == len(dataset.data):
+                return scores
+
+        scores = patch_scores(dataset.data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, scores)
+        return scores
+
+    def on_train_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the beginning of the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if self.kept >= 0:
+            self.training_queue.put(
+                TrainUpdate(TrainUpdateType.PATCHES_KEPT, self.kept)
+            )
+
+    def on_train_epoch_start(
+        self, trainer: Trainer, pl_module: LightningModule
+    ) -> None:
+        """Method called at the beginning of each epoch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self._epoch_start = time.perf_counter()
+        self._validation_time = 0.0
+
+    def on_validation_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the beginning of each validation.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self._validation_start = time.perf_counter()
+
+    def on_validation_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of each validation.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self._validation_time += time.perf_counter() - self._validation_start
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of each epoch, estimating the time saved.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if self.kept <= 0:
+            return
+
+        # the duration of the training steps is proportional to the number of
+        # patches, unlike the one of the validation
+        duration = time.perf_counter() - self._epoch_start - self._validation_time
+        saved = duration * (1 - self.kept) / self.kept
+        self.training_queue.put(TrainUpdate(TrainUpdateType.EPOCH_TIME_SAVED, saved))
@@ -0,0 +1,226 @@
+"""Cache allowing to only re-predict the tiles whose input changed."""
+
+import hashlib
+from itertools import product
+from typing import Any, Optional
+
+import numpy as np
+from careamics import CAREamist
+from careamics.dataset.dataset_utils import reshape_array
+from careamics.dataset.tiling.tiled_patching import _compute_crop_and_stitch_coords_1d
+from numpy.typing import NDArray
+from typing_extensions import Self
+
+from .checkpointing import weights_hash
+
+
+class PredictionCache:
+    """Per-tile fingerprints of the last predicted input and its prediction.
+
+    The input is split into the tiles of the CAREamics tiled prediction (one tile
+    per frame if no tile size is given). Each tile is fingerprinted on its input
+    crop, overlap included, so that a change in the context used to predict a tile
+    also marks it as dirty. On the next prediction, only the dirty tiles are predicted
+    again, the others are reused from the previous output. Frames appended to the
+    input, e.g. new time-points during an acquisition, are dirty by construction.
+
+    The cache is invalidated whenever the model, its normalization, the tiling
+    parameters or the non-sample dimensions of the input change.
+
+    Attributes
+    ----------
+    n_tiles : int
+        Number of tiles in the last prediction.
+    n_predicted : int
+        Number of tiles that were predicted during the last prediction.
+    """
+
+    def __init__(self: Self) -> None:
+        """Initialize the cache."""
+        self.reset()
+
+    def reset(self: Self) -> None:
+        """Clear the cache."""
+        self._key: Optional[tuple] = None
+        self._fingerprints: dict[tuple, bytes] = {}
+        self._output: Optional[NDArray] = None
+
+        self.n_tiles = 0
+        self.n_predicted = 0
+
+    def predict(
+        self: Self,
+        careamist: CAREamist,
+        data: NDArray,
+        tile_size: Optional[tuple[int, ...]] = None,
+        tile_overlap: Optional[tuple[int, ...]] = None,
+        batch_size: int = 1,
+    ) -> NDArray:
+        """Predict the tiles of `data` that changed since the last call.
+
+        Parameters
+        ----------
+        careamist : CAREamist
+            CAREamist instance.
+        data : numpy.ndarray
+            Data, with the axes of the CAREamist data configuration.
+        tile_size : tuple of int or None, default=None
+            Size of the tiles along the spatial dimensions, None to use one tile
+            per frame.
+        tile_overlap : tuple of int or None, default=None
+            Overlap between the tiles.
+        batch_size : int, default=1
+            Batch size.
+
+        Returns
+        -------
+        numpy.ndarray
+            Prediction, with axes SC(Z)YX.
+        """
+        array = reshape_array(np.asarray(data), careamist.cfg.data_config.axes)
+        spatial = array.shape[2:]
+        axes = "SC" + ("Z" if len(spatial) == 3 else "") + "YX"
+
+        if tile_size is None:
+            tiles = tuple(spatial)
+            overlap = (0,) * len(spatial)
+        else:
+            tiles = tuple(tile_size)
+            overlap = (0,) * len(spatial) if tile_overlap is None else tile_overlap
+
+        # tiles of the CAREamics tiling, as crop, stitch and overlap crop slices
+        grid = list(
+            product(
+                *[
+                    list(zip(*_compute_crop_and_stitch_coords_1d(s, t, o)))
+                    for s, t, o in zip(spatial, tiles, overlap)
+                ]
+            )
+        )
+
+        # invalidate the cache if anything but the number of samples changed
+        data_config = careamist.cfg.data_config
+        key = (
+            array.shape[1:],
+            array.dtype.str,
+            tiles,
+            tuple(overlap),
+            weights_hash(careamist.model),
+            tuple(data_config.image_means or ()),
+            tuple(data_config.image_stds or ()),
+        )
+        if key != self._key:
+            self.reset()
+            self._key = key
+
+        # fingerprint the input crop of each tile, overlap included
+        fingerprints: dict[tuple, bytes] = {}
+        dirty: list[tuple] = []
+        for sample in range(array.shape[0]):
+            for index, tile in enumerate(grid):
+                region: tuple[Any, ...] = (sample, slice(None)) + tuple(
+                    slice(*crop) for crop, _, _ in tile
+                )
+                fingerprint = hashlib.blake2b(
+                    array[region].tobytes(), digest_size=16
+                ).digest()
+
+                fingerprints[(sample, index)] = fingerprint
+                if self._fingerprints.get((sample, index)) != fingerprint:
+                    dirty.append((sample, tile))
+
+        self.n_tiles = len(fingerprints)
+        self.n_predicted = len(dirty)
+
+        if self._output is None:
+            # nothing to reuse, predict everything with the CAREamics tiling
+            result = careamist.predict(  # type: ignore
+                array,
+                data_type="array",
+                axes=axes,
+                tile_size=tile_size,
+                tile_overlap=tile_overlap,
+                batch_size=batch_size,
+            )
+            output = (
+                np.concatenate(result, axis=0) if isinstance(result, list) else result
+            )
+        else:
+            # the previous output is copied rather than modified in place, since it
+            # may still be displayed
+            output = np.zeros(
+                (array.shape[0], *self._output.shape[1:]), dtype=self._output.dtype
+            )
+            n_samples = min(array.shape[0], self._output.shape[0])
+            output[:n_samples] = self._output[:n_samples]
+
+            if len(dirty) > 0:
+                self._predict_tiles(careamist, array, output, dirty, axes, batch_size)
+
+        self._fingerprints = fingerprints
+        self._output = output
+
+        return output
+
+    def _predict_tiles(
+        self: Self,
+        careamist: CAREamist,
+        array: NDArray,
+        output: NDArray,
+        dirty: list[tuple],
+        axes: str,
+        batch_size: int,
+    ) -> None:
+        """Predict the dirty tiles and stitch them into the output.
+
+        The tiles are cropped, predicted and stitched in the same way as in the
+        CAREamics tiled prediction, so that they match the tiles reused from the
+        previous output.
+
+        Parameters
+        ----------
+        careamist : CAREamist
+            CAREamist instance.
+        array : numpy.ndarray
+            Input, with axes SC(Z)YX.
+        output : numpy.ndarray
+            Output, with axes SC(Z)YX, modified in place.
+        dirty : list of tuple
+            Sample index and (crop, stitch, overlap crop) coordinates along each
+            spatial axis of the dirty tiles.
+        axes : str
+            Axes of the input.
+        batch_size : int
+            Batch size.
+        """
+        crops = [
+            array[
+                (slice(sample, sample + 1), slice(None))
+                + tuple(slice(*crop) for crop, _, _ in tile)
+            ]
+            for sample, tile in dirty
+        ]
+        stack = np.concatenate(crops, axis=0)
+
+        # all crops have the same size, which the network requires to be
+        # divisible by 2**depth
+        crop_size = stack.shape[2:]
+        multiple = 2**careamist.cfg.algorithm_config.model.depth
+        padding = [(0, 0), (0, 0)] + [(0, -c % multiple) for c in crop_size]
+        if any(p > 0 for _, p in padding):
+            reflect = all(p < c for (_, p), c in zip(padding[2:], crop_size))
+            stack = np.pad(stack, padding, mode="reflect" if reflect else "edge")
+
+        result = careamist.predict(  # type: ignore
+            stack, data_type="array", axes=axes, batch_size=batch_size
+        )
+        if isinstance(result, list):
+            result = np.concatenate(result, axis=0)
+
+        # stitch the tiles, without their overlap
+        for (sample, tile), prediction in zip(dirty, result):
+            stitch = tuple(slice(*coords) for _, coords, _ in tile)
+            overlap_crop = tuple(slice(*coords) for _, _, coords in tile)
+            output[(sample, slice(None), *stitch)] = prediction[
+                (slice(None), *overlap_crop)
+            ]
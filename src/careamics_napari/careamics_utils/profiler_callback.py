@@ -0,0 +1,187 @@
+"""PyTorch Lightning callback used to profile a window of training batches."""
+
+from datetime import datetime
+from pathlib import Path
+from queue import Queue
+from typing import Any, Optional, Union
+
+import torch
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from torch.profiler import ProfilerActivity, profile
+from typing_extensions import Self
+
+from careamics_napari.signals import TrainUpdate, TrainUpdateType
+
+TOP_OPERATORS = 10
+"""Number of operators reported in the UI."""
+
+
+class ProfilerCallBack(Callback):
+    """PyTorch Lightning callback profiling a number of batches on request.
+
+    Profiling is requested (from any thread) with `request`. The profiler is then
+    attached at the start of the next training batch and detached after the
+    requested number of batches, or at the end of the training. A Chrome trace and
+    the table of the operators are saved in the requested directory, and a summary
+    of the hottest operators is sent to the training queue as a
+    `TrainUpdateType.PROFILE` update.
+
+    Parameters
+    ----------
+    training_queue : Queue
+        Training queue used to pass updates between threads.
+    """
+
+    def __init__(self: Self, training_queue: Queue) -> None:
+        """Initialize the callback.
+
+        Parameters
+        ----------
+        training_queue : Queue
+            Training queue used to pass updates between threads.
+        """
+        self.training_queue = training_queue
+
+        # pending request, as (number of batches, log directory)
+        self._request: Optional[tuple[int, Path]] = None
+
+        self._profiler: Optional[profile] = None
+        self._log_dir = Path()
+        self._remaining = 0
+        self._n_batches = 0
+
+    def request(self: Self, n_batches: int, log_dir: Union[str, Path]) -> None:
+        """Request the profiling of the next batches.
+
+        Parameters
+        ----------
+        n_batches : int
+            Number of batches to profile.
+        log_dir : str or pathlib.Path
+            Directory in which the trace and the operator table are saved.
+        """
+        self._request = (n_batches, Path(log_dir))
+
+    def cancel(self: Self) -> None:
+        """Cancel the pending request, if any."""
+        self._request = None
+
+    def on_train_batch_start(
+        self, trainer: Trainer, pl_module: LightningModule, batch: Any, batch_idx: int
+    ) -> None:
+        """Method called at the beginning of each batch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        """
+        request, self._request = self._request, None
+        if request is None or self._profiler is not None:
+            return
+
+        self._n_batches, self._log_dir = request
+        self._remaining = self._n_batches
+
+        activities = [ProfilerActivity.CPU]
+        if pl_module.device.type == "cuda":
+            activities.append(ProfilerActivity.CUDA)
+
+        self._profiler = profile(activities=activities, profile_memory=True)
+        self._profiler.start()
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Method called at the end of each batch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        outputs : Any
+            Outputs of the training step.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        """
+        if self._profiler is None:
+            return
+
+        self._profiler.step()
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._stop(pl_module)
+
+    def on_train_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if self._profiler is not None:
+            self._stop(pl_module)
+
+    def _stop(self: Self, pl_module: LightningModule) -> None:
+        """Stop profiling, save the results and send the hottest operators.
+
+        Parameters
+        ----------
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+
+        if pl_module.device.type == "cuda":
+            torch.cuda.synchronize(pl_module.device)
+        profiler.stop()
+
+        sort_by = (
+            "self_cuda_time_total"
+            if pl_module.device.type == "cuda"
+            else "self_cpu_time_total"
+        )
+        averages = profiler.key_averages()
+
+        self._log_dir.mkdir(parents=True, exist_ok=True)
+        name = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        trace_path = self._log_dir / f"{name}.json"
+        table_path = self._log_dir / f"{name}.txt"
+
+        profiler.export_chrome_trace(str(trace_path))
+        table_path.write_text(averages.table(sort_by=sort_by))
+
+        self.training_queue.put(
+            TrainUpdate(
+                TrainUpdateType.PROFILE,
+                {
+                    "n_batches": self._n_batches - max(0, self._remaining),
+                    "trace": str(trace_path),
+                    "table": str(table_path),
+                    "top_operators": averages.table(
+                        sort_by=sort_by, row_limit=TOP_OPERATORS
+                    ),
+                },
+            )
+        )
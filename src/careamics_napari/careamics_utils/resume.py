@@ -0,0 +1,171 @@
+"""Utilities to resume an interrupted training from its checkpoints."""
+
+import hashlib
+import warnings
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from typing_extensions import Self
+
+from .chunked_dataset import chunked_fingerprint, is_chunked
+from .packed_cache import PackedFiles
+
+LAST_CHECKPOINT = "last.ckpt"
+"""Name of the checkpoint saved by CAREamics at the end of each epoch."""
+
+
+def find_last_checkpoint(work_dir: Union[str, Path]) -> Optional[Path]:
+    """Find the last checkpoint saved in a working directory.
+
+    Parameters
+    ----------
+    work_dir : str or pathlib.Path
+        Working directory of the training.
+
+    Returns
+    -------
+    pathlib.Path or None
+        Path to the last checkpoint, None if there is no checkpoint.
+    """
+    checkpoint_dir = Path(work_dir) / "checkpoints"
+
+    # PyTorch Lightning adds a version suffix (last-v1.ckpt) if the file exists
+    candidates = [
+        path
+        for path in checkpoint_dir.glob(f"{Path(LAST_CHECKPOINT).stem}*.ckpt")
+        if path.is_file()
+    ]
+    if len(candidates) == 0:
+        return None
+
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+
+def validation_fingerprint(datamodule: Any) -> Optional[str]:
+    """Compute a fingerprint of the validation data of a training data module.
+
+    Arrays are identified by their content, while files are identified by their
+    paths, sizes and modification times, chunked arrays by their location or
+    dask graph, and packed files by the key of their packing. The patch size is
+    included since it changes the validation patches.
+
+    Parameters
+    ----------
+    datamodule : Any
+        CAREamics training data module.
+
+    Returns
+    -------
+    str or None
+        Hexadecimal digest, None if the validation data is randomly split from
+        the training data.
+    """
+    val_data = getattr(datamodule, "val_data", None)
+    if val_data is None:
+        return None
+
+    digest = hashlib.blake2b()
+    digest.update(str(datamodule.data_config.patch_size).encode())
+
+    for source in (val_data, getattr(datamodule, "val_data_target", None)):
+        if is_chunked(source):
+            digest.update(chunked_fingerprint(source).encode())
+        elif isinstance(source, PackedFiles):
+            digest.update(source.key.encode())
+        elif isinstance(source, np.ndarray):
+            digest.update(f"{source.shape}{source.dtype.str}".encode())
+            digest.update(source.tobytes())
+        elif source is not None:
+            path = Path(source)
+            files = sorted(path.rglob("*")) if path.is_dir() else [path]
+            files = [file for file in files if file.is_file()]
+            for file in files:
+                stat = file.stat()
+                digest.update(
+                    f"{file.resolve()}:{stat.st_size}:{stat.st_mtime}".encode()
+                )
+
+    return digest.hexdigest()
+
+
+class ValidationSplitCallBack(Callback):
+    """PyTorch Lightning callback checking that resumed trainings use the same split.
+
+    The fingerprint of the validation data is computed at the start of the
+    training and saved in the checkpoints. When resuming from a checkpoint, the
+    training is aborted if the validation data differs from the saved one, or if
+    it is randomly split from the training data (CAREamics shuffles the patches
+    before splitting them), since validation patches would otherwise leak into
+    the training set.
+    """
+
+    def __init__(self: Self) -> None:
+        """Initialize the callback."""
+        self.fingerprint: Optional[str] = None
+
+        # state restored from a checkpoint
+        self._restored: Optional[dict[str, Any]] = None
+
+    def state_dict(self: Self) -> dict[str, Any]:
+        """Return the state saved in the checkpoints.
+
+        Returns
+        -------
+        dict of {str: Any}
+            Fingerprint of the validation data.
+        """
+        return {"fingerprint": self.fingerprint}
+
+    def load_state_dict(self: Self, state_dict: dict[str, Any]) -> None:
+        """Restore the state from a checkpoint.
+
+        Parameters
+        ----------
+        state_dict : dict of {str: Any}
+            Saved state.
+        """
+        self._restored = state_dict
+
+    def on_fit_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the start of the training, after the checkpoint loading.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+
+        Raises
+        ------
+        ValueError
+            If resuming with a random or different validation split.
+        """
+        restored, self._restored = self._restored, None
+        self.fingerprint = validation_fingerprint(getattr(trainer, "datamodule", None))
+
+        if trainer.ckpt_path is None:
+            return
+
+        if self.fingerprint is None:
+            raise ValueError(
+                "Resuming training requires explicitely passing validation data, "
+                "otherwise the validation patches are randomly drawn from the "
+                "training data and leak into the training set."
+            )
+
+        if restored is None:
+            warnings.warn(
+                "The checkpoint does not record its validation data, which cannot "
+                "be checked.",
+                stacklevel=1,
+            )
+        elif restored.get("fingerprint") != self.fingerprint:
+            raise ValueError(
+                "The validation data differs from the one used before the "
+                "checkpoint. Select the same validation data and patch size to "
+                "resume training."
+            )
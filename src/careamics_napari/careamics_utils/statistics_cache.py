@@ -0,0 +1,203 @@
+"""Persistent cache of the normalization statistics of the training files."""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+from platformdirs import user_cache_dir
+from typing_extensions import Self
+
+from .streaming_statistics import StreamingStatistics, file_statistics
+
+STATISTICS_CACHE = Path(user_cache_dir("careamics-napari")) / "statistics.json"
+"""Default location of the statistics cache."""
+
+CACHE_HISTOGRAM_BINS = 128
+"""Number of histogram bins stored per file and channel in the cache."""
+
+
+class StatisticsCache:
+    """Persistent cache of the normalization statistics of image files.
+
+    The per-channel statistics of each file are stored in a JSON file, keyed by
+    the file path and validated against its size, modification time and axes.
+    The statistics of a dataset are merged from the ones of its files, so that
+    only new or modified files are read. Files are read plane by plane, several
+    files in parallel, and never fully loaded in memory.
+
+    To keep the cache small, the histograms of the files are stored with
+    `CACHE_HISTOGRAM_BINS` bins, the entries of the files that no longer exist
+    are pruned, and the cache is only written when it changed.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path, default=STATISTICS_CACHE
+        Path to the JSON file of the cache.
+    n_workers : int or None, default=None
+        Number of files read in parallel, by default the number of CPUs.
+    """
+
+    def __init__(
+        self: Self,
+        path: Union[str, Path] = STATISTICS_CACHE,
+        n_workers: Optional[int] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path, default=STATISTICS_CACHE
+            Path to the JSON file of the cache.
+        n_workers : int or None, default=None
+            Number of files read in parallel, by default the number of CPUs.
+        """
+        self.path = Path(path)
+        self.n_workers = n_workers or os.cpu_count() or 1
+
+        self._entries: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                # corrupted cache, rebuilt from scratch
+                self._entries = {}
+
+    def dataset_statistics(
+        self: Self, files: list[Path], axes: str
+    ) -> tuple[StreamingStatistics, float]:
+        """Compute the per-channel statistics of a dataset.
+
+        Parameters
+        ----------
+        files : list of pathlib.Path
+            Files of the dataset.
+        axes : str
+            Axes of the files.
+
+        Returns
+        -------
+        tuple of (StreamingStatistics, float)
+            Statistics and computation time, in seconds, saved by the cached
+            files.
+
+        Raises
+        ------
+        ValueError
+            If there are no pixels in the files, or if their number of channels
+            differ.
+        """
+        keys = [str(Path(file).resolve()) for file in files]
+        stats = {key: os.stat(key) for key in keys}
+
+        saved = 0.0
+        missing = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.get("bins") == CACHE_HISTOGRAM_BINS
+                and entry["size"] == stats[key].st_size
+                and entry["mtime_ns"] == stats[key].st_mtime_ns
+                and entry["axes"] == axes
+            ):
+                saved += entry["seconds"]
+            elif key not in missing:
+                missing.append(key)
+
+        if len(missing) > 0:
+            with ThreadPoolExecutor(min(self.n_workers, len(missing))) as executor:
+                entries = executor.map(
+                    lambda key: self._compute_entry(key, axes, stats[key]), missing
+                )
+                self._entries.update(zip(missing, entries))
+
+        if self._prune() or len(missing) > 0:
+            self._save()
+
+        statistics: Optional[StreamingStatistics] = None
+        for file, key in zip(files, keys):
+            entry = self._entries[key]
+            if entry["count"] == 0:
+                continue
+
+            # merged at full resolution, the stored histograms being coarser
+            file_stats = StreamingStatistics.from_dict(entry)
+            if statistics is None:
+                statistics = StreamingStatistics(file_stats.n_channels)
+                statistics.merge(file_stats)
+            elif file_stats.n_channels != statistics.n_channels:
+                raise ValueError(
+                    f"{file} has {file_stats.n_channels} channels, other files have "
+                    f"{statistics.n_channels}."
+                )
+            else:
+                statistics.merge(file_stats)
+
+        if statistics is None:
+            raise ValueError("No pixels to compute the statistics of.")
+
+        return statistics, saved
+
+    @staticmethod
+    def _compute_entry(key: str, axes: str, stat: os.stat_result) -> dict[str, Any]:
+        """Compute the cache entry of a file.
+
+        Parameters
+        ----------
+        key : str
+            Resolved path to the file.
+        axes : str
+            Axes of the file.
+        stat : os.stat_result
+            Status of the file, used to validate the entry.
+
+        Returns
+        -------
+        dict of {str: Any}
+            Cache entry.
+        """
+        start = time.perf_counter()
+        statistics = file_statistics(Path(key), axes)
+        entry: dict[str, Any] = {"count": 0, "histogram": []}
+        if statistics is not None:
+            entry = statistics.coarsened(CACHE_HISTOGRAM_BINS).to_dict()
+            # integer counts are enough for the percentiles, and more compact
+            entry["histogram"] = np.rint(entry["histogram"]).astype(int).tolist()
+        entry.update(
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            axes=axes,
+            bins=CACHE_HISTOGRAM_BINS,
+            seconds=time.perf_counter() - start,
+        )
+        return entry
+
+    def _prune(self: Self) -> bool:
+        """Remove the entries of the files that no longer exist.
+
+        Returns
+        -------
+        bool
+            Whether entries were removed.
+        """
+        removed = [key for key in self._entries if not os.path.exists(key)]
+        for key in removed:
+            del self._entries[key]
+
+        return len(removed) > 0
+
+    def clear(self: Self) -> None:
+        """Remove all entries from the cache."""
+        self._entries = {}
+        self._save()
+
+    def _save(self: Self) -> None:
+        """Write the cache, through a temporary file to never leave it partial."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        temporary.write_text(json.dumps(self._entries))
+        os.replace(temporary, self.path)
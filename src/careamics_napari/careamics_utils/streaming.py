@@ -0,0 +1,353 @@
+"""Low latency denoising of a stream of frames."""
+
+import time
+from collections import deque
+from collections.abc import Sequence
+from enum import Enum
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+import numpy as np
+import torch
+from careamics import CAREamist
+from careamics.dataset.dataset_utils import reshape_array
+from careamics.transforms import Denormalize, Normalize
+from numpy.typing import NDArray
+from typing_extensions import Self
+
+
+class StreamingPolicy(str, Enum):
+    """Policy applied when a frame is pushed while the buffer is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    """Drop the oldest buffered frame to make room for the new one."""
+
+    SKIP = "skip"
+    """Drop the new frame."""
+
+    BLOCK = "block"
+    """Wait until there is room in the buffer."""
+
+
+class StreamingDenoiser:
+    """Denoise a stream of frames with the model of a CAREamist instance.
+
+    Frames are pushed into a bounded buffer and denoised in micro-batches by a
+    background thread, which calls `callback` with the index and the prediction of
+    each frame, in the order in which the frames were pushed. The model is called
+    directly, bypassing the Lightning trainer whose per-call overhead is too large
+    for live imaging.
+
+    Frames have the axes of the CAREamist data configuration, without the S and T
+    axes. Their spatial dimensions are padded to a multiple of the network
+    downsampling factor if necessary.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance, with a trained model and normalization statistics.
+    callback : Callable[[int, numpy.ndarray], None] or None, default=None
+        Function called from the denoising thread with the index of each frame and
+        its prediction.
+    buffer_size : int, default=8
+        Maximum number of frames waiting to be denoised.
+    batch_size : int, default=4
+        Maximum number of frames denoised together.
+    policy : StreamingPolicy, default=StreamingPolicy.DROP_OLDEST
+        Policy applied when a frame is pushed while the buffer is full.
+    latency_window : int, default=1000
+        Number of frames over which the latency percentiles are computed.
+
+    Attributes
+    ----------
+    n_pushed : int
+        Number of frames pushed.
+    n_dropped : int
+        Number of frames dropped because the buffer was full.
+    n_denoised : int
+        Number of frames denoised.
+    exception : Exception or None
+        Exception raised by the denoising thread, which then stops.
+    """
+
+    def __init__(
+        self: Self,
+        careamist: CAREamist,
+        callback: Optional[Callable[[int, NDArray], None]] = None,
+        buffer_size: int = 8,
+        batch_size: int = 4,
+        policy: StreamingPolicy = StreamingPolicy.DROP_OLDEST,
+        latency_window: int = 1000,
+    ) -> None:
+        """Initialize the denoiser.
+
+        Parameters
+        ----------
+        careamist : CAREamist
+            CAREamist instance, with a trained model and normalization statistics.
+        callback : Callable[[int, numpy.ndarray], None] or None, default=None
+            Function called from the denoising thread with the index of each frame
+            and its prediction.
+        buffer_size : int, default=8
+            Maximum number of frames waiting to be denoised.
+        batch_size : int, default=4
+            Maximum number of frames denoised together.
+        policy : StreamingPolicy, default=StreamingPolicy.DROP_OLDEST
+            Policy applied when a frame is pushed while the buffer is full.
+        latency_window : int, default=1000
+            Number of frames over which the latency percentiles are computed.
+        """
+        if buffer_size < 1 or batch_size < 1:
+            raise ValueError("Buffer and batch sizes must be strictly positive.")
+
+        self.callback = callback
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.policy = StreamingPolicy(policy)
+
+        data_config = careamist.cfg.data_config
+        if data_config.image_means is None or data_config.image_stds is None:
+            raise ValueError("The CAREamist has no normalization statistics.")
+
+        self._frame_axes = "".join(a for a in data_config.axes if a not in "ST")
+        self._normalize = Normalize(data_config.image_means, data_config.image_stds)
+        self._denormalize = Denormalize(data_config.image_means, data_config.image_stds)
+        self._multiple = 2**careamist.cfg.algorithm_config.model.depth
+
+        self._model = careamist.model.model
+        self._device = next(careamist.model.parameters()).device
+
+        # frames waiting to be denoised, as (index, push time, frame)
+        self._buffer: deque[tuple[int, float, NDArray]] = deque()
+        self._condition = Condition()
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._thread: Optional[Thread] = None
+        self._running = False
+
+        self.n_pushed = 0
+        self.n_dropped = 0
+        self.n_denoised = 0
+        self.exception: Optional[Exception] = None
+
+    def __enter__(self: Self) -> Self:
+        """Start the denoiser.
+
+        Returns
+        -------
+        StreamingDenoiser
+            The started denoiser.
+        """
+        self.start()
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        """Stop the denoiser once the buffered frames are denoised.
+
+        Parameters
+        ----------
+        *args : object
+            Exception information, ignored.
+        """
+        self.stop()
+
+    @property
+    def queue_depth(self: Self) -> int:
+        """Number of frames waiting to be denoised.
+
+        Returns
+        -------
+        int
+            Number of buffered frames.
+        """
+        with self._condition:
+            return len(self._buffer)
+
+    def start(self: Self) -> None:
+        """Start the denoising thread."""
+        if self._running:
+            return
+
+        self._model.eval()
+        self._running = True
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self: Self, drain: bool = True) -> None:
+        """Stop the denoising thread.
+
+        Parameters
+        ----------
+        drain : bool, default=True
+            Whether to denoise the buffered frames before stopping, otherwise they
+            are discarded.
+        """
+        with self._condition:
+            if not drain:
+                self.n_dropped += len(self._buffer)
+                self._buffer.clear()
+
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def push(self: Self, frame: NDArray) -> Optional[int]:
+        """Push a frame to be denoised.
+
+        Parameters
+        ----------
+        frame : numpy.ndarray
+            Frame, with the axes of the data configuration without S and T.
+
+        Returns
+        -------
+        int or None
+            Index of the frame, or None if it was skipped because the buffer was
+            full.
+        """
+        with self._condition:
+            if not self._running:
+                raise RuntimeError(
+                    "The streaming denoiser is not running."
+                ) from self.exception
+
+            if len(self._buffer) >= self.buffer_size:
+                if self.policy == StreamingPolicy.SKIP:
+                    self.n_pushed += 1
+                    self.n_dropped += 1
+                    return None
+                elif self.policy == StreamingPolicy.DROP_OLDEST:
+                    self._buffer.popleft()
+                    self.n_dropped += 1
+                else:
+                    self._condition.wait_for(
+                        lambda: len(self._buffer) < self.buffer_size
+                        or not self._running
+                    )
+                    if not self._running:
+                        raise RuntimeError(
+                            "The streaming denoiser stopped while waiting."
+                        ) from self.exception
+
+            index = self.n_pushed
+            self.n_pushed += 1
+            self._buffer.append((index, time.perf_counter(), frame))
+            self._condition.notify_all()
+
+        return index
+
+    def reset_statistics(self: Self) -> None:
+        """Reset the latencies and the counts of dropped and denoised frames.
+
+        This allows excluding warm-up frames from the statistics. The frame indices
+        keep increasing.
+        """
+        with self._condition:
+            self._latencies.clear()
+            self.n_dropped = 0
+            self.n_denoised = 0
+
+    def latency_percentiles(
+        self: Self, percentiles: Sequence[float] = (50, 90, 99)
+    ) -> dict[float, float]:
+        """Percentiles of the latency between pushing and emitting a frame.
+
+        Parameters
+        ----------
+        percentiles : sequence of float, default=(50, 90, 99)
+            Percentiles to compute.
+
+        Returns
+        -------
+        dict of {float: float}
+            Latency, in seconds, for each percentile, NaN if no frame was denoised.
+        """
+        # the deque is appended to by the worker thread
+        with self._condition:
+            latencies = np.array(self._latencies)
+
+        if latencies.size == 0:
+            return {p: float("nan") for p in percentiles}
+
+        return dict(zip(percentiles, np.percentile(latencies, percentiles).tolist()))
+
+    def _run(self: Self) -> None:
+        """Denoise the buffered frames until stopped."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._buffer or not self._running)
+                if not self._buffer:  # stopped and drained
+                    return
+
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(min(self.batch_size, len(self._buffer)))
+                ]
+                self._condition.notify_all()
+
+            try:
+                predictions = self._predict([frame for _, _, frame in batch])
+            except Exception as e:
+                with self._condition:
+                    self.exception = e
+                    self.n_dropped += len(batch) + len(self._buffer)
+                    self._buffer.clear()
+                    self._running = False
+                    self._condition.notify_all()
+                return
+
+            for (index, push_time, _), prediction in zip(batch, predictions):
+                with self._condition:
+                    self._latencies.append(time.perf_counter() - push_time)
+                    self.n_denoised += 1
+
+                if self.callback is not None:
+                    self.callback(index, prediction)
+
+    def _predict(self: Self, frames: list[NDArray]) -> list[NDArray]:
+        """Denoise a micro-batch of frames.
+
+        Parameters
+        ----------
+        frames : list of numpy.ndarray
+            Frames, with the axes of the data configuration without S and T.
+
+        Returns
+        -------
+        list of numpy.ndarray
+            Predictions, with the same axes as the frames.
+        """
+        # normalize each frame, the normalization expects C(Z)YX
+        batch = np.stack(
+            [
+                self._normalize(
+                    reshape_array(frame, self._frame_axes)[0].astype(np.float32)
+                )[0]
+                for frame in frames
+            ]
+        )
+
+        # pad the spatial dimensions to a multiple of the downsampling factor
+        spatial = batch.shape[2:]
+        padding = [(0, 0), (0, 0)] + [(0, -s % self._multiple) for s in spatial]
+        if any(after > 0 for _, after in padding):
+            batch = np.pad(batch, padding, mode="reflect")
+
+        with torch.inference_mode():
+            output = self._model(torch.from_numpy(batch).to(self._device))
+
+        output = self._denormalize(output.cpu().numpy())
+        output = output[(slice(None), slice(None), *[slice(s) for s in spatial])]
+
+        # restore the axes of the frames
+        predictions = []
+        for prediction in output:
+            if "C" in self._frame_axes:
+                prediction = np.moveaxis(prediction, 0, self._frame_axes.index("C"))
+            else:
+                prediction = prediction[0]
+            predictions.append(prediction)
+
+        return predictions
@@ -0,0 +1,388 @@
+"""Streaming statistics of images too large to be loaded in memory."""
+
+from collections.abc import Generator, Sequence
+from itertools import product
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import tifffile
+import zarr
+from typing_extensions import Self
+
+HISTOGRAM_BINS = 1024
+"""Number of bins of the histograms used to estimate the percentiles."""
+
+
+class StreamingStatistics:
+    """Mergeable per-channel statistics, updated chunk by chunk.
+
+    Means and variances are accumulated with Welford's algorithm, and merged
+    with its parallel variant, so that chunks and files can be processed
+    independently. Percentiles are estimated from a histogram spanning the
+    range of the values, which is redistributed when the range grows.
+
+    Parameters
+    ----------
+    n_channels : int
+        Number of channels.
+    bins : int, default=HISTOGRAM_BINS
+        Number of bins of the histograms.
+    """
+
+    def __init__(self: Self, n_channels: int, bins: int = HISTOGRAM_BINS) -> None:
+        """Initialize empty statistics.
+
+        Parameters
+        ----------
+        n_channels : int
+            Number of channels.
+        bins : int, default=HISTOGRAM_BINS
+            Number of bins of the histograms.
+        """
+        self.count = 0
+        self.mean = np.zeros(n_channels)
+        self.m2 = np.zeros(n_channels)
+        self.minimum = np.full(n_channels, np.inf)
+        self.maximum = np.full(n_channels, -np.inf)
+        self.histogram = np.zeros((n_channels, bins))
+
+    @property
+    def n_channels(self: Self) -> int:
+        """Number of channels.
+
+        Returns
+        -------
+        int
+            Number of channels.
+        """
+        return len(self.mean)
+
+    @property
+    def means(self: Self) -> list[float]:
+        """Per-channel means.
+
+        Returns
+        -------
+        list of float
+            Means.
+        """
+        return self.mean.tolist()
+
+    @property
+    def stds(self: Self) -> list[float]:
+        """Per-channel standard deviations.
+
+        Returns
+        -------
+        list of float
+            Standard deviations.
+        """
+        if self.count == 0:
+            return [0.0] * self.n_channels
+
+        return np.sqrt(self.m2 / self.count).tolist()
+
+    def update(self: Self, chunk: np.ndarray) -> None:
+        """Add a chunk of values.
+
+        Parameters
+        ----------
+        chunk : numpy.ndarray
+            Values, with shape (C, N).
+        """
+        values = np.asarray(chunk, dtype=np.float64)
+        if values.size == 0:
+            return
+
+        other = StreamingStatistics(self.n_channels, self.histogram.shape[1])
+        other.count = values.shape[1]
+        other.mean = values.mean(axis=1)
+        other.m2 = ((values - other.mean[:, None]) ** 2).sum(axis=1)
+        other.minimum = values.min(axis=1)
+        other.maximum = values.max(axis=1)
+        for channel in range(self.n_channels):
+            other.histogram[channel] = np.histogram(
+                values[channel],
+                bins=other.histogram.shape[1],
+                range=_bin_range(other.minimum[channel], other.maximum[channel]),
+            )[0]
+
+        self.merge(other)
+
+    def merge(self: Self, other: "StreamingStatistics") -> None:
+        """Merge the statistics of other values.
+
+        The histograms of `other` are redistributed into the bins of these
+        statistics, so that their numbers of bins can differ.
+
+        Parameters
+        ----------
+        other : StreamingStatistics
+            Statistics of other values.
+
+        Raises
+        ------
+        ValueError
+            If the numbers of channels differ.
+        """
+        if other.n_channels != self.n_channels:
+            raise ValueError(
+                f"Cannot merge statistics of {other.n_channels} channels into "
+                f"statistics of {self.n_channels} channels."
+            )
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta**2 * self.count * other.count / count
+
+        minimum = np.minimum(self.minimum, other.minimum)
+        maximum = np.maximum(self.maximum, other.maximum)
+        histogram = np.zeros_like(self.histogram)
+        for channel in range(self.n_channels):
+            new_range = _bin_range(minimum[channel], maximum[channel])
+            for source in (self, other):
+                if source.count > 0:
+                    histogram[channel] += _rebin(
+                        source.histogram[channel],
+                        _bin_range(source.minimum[channel], source.maximum[channel]),
+                        new_range,
+                        self.histogram.shape[1],
+                    )
+
+        self.count = count
+        self.minimum = minimum
+        self.maximum = maximum
+        self.histogram = histogram
+
+    def coarsened(self: Self, bins: int) -> "StreamingStatistics":
+        """Copy of the statistics with fewer histogram bins, e.g. to be stored.
+
+        Parameters
+        ----------
+        bins : int
+            Number of bins, dividing the current number of bins.
+
+        Returns
+        -------
+        StreamingStatistics
+            Statistics with `bins` bins, the counts of merged bins being summed.
+
+        Raises
+        ------
+        ValueError
+            If `bins` does not divide the current number of bins.
+        """
+        if self.histogram.shape[1] % bins != 0:
+            raise ValueError(
+                f"Cannot coarsen {self.histogram.shape[1]} bins into {bins} bins."
+            )
+
+        statistics = StreamingStatistics.from_dict(self.to_dict())
+        statistics.histogram = self.histogram.reshape(self.n_channels, bins, -1).sum(
+            axis=2
+        )
+        return statistics
+
+    def percentiles(self: Self, q: Sequence[float]) -> list[list[float]]:
+        """Estimate per-channel percentiles.
+
+        Parameters
+        ----------
+        q : sequence of float
+            Percentiles, between 0 and 100.
+
+        Returns
+        -------
+        list of list of float
+            Percentiles of each channel.
+        """
+        percentiles = []
+        for channel in range(self.n_channels):
+            low, high = _bin_range(self.minimum[channel], self.maximum[channel])
+            edges = np.linspace(low, high, self.histogram.shape[1] + 1)
+            cumulative = np.concatenate([[0], np.cumsum(self.histogram[channel])])
+            cumulative = cumulative / max(cumulative[-1], 1)
+
+            values = np.interp(np.asarray(q) / 100, cumulative, edges)
+            percentiles.append(
+                np.clip(values, self.minimum[channel], self.maximum[channel]).tolist()
+            )
+
+        return percentiles
+
+    def to_dict(self: Self) -> dict[str, Any]:
+        """Serialize the statistics to JSON compatible types.
+
+        Returns
+        -------
+        dict of {str: Any}
+            Statistics.
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "m2": self.m2.tolist(),
+            "minimum": self.minimum.tolist(),
+            "maximum": self.maximum.tolist(),
+            "histogram": self.histogram.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any]) -> "StreamingStatistics":
+        """Deserialize statistics.
+
+        Parameters
+        ----------
+        state : dict of {str: Any}
+            Statistics, as returned by `to_dict`.
+
+        Returns
+        -------
+        StreamingStatistics
+            Statistics.
+        """
+        histogram = np.asarray(state["histogram"], dtype=np.float64)
+        statistics = cls(histogram.shape[0], histogram.shape[1])
+        statistics.count = state["count"]
+        statistics.mean = np.asarray(state["mean"], dtype=np.float64)
+        statistics.m2 = np.asarray(state["m2"], dtype=np.float64)
+        statistics.minimum = np.asarray(state["minimum"], dtype=np.float64)
+        statistics.maximum = np.asarray(state["maximum"], dtype=np.float64)
+        statistics.histogram = histogram
+        return statistics
+
+
+def _bin_range(minimum: float, maximum: float) -> tuple[float, float]:
+    """Range of the histogram bins, widened if all values are equal.
+
+    Parameters
+    ----------
+    minimum : float
+        Minimum value.
+    maximum : float
+        Maximum value.
+
+    Returns
+    -------
+    tuple of (float, float)
+        Lower and upper edges of the bins.
+    """
+    if maximum > minimum:
+        return float(minimum), float(maximum)
+
+    return float(minimum) - 0.5, float(minimum) + 0.5
+
+
+def _rebin(
+    histogram: np.ndarray,
+    old_range: tuple[float, float],
+    new_range: tuple[float, float],
+    bins: int,
+) -> np.ndarray:
+    """Redistribute the counts of a histogram into the bins of another range.
+
+    The values are assumed uniformly distributed within each bin, so that the
+    counts of a bin are split proportionally between the new bins it overlaps.
+
+    Parameters
+    ----------
+    histogram : numpy.ndarray
+        Counts.
+    old_range : tuple of (float, float)
+        Range of the bins of `histogram`.
+    new_range : tuple of (float, float)
+        Range of the new bins, containing `old_range`.
+    bins : int
+        Number of new bins.
+
+    Returns
+    -------
+    numpy.ndarray
+        Counts in the new bins.
+    """
+    if old_range == new_range and bins == len(histogram):
+        return histogram
+
+    old_edges = np.linspace(*old_range, len(histogram) + 1)
+    new_edges = np.linspace(*new_range, bins + 1)
+    cumulative = np.concatenate([[0], np.cumsum(histogram)])
+    return np.diff(np.interp(new_edges, old_edges, cumulative))
+
+
+def iter_tiff_chunks(path: Path, axes: str) -> Generator[np.ndarray, None, None]:
+    """Read a TIFF file plane by plane.
+
+    Only one plane, with all its channels, is loaded at a time.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the TIFF file.
+    axes : str
+        Axes of the image.
+
+    Yields
+    ------
+    numpy.ndarray
+        Values of a plane, with shape (C, N).
+
+    Raises
+    ------
+    ValueError
+        If the number of dimensions of the image does not match the axes.
+    """
+    with tifffile.imread(path, aszarr=True) as store:
+        array = zarr.open(store, mode="r")
+        if array.ndim != len(axes):
+            raise ValueError(
+                f"{path} has {array.ndim} dimensions, which does not match the "
+                f"axes {axes}."
+            )
+
+        # planes are indexed by all axes but the channels, Y and X
+        outer = [i for i, axis in enumerate(axes) if axis not in "CYX"]
+        plane_axes = [axis for axis in axes if axis in "CYX"]
+        for index in product(*(range(array.shape[i]) for i in outer)):
+            selection: list[Any] = [slice(None)] * array.ndim
+            for i, position in zip(outer, index):
+                selection[i] = position
+
+            plane = np.asarray(array[tuple(selection)])
+            if "C" in plane_axes:
+                plane = np.moveaxis(plane, plane_axes.index("C"), 0)
+            else:
+                plane = plane[np.newaxis]
+
+            yield plane.reshape(plane.shape[0], -1)
+
+
+def file_statistics(
+    path: Path, axes: str, bins: int = HISTOGRAM_BINS
+) -> Optional[StreamingStatistics]:
+    """Compute the statistics of a TIFF file, plane by plane.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        Path to the TIFF file.
+    axes : str
+        Axes of the image.
+    bins : int, default=HISTOGRAM_BINS
+        Number of bins of the histograms.
+
+    Returns
+    -------
+    StreamingStatistics or None
+        Statistics, None if the file is empty.
+    """
+    statistics: Optional[StreamingStatistics] = None
+    for chunk in iter_tiff_chunks(path, axes):
+        if statistics is None:
+            statistics = StreamingStatistics(chunk.shape[0], bins)
+        statistics.update(chunk)
+
+    return statistics
@@ -0,0 +1,238 @@
+"""Measurement of the training and data loading throughput."""
+
+import csv
+import json
+from collections import deque
+from pathlib import Path
+from typing import Optional, Union
+
+from typing_extensions import Self
+
+
+class ThroughputMeter:
+    """Record the time spent loading data and computing for each training batch.
+
+    The time between the end of a batch (or the start of an epoch) and the start of
+    the next batch is spent waiting on the dataloader, while the time between the
+    start and the end of a batch is spent in the forward and backward passes and in
+    the optimizer step. Statistics are computed over a moving window of batches,
+    and epochs durations (including validation) are averaged to estimate the
+    remaining time.
+
+    Parameters
+    ----------
+    window : int, default=50
+        Number of batches over which the moving statistics are computed.
+    epoch_smoothing : float, default=0.3
+        Weight of the last epoch in the exponential moving average of the epoch
+        duration.
+    """
+
+    def __init__(self: Self, window: int = 50, epoch_smoothing: float = 0.3) -> None:
+        """Initialize the meter.
+
+        Parameters
+        ----------
+        window : int, default=50
+            Number of batches over which the moving statistics are computed.
+        epoch_smoothing : float, default=0.3
+            Weight of the last epoch in the exponential moving average of the epoch
+            duration.
+        """
+        self.window = window
+        self.epoch_smoothing = epoch_smoothing
+        self.reset()
+
+    def reset(self: Self) -> None:
+        """Clear all measurements."""
+        # epoch, batch, data time, compute time, number of patches
+        self.records: list[tuple[int, int, float, float, int]] = []
+        self._recent: deque[tuple[float, float, int]] = deque(maxlen=self.window)
+
+        self._epoch_start: Optional[float] = None
+        self._epoch_duration: Optional[float] = None
+        self._last_end: Optional[float] = None
+        self._batch_start: Optional[float] = None
+        self._data_time = 0.0
+
+    def start_epoch(self: Self, now: float) -> None:
+        """Register the start of an epoch.
+
+        Parameters
+        ----------
+        now : float
+            Current time, in seconds.
+        """
+        self._epoch_start = now
+        self._last_end = now
+
+    def end_epoch(self: Self, now: float) -> None:
+        """Register the end of an epoch.
+
+        Parameters
+        ----------
+        now : float
+            Current time, in seconds.
+        """
+        if self._epoch_start is None:
+            return
+
+        duration = now - self._epoch_start
+        if self._epoch_duration is None:
+            self._epoch_duration = duration
+        else:
+            self._epoch_duration = (
+                self.epoch_smoothing * duration
+                + (1 - self.epoch_smoothing) * self._epoch_duration
+            )
+
+        self._epoch_start = None
+
+    def start_batch(self: Self, now: float) -> None:
+        """Register the start of a batch, once its data has been loaded.
+
+        Parameters
+        ----------
+        now : float
+            Current time, in seconds.
+        """
+        self._data_time = 0.0 if self._last_end is None else now - self._last_end
+        self._batch_start = now
+
+    def end_batch(
+        self: Self, now: float, epoch: int, batch: int, n_patches: int
+    ) -> None:
+        """Register the end of a batch.
+
+        Parameters
+        ----------
+        now : float
+            Current time, in seconds.
+        epoch : int
+            Index of the epoch.
+        batch : int
+            Index of the batch.
+        n_patches : int
+            Number of patches in the batch.
+        """
+        if self._batch_start is None:
+            return
+
+        compute_time = now - self._batch_start
+        self.records.append((epoch, batch, self._data_time, compute_time, n_patches))
+        self._recent.append((self._data_time, compute_time, n_patches))
+
+        self._batch_start = None
+        self._last_end = now
+
+    @property
+    def patches_per_second(self: Self) -> float:
+        """Number of patches processed per second over the recent batches.
+
+        Returns
+        -------
+        float
+            Throughput, -1 if no batch was recorded.
+        """
+        total = sum(data + compute for data, compute, _ in self._recent)
+        if total <= 0:
+            return -1
+
+        return sum(n for _, _, n in self._recent) / total
+
+    @property
+    def data_share(self: Self) -> float:
+        """Fraction of the time spent waiting on the dataloader.
+
+        Returns
+        -------
+        float
+            Share of the recent batches time spent loading data, between 0 and 1,
+            -1 if no batch was recorded.
+        """
+        total = sum(data + compute for data, compute, _ in self._recent)
+        if total <= 0:
+            return -1
+
+        return sum(data for data, _, _ in self._recent) / total
+
+    def eta(self: Self, remaining_batches: int, remaining_epochs: int) -> float:
+        """Estimate the remaining training time.
+
+        Parameters
+        ----------
+        remaining_batches : int
+            Number of batches remaining in the current epoch.
+        remaining_epochs : int
+            Number of epochs remaining after the current one.
+
+        Returns
+        -------
+        float
+            Remaining time, in seconds, -1 if it cannot be estimated yet.
+        """
+        if len(self._recent) == 0:
+            return -1
+
+        total = sum(data + compute for data, compute, _ in self._recent)
+        remaining = remaining_batches * total / len(self._recent)
+
+        if remaining_epochs > 0:
+            if self._epoch_duration is None:
+                return -1
+            remaining += remaining_epochs * self._epoch_duration
+
+        return remaining
+
+    def summary(self: Self) -> dict[str, float]:
+        """Summarize the throughput over all recorded batches.
+
+        Returns
+        -------
+        dict of {str: float}
+            Number of batches and patches, total data and compute times, overall
+            throughput and data loading share.
+        """
+        data_time = sum(r[2] for r in self.records)
+        compute_time = sum(r[3] for r in self.records)
+        n_patches = sum(r[4] for r in self.records)
+        total = data_time + compute_time
+
+        return {
+            "n_batches": len(self.records),
+            "n_patches": n_patches,
+            "data_time": data_time,
+            "compute_time": compute_time,
+            "patches_per_second": n_patches / total if total > 0 else -1,
+            "data_share": data_time / total if total > 0 else -1,
+        }
+
+    def save(self: Self, path: Union[str, Path]) -> tuple[Path, Path]:
+        """Save the per-batch records as CSV and the summary as JSON.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path of the files, without extension.
+
+        Returns
+        -------
+        tuple of (pathlib.Path, pathlib.Path)
+            Paths to the CSV and JSON files.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        csv_path = path.with_suffix(".csv")
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["epoch", "batch", "data_time", "compute_time", "n_patches"]
+            )
+            writer.writerows(self.records)
+
+        json_path = path.with_suffix(".json")
+        with open(json_path, "w") as f:
+            json.dump(self.summary(), f, indent=4)
+
+        return csv_path, json_path
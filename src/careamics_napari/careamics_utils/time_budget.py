@@ -0,0 +1,234 @@
+"""PyTorch Lightning callback stopping the training at a wall-clock time budget."""
+
+import time
+from queue import Queue
+from typing import Any
+
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from typing_extensions import Self
+
+from careamics_napari.signals import TrainUpdate, TrainUpdateType
+
+BUDGET_INTERVAL = 1.0
+"""Minimum time, in seconds, between two updates of the remaining budget."""
+
+
+class TimeBudgetCallBack(Callback):
+    """PyTorch Lightning callback stopping the training at a time budget.
+
+    The duration of an epoch, validation included, is estimated from the epochs
+    already trained. The training stops at the end of the last epoch that is
+    expected to finish within the budget, or after the current batch if the
+    budget is exceeded. The weights with the best validation loss, saved by the
+    CAREamics checkpoint callback, are then restored.
+
+    The remaining budget and the projected number of epochs are sent to the
+    training queue.
+
+    Parameters
+    ----------
+    budget : float
+        Time budget of the training, in seconds.
+    training_queue : Queue
+        Training queue used to pass updates between threads.
+
+    Attributes
+    ----------
+    stop_reason : str
+        Reason of the stop, empty if the training was not stopped.
+    """
+
+    def __init__(self: Self, budget: float, training_queue: Queue) -> None:
+        """Initialize the callback.
+
+        Parameters
+        ----------
+        budget : float
+            Time budget of the training, in seconds.
+        training_queue : Queue
+            Training queue used to pass updates between threads.
+        """
+        self.budget = budget
+        self.training_queue = training_queue
+
+        self.stop_reason = ""
+        self._start = 0.0
+        self._epoch_start = 0.0
+        self._epoch_durations: list[float] = []
+        self._first_epoch = 0
+        self._last_update = 0.0
+
+    @property
+    def epoch_duration(self: Self) -> float:
+        """Estimated duration of an epoch, in seconds, 0 before the first epoch.
+
+        Returns
+        -------
+        float
+            Duration of an epoch.
+        """
+        if len(self._epoch_durations) == 0:
+            return 0.0
+
+        # the first epoch includes the warm-up of the dataloaders and kernels
+        durations = self._epoch_durations
+        if len(durations) > 1:
+            durations = durations[1:]
+
+        return sum(durations) / len(durations)
+
+    def remaining(self: Self) -> float:
+        """Remaining time budget, in seconds.
+
+        Returns
+        -------
+        float
+            Remaining budget, negative if exceeded.
+        """
+        return self.budget - (time.perf_counter() - self._start)
+
+    def on_train_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the beginning of the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self.stop_reason = ""
+        self._start = time.perf_counter()
+        self._epoch_durations.clear()
+        self._first_epoch = trainer.current_epoch
+        self._put_budget(trainer, force=True)
+
+    def on_train_epoch_start(
+        self, trainer: Trainer, pl_module: LightningModule
+    ) -> None:
+        """Method called at the beginning of each epoch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Method called at the end of each batch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        outputs : Any
+            Outputs of the training step.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        """
+        if self.remaining() <= 0:
+            self._stop(trainer)
+
+        self._put_budget(trainer)
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of each epoch, after the validation.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        self._epoch_durations.append(time.perf_counter() - self._epoch_start)
+
+        # stop if the next epoch is not expected to finish within the budget
+        if self.remaining() < self.epoch_duration:
+            self._stop(trainer)
+
+        self._put_budget(trainer, force=True)
+
+    def on_train_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Method called at the end of the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        """
+        if self.stop_reason == "":
+            return
+
+        # restore the weights with the best validation loss
+        checkpoint_callback = trainer.checkpoint_callback
+        best_path = getattr(checkpoint_callback, "best_model_path", "")
+        if best_path != "":
+            # loaded through the strategy, to wait for checkpoints being written
+            checkpoint = trainer.strategy.load_checkpoint(best_path)
+            pl_module.load_state_dict(checkpoint["state_dict"])
+
+    def _stop(self: Self, trainer: Trainer) -> None:
+        """Stop the training.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        """
+        trainer.should_stop = True
+        self.stop_reason = (
+            f"Time budget of {self.budget / 60:g} min reached, best weights kept"
+        )
+
+    def _put_budget(self: Self, trainer: Trainer, force: bool = False) -> None:
+        """Send the remaining budget and projected number of epochs.
+
+        Updates are sent at most every `BUDGET_INTERVAL`, unless forced.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        force : bool, default=False
+            Whether to send the updates regardless of the interval.
+        """
+        now = time.perf_counter()
+        if not force and now - self._last_update < BUDGET_INTERVAL:
+            return
+        self._last_update = now
+
+        remaining = max(0.0, self.remaining())
+        self.training_queue.put(
+            TrainUpdate(TrainUpdateType.REMAINING_BUDGET, remaining)
+        )
+
+        if self.epoch_duration > 0:
+            # epochs trained, and epochs expected to fit in the remaining budget
+            completed = self._first_epoch + len(self._epoch_durations)
+            projected = completed + int(remaining // self.epoch_duration)
+            if trainer.max_epochs is not None and trainer.max_epochs > 0:
+                projected = min(projected, trainer.max_epochs)
+            if trainer.should_stop:
+                projected = completed
+
+            self.training_queue.put(
+                TrainUpdate(TrainUpdateType.PROJECTED_EPOCHS, projected)
+            )
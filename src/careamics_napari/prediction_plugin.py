@@ -2,16 +2,29 @@
 
 from pathlib import Path
 from queue import Queue
+from threading import Event
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
+from careamics import CAREamist
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import (
-    QHBoxLayout, QVBoxLayout, QWidget,
-    QLabel, QPushButton, QLineEdit, QFileDialog
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QVBoxLayout,
+    QWidget,
 )
 from typing_extensions import Self
 
-from careamics import CAREamist
+from careamics_napari.careamics_utils import (
+    WEIGHTS_SUFFIX,
+    PredictionCache,
+    UpdaterCallBack,
+    load_weights,
+)
 from careamics_napari.signals import (
     PredictionSignal,
     PredictionState,
@@ -20,18 +33,17 @@ from careamics_napari.signals import (
     PredictionUpdateType,
     TrainingState,
     TrainingStatus,
+    TrainUpdateType,
+    UpdateChannel,
 )
+from careamics_napari.utils import StatusThrottle
 from careamics_napari.widgets import (
     CAREamicsBanner,
     PredictionWidget,
     ScrollWidgetWrapper,
     create_gpu_label,
 )
-from careamics_napari.careamics_utils import UpdaterCallBack
-from careamics_napari.workers import predict_worker
-from careamics_napari.utils.axes_utils import reshape_prediction
-
-import numpy as np
+from careamics_napari.workers import live_worker, predict_worker, watch_worker
 
 if TYPE_CHECKING:
     import napari
@@ -96,14 +108,30 @@ class PredictionPlugin(QWidget):
         self.train_status = TrainingStatus()  # type: ignore
         self.pred_status = PredictionStatus()  # type: ignore
 
+        # rate limit the progress updates, each of them triggering a repaint
+        self._pred_throttle = StatusThrottle(
+            self.pred_status, [PredictionUpdateType.SAMPLE_IDX]
+        )
+
         # create signals, used to hold the various parameters modified by the UI
         self.pred_config_signal = PredictionSignal()
 
         # create queues, used to communicate between the threads and the UI
         # TODO: we shouldn't need to have a training queue here
         # right now, UpdateCallBack init requires it.
-        self._training_queue: Queue = Queue(10)
-        self._prediction_queue: Queue = Queue(10)
+        # The queues never block the threads, and only deliver the latest
+        # batch/sample index
+        self._training_queue: Queue = UpdateChannel([TrainUpdateType.BATCH])
+        self._prediction_queue: Queue = UpdateChannel([PredictionUpdateType.SAMPLE_IDX])
+
+        # contrast limits estimated during the last prediction
+        self._contrast_limits: Optional[tuple[float, float]] = None
+
+        # tiles of the last prediction, reused if their input did not change
+        self._prediction_cache = PredictionCache()
+
+        # event used to stop watching the prediction folder
+        self._stop_watching = Event()
 
         self._init_ui()
 
@@ -159,7 +187,7 @@ class PredictionPlugin(QWidget):
     def _select_model_checkpoint(self) -> None:
         """Load a select CAREamics model."""
         selected_file, _filter = QFileDialog.getOpenFileName(
-            self, "CAREamics", ".", "CAREamics Model(*.ckpt *.zip)"
+            self, "CAREamics", ".", f"CAREamics Model(*.ckpt *.zip *{WEIGHTS_SUFFIX})"
         )
         if selected_file is not None and len(selected_file) > 0:
             self.careamist = self._load_model(selected_file)
@@ -175,7 +203,7 @@ class PredictionPlugin(QWidget):
         Parameters
         ----------
         model_path : str
-            Path to the model checkpoint.
+            Path to the model checkpoint, or weights file saved by `save_weights`.
 
         Returns
         -------
@@ -184,10 +212,11 @@ class PredictionPlugin(QWidget):
         """
         try:
             # carefully load the model among the mist: careamist!
-            careamist = CAREamist(
-                model_path,
-                callbacks=[UpdaterCallBack(self._training_queue, self._prediction_queue)]
-            )
+            callbacks = [UpdaterCallBack(self._training_queue, self._prediction_queue)]
+            if Path(model_path).suffix == WEIGHTS_SUFFIX:
+                careamist = load_weights(model_path, callbacks=callbacks)
+            else:
+                careamist = CAREamist(model_path, callbacks=callbacks)
             # training is already done!
             self.train_status.state = TrainingState.DONE
             self.algo_label.setText(
@@ -210,17 +239,65 @@ class PredictionPlugin(QWidget):
             New state.
         """
         if state == PredictionState.PREDICTING:
-            self.pred_worker = predict_worker(
-                self.careamist, self.pred_config_signal, self._prediction_queue
-            )
+            if (
+                self.pred_config_signal.load_from_disk
+                and self.pred_config_signal.watch_folder
+            ):
+                # a new watcher is only started once the previous one has
+                # finished (STOPPING until then), but its event is already set
+                self._stop_watching = Event()
+                self.pred_worker = watch_worker(
+                    self.careamist,
+                    self.pred_config_signal,
+                    self._prediction_queue,
+                    self._stop_watching,
+                )
+            elif (
+                not self.pred_config_signal.load_from_disk
+                and self.pred_config_signal.live
+                and self.viewer is not None
+            ):
+                self._stop_watching = Event()
+                self.pred_worker = live_worker(
+                    self.careamist,
+                    self.pred_config_signal.layer_pred,
+                    self._live_layer(self.viewer),
+                    self._stop_watching,
+                )
+            else:
+                self.pred_worker = predict_worker(
+                    self.careamist,
+                    self.pred_config_signal,
+                    self._prediction_queue,
+                    self._prediction_cache,
+                )
 
             self.pred_worker.yielded.connect(self._update_from_prediction)
             self.pred_worker.start()
 
-        elif state == PredictionState.STOPPED:
-            # self.careamist.stop_prediction()
-            # TODO not existing yet
-            pass
+        elif state == PredictionState.STOPPING:
+            # only the folder watching and live prediction can currently be stopped
+            # TODO stopping prediction not existing yet in CAREamics
+            self._stop_watching.set()
+
+    def _live_layer(self, viewer: napari.Viewer) -> napari.layers.Image:
+        """Get the layer displaying the live prediction, adding it if necessary.
+
+        Parameters
+        ----------
+        viewer : napari.Viewer
+            Napari viewer.
+
+        Returns
+        -------
+        napari.layers.Image
+            Live prediction layer.
+        """
+        if "Live prediction" in viewer.layers:
+            return viewer.layers["Live prediction"]
+
+        # placeholder, replaced by the first prediction
+        return viewer.add_image(np.zeros((1, 1), np.float32), name="Live prediction")
 
     def _update_from_prediction(self, update: PredictionUpdate) -> None:
         """Update the signal from the prediction worker.
@@ -235,6 +312,7 @@ class PredictionPlugin(QWidget):
         if update.type == PredictionUpdateType.DEBUG:
             print(update.value)
         elif update.type == PredictionUpdateType.EXCEPTION:
+            self._pred_throttle.flush()
             self.pred_status.state = PredictionState.CRASHED
 
             # print exception without raising it
@@ -247,28 +325,24 @@ class PredictionPlugin(QWidget):
                     f"Tensors, try using tiling."
                 )
 
+        elif update.type == PredictionUpdateType.CONTRAST_LIMITS:
+            self._contrast_limits = update.value  # type: ignore
         else:
             if update.type == PredictionUpdateType.SAMPLE:
                 # add image to napari
                 # TODO keep scaling?
                 if self.viewer is not None:
-                    # value is either a numpy array or a list of numpy arrays,
-                    # with each sample/time-point as an element
-                    if isinstance(update.value, list):
-                        # combine all samples
-                        samples = np.concatenate(update.value, axis=0)
-                    else:
-                        samples = update.value
-
-                    # reshape the prediction to match the input axes
-                    samples = reshape_prediction(
-                        samples, self.careamist.cfg.data_config.axes,
-                        self.pred_config_signal.is_3d
+                    # value is either the reshaped prediction or, for large images,
+                    # a list of multiscale levels. Contrast limits were estimated
+                    # during the prediction to avoid napari computing them.
+                    self.viewer.add_image(
+                        update.value,
+                        name="Prediction",
+                        multiscale=isinstance(update.value, list),
+                        contrast_limits=self._contrast_limits,
                     )
-
-                    self.viewer.add_image(samples, name="Prediction")
             else:
-                self.pred_status.update(update)
+                self._pred_throttle.update(update)
 
     def closeEvent(self, event) -> None:
         """Close the plugin.
@@ -280,10 +354,12 @@ class PredictionPlugin(QWidget):
         """
         super().closeEvent(event)
         # TODO check training or prediction and stop it
+        self._stop_watching.set()
 
 
 if __name__ == "__main__":
     import faulthandler
+
     import napari
 
     log_file_fd = open("fault_log.txt", "a")
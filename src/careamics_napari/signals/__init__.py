@@ -1,22 +1,23 @@
 """Classes used to pass information between threds and UI elements."""
 
 __all__ = [
-    "TrainingSignal",
+    "ExportType",
     "PredictionSignal",
-    "TrainingStatus",
-    "TrainingState",
-    "TrainUpdate",
-    "TrainUpdateType",
-    "PredictionStatus",
     "PredictionState",
+    "PredictionStatus",
     "PredictionUpdate",
     "PredictionUpdateType",
-    "ExportType",
     "SavingSignal",
-    "SavingStatus",
     "SavingState",
+    "SavingStatus",
     "SavingUpdate",
     "SavingUpdateType",
+    "TrainUpdate",
+    "TrainUpdateType",
+    "TrainingSignal",
+    "TrainingState",
+    "TrainingStatus",
+    "UpdateChannel",
 ]
 
 
@@ -31,3 +32,4 @@ from .saving_signal import ExportType, SavingSignal
 from .saving_status import SavingState, SavingStatus, SavingUpdate, SavingUpdateType
 from .training_signal import TrainingSignal
 from .training_status import TrainingState, TrainingStatus, TrainUpdate, TrainUpdateType
+from .update_channel import UpdateChannel
@@ -35,9 +35,16 @@ class PredictionSignal:
         layer_pred: Image = None
         """Layer containing the data on which to predict."""
 
+    live: bool = False
+    """Whether to keep predicting the latest frame of `layer_pred` as it is
+    updated."""
+
     path_pred: str = ""
     """Path to the data on which to predict."""
 
+    watch_folder: bool = False
+    """Whether to keep predicting the new images written in `path_pred`."""
+
     is_3d: bool = False
     """Whether the data is 3D or 2D."""
 
@@ -55,6 +62,9 @@ class PredictionSignal:
 
     tile_overlap_z: int = 4  # TODO currently fixed
     """Overlap between the tiles along the Z dimension."""
-    
+
     batch_size: int = 1
     """Batch size."""
+
+    incremental: bool = False
+    """Whether to only predict again the tiles whose input changed."""
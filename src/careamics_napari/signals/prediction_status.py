@@ -24,6 +24,15 @@ if TYPE_CHECKING:
         state: SignalInstance
         """Current state of the prediction process."""
 
+        watch_queue: SignalInstance
+        """Number of files (frames in live mode) waiting to be predicted in watch
+        mode."""
+
+        watch_latency: SignalInstance
+        """Time, in seconds, between the detection of the last file and its
+        prediction being written, in watch mode (median frame latency in live
+        mode)."""
+
 
 class PredictionUpdateType(str, Enum):
     """Type of prediction update."""
@@ -35,11 +44,21 @@ class PredictionUpdateType(str, Enum):
     """Index of the current sample being predicted."""
 
     SAMPLE = "sample"
-    """Prediction result."""
+    """Prediction result, either an array or a list of multiscale levels."""
+
+    CONTRAST_LIMITS = "contrast_limits"
+    """Contrast limits estimated during the prediction."""
 
     STATE = "state"
     """Current state of the prediction process."""
 
+    WATCH_QUEUE = "watch_queue"
+    """Number of files (frames in live mode) waiting to be predicted in watch mode."""
+
+    WATCH_LATENCY = "watch_latency"
+    """Time, in seconds, between the detection of the last file and its prediction
+    being written, in watch mode (median frame latency in live mode)."""
+
     DEBUG = "debug message"
     """Debug message."""
 
@@ -65,6 +84,9 @@ class PredictionState(IntEnum):
     CRASHED = 4
     """Prediction crashed."""
 
+    STOPPING = 5
+    """Stop was requested, waiting for the folder watcher to finish."""
+
 
 @dataclass
 class PredictionUpdate:
@@ -73,7 +95,9 @@ class PredictionUpdate:
     type: PredictionUpdateType
     """Type of the update."""
 
-    value: Optional[Union[int, float, str, NDArray, PredictionState, Exception]] = None
+    value: Optional[
+        Union[int, float, str, NDArray, list, tuple, PredictionState, Exception]
+    ] = None
     """Content of the update."""
 
 
@@ -101,10 +125,17 @@ class PredictionStatus:
     state: PredictionState = PredictionState.IDLE
     """Current state of the prediction process."""
 
+    watch_queue: int = 0
+    """Number of files (frames in live mode) waiting to be predicted in watch mode."""
+
+    watch_latency: float = -1
+    """Time, in seconds, between the detection of the last file and its prediction
+    being written, in watch mode (median frame latency in live mode)."""
+
     def update(self, new_update: PredictionUpdate) -> None:
         """Update the status with the new values.
 
-        Exceptions, debugging messages and samples are ignored.
+        Exceptions, debugging messages, samples and contrast limits are ignored.
 
         Parameters
         ----------
@@ -115,5 +146,6 @@ class PredictionStatus:
             new_update.type != PredictionUpdateType.EXCEPTION
             and new_update.type != PredictionUpdateType.DEBUG
             and new_update.type != PredictionUpdateType.SAMPLE
+            and new_update.type != PredictionUpdateType.CONTRAST_LIMITS
         ):
             setattr(self, new_update.type.value, new_update.value)
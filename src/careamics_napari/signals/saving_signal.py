@@ -16,6 +16,12 @@ class ExportType(Enum):
     CKPT = "Checkpoint"
     """PyTorch Lightning checkpoint."""
 
+    WEIGHTS = "Weights only"
+    """Model weights and configuration, without the training state."""
+
+    WEIGHTS_FP16 = "Weights only (float16)"
+    """Model weights in float16 and configuration, without the training state."""
+
     @classmethod
     def list(cls) -> list[str]:
         """List of all available export types.
@@ -42,3 +48,9 @@ class SavingSignal:
 
     export_type: ExportType = ExportType.BMZ
     """Format of model export."""
+
+    torchscript: bool = True
+    """Whether to include TorchScript weights in the Bioimage.io export."""
+
+    onnx: bool = False
+    """Whether to include ONNX weights in the Bioimage.io export."""
@@ -148,3 +148,66 @@ class TrainingSignal:
 
     val_minimum_split: int = 1
     """Minimum number of patches or images in the validation set."""
+
+    learning_rate: float = 1e-4
+    """Learning rate of the optimizer."""
+
+    auto_tune: bool = False
+    """Whether to choose the batch size and learning rate with a short probe."""
+
+    auto_tune_budget: int = 60
+    """Maximum duration of the auto-tuning probe, in seconds."""
+
+    time_budget: int = 0
+    """Time budget of the training, in minutes, 0 to train all epochs."""
+
+    early_stopping: bool = False
+    """Whether to stop the training when the validation loss stops improving."""
+
+    early_stopping_patience: int = 10
+    """Number of validations without improvement before stopping the training."""
+
+    early_stopping_min_delta: float = 0.0
+    """Minimum decrease of the validation loss counted as an improvement."""
+
+    lr_plateau_factor: float = 0.1
+    """Factor applied to the learning rate when the validation loss plateaus."""
+
+    lr_plateau_patience: int = 10
+    """Number of epochs without improvement before reducing the learning rate."""
+
+    checkpoint_top_k: int = 3
+    """Number of checkpoints with the lowest validation loss kept."""
+
+    checkpoint_last_k: int = 0
+    """Number of checkpoints of the last epochs kept, in addition to `last.ckpt`."""
+
+    foreground_patches: bool = False
+    """Whether to train mostly on the patches containing signal."""
+
+    background_fraction: float = 0.1
+    """Fraction of the background patches kept by the foreground selection."""
+
+    num_workers: int = -1
+    """Number of dataloader workers, -1 to choose it from the number of cores."""
+
+    prefetch_factor: int = 2
+    """Number of batches loaded in advance by each dataloader worker."""
+
+    persistent_workers: bool = True
+    """Whether to keep the dataloader workers alive between epochs."""
+
+    pin_memory: bool = False
+    """Whether to use pinned memory to speed up the transfers to the GPU."""
+
+    pack_files: bool = False
+    """Whether to decode the training files once into a memory-mapped cache."""
+
+    precision: str = "32"
+    """Numerical precision of the training, "32", "16-mixed" or "bf16-mixed"."""
+
+    separate_process: bool = False
+    """Whether to train in a separate process, keeping the viewer responsive."""
+
+    resume_training: bool = False
+    """Whether to resume new trainings from the last checkpoint of `work_dir`."""
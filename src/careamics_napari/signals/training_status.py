@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from enum import Enum, IntEnum
 from typing import TYPE_CHECKING, Optional, Union
 
+import numpy as np
 from careamics import CAREamist
 from psygnal import evented
 
@@ -34,6 +35,36 @@ if TYPE_CHECKING:
         state: SignalInstance
         """Current state of the training process."""
 
+        patches_per_second: SignalInstance
+        """Number of patches processed per second."""
+
+        eta: SignalInstance
+        """Estimated remaining training time, in seconds."""
+
+        data_share: SignalInstance
+        """Share of the training time spent waiting on the dataloader."""
+
+        profiling: SignalInstance
+        """Number of batches requested to be profiled, 0 if not profiling."""
+
+        stop_reason: SignalInstance
+        """Reason why the training stopped before its last epoch."""
+
+        saved_epochs: SignalInstance
+        """Number of epochs skipped by stopping before the last epoch."""
+
+        remaining_budget: SignalInstance
+        """Remaining time budget of the training, in seconds."""
+
+        projected_epochs: SignalInstance
+        """Number of epochs expected to be trained within the time budget."""
+
+        patches_kept: SignalInstance
+        """Fraction of the training patches kept by the foreground selection."""
+
+        epoch_time_saved: SignalInstance
+        """Time saved per epoch by the foreground selection, in seconds."""
+
 
 class TrainUpdateType(str, Enum):
     """Type of training update."""
@@ -56,12 +87,48 @@ class TrainUpdateType(str, Enum):
     VAL_LOSS = "val_loss"
     """Current validation loss value."""
 
+    BATCH_LOSS = "batch_loss"
+    """Training losses of the last batches, with their position in epochs."""
+
     STATE = "state"
     """Current state of the training process."""
 
+    PATCHES_PER_SECOND = "patches_per_second"
+    """Number of patches processed per second."""
+
+    ETA = "eta"
+    """Estimated remaining training time, in seconds."""
+
+    DATA_SHARE = "data_share"
+    """Share of the training time spent waiting on the dataloader."""
+
+    STOP_REASON = "stop_reason"
+    """Reason why the training stopped before its last epoch."""
+
+    SAVED_EPOCHS = "saved_epochs"
+    """Number of epochs skipped by stopping before the last epoch."""
+
+    REMAINING_BUDGET = "remaining_budget"
+    """Remaining time budget of the training, in seconds."""
+
+    PROJECTED_EPOCHS = "projected_epochs"
+    """Number of epochs expected to be trained within the time budget."""
+
+    PATCHES_KEPT = "patches_kept"
+    """Fraction of the training patches kept by the foreground selection."""
+
+    EPOCH_TIME_SAVED = "epoch_time_saved"
+    """Time saved per epoch by the foreground selection, in seconds."""
+
     CAREAMIST = "careamist"
     """CAREamist instance."""
 
+    PROFILE = "profile"
+    """Results of the profiling of a number of batches."""
+
+    AUTOTUNE = "auto_tune"
+    """Batch size, learning rate and throughput found by the auto-tuning probe."""
+
     DEBUG = "debug message"
     """Debug message."""
 
@@ -96,7 +163,9 @@ class TrainUpdate:
     """Type of the update."""
 
     # TODO should we split into subclasses to make the value type more specific?
-    value: Optional[Union[int, float, str, TrainingState, CAREamist, Exception]] = None
+    value: Optional[
+        Union[int, float, str, dict, np.ndarray, TrainingState, CAREamist, Exception]
+    ] = None
     """Content of the update."""
 
 
@@ -136,10 +205,42 @@ class TrainingStatus:
     state: TrainingState = TrainingState.IDLE
     """Current state of the training process."""
 
+    patches_per_second: float = -1
+    """Number of patches processed per second."""
+
+    eta: float = -1
+    """Estimated remaining training time, in seconds."""
+
+    data_share: float = -1
+    """Share of the training time spent waiting on the dataloader."""
+
+    profiling: int = 0
+    """Number of batches requested to be profiled, 0 if not profiling."""
+
+    stop_reason: str = ""
+    """Reason why the training stopped before its last epoch."""
+
+    saved_epochs: int = 0
+    """Number of epochs skipped by stopping before the last epoch."""
+
+    remaining_budget: float = -1
+    """Remaining time budget of the training, in seconds, -1 without budget."""
+
+    projected_epochs: int = -1
+    """Number of epochs expected to be trained within the time budget."""
+
+    patches_kept: float = -1
+    """Fraction of the training patches kept by the foreground selection, -1 if
+    all patches are used."""
+
+    epoch_time_saved: float = -1
+    """Time saved per epoch by the foreground selection, in seconds."""
+
     def update(self, new_update: TrainUpdate) -> None:
         """Update the status with the new values.
 
-        Exceptions, debugging messages and CAREamist instances are ignored.
+        Exceptions, debugging messages, CAREamist instances, batch losses,
+        profiling and auto-tuning results are ignored.
 
         Parameters
         ----------
@@ -148,6 +249,9 @@ class TrainingStatus:
         """
         if (
             new_update.type != TrainUpdateType.CAREAMIST
+            and new_update.type != TrainUpdateType.BATCH_LOSS
+            and new_update.type != TrainUpdateType.PROFILE
+            and new_update.type != TrainUpdateType.AUTOTUNE
             and new_update.type != TrainUpdateType.EXCEPTION
             and new_update.type != TrainUpdateType.DEBUG
         ):
@@ -0,0 +1,116 @@
+"""Non-blocking queue passing updates from the worker threads to the UI."""
+
+from collections import deque
+from collections.abc import Iterable
+from enum import Enum
+from queue import Queue
+from typing import Any
+
+# marker of an update superseded by a newer update of the same type
+_SUPERSEDED = object()
+
+
+class UpdateChannel(Queue):
+    """Unbounded queue coalescing the updates of selected types.
+
+    `put` never blocks, so that the training or prediction threads are never
+    stalled by a busy UI. Updates whose type is in `coalesced_types` (e.g. batch
+    indices) replace any undelivered update of the same type, so that only the
+    newest value is delivered. Superseded entries are dropped as soon as they
+    outnumber the pending updates, so that the queue does not grow with the number
+    of batches. All other updates (states, losses, exceptions etc.) are always
+    delivered, in order.
+
+    Updates are expected to have a `type` attribute, as `TrainUpdate`,
+    `PredictionUpdate` and `SavingUpdate`.
+
+    Parameters
+    ----------
+    coalesced_types : iterable of Enum, default=()
+        Types of the updates for which only the newest value is delivered.
+    """
+
+    def __init__(self, coalesced_types: Iterable[Enum] = ()) -> None:
+        """Initialize the channel.
+
+        Parameters
+        ----------
+        coalesced_types : iterable of Enum, default=()
+            Types of the updates for which only the newest value is delivered.
+        """
+        self.coalesced_types = frozenset(coalesced_types)
+        super().__init__(maxsize=0)
+
+    # The following methods are called by `Queue` with its lock held.
+    def _init(self, maxsize: int) -> None:
+        """Initialize the underlying containers.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum size, unused.
+        """
+        # entries are single-element lists, so that they can be superseded in place
+        self.queue: deque[list[Any]] = deque()
+        self._pending: dict[Enum, list[Any]] = {}
+        self._size = 0
+        self._superseded = 0
+
+    def _qsize(self) -> int:
+        """Number of updates waiting to be delivered.
+
+        Returns
+        -------
+        int
+            Number of updates.
+        """
+        return self._size
+
+    def _put(self, item: Any) -> None:
+        """Add an update, superseding the pending update of the same type.
+
+        Parameters
+        ----------
+        item : Any
+            Update.
+        """
+        entry = [item]
+        update_type = getattr(item, "type", None)
+
+        if update_type in self.coalesced_types:
+            previous = self._pending.get(update_type)
+            if previous is not None:
+                previous[0] = _SUPERSEDED
+                self._size -= 1
+                self._superseded += 1
+
+            self._pending[update_type] = entry
+
+        self.queue.append(entry)
+        self._size += 1
+
+        # amortized removal of the superseded entries
+        if self._superseded > self._size:
+            self.queue = deque(e for e in self.queue if e[0] is not _SUPERSEDED)
+            self._superseded = 0
+
+    def _get(self) -> Any:
+        """Remove and return the oldest update that was not superseded.
+
+        Returns
+        -------
+        Any
+            Update.
+        """
+        while True:
+            item = self.queue.popleft()[0]
+            if item is not _SUPERSEDED:
+                break
+            self._superseded -= 1
+
+        update_type = getattr(item, "type", None)
+        if update_type in self.coalesced_types:
+            del self._pending[update_type]
+
+        self._size -= 1
+        return item
@@ -1,15 +1,25 @@
 """CAREamics training Qt widget."""
 
+import html
 from pathlib import Path
 from queue import Queue
+from threading import Event
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 from careamics import CAREamist
 from careamics.config.support import SupportedAlgorithm
 from qtpy.QtCore import Qt
-from qtpy.QtWidgets import QHBoxLayout, QStackedWidget, QVBoxLayout, QWidget
+from qtpy.QtWidgets import (
+    QHBoxLayout,
+    QMessageBox,
+    QStackedWidget,
+    QVBoxLayout,
+    QWidget,
+)
 from typing_extensions import Self
 
+from careamics_napari.careamics_utils import PredictionCache, ProfilerCallBack
 from careamics_napari.signals import (
     PredictionSignal,
     PredictionState,
@@ -26,7 +36,9 @@ from careamics_napari.signals import (
     TrainingStatus,
     TrainUpdate,
     TrainUpdateType,
+    UpdateChannel,
 )
+from careamics_napari.utils import StatusThrottle
 from careamics_napari.widgets import (
     AlgorithmSelectionWidget,
     CAREamicsBanner,
@@ -39,10 +51,16 @@ from careamics_napari.widgets import (
     TrainProgressWidget,
     create_gpu_label,
 )
-from careamics_napari.workers import predict_worker, save_worker, train_worker
-from careamics_napari.utils.axes_utils import reshape_prediction
-
-import numpy as np
+from careamics_napari.workers import (
+    ProcessCommand,
+    create_command_queue,
+    live_worker,
+    predict_worker,
+    save_worker,
+    train_process_worker,
+    train_worker,
+    watch_worker,
+)
 
 if TYPE_CHECKING:
     import napari
@@ -119,6 +137,14 @@ class TrainPlugin(QWidget):
         self.pred_status = PredictionStatus()  # type: ignore
         self.save_status = SavingStatus()  # type: ignore
 
+        # rate limit the progress updates, each of them triggering a repaint
+        self._train_throttle = StatusThrottle(
+            self.train_status, [TrainUpdateType.BATCH]
+        )
+        self._pred_throttle = StatusThrottle(
+            self.pred_status, [PredictionUpdateType.SAMPLE_IDX]
+        )
+
         # create signals, used to hold the various parameters modified by the UI
         self.train_config_signal = TrainingSignal()  # type: ignore
         self.pred_config_signal = PredictionSignal()
@@ -126,9 +152,26 @@ class TrainPlugin(QWidget):
 
         self.train_config_signal.events.is_3d.connect(self._set_pred_3d)
 
-        # create queues, used to communicate between the threads and the UI
-        self._training_queue: Queue = Queue(10)
-        self._prediction_queue: Queue = Queue(10)
+        # create queues, used to communicate between the threads and the UI. They
+        # never block the threads, and only deliver the latest batch/sample index
+        self._training_queue: Queue = UpdateChannel([TrainUpdateType.BATCH])
+        self._prediction_queue: Queue = UpdateChannel([PredictionUpdateType.SAMPLE_IDX])
+
+        # contrast limits estimated during the last prediction
+        self._contrast_limits: Optional[tuple[float, float]] = None
+
+        # tiles of the last prediction, reused if their input did not change
+        self._prediction_cache = PredictionCache()
+
+        # event used to stop watching the prediction folder
+        self._stop_watching = Event()
+
+        # callback profiling the training on request
+        self._profiler = ProfilerCallBack(self._training_queue)
+
+        # commands sent to the training process, when training in a separate process
+        self._train_commands = create_command_queue()
+        self._training_in_process = False
 
         # set workdir
         self.train_config_signal.work_dir = Path.cwd()
@@ -217,6 +260,7 @@ class TrainPlugin(QWidget):
 
         # changes from the training, prediction or saving state
         self.train_status.events.state.connect(self._training_state_changed)
+        self.train_status.events.profiling.connect(self._profiling_requested)
         self.pred_status.events.state.connect(self._prediction_state_changed)
         self.save_status.events.state.connect(self._saving_state_changed)
 
@@ -241,24 +285,76 @@ class TrainPlugin(QWidget):
             New state.
         """
         if state == TrainingState.TRAINING:
-            self.train_worker = train_worker(
-                self.train_config_signal,
-                self._training_queue,
-                self._prediction_queue,
-                self.careamist,
-            )
+            self._training_in_process = self.train_config_signal.separate_process
+            if self._training_in_process:
+                self.train_worker = train_process_worker(
+                    self.train_config_signal,
+                    self._training_queue,
+                    self._prediction_queue,
+                    self._train_commands,
+                    self.careamist,
+                )
+            else:
+                self.train_worker = train_worker(
+                    self.train_config_signal,
+                    self._training_queue,
+                    self._prediction_queue,
+                    self.careamist,
+                    self._profiler,
+                )
 
             self.train_worker.yielded.connect(self._update_from_training)
             self.train_worker.start()
 
         elif state == TrainingState.STOPPED:
-            if self.careamist is not None:
+            if self._training_in_process:
+                self._train_commands.put((ProcessCommand.STOP,))
+            elif self.careamist is not None:
                 self.careamist.stop_training()
 
-        elif state == TrainingState.CRASHED or state == TrainingState.IDLE:
+        if state != TrainingState.TRAINING:
+            # a request not honoured before the end of the training is dropped
+            self._profiler.cancel()
+            self.train_status.profiling = 0
+
+        if state == TrainingState.CRASHED or state == TrainingState.IDLE:
             del self.careamist
             self.careamist = None
 
+    def _profiling_requested(self, n_batches: int) -> None:
+        """Request the profiling of the next training batches.
+
+        Parameters
+        ----------
+        n_batches : int
+            Number of batches to profile, 0 once the profiling is over.
+        """
+        if n_batches > 0:
+            log_dir = Path(self.train_config_signal.work_dir) / "logs"
+            if self._training_in_process:
+                self._train_commands.put((ProcessCommand.PROFILE, n_batches, log_dir))
+            else:
+                self._profiler.request(n_batches, log_dir)
+
+    def _show_profile(self, profile: dict) -> None:
+        """Show the hottest operators of a profiling run.
+
+        Parameters
+        ----------
+        profile : dict
+            Profiling results, with the number of profiled batches, the paths to
+            the trace and operator table, and the table of the hottest operators.
+        """
+        message = QMessageBox(self)
+        message.setWindowTitle("Training profile")
+        message.setText(
+            f"Profiled {profile['n_batches']} batches.<br>"
+            f"Chrome trace: {html.escape(profile['trace'])}<br>"
+            f"Operators: {html.escape(profile['table'])}"
+            f"<pre>{html.escape(profile['top_operators'])}</pre>"
+        )
+        message.exec_()
+
     def _prediction_state_changed(self, state: PredictionState) -> None:
         """Handle prediction state changes.
 
@@ -268,17 +364,46 @@ class TrainPlugin(QWidget):
             New state.
         """
         if state == PredictionState.PREDICTING:
-            self.pred_worker = predict_worker(
-                self.careamist, self.pred_config_signal, self._prediction_queue
-            )
+            if (
+                self.pred_config_signal.load_from_disk
+                and self.pred_config_signal.watch_folder
+            ):
+                # a new watcher is only started once the previous one has
+                # finished (STOPPING until then), but its event is already set
+                self._stop_watching = Event()
+                self.pred_worker = watch_worker(
+                    self.careamist,
+                    self.pred_config_signal,
+                    self._prediction_queue,
+                    self._stop_watching,
+                )
+            elif (
+                not self.pred_config_signal.load_from_disk
+                and self.pred_config_signal.live
+                and self.viewer is not None
+            ):
+                self._stop_watching = Event()
+                self.pred_worker = live_worker(
+                    self.careamist,
+                    self.pred_config_signal.layer_pred,
+                    self._live_layer(self.viewer),
+                    self._stop_watching,
+                )
+            else:
+                self.pred_worker = predict_worker(
+                    self.careamist,
+                    self.pred_config_signal,
+                    self._prediction_queue,
+                    self._prediction_cache,
+                )
 
             self.pred_worker.yielded.connect(self._update_from_prediction)
             self.pred_worker.start()
 
-        elif state == PredictionState.STOPPED:
-            # self.careamist.stop_prediction()
-            # TODO not existing yet
-            pass
+        elif state == PredictionState.STOPPING:
+            # only the folder watching and live prediction can currently be stopped
+            # TODO stopping prediction not existing yet in CAREamics
+            self._stop_watching.set()
 
     def _saving_state_changed(self, state: SavingState) -> None:
         """Handle saving state changes.
@@ -309,15 +434,64 @@ class TrainPlugin(QWidget):
         if update.type == TrainUpdateType.CAREAMIST:
             if isinstance(update.value, CAREamist):
                 self.careamist = update.value
+        elif update.type == TrainUpdateType.BATCH_LOSS:
+            if isinstance(update.value, np.ndarray):
+                self.progress_widget.plot.add_batch_losses(update.value)
+        elif update.type == TrainUpdateType.PROFILE:
+            self.train_status.profiling = 0
+            if isinstance(update.value, dict):
+                self._show_profile(update.value)
+        elif update.type == TrainUpdateType.AUTOTUNE:
+            if isinstance(update.value, dict):
+                self._apply_auto_tune(update.value)
         elif update.type == TrainUpdateType.DEBUG:
             print(update.value)
         elif update.type == TrainUpdateType.EXCEPTION:
+            self._train_throttle.flush()
             self.train_status.state = TrainingState.CRASHED
 
             if isinstance(update.value, Exception):
                 raise update.value
         else:
-            self.train_status.update(update)
+            self._train_throttle.update(update)
+
+    def _apply_auto_tune(self, result: dict) -> None:
+        """Report the auto-tuning results and store them in the training signal.
+
+        Parameters
+        ----------
+        result : dict
+            Batch size, learning rate, throughput and duration of the probe.
+        """
+        self.train_config_signal.batch_size = result["batch_size"]
+        self.train_config_signal.learning_rate = result["learning_rate"]
+
+        message = (
+            f"Auto-tuning ({result['duration']:.1f} s): batch size "
+            f"{result['batch_size']}, learning rate {result['learning_rate']:.2e}, "
+            f"{result['patches_per_second']:.1f} patches/s."
+        )
+        if _has_napari:
+            ntf.show_info(message)
+
+    def _live_layer(self, viewer: napari.Viewer) -> napari.layers.Image:
+        """Get the layer displaying the live prediction, adding it if necessary.
+
+        Parameters
+        ----------
+        viewer : napari.Viewer
+            Napari viewer.
+
+        Returns
+        -------
+        napari.layers.Image
+            Live prediction layer.
+        """
+        if "Live prediction" in viewer.layers:
+            return viewer.layers["Live prediction"]
+
+        # placeholder, replaced by the first prediction
+        return viewer.add_image(np.zeros((1, 1), np.float32), name="Live prediction")
 
     def _update_from_prediction(self, update: PredictionUpdate) -> None:
         """Update the signal from the prediction worker.
@@ -332,6 +506,7 @@ class TrainPlugin(QWidget):
         if update.type == PredictionUpdateType.DEBUG:
             print(update.value)
         elif update.type == PredictionUpdateType.EXCEPTION:
+            self._pred_throttle.flush()
             self.pred_status.state = PredictionState.CRASHED
 
             # print exception without raising it
@@ -344,24 +519,24 @@ class TrainPlugin(QWidget):
                     f"Tensors, try using tiling."
                 )
 
+        elif update.type == PredictionUpdateType.CONTRAST_LIMITS:
+            self._contrast_limits = update.value  # type: ignore
         else:
             if update.type == PredictionUpdateType.SAMPLE:
                 # add image to napari
                 # TODO keep scaling?
                 if self.viewer is not None:
-                    # value is eighter a numpy array or a list of numpy arrays with each sample/timepoint as an element
-                    if isinstance(update.value, list):
-                        # combine all samples
-                        samples = np.concatenate(update.value, axis=0)
-                    else:
-                        samples = update.value
-                    
-                    # reshape the prediction to match the input axes
-                    samples = reshape_prediction(samples, self.train_config_signal.axes, self.pred_config_signal.is_3d)
-
-                    self.viewer.add_image(samples, name="Prediction")
+                    # value is either the reshaped prediction or, for large images,
+                    # a list of multiscale levels. Contrast limits were estimated
+                    # during the prediction to avoid napari computing them.
+                    self.viewer.add_image(
+                        update.value,
+                        name="Prediction",
+                        multiscale=isinstance(update.value, list),
+                        contrast_limits=self._contrast_limits,
+                    )
             else:
-                self.pred_status.update(update)
+                self._pred_throttle.update(update)
 
     def _update_from_saving(self, update: SavingUpdate) -> None:
         """Update the signal from the saving worker.
@@ -407,6 +582,9 @@ class TrainPlugin(QWidget):
         """
         super().closeEvent(event)
         # TODO check training or prediction and stop it
+        self._stop_watching.set()
+        if self._training_in_process:
+            self._train_commands.put((ProcessCommand.STOP,))
 
 
 if __name__ == "__main__":
@@ -2,8 +2,30 @@
 
 __all__ = [
     "REF_AXES",
+    "ContrastLimitsEstimator",
+    "FolderWatcher",
+    "LayerFeed",
+    "PyramidBuilder",
+    "RingBuffer",
+    "StatusThrottle",
     "are_axes_valid",
+    "build_pyramid",
+    "create_pyramid",
+    "estimate_contrast_limits",
     "filter_dimensions",
+    "prepare_for_display",
 ]
 
 from .axes_utils import REF_AXES, are_axes_valid, filter_dimensions
+from .display_utils import (
+    ContrastLimitsEstimator,
+    LayerFeed,
+    PyramidBuilder,
+    build_pyramid,
+    create_pyramid,
+    estimate_contrast_limits,
+    prepare_for_display,
+)
+from .folder_watcher import FolderWatcher
+from .ring_buffer import RingBuffer
+from .status_throttle import StatusThrottle
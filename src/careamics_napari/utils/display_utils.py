@@ -0,0 +1,545 @@
+"""Utilities to speed up the display of predictions in napari."""
+
+from threading import Lock
+from typing import Any, Optional, Union
+
+import numpy as np
+from numpy.typing import NDArray
+from superqt.utils import ensure_main_thread
+
+PYRAMID_MIN_SIZE = 2048
+"""Size (in pixels along Y or X) above which a display pyramid is created."""
+
+MULTISCALE_MIN_SIZE = 8192
+"""Size (in pixels along Y or X) above which the pyramid levels are averaged."""
+
+
+class ContrastLimitsEstimator:
+    """Streaming estimator of the contrast limits of an image.
+
+    The estimator is updated batch by batch with the predicted arrays. It keeps track
+    of the exact minimum and maximum, as well as a bounded random sample of the pixel
+    values (sketch) from which percentiles are estimated. This avoids napari computing
+    the contrast limits over the whole array on the UI thread.
+
+    Parameters
+    ----------
+    percentiles : tuple of (float, float), default=(0.1, 99.9)
+        Lower and upper percentiles used as contrast limits.
+    sketch_size : int, default=100_000
+        Maximum number of pixel values kept in the sketch.
+    samples_per_update : int, default=10_000
+        Maximum number of pixel values sampled from each update.
+    seed : int or None, default=None
+        Seed of the random generator used to subsample the updates.
+    """
+
+    def __init__(
+        self,
+        percentiles: tuple[float, float] = (0.1, 99.9),
+        sketch_size: int = 100_000,
+        samples_per_update: int = 10_000,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the estimator.
+
+        Parameters
+        ----------
+        percentiles : tuple of (float, float), default=(0.1, 99.9)
+            Lower and upper percentiles used as contrast limits.
+        sketch_size : int, default=100_000
+            Maximum number of pixel values kept in the sketch.
+        samples_per_update : int, default=10_000
+            Maximum number of pixel values sampled from each update.
+        seed : int or None, default=None
+            Seed of the random generator used to subsample the updates.
+        """
+        self.percentiles = percentiles
+        self.sketch_size = sketch_size
+        self.samples_per_update = samples_per_update
+        self._rng = np.random.default_rng(seed)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset the estimator."""
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._sketch: list[NDArray] = []
+        self._sketch_length = 0
+
+    def update(self, array: NDArray) -> None:
+        """Update the estimator with a new array.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            New values, e.g. a batch of predictions.
+        """
+        values = np.asarray(array).ravel()
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+
+        # exact extrema
+        batch_min = float(values.min())
+        batch_max = float(values.max())
+        self.min = batch_min if self.min is None else min(self.min, batch_min)
+        self.max = batch_max if self.max is None else max(self.max, batch_max)
+
+        # subsample the batch
+        if values.size > self.samples_per_update:
+            idx = self._rng.choice(values.size, self.samples_per_update, replace=False)
+            values = values[idx]
+
+        self._sketch.append(values.astype(np.float32, copy=False))
+        self._sketch_length += values.size
+
+        # keep the sketch bounded by randomly dropping values
+        if self._sketch_length > self.sketch_size:
+            sketch = np.concatenate(self._sketch)
+            keep = self._rng.choice(sketch.size, self.sketch_size, replace=False)
+            self._sketch = [sketch[keep]]
+            self._sketch_length = self.sketch_size
+
+    def get_contrast_limits(self) -> Optional[tuple[float, float]]:
+        """Return the estimated contrast limits.
+
+        Returns
+        -------
+        tuple of (float, float) or None
+            Estimated contrast limits, or None if no (or constant) values were seen.
+        """
+        if self.min is None or self.max is None or self._sketch_length == 0:
+            return None
+
+        low, high = np.percentile(np.concatenate(self._sketch), self.percentiles)
+        low = max(float(low), self.min)
+        high = min(float(high), self.max)
+
+        if high <= low:
+            # fall back onto the extrema
+            low, high = self.min, self.max
+
+            if high <= low:
+                return None
+
+        return low, high
+
+
+def estimate_contrast_limits(
+    array: NDArray, percentiles: tuple[float, float] = (0.1, 99.9)
+) -> Optional[tuple[float, float]]:
+    """Estimate the contrast limits of an array from a subsample of its values.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array.
+    percentiles : tuple of (float, float), default=(0.1, 99.9)
+        Lower and upper percentiles used as contrast limits.
+
+    Returns
+    -------
+    tuple of (float, float) or None
+        Estimated contrast limits, or None if the array is empty or constant.
+    """
+    estimator = ContrastLimitsEstimator(percentiles=percentiles, seed=42)
+    estimator.update(array)
+
+    return estimator.get_contrast_limits()
+
+
+def _yx_indices(axes: str, ndim: int) -> Optional[tuple[int, int]]:
+    """Return the indices of the Y and X axes.
+
+    Parameters
+    ----------
+    axes : str
+        Axes of the array.
+    ndim : int
+        Number of dimensions of the array.
+
+    Returns
+    -------
+    tuple of (int, int) or None
+        Indices of Y and X, or None if the axes do not match the array.
+    """
+    axes = axes.upper().replace("T", "S")
+    if len(axes) != ndim or "Y" not in axes or "X" not in axes:
+        return None
+
+    return axes.index("Y"), axes.index("X")
+
+
+def create_pyramid(
+    array: NDArray, axes: str, min_size: int = PYRAMID_MIN_SIZE
+) -> Union[NDArray, list[NDArray]]:
+    """Create a multiscale pyramid of strided views for display.
+
+    The levels are created by subsampling the Y and X axes by successive factors of
+    2 until both are smaller than `min_size`. The levels are views of the original
+    array and therefore do not require any additional memory or computation.
+
+    If the array is smaller than `min_size` along both Y and X, it is returned as is.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array to display.
+    axes : str
+        Axes of the array, must contain Y and X.
+    min_size : int, default=PYRAMID_MIN_SIZE
+        Size along Y or X above which levels are added to the pyramid.
+
+    Returns
+    -------
+    numpy.ndarray or list of numpy.ndarray
+        Array, or list of pyramid levels starting with the full resolution.
+    """
+    indices = _yx_indices(axes, array.ndim)
+    if indices is None:
+        return array
+
+    y_idx, x_idx = indices
+
+    levels = [array]
+    factor = 1
+    while max(array.shape[y_idx], array.shape[x_idx]) // factor > min_size:
+        factor *= 2
+
+        slices = [slice(None)] * array.ndim
+        slices[y_idx] = slice(None, None, factor)
+        slices[x_idx] = slice(None, None, factor)
+        levels.append(array[tuple(slices)])
+
+    return levels if len(levels) > 1 else array
+
+
+def _downsample(array: NDArray, y_idx: int, x_idx: int) -> NDArray:
+    """Downsample an array by a factor 2 along Y and X using 2x2 averaging.
+
+    Trailing odd rows and columns are discarded.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array.
+    y_idx : int
+        Index of the Y axis.
+    x_idx : int
+        Index of the X axis.
+
+    Returns
+    -------
+    numpy.ndarray
+        Downsampled array, with the same dtype as the input.
+    """
+    result = array.astype(np.float32, copy=False)
+
+    for idx in (y_idx, x_idx):
+        n = result.shape[idx] // 2 * 2
+
+        even = [slice(None)] * result.ndim
+        odd = [slice(None)] * result.ndim
+        even[idx] = slice(0, n, 2)
+        odd[idx] = slice(1, n, 2)
+
+        result = (result[tuple(even)] + result[tuple(odd)]) / 2
+
+    if np.issubdtype(array.dtype, np.integer):
+        result = np.rint(result)
+
+    return result.astype(array.dtype, copy=False)
+
+
+class PyramidBuilder:
+    """Incremental builder of a multiscale pyramid.
+
+    Regions of the full resolution image are added as they are completed (bands of
+    rows along Y), and are immediately downsampled into the lower resolution levels.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Shape of the full resolution array.
+    axes : str
+        Axes of the array, must contain Y and X.
+    dtype : numpy.typing.DTypeLike
+        Data type of the array.
+    n_levels : int
+        Number of levels, including the full resolution.
+    full_resolution : numpy.ndarray or None, default=None
+        In memory array to use as full resolution level, avoiding a copy.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, ...],
+        axes: str,
+        dtype: Any,
+        n_levels: int,
+        full_resolution: Optional[NDArray] = None,
+    ) -> None:
+        """Initialize the builder.
+
+        Parameters
+        ----------
+        shape : tuple of int
+            Shape of the full resolution array.
+        axes : str
+            Axes of the array, must contain Y and X.
+        dtype : numpy.typing.DTypeLike
+            Data type of the array.
+        n_levels : int
+            Number of levels, including the full resolution.
+        full_resolution : numpy.ndarray or None, default=None
+            In memory array to use as full resolution level, avoiding a copy.
+
+        Raises
+        ------
+        ValueError
+            If the axes do not match the shape.
+        """
+        indices = _yx_indices(axes, len(shape))
+        if indices is None:
+            raise ValueError(f"Axes {axes} incompatible with shape {shape}.")
+
+        self.y_idx, self.x_idx = indices
+        self.n_levels = max(1, n_levels)
+
+        # shapes of the levels
+        self.shapes: list[tuple[int, ...]] = []
+        for level in range(self.n_levels):
+            level_shape = list(shape)
+            level_shape[self.y_idx] = shape[self.y_idx] // 2**level
+            level_shape[self.x_idx] = shape[self.x_idx] // 2**level
+            self.shapes.append(tuple(level_shape))
+
+        # allocate the levels
+        self.levels: list[NDArray] = [
+            (
+                full_resolution
+                if level == 0 and full_resolution is not None
+                else np.zeros(level_shape, dtype=dtype)
+            )
+            for level, level_shape in enumerate(self.shapes)
+        ]
+
+        self._full_resolution_is_source = full_resolution is not None
+
+    @property
+    def alignment(self) -> int:
+        """Number of rows by which region starts must be aligned.
+
+        Returns
+        -------
+        int
+            Alignment of the regions along Y.
+        """
+        return 2 ** (self.n_levels - 1)
+
+    def _rows(self, level: int, start: int, stop: int) -> tuple[slice, ...]:
+        """Return the slices selecting rows along Y for a level.
+
+        Parameters
+        ----------
+        level : int
+            Level.
+        start : int
+            First row.
+        stop : int
+            Row after the last one.
+
+        Returns
+        -------
+        tuple of slice
+            Slices.
+        """
+        slices = [slice(None)] * len(self.shapes[level])
+        slices[self.y_idx] = slice(start, min(stop, self.shapes[level][self.y_idx]))
+        return tuple(slices)
+
+    def add_region(self, region: NDArray, y_start: int) -> None:
+        """Add a completed region of the full resolution image.
+
+        The region spans all axes of the image, but only a band of rows along Y.
+
+        Parameters
+        ----------
+        region : numpy.ndarray
+            Completed region.
+        y_start : int
+            Index of the first row of the region along Y, must be a multiple of
+            `alignment`.
+
+        Raises
+        ------
+        ValueError
+            If the region start is not aligned.
+        """
+        if y_start % self.alignment != 0:
+            raise ValueError(
+                f"Region start ({y_start}) must be a multiple of {self.alignment}."
+            )
+
+        height = region.shape[self.y_idx]
+        if not self._full_resolution_is_source:
+            self.levels[0][self._rows(0, y_start, y_start + height)] = region
+
+        current = region
+        for level in range(1, self.n_levels):
+            current = _downsample(current, self.y_idx, self.x_idx)
+
+            start = y_start // 2**level
+            rows = self._rows(level, start, start + current.shape[self.y_idx])
+            n_rows = rows[self.y_idx].stop - rows[self.y_idx].start
+
+            # crop the region to the level shape (odd sizes)
+            crop = [slice(None)] * current.ndim
+            crop[self.y_idx] = slice(0, n_rows)
+            crop[self.x_idx] = slice(0, self.shapes[level][self.x_idx])
+            self.levels[level][rows] = current[tuple(crop)]
+
+
+def build_pyramid(
+    array: NDArray,
+    axes: str,
+    min_size: int = PYRAMID_MIN_SIZE,
+    band_size: int = 2048,
+) -> list[NDArray]:
+    """Build an averaged multiscale pyramid, band by band.
+
+    Levels are added until both Y and X are smaller than `min_size`. The array is
+    processed in bands of rows so that the temporary memory stays bounded.
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Full resolution array.
+    axes : str
+        Axes of the array, must contain Y and X.
+    min_size : int, default=PYRAMID_MIN_SIZE
+        Size along Y or X above which levels are added to the pyramid.
+    band_size : int, default=2048
+        Approximate number of rows processed at once.
+
+    Returns
+    -------
+    list of numpy.ndarray
+        Pyramid levels, starting with the full resolution.
+    """
+    indices = _yx_indices(axes, array.ndim)
+    if indices is None:
+        return [array]
+
+    y_idx, x_idx = indices
+    n_levels = 1
+    while max(array.shape[y_idx], array.shape[x_idx]) // 2 ** (n_levels - 1) > min_size:
+        n_levels += 1
+
+    builder = PyramidBuilder(
+        array.shape,
+        axes,
+        array.dtype,
+        n_levels,
+        full_resolution=array,
+    )
+
+    # bands must be aligned with the coarsest level
+    band = max(builder.alignment, band_size // builder.alignment * builder.alignment)
+    for start in range(0, array.shape[y_idx], band):
+        rows = [slice(None)] * array.ndim
+        rows[y_idx] = slice(start, start + band)
+        builder.add_region(array[tuple(rows)], start)
+
+    return builder.levels
+
+
+def prepare_for_display(array: NDArray, axes: str) -> Union[NDArray, list[NDArray]]:
+    """Prepare a prediction for display in napari.
+
+    Small arrays are returned as is, medium arrays are returned as a pyramid of
+    strided views (see `create_pyramid`) and arrays larger than `MULTISCALE_MIN_SIZE`
+    along Y or X are returned as an averaged pyramid (see `build_pyramid`).
+
+    Parameters
+    ----------
+    array : numpy.ndarray
+        Array to display.
+    axes : str
+        Axes of the array.
+
+    Returns
+    -------
+    numpy.ndarray or list of numpy.ndarray
+        Array, or list of pyramid levels starting with the full resolution.
+    """
+    indices = _yx_indices(axes, array.ndim)
+    if indices is not None and (
+        max(array.shape[indices[0]], array.shape[indices[1]]) >= MULTISCALE_MIN_SIZE
+    ):
+        return build_pyramid(array, axes)
+
+    return create_pyramid(array, axes, PYRAMID_MIN_SIZE)
+
+
+class LayerFeed:
+    """Display the latest frame of a stream in a napari layer.
+
+    The instance is meant to be used as the callback of a `StreamingDenoiser`. It
+    can be called from any thread, the layer being updated on the main thread. If
+    frames arrive faster than the layer is refreshed, only the latest frame is
+    displayed. The contrast limits are reset whenever the shape of the frames
+    changes, e.g. when the first frame replaces a placeholder.
+
+    Parameters
+    ----------
+    layer : napari.layers.Image
+        Layer whose data is replaced by the frames.
+    """
+
+    def __init__(self, layer: Any) -> None:
+        """Initialize the feed.
+
+        Parameters
+        ----------
+        layer : napari.layers.Image
+            Layer whose data is replaced by the frames.
+        """
+        self.layer = layer
+
+        self._lock = Lock()
+        self._latest: Optional[NDArray] = None
+        self._pending = False
+
+    def __call__(self, index: int, frame: NDArray) -> None:
+        """Schedule the display of a frame.
+
+        Parameters
+        ----------
+        index : int
+            Index of the frame in the stream.
+        frame : numpy.ndarray
+            Frame.
+        """
+        with self._lock:
+            self._latest = frame
+            if self._pending:
+                return
+            self._pending = True
+
+        self._refresh()
+
+    @ensure_main_thread
+    def _refresh(self) -> None:
+        """Replace the layer data by the latest frame."""
+        with self._lock:
+            frame = self._latest
+            self._pending = False
+
+        if frame is not None:
+            reset = frame.shape != self.layer.data.shape
+            self.layer.data = frame
+            if reset:
+                self.layer.reset_contrast_limits()
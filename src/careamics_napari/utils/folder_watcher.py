@@ -0,0 +1,141 @@
+"""Utilities to watch a folder for new images."""
+
+from collections.abc import Sequence
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Union
+
+from typing_extensions import Self
+
+IMAGE_EXTENSIONS = (".tif", ".tiff")
+"""Extensions of the files reported by the folder watcher."""
+
+
+class FolderWatcher:
+    """Polling watcher reporting new images once they are completely written.
+
+    Microscopes write images progressively, a file is therefore only reported once
+    its size and modification time did not change for `stable_polls` consecutive
+    calls to `poll`. Each file is reported only once. Polling is used rather than
+    file system events so that the watcher behaves identically on all platforms and
+    on network shares.
+
+    Parameters
+    ----------
+    folder : str or pathlib.Path
+        Folder to watch.
+    extensions : sequence of str, default=(".tif", ".tiff")
+        Extensions of the files to report, case insensitive.
+    exclude : sequence of str, default=()
+        Glob patterns of file names to ignore, e.g. the outputs of the prediction.
+    stable_polls : int, default=1
+        Number of consecutive polls during which a file must remain unchanged
+        before being reported.
+    include_existing : bool, default=False
+        Whether to report the files already present in the folder upon creation.
+    """
+
+    def __init__(
+        self: Self,
+        folder: Union[str, Path],
+        extensions: Sequence[str] = IMAGE_EXTENSIONS,
+        exclude: Sequence[str] = (),
+        stable_polls: int = 1,
+        include_existing: bool = False,
+    ) -> None:
+        """Initialize the watcher.
+
+        Parameters
+        ----------
+        folder : str or pathlib.Path
+            Folder to watch.
+        extensions : sequence of str, default=(".tif", ".tiff")
+            Extensions of the files to report, case insensitive.
+        exclude : sequence of str, default=()
+            Glob patterns of file names to ignore, e.g. the outputs of the
+            prediction.
+        stable_polls : int, default=1
+            Number of consecutive polls during which a file must remain unchanged
+            before being reported.
+        include_existing : bool, default=False
+            Whether to report the files already present in the folder upon
+            creation.
+        """
+        self.folder = Path(folder)
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.exclude = tuple(exclude)
+        self.stable_polls = stable_polls
+
+        # files already reported
+        self._reported: set[Path] = set()
+
+        # files not yet stable, with their last (size, mtime) and stable count
+        self._candidates: dict[Path, tuple[tuple[int, int], int]] = {}
+
+        if not include_existing:
+            self._reported.update(self._list_files())
+
+    def _list_files(self: Self) -> list[Path]:
+        """List the files of the folder matching the extensions and exclusions.
+
+        Returns
+        -------
+        list of pathlib.Path
+            Sorted list of files.
+        """
+        if not self.folder.is_dir():
+            return []
+
+        return sorted(
+            path
+            for path in self.folder.iterdir()
+            if path.is_file()
+            and path.suffix.lower() in self.extensions
+            and not any(fnmatch(path.name, pattern) for pattern in self.exclude)
+        )
+
+    def poll(self: Self) -> list[Path]:
+        """Return the new files that have been stable since the previous polls.
+
+        Returns
+        -------
+        list of pathlib.Path
+            Files ready to be processed, sorted by name.
+        """
+        ready: list[Path] = []
+        candidates: dict[Path, tuple[tuple[int, int], int]] = {}
+
+        for path in self._list_files():
+            if path in self._reported:
+                continue
+
+            try:
+                stat = path.stat()
+            except OSError:  # file removed in the meantime
+                continue
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous, count = self._candidates.get(path, (None, -1))
+            count = count + 1 if signature == previous and stat.st_size > 0 else 0
+
+            if count >= self.stable_polls:
+                ready.append(path)
+                self._reported.add(path)
+            else:
+                candidates[path] = (signature, count)
+
+        # files that disappeared are forgotten
+        self._candidates = candidates
+
+        return ready
+
+    @property
+    def n_pending(self: Self) -> int:
+        """Number of new files that are not yet stable.
+
+        Returns
+        -------
+        int
+            Number of files being written.
+        """
+        return len(self._candidates)
@@ -0,0 +1,181 @@
+"""Fixed capacity buffer of numerical rows, used to accumulate plotted values."""
+
+from typing import Union
+
+import numpy as np
+from numpy.typing import ArrayLike, DTypeLike, NDArray
+from typing_extensions import Self
+
+
+class RingBuffer:
+    """Fixed capacity buffer of numerical rows, dropping the oldest rows when full.
+
+    Each column is stored contiguously so that it can be passed to plotting
+    libraries without copy. The storage is allocated progressively, doubling its
+    size until `capacity` is reached. Once full, each row is written twice, at
+    its index and one capacity further, so that the rows always form a contiguous
+    window of the storage and reading the buffer never requires a copy.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of rows kept in the buffer.
+    n_columns : int, default=2
+        Number of columns, e.g. x and y coordinates.
+    dtype : numpy.typing.DTypeLike, default=numpy.float64
+        Data type of the values.
+    initial_size : int, default=1024
+        Number of rows initially allocated.
+    """
+
+    def __init__(
+        self: Self,
+        capacity: int,
+        n_columns: int = 2,
+        dtype: DTypeLike = np.float64,
+        initial_size: int = 1024,
+    ) -> None:
+        """Initialize the buffer.
+
+        Parameters
+        ----------
+        capacity : int
+            Maximum number of rows kept in the buffer.
+        n_columns : int, default=2
+            Number of columns, e.g. x and y coordinates.
+        dtype : numpy.typing.DTypeLike, default=numpy.float64
+            Data type of the values.
+        initial_size : int, default=1024
+            Number of rows initially allocated.
+        """
+        if capacity < 1:
+            raise ValueError(f"Capacity must be positive (got {capacity}).")
+
+        self.capacity = capacity
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.initial_size = initial_size
+        self.clear()
+
+    def clear(self: Self) -> None:
+        """Remove all rows and release the storage."""
+        self._data: NDArray = np.empty(
+            (self.n_columns, min(self.initial_size, self.capacity)), dtype=self.dtype
+        )
+        self._start = 0
+        self._size = 0
+        self._full = False
+
+    def __len__(self: Self) -> int:
+        """Number of rows in the buffer.
+
+        Returns
+        -------
+        int
+            Number of rows.
+        """
+        return self._size
+
+    def append(self: Self, *values: Union[int, float]) -> None:
+        """Append a single row.
+
+        Parameters
+        ----------
+        *values : int or float
+            Values of the row, one per column.
+        """
+        self.extend(np.asarray(values, dtype=self.dtype)[:, np.newaxis])
+
+    def extend(self: Self, rows: ArrayLike) -> None:
+        """Append several rows, dropping the oldest ones if the buffer is full.
+
+        Parameters
+        ----------
+        rows : numpy.typing.ArrayLike
+            Array of shape (n_columns, n_rows).
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.ndim != 2 or rows.shape[0] != self.n_columns:
+            raise ValueError(
+                f"Expected an array of shape ({self.n_columns}, N) (got "
+                f"{rows.shape})."
+            )
+
+        # only the last rows can be kept
+        rows = rows[:, -self.capacity :]
+        n_rows = rows.shape[1]
+        if n_rows == 0:
+            return
+
+        if not self._full:
+            if self._size + n_rows <= self._data.shape[1]:
+                self._data[:, self._size : self._size + n_rows] = rows
+                self._size += n_rows
+                return
+
+            if self._size + n_rows < self.capacity:
+                self._grow(self._size + n_rows)
+                self._data[:, self._size : self._size + n_rows] = rows
+                self._size += n_rows
+                return
+
+            self._to_ring()
+
+        self._write_ring(rows)
+
+    @property
+    def data(self: Self) -> NDArray:
+        """Rows of the buffer, from the oldest to the newest.
+
+        Returns
+        -------
+        numpy.ndarray
+            View of shape (n_columns, n_rows), only valid until the next change.
+        """
+        return self._data[:, self._start : self._start + self._size]
+
+    def _grow(self: Self, min_size: int) -> None:
+        """Increase the allocated storage, doubling its size.
+
+        Parameters
+        ----------
+        min_size : int
+            Minimum number of rows to allocate.
+        """
+        size = self._data.shape[1]
+        while size < min_size:
+            size *= 2
+
+        data = np.empty((self.n_columns, min(size, self.capacity)), dtype=self.dtype)
+        data[:, : self._size] = self._data[:, : self._size]
+        self._data = data
+
+    def _to_ring(self: Self) -> None:
+        """Switch to a mirrored storage of twice the capacity."""
+        data = np.empty((self.n_columns, 2 * self.capacity), dtype=self.dtype)
+        data[:, : self._size] = self._data[:, : self._size]
+        data[:, self.capacity : self.capacity + self._size] = data[:, : self._size]
+        self._data = data
+        self._full = True
+
+    def _write_ring(self: Self, rows: NDArray) -> None:
+        """Write rows in the mirrored storage.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            Array of shape (n_columns, n_rows), with at most `capacity` rows.
+        """
+        n_rows = rows.shape[1]
+
+        # index of the first row to write, modulo the capacity
+        end = (self._start + self._size) % self.capacity
+        first = min(n_rows, self.capacity - end)
+
+        for offset in (0, self.capacity):
+            self._data[:, offset + end : offset + end + first] = rows[:, :first]
+            self._data[:, offset : offset + n_rows - first] = rows[:, first:]
+
+        overflow = max(0, self._size + n_rows - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + n_rows)
@@ -0,0 +1,120 @@
+"""Rate limiting of the updates applied to the training and prediction statuses."""
+
+import math
+import time
+from collections.abc import Iterable
+from enum import Enum
+from typing import Optional, Union
+
+from qtpy.QtCore import QTimer
+
+from careamics_napari.signals import (
+    PredictionStatus,
+    PredictionUpdate,
+    TrainingStatus,
+    TrainUpdate,
+)
+
+STATUS_MAX_RATE = 20.0
+"""Default maximum frequency, in Hz, at which throttled status fields are updated."""
+
+
+class StatusThrottle:
+    """Apply updates to a status, rate limiting the progress fields.
+
+    Every change of an evented status attribute triggers the UI listeners, e.g. a
+    progress bar repaint. Progress updates (such as batch indices) can arrive
+    thousands of times per epoch, their rate is therefore limited to `max_rate`:
+    updates arriving too early are held back, and only the latest one is applied
+    later. Held back updates are flushed before any other update, e.g. state
+    changes or losses, so that the status is always up to date when they are
+    applied, and by a single-shot timer at the end of the period, so that the last
+    progress update is displayed even if no other update follows.
+
+    The throttle must be used from the Qt main thread.
+
+    Parameters
+    ----------
+    status : TrainingStatus or PredictionStatus
+        Status to update.
+    throttled_types : iterable of Enum
+        Types of the updates whose rate is limited.
+    max_rate : float, default=STATUS_MAX_RATE
+        Maximum frequency, in Hz, at which each throttled field is updated.
+    """
+
+    def __init__(
+        self,
+        status: Union[TrainingStatus, PredictionStatus],
+        throttled_types: Iterable[Enum],
+        max_rate: float = STATUS_MAX_RATE,
+    ) -> None:
+        """Initialize the throttle.
+
+        Parameters
+        ----------
+        status : TrainingStatus or PredictionStatus
+            Status to update.
+        throttled_types : iterable of Enum
+            Types of the updates whose rate is limited.
+        max_rate : float, default=STATUS_MAX_RATE
+            Maximum frequency, in Hz, at which each throttled field is updated.
+        """
+        self.status = status
+        self.throttled_types = frozenset(throttled_types)
+        self.period = 1 / max_rate
+
+        self._last_update: dict[Enum, float] = {}
+        self._pending: dict[Enum, Union[TrainUpdate, PredictionUpdate]] = {}
+        self._timer: Optional[QTimer] = None
+
+    def update(self, new_update: Union[TrainUpdate, PredictionUpdate]) -> None:
+        """Apply an update to the status, or hold it back if it comes too early.
+
+        Parameters
+        ----------
+        new_update : TrainUpdate or PredictionUpdate
+            Update to apply.
+        """
+        if new_update.type in self.throttled_types:
+            now = time.monotonic()
+            last_update = self._last_update.get(new_update.type, -self.period)
+            if now - last_update < self.period:
+                self._pending[new_update.type] = new_update
+                self._schedule_flush(last_update + self.period - now)
+                return
+
+            self._last_update[new_update.type] = now
+            self._pending.pop(new_update.type, None)
+        else:
+            self.flush()
+
+        self.status.update(new_update)  # type: ignore
+
+    def _schedule_flush(self, delay: float) -> None:
+        """Start the flush timer, unless it is already running.
+
+        Parameters
+        ----------
+        delay : float
+            Delay before the flush, in seconds.
+        """
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+
+        if not self._timer.isActive():
+            self._timer.start(max(0, math.ceil(1000 * delay)))
+
+    def flush(self) -> None:
+        """Apply the updates held back."""
+        if self._timer is not None:
+            self._timer.stop()
+
+        pending = list(self._pending.values())
+        self._pending.clear()
+
+        for update in pending:
+            self._last_update[update.type] = time.monotonic()
+            self.status.update(update)  # type: ignore
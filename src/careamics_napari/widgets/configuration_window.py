@@ -6,9 +6,11 @@ from careamics.config.support import SupportedAlgorithm
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QDialog,
     QFormLayout,
     QGroupBox,
+    QLabel,
     QLineEdit,
     QPushButton,
     QStackedWidget,
@@ -17,6 +19,11 @@ from qtpy.QtWidgets import (
 )
 from typing_extensions import Self
 
+from careamics_napari.careamics_utils.configuration import (
+    SUPPORTED_PRECISIONS,
+    auto_num_workers,
+    oversubscription_warning,
+)
 from careamics_napari.signals import TrainingSignal
 
 try:
@@ -170,7 +177,9 @@ class AdvancedConfigurationWindow(QDialog):
         n2v_channels_widget = QWidget()
         n2v_channels_widget_layout = QFormLayout()
         n2v_channels_widget_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
-        n2v_channels_widget_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+        n2v_channels_widget_layout.setFieldGrowthPolicy(
+            QFormLayout.AllNonFixedFieldsGrow
+        )
 
         self.n_channels = create_int_spinbox(
             1, 10, self.configuration_signal.n_channels_n2v, 1
@@ -184,7 +193,9 @@ class AdvancedConfigurationWindow(QDialog):
         care_channels_widget = QWidget()
         care_channels_widget_layout = QFormLayout()
         care_channels_widget_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
-        care_channels_widget_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+        care_channels_widget_layout.setFieldGrowthPolicy(
+            QFormLayout.AllNonFixedFieldsGrow
+        )
 
         self.n_channels_in = create_int_spinbox(
             1, 10, self.configuration_signal.n_channels_in_care, 1
@@ -243,6 +254,226 @@ class AdvancedConfigurationWindow(QDialog):
         model_params.setLayout(model_params_layout)
         self.layout().addWidget(model_params)
 
+        ##################
+        # patch selection
+        patch_selection = QGroupBox("Patch selection")
+        patch_selection_layout = QFormLayout()
+        patch_selection_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
+        patch_selection_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        self.foreground_patches = QCheckBox("Skip background patches")
+        self.foreground_patches.setToolTip(
+            "Check to remove most of the flat background patches from the\n"
+            "training set, shortening the epochs of sparse images. Only applies\n"
+            "to data fitting in memory."
+        )
+        self.foreground_patches.setChecked(self.configuration_signal.foreground_patches)
+
+        self.background_fraction = create_double_spinbox(
+            0, 1, self.configuration_signal.background_fraction, 0.05, n_decimal=2
+        )
+        self.background_fraction.setToolTip(
+            "Fraction of the background patches kept in the training set."
+        )
+
+        patch_selection_layout.addRow(self.foreground_patches)
+        patch_selection_layout.addRow("Background kept", self.background_fraction)
+        patch_selection.setLayout(patch_selection_layout)
+        self.layout().addWidget(patch_selection)
+
+        ##################
+        # data loading
+        data_loading = QGroupBox("Data loading")
+        data_loading_layout = QFormLayout()
+        data_loading_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
+        data_loading_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        self.num_workers = create_int_spinbox(
+            -1, 128, self.configuration_signal.num_workers, 1
+        )
+        self.num_workers.setSpecialValueText(f"Auto ({auto_num_workers()})")
+        self.num_workers.setToolTip(
+            "Number of processes extracting the patches in parallel, 0 to load\n"
+            "the data in the main process."
+        )
+
+        self.prefetch_factor = create_int_spinbox(
+            1, 64, self.configuration_signal.prefetch_factor, 1
+        )
+        self.prefetch_factor.setToolTip(
+            "Number of batches loaded in advance by each worker."
+        )
+
+        self.persistent_workers = QCheckBox("Persistent workers")
+        self.persistent_workers.setToolTip(
+            "Check to keep the workers alive between epochs."
+        )
+        self.persistent_workers.setChecked(self.configuration_signal.persistent_workers)
+
+        self.pin_memory = QCheckBox("Pin memory")
+        self.pin_memory.setToolTip(
+            "Check to use pinned memory, speeding up the transfers to the GPU."
+        )
+        self.pin_memory.setChecked(self.configuration_signal.pin_memory)
+
+        self.pack_files = QCheckBox("Pack training files")
+        self.pack_files.setToolTip(
+            "Check to decode the training files from disk once into a single\n"
+            "memory-mapped cache in the working directory, speeding up the\n"
+            "epochs on folders of many small files. The cache is rebuilt when\n"
+            "the files change."
+        )
+        self.pack_files.setChecked(self.configuration_signal.pack_files)
+
+        self.workers_warning = QLabel("")
+        self.workers_warning.setWordWrap(True)
+        self.workers_warning.setStyleSheet("color: orange")
+
+        data_loading_layout.addRow("Workers", self.num_workers)
+        data_loading_layout.addRow("Prefetch factor", self.prefetch_factor)
+        data_loading_layout.addRow(self.persistent_workers)
+        data_loading_layout.addRow(self.pin_memory)
+        data_loading_layout.addRow(self.pack_files)
+        data_loading_layout.addRow(self.workers_warning)
+        data_loading.setLayout(data_loading_layout)
+        self.layout().addWidget(data_loading)
+
+        ##################
+        # early stopping and learning rate schedule
+        convergence = QGroupBox("Early stopping and learning rate")
+        convergence_layout = QFormLayout()
+        convergence_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
+        convergence_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        self.early_stopping = QCheckBox("Early stopping")
+        self.early_stopping.setToolTip(
+            "Check to stop the training when the validation loss has not improved\n"
+            "for a number of validations."
+        )
+        self.early_stopping.setChecked(self.configuration_signal.early_stopping)
+
+        self.early_stopping_patience = create_int_spinbox(
+            1, 1000, self.configuration_signal.early_stopping_patience, 1
+        )
+        self.early_stopping_patience.setToolTip(
+            "Number of validations, run at the end of each epoch, without\n"
+            "improvement of the validation loss before stopping the training."
+        )
+
+        self.early_stopping_min_delta = create_double_spinbox(
+            0, 1, self.configuration_signal.early_stopping_min_delta, 1e-4, n_decimal=4
+        )
+        self.early_stopping_min_delta.setToolTip(
+            "Minimum decrease of the validation loss counted as an improvement."
+        )
+
+        self.lr_plateau_factor = create_double_spinbox(
+            0.01, 0.99, self.configuration_signal.lr_plateau_factor, 0.05, n_decimal=2
+        )
+        self.lr_plateau_factor.setToolTip(
+            "Factor applied to the learning rate when the validation loss plateaus."
+        )
+
+        self.lr_plateau_patience = create_int_spinbox(
+            1, 1000, self.configuration_signal.lr_plateau_patience, 1
+        )
+        self.lr_plateau_patience.setToolTip(
+            "Number of epochs without improvement of the validation loss before\n"
+            "reducing the learning rate."
+        )
+
+        convergence_layout.addRow(self.early_stopping)
+        convergence_layout.addRow("Patience", self.early_stopping_patience)
+        convergence_layout.addRow("Min. delta", self.early_stopping_min_delta)
+        convergence_layout.addRow("LR reduction factor", self.lr_plateau_factor)
+        convergence_layout.addRow("LR patience", self.lr_plateau_patience)
+        convergence.setLayout(convergence_layout)
+        self.layout().addWidget(convergence)
+
+        ##################
+        # checkpoints
+        checkpoints = QGroupBox("Checkpoints")
+        checkpoints_layout = QFormLayout()
+        checkpoints_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
+        checkpoints_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        self.checkpoint_top_k = create_int_spinbox(
+            1, 10, self.configuration_signal.checkpoint_top_k, 1
+        )
+        self.checkpoint_top_k.setToolTip(
+            "Number of checkpoints with the lowest validation loss kept in the\n"
+            "working directory."
+        )
+
+        self.checkpoint_last_k = create_int_spinbox(
+            0, 10, self.configuration_signal.checkpoint_last_k, 1
+        )
+        self.checkpoint_last_k.setToolTip(
+            "Number of checkpoints of the last epochs kept in the working\n"
+            "directory, in addition to the last one."
+        )
+
+        checkpoints_layout.addRow("Best kept", self.checkpoint_top_k)
+        checkpoints_layout.addRow("Last epochs kept", self.checkpoint_last_k)
+        checkpoints.setLayout(checkpoints_layout)
+        self.layout().addWidget(checkpoints)
+
+        ##################
+        # execution
+        execution = QGroupBox("Execution")
+        execution_layout = QFormLayout()
+        execution_layout.setFormAlignment(Qt.AlignLeft | Qt.AlignTop)
+        execution_layout.setFieldGrowthPolicy(QFormLayout.AllNonFixedFieldsGrow)
+
+        self.separate_process = QCheckBox("Train in a separate process")
+        self.separate_process.setToolTip(
+            "Check to train in a separate process, keeping napari responsive and "
+            "avoiding slowing down the training. Images are copied to the process "
+            "at the start of the training."
+        )
+        self.separate_process.setChecked(self.configuration_signal.separate_process)
+
+        self.resume_training = QCheckBox("Resume from the last checkpoint")
+        self.resume_training.setToolTip(
+            "Check to resume an interrupted training from the last checkpoint of\n"
+            "the working directory (model, optimizer, learning rate scheduler and\n"
+            "epoch), until the total number of epochs is reached. The training\n"
+            "and validation data must be the same as before the interruption."
+        )
+        self.resume_training.setChecked(self.configuration_signal.resume_training)
+
+        self.precision = QComboBox()
+        self.precision.addItems(SUPPORTED_PRECISIONS)
+        self.precision.setCurrentText(self.configuration_signal.precision)
+        self.precision.setToolTip(
+            "Numerical precision of the training. Mixed precisions (16-mixed on\n"
+            "GPUs, bf16-mixed on recent GPUs and CPUs) are faster and use less\n"
+            "memory, at the cost of a lower numerical accuracy."
+        )
+
+        self.learning_rate = create_double_spinbox(
+            1e-6, 1.0, self.configuration_signal.learning_rate, 1e-5, n_decimal=6
+        )
+        self.learning_rate.setToolTip(
+            "Learning rate of the optimizer, overwritten by the auto-tuning."
+        )
+
+        self.auto_tune_budget = create_int_spinbox(
+            5, 600, self.configuration_signal.auto_tune_budget, 5
+        )
+        self.auto_tune_budget.setToolTip(
+            "Maximum duration, in seconds, of the batch size and learning rate\n"
+            "probe run before training when auto-tuning is enabled."
+        )
+
+        execution_layout.addRow("Precision", self.precision)
+        execution_layout.addRow("Learning rate", self.learning_rate)
+        execution_layout.addRow("Auto-tune budget (s)", self.auto_tune_budget)
+        execution_layout.addRow(self.separate_process)
+        execution_layout.addRow(self.resume_training)
+        execution.setLayout(execution_layout)
+        self.layout().addWidget(execution)
+
         ##################
         # save button
         button_widget = QWidget()
@@ -256,6 +487,12 @@ class AdvancedConfigurationWindow(QDialog):
         ##################
         # actions and set defaults
         self.save_button.clicked.connect(self._save)
+        self.num_workers.valueChanged.connect(self._update_workers)
+        self._update_workers(self.num_workers.value())
+        self.early_stopping.toggled.connect(self._update_early_stopping)
+        self._update_early_stopping(self.early_stopping.isChecked())
+        self.foreground_patches.toggled.connect(self.background_fraction.setEnabled)
+        self.background_fraction.setEnabled(self.foreground_patches.isChecked())
 
         if self.configuration_signal is not None:
             self.configuration_signal.events.use_channels.connect(
@@ -295,6 +532,33 @@ class AdvancedConfigurationWindow(QDialog):
         """
         self.channels.setVisible(use_channels)
 
+    def _update_workers(self: Self, num_workers: int) -> None:
+        """Update the worker options and warn if the CPU is oversubscribed.
+
+        Parameters
+        ----------
+        num_workers : int
+            Number of dataloader workers, -1 for automatic.
+        """
+        has_workers = num_workers > 0 or (num_workers < 0 and auto_num_workers() > 0)
+        self.prefetch_factor.setEnabled(has_workers)
+        self.persistent_workers.setEnabled(has_workers)
+
+        message = oversubscription_warning(num_workers)
+        self.workers_warning.setText("" if message is None else message)
+        self.workers_warning.setVisible(message is not None)
+
+    def _update_early_stopping(self: Self, state: bool) -> None:
+        """Enable the early stopping parameters if early stopping is selected.
+
+        Parameters
+        ----------
+        state : bool
+            Whether early stopping is selected.
+        """
+        self.early_stopping_patience.setEnabled(state)
+        self.early_stopping_min_delta.setEnabled(state)
+
     def _save(self: Self) -> None:
         """Save the parameters and close the dialog."""
         # Update the parameters
@@ -314,6 +578,39 @@ class AdvancedConfigurationWindow(QDialog):
             self.configuration_signal.use_n2v2 = self.use_n2v2.isChecked()
             self.configuration_signal.depth = self.model_depth.value()
             self.configuration_signal.num_conv_filters = self.size_conv_filters.value()
+            self.configuration_signal.early_stopping = self.early_stopping.isChecked()
+            self.configuration_signal.early_stopping_patience = (
+                self.early_stopping_patience.value()
+            )
+            self.configuration_signal.early_stopping_min_delta = (
+                self.early_stopping_min_delta.value()
+            )
+            self.configuration_signal.lr_plateau_factor = self.lr_plateau_factor.value()
+            self.configuration_signal.lr_plateau_patience = (
+                self.lr_plateau_patience.value()
+            )
+            self.configuration_signal.checkpoint_top_k = self.checkpoint_top_k.value()
+            self.configuration_signal.checkpoint_last_k = self.checkpoint_last_k.value()
+            self.configuration_signal.foreground_patches = (
+                self.foreground_patches.isChecked()
+            )
+            self.configuration_signal.background_fraction = (
+                self.background_fraction.value()
+            )
+            self.configuration_signal.num_workers = self.num_workers.value()
+            self.configuration_signal.prefetch_factor = self.prefetch_factor.value()
+            self.configuration_signal.persistent_workers = (
+                self.persistent_workers.isChecked()
+            )
+            self.configuration_signal.pin_memory = self.pin_memory.isChecked()
+            self.configuration_signal.pack_files = self.pack_files.isChecked()
+            self.configuration_signal.precision = self.precision.currentText()
+            self.configuration_signal.learning_rate = self.learning_rate.value()
+            self.configuration_signal.auto_tune_budget = self.auto_tune_budget.value()
+            self.configuration_signal.separate_process = (
+                self.separate_process.isChecked()
+            )
+            self.configuration_signal.resume_training = self.resume_training.isChecked()
 
         self.close()
 
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional
 
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import (
+    QCheckBox,
     QFormLayout,
     QTabWidget,
     QVBoxLayout,
@@ -99,10 +100,20 @@ class PredictDataWidget(QTabWidget):
             self.img_pred = layer_choice()
             form.addRow("Predict", self.img_pred.native)
 
+            self.live_cbox = QCheckBox("Live")
+            self.live_cbox.setToolTip(
+                "Select to keep predicting the latest frame of the layer whenever "
+                "it is updated, for instance by an acquisition software. The "
+                "prediction is displayed in a live layer."
+            )
+            self.live_cbox.setChecked(self.config_signal.live)
+            form.addRow("", self.live_cbox)
+
             layer_tab.layout().addWidget(widget_layers)
 
             # connection actions for images
             self.img_pred.changed.connect(self._update_pred_layer)
+            self.live_cbox.stateChanged.connect(self._update_live)
             # to cover the case when image was loaded before the plugin
             if self.img_pred.value is not None:
                 self._update_pred_layer(self.img_pred.value)
@@ -130,10 +141,20 @@ class PredictDataWidget(QTabWidget):
 
         self.pred_images_folder.setToolTip("Select a folder containing images.")
 
+        self.watch_cbox = QCheckBox("Watch folder")
+        self.watch_cbox.setToolTip(
+            "Select to keep predicting the new images written in the folder, "
+            "for instance during an acquisition. Predictions are saved next to "
+            "the images."
+        )
+        self.watch_cbox.setChecked(self.config_signal.watch_folder)
+        form.addRow("", self.watch_cbox)
+
         # add actions
         self.pred_images_folder.get_text_widget().textChanged.connect(
             self._update_pred_folder
         )
+        self.watch_cbox.stateChanged.connect(self._update_watch_folder)
 
         buttons.setLayout(form)
         disk_tab.layout().addWidget(buttons)
@@ -160,6 +181,16 @@ class PredictDataWidget(QTabWidget):
         if self.config_signal is not None:
             self.config_signal.layer_pred = layer
 
+    def _update_live(self: Self, state: bool) -> None:
+        """Update the live attribute of the signal.
+
+        Parameters
+        ----------
+        state : bool
+            The new state of the live checkbox.
+        """
+        self.config_signal.live = bool(state)
+
     def _update_pred_folder(self: Self, folder: str) -> None:
         """Update the path attribute of the signal.
 
@@ -171,6 +202,16 @@ class PredictDataWidget(QTabWidget):
         if self.config_signal.path_pred is not None:
             self.config_signal.path_pred = folder
 
+    def _update_watch_folder(self: Self, state: bool) -> None:
+        """Update the watch folder attribute of the signal.
+
+        Parameters
+        ----------
+        state : bool
+            The new state of the watch folder checkbox.
+        """
+        self.config_signal.watch_folder = bool(state)
+
 
 if __name__ == "__main__":
     # from qtpy.QtWidgets import QApplication
@@ -8,6 +8,7 @@ from qtpy.QtWidgets import (
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
+    QLabel,
     QPushButton,
     QVBoxLayout,
     QWidget,
@@ -90,6 +91,14 @@ class PredictionWidget(QGroupBox):
         )
         self.layout().addWidget(self.tiling_cbox)
 
+        self.incremental_cbox = QCheckBox("Only predict changed tiles")
+        self.incremental_cbox.setToolTip(
+            "Select to reuse the previous prediction for the tiles (or frames) "
+            "whose input did not change since the last prediction."
+        )
+        self.incremental_cbox.setChecked(self.pred_signal.incremental)
+        self.layout().addWidget(self.incremental_cbox)
+
         # tiling spinboxes
         self.tile_size_xy = PowerOfTwoSpinBox(64, 1024, self.pred_signal.tile_size_xy)
         self.tile_size_xy.setToolTip("Tile size in the xy dimension.")
@@ -121,6 +130,15 @@ class PredictionWidget(QGroupBox):
         )
         self.pb_prediction.setToolTip("Show the progress of the prediction")
 
+        # watch and live modes status
+        self.watch_label = QLabel("")
+        self.watch_label.setToolTip(
+            "Number of files (or frames) waiting to be predicted and time between "
+            "the detection of the last file and its prediction being saved (or "
+            "median latency of the frames)."
+        )
+        self.watch_label.setVisible(False)
+
         # predict button
         predictions = QWidget()
         predictions.setLayout(QHBoxLayout())
@@ -133,10 +151,12 @@ class PredictionWidget(QGroupBox):
 
         # add to the group
         self.layout().addWidget(self.pb_prediction)
+        self.layout().addWidget(self.watch_label)
         self.layout().addWidget(predictions)
 
         # actions
         self.tiling_cbox.stateChanged.connect(self._update_tiles)
+        self.incremental_cbox.stateChanged.connect(self._update_incremental)
 
         if self.pred_status is not None and self.train_status is not None:
             # what to do when the buttons are clicked
@@ -153,6 +173,8 @@ class PredictionWidget(QGroupBox):
 
             self.pred_status.events.sample_idx.connect(self._update_sample_idx)
             self.pred_status.events.max_samples.connect(self._update_max_sample)
+            self.pred_status.events.watch_queue.connect(self._update_watch_label)
+            self.pred_status.events.watch_latency.connect(self._update_watch_label)
 
     def _set_xy_tile_size(self: Self, size: int) -> None:
         """Update the signal tile size in the xy dimension.
@@ -213,6 +235,16 @@ class PredictionWidget(QGroupBox):
         if self.train_signal.is_3d:
             self.tile_size_z.setEnabled(state)
 
+    def _update_incremental(self: Self, state: bool) -> None:
+        """Update the signal incremental prediction parameter.
+
+        Parameters
+        ----------
+        state : bool
+            The new state of the incremental prediction checkbox.
+        """
+        self.pred_signal.incremental = bool(state)
+
     def _update_3d_tiles(self: Self, state: bool) -> None:
         """Enable the z tile size spinbox if the data is 3D and tiled.
 
@@ -247,16 +279,60 @@ class PredictionWidget(QGroupBox):
             f"Sample {sample+1}/{self.pred_status.max_samples}"
         )
 
+    def _update_watch_label(self: Self) -> None:
+        """Update the watch and live modes status label."""
+        latency = self.pred_status.watch_latency
+        if self.pred_signal.load_from_disk:
+            self.watch_label.setText(
+                f"Queued files: {self.pred_status.watch_queue}, last file: "
+                + (f"{latency:.2f} s" if latency >= 0 else "-")
+            )
+        else:
+            self.watch_label.setText(
+                f"Queued frames: {self.pred_status.watch_queue}, latency: "
+                + (f"{1000 * latency:.0f} ms" if latency >= 0 else "-")
+            )
+
+    def _is_watching(self: Self) -> bool:
+        """Whether the prediction watches a folder or a layer for new images.
+
+        Returns
+        -------
+        bool
+            Whether the prediction watches a folder or a layer.
+        """
+        if self.pred_signal.load_from_disk:
+            return self.pred_signal.watch_folder
+        return self.pred_signal.live
+
     def _predict_button_clicked(self: Self) -> None:
-        """Run the prediction on the images."""
+        """Run the prediction on the images, or stop watching the folder or layer."""
         if self.pred_status is not None:
-            if (
+            if self.pred_status.state == PredictionState.PREDICTING:
+                # only reachable in watch and live modes, the button is otherwise
+                # disabled. The button stays disabled until the watcher has
+                # finished, which it signals by setting the state to STOPPED.
+                self.predict_button.setText("Stopping...")
+                self.predict_button.setEnabled(False)
+                self.pred_status.state = PredictionState.STOPPING
+
+            elif (
                 self.pred_status.state == PredictionState.IDLE
                 or self.train_status.state == TrainingState.DONE
                 or self.pred_status.state == PredictionState.CRASHED
+                or self.pred_status.state == PredictionState.STOPPED
             ):
-                self.pred_status.state = PredictionState.PREDICTING
-                self.predict_button.setEnabled(False)
+                if self._is_watching():
+                    self.pred_status.watch_queue = 0
+                    self.pred_status.watch_latency = -1
+                    self._update_watch_label()
+                    self.watch_label.setVisible(True)
+
+                    self.pred_status.state = PredictionState.PREDICTING
+                    self.predict_button.setText("Stop watching")
+                else:
+                    self.pred_status.state = PredictionState.PREDICTING
+                    self.predict_button.setEnabled(False)
 
     def _update_button_from_train(self: Self, state: TrainingState) -> None:
         """Update the predict button based on the training state.
@@ -267,7 +343,11 @@ class PredictionWidget(QGroupBox):
             The new state of the training plugin.
         """
         if state == TrainingState.DONE:
-            self.predict_button.setEnabled(True)
+            # a stopping watcher re-enables the button once it has finished
+            self.predict_button.setEnabled(
+                self.pred_status is None
+                or self.pred_status.state != PredictionState.STOPPING
+            )
         else:
             self.predict_button.setEnabled(False)
 
@@ -279,8 +359,14 @@ class PredictionWidget(QGroupBox):
         state : PredictionState
             The new state of the prediction plugin.
         """
-        if state == PredictionState.DONE or state == PredictionState.CRASHED:
+        if (
+            state == PredictionState.DONE
+            or state == PredictionState.CRASHED
+            or state == PredictionState.STOPPED
+        ):
+            self.predict_button.setText("Predict")
             self.predict_button.setEnabled(True)
+            self.watch_label.setVisible(False)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from typing import Optional
 
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QFileDialog,
     QGroupBox,
@@ -15,6 +16,7 @@ from qtpy.QtWidgets import (
 )
 from typing_extensions import Self
 
+from careamics_napari.careamics_utils import is_onnx_available
 from careamics_napari.signals import (
     ExportType,
     SavingSignal,
@@ -80,6 +82,28 @@ class SavingWidget(QGroupBox):
         save_widget.layout().addWidget(self.save_button, alignment=Qt.AlignLeft)
         self.layout().addWidget(save_widget)
 
+        # additional weight formats of the Bioimage.io export
+        formats_widget = QWidget()
+        formats_widget.setLayout(QHBoxLayout())
+        self.torchscript = QCheckBox("TorchScript")
+        self.torchscript.setToolTip(
+            "Include TorchScript weights in the Bioimage.io export, which can be\n"
+            "run without CAREamics."
+        )
+        self.onnx = QCheckBox("ONNX")
+        if is_onnx_available():
+            self.onnx.setToolTip("Include ONNX weights in the Bioimage.io export.")
+        else:
+            self.onnx.setToolTip("Install `onnx` to export ONNX weights.")
+        if self.save_signal is not None:
+            self.torchscript.setChecked(self.save_signal.torchscript)
+            self.onnx.setChecked(self.save_signal.onnx and is_onnx_available())
+
+        formats_widget.layout().addWidget(self.torchscript)
+        formats_widget.layout().addWidget(self.onnx)
+        self.layout().addWidget(formats_widget)
+        self._update_formats()
+
         # actions
         if self.train_status is not None:
             # updates from signals
@@ -91,6 +115,10 @@ class SavingWidget(QGroupBox):
             # when changing the format
             self.save_choice.currentIndexChanged.connect(self._update_export_type)
 
+            # when changing the weight formats
+            self.torchscript.stateChanged.connect(self._update_formats)
+            self.onnx.stateChanged.connect(self._update_formats)
+
     def _update_export_type(self: Self, index: int) -> None:
         """Set the signal export type to the selected format.
 
@@ -100,7 +128,19 @@ class SavingWidget(QGroupBox):
             Index of the selected format.
         """
         if self.save_signal is not None:
-            self.save_signal.export_type = self.save_choice.currentText()
+            self.save_signal.export_type = ExportType(self.save_choice.currentText())
+
+        self._update_formats()
+
+    def _update_formats(self: Self) -> None:
+        """Enable the weight formats of the Bioimage.io export and update the signal."""
+        is_bmz = ExportType(self.save_choice.currentText()) == ExportType.BMZ
+        self.torchscript.setEnabled(is_bmz)
+        self.onnx.setEnabled(is_bmz and is_onnx_available())
+
+        if self.save_signal is not None:
+            self.save_signal.torchscript = self.torchscript.isChecked()
+            self.save_signal.onnx = self.onnx.isChecked()
 
     def _update_training_state(self: Self, state: TrainingState) -> None:
         """Update the widget state based on the training state.
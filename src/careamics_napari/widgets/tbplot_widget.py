@@ -3,6 +3,7 @@
 import webbrowser
 from typing import Any, Optional
 
+import numpy as np
 import pyqtgraph as pg
 from magicgui.widgets import Container
 from qtpy.QtCore import QSize, Qt
@@ -12,12 +13,24 @@ from typing_extensions import Self
 
 from careamics_napari.resources import ICON_TF
 from careamics_napari.signals import TrainingSignal
+from careamics_napari.utils import RingBuffer
+
+EPOCH_LOSS_CAPACITY = 100_000
+"""Maximum number of epochs whose losses are plotted."""
+
+BATCH_LOSS_CAPACITY = 1_000_000
+"""Maximum number of batch losses plotted, the oldest ones are dropped."""
 
 
 # TODO why is it a magicgui container and not just a widget?
 class TBPlotWidget(Container):
     """A widget displaying losses and a button to open TensorBoard in the browser.
 
+    The losses are accumulated in ring buffers and the curves are updated in
+    place. Long curves are decimated by pyqtgraph (minimum and maximum per pixel)
+    and clipped to the visible range, so that the cost of an update does not grow
+    with the number of points.
+
     Parameters
     ----------
     min_width : int or None, default=None
@@ -91,6 +104,38 @@ class TBPlotWidget(Container):
         self.plot.setLabel("left", "loss")
         self.plot.addLegend(offset=(125, -50))
 
+        # decimate the curves to their minimum and maximum per pixel, and only draw
+        # the visible range
+        self.plot.setDownsampling(auto=True, mode="peak")
+        self.plot.setClipToView(True)
+
+        # persistent curves, updated with the content of the buffers
+        curve_options = {"skipFiniteCheck": True}
+        self.batch_curve = self.plot.plot(
+            pen=pg.mkPen(color=(204, 221, 255, 80)),
+            name="Train (batch)",
+            **curve_options,
+        )
+        self.train_curve = self.plot.plot(
+            pen=pg.mkPen(color=(204, 221, 255)),
+            symbol="o",
+            symbolSize=2,
+            name="Train",
+            **curve_options,
+        )
+        self.val_curve = self.plot.plot(
+            pen=pg.mkPen(color=(244, 173, 173)),
+            symbol="o",
+            symbolSize=2,
+            name="Val",
+            **curve_options,
+        )
+
+        # epoch, training and validation losses
+        self.epoch_losses = RingBuffer(EPOCH_LOSS_CAPACITY, n_columns=3)
+        # position in epochs and training loss of each batch
+        self.batch_losses = RingBuffer(BATCH_LOSS_CAPACITY, n_columns=2)
+
         # tensorboard button
         tb_button = QPushButton("Open in TensorBoard")
         tb_button.setToolTip("Open TensorBoard in your browser")
@@ -108,9 +153,6 @@ class TBPlotWidget(Container):
         self.native.layout().addWidget(button_widget)
 
         # set empty references
-        self.epochs: list[int] = []
-        self.train_loss: list[float] = []
-        self.val_loss: list[float] = []
         self.url: Optional[str] = None
         self.tb = None
 
@@ -152,35 +194,30 @@ class TBPlotWidget(Container):
         val_loss : float
             Validation loss.
         """
-        # clear the plot
-        self.plot.clear()
-
-        # add the new points
-        self.epochs.append(epoch)
-        self.train_loss.append(train_loss)
-        self.val_loss.append(val_loss)
-
-        # replot
-        self.plot.plot(
-            self.epochs,
-            self.train_loss,
-            pen=pg.mkPen(color=(204, 221, 255)),
-            symbol="o",
-            symbolSize=2,
-            name="Train",
-        )
-        self.plot.plot(
-            self.epochs,
-            self.val_loss,
-            pen=pg.mkPen(color=(244, 173, 173)),
-            symbol="o",
-            symbolSize=2,
-            name="Val",
-        )
+        self.epoch_losses.append(epoch, train_loss, val_loss)
+
+        epochs, train, val = self.epoch_losses.data
+        self.train_curve.setData(epochs, train)
+        self.val_curve.setData(epochs, val)
+
+    def add_batch_losses(self: Self, losses: np.ndarray) -> None:
+        """Add training losses of individual batches to the plot.
+
+        Parameters
+        ----------
+        losses : numpy.ndarray
+            Array of shape (2, N), with the position of the batches in epochs and
+            their training loss.
+        """
+        self.batch_losses.extend(losses)
+
+        positions, values = self.batch_losses.data
+        self.batch_curve.setData(positions, values)
 
     def clear_plot(self: Self) -> None:
         """Clear the plot."""
-        self.plot.clear()
-        self.epochs = []
-        self.train_loss = []
-        self.val_loss = []
+        self.epoch_losses.clear()
+        self.batch_losses.clear()
+
+        for curve in (self.batch_curve, self.train_curve, self.val_curve):
+            curve.setData([], [])
@@ -183,7 +183,7 @@ class TrainDataWidget(QTabWidget):
                 "Select a folder containing the validation\n" "target."
             )
             self.train_images_folder.setToolTip(
-                "Select a folder containing the training\n" "images."
+                "Select a folder containing the training\n" "images, or a Zarr store."
             )
             self.val_images_folder.setToolTip(
                 "Select a folder containing the validation\n" "images."
@@ -199,7 +199,7 @@ class TrainDataWidget(QTabWidget):
 
         else:
             self.train_images_folder.setToolTip(
-                "Select a folder containing the training\n" "images."
+                "Select a folder containing the training\n" "images, or a Zarr store."
             )
             self.val_images_folder.setToolTip(
                 "Select a folder containing the validation\n"
@@ -4,6 +4,7 @@ from typing import Optional
 
 from qtpy.QtWidgets import (
     QGroupBox,
+    QLabel,
     QVBoxLayout,
 )
 from typing_extensions import Self
@@ -63,8 +64,41 @@ class TrainProgressWidget(QGroupBox):
             value=0,
         )
 
+        # throughput
+        self.throughput_label = QLabel("")
+        self.throughput_label.setToolTip(
+            "Number of patches processed per second, estimated remaining time and "
+            "share of the time spent waiting for the data to be loaded. A large "
+            "share indicates that the training is limited by the data loading."
+        )
+
+        # time budget
+        self.budget_label = QLabel("")
+        self.budget_label.setToolTip(
+            "Remaining time budget and number of epochs expected to be trained "
+            "within the budget."
+        )
+        self.budget_label.setVisible(False)
+
+        # foreground patch selection
+        self.patches_label = QLabel("")
+        self.patches_label.setToolTip(
+            "Fraction of the training patches kept by skipping the background, "
+            "and time saved per epoch compared to training on all patches."
+        )
+        self.patches_label.setVisible(False)
+
+        # reason of an early stop
+        self.stop_label = QLabel("")
+        self.stop_label.setWordWrap(True)
+        self.stop_label.setVisible(False)
+
         self.layout().addWidget(self.pb_epochs)
         self.layout().addWidget(self.pb_batch)
+        self.layout().addWidget(self.throughput_label)
+        self.layout().addWidget(self.budget_label)
+        self.layout().addWidget(self.patches_label)
+        self.layout().addWidget(self.stop_label)
 
         # plot widget
         self.plot = TBPlotWidget(
@@ -82,6 +116,19 @@ class TrainProgressWidget(QGroupBox):
             self.train_status.events.max_batches.connect(self._update_max_batch)
             self.train_status.events.val_loss.connect(self._update_loss)
 
+            self.train_status.events.patches_per_second.connect(self._update_throughput)
+            self.train_status.events.eta.connect(self._update_throughput)
+            self.train_status.events.data_share.connect(self._update_throughput)
+
+            self.train_status.events.remaining_budget.connect(self._update_budget)
+            self.train_status.events.projected_epochs.connect(self._update_budget)
+
+            self.train_status.events.patches_kept.connect(self._update_patches)
+            self.train_status.events.epoch_time_saved.connect(self._update_patches)
+
+            self.train_status.events.stop_reason.connect(self._update_stop_reason)
+            self.train_status.events.saved_epochs.connect(self._update_stop_reason)
+
     def _update_training_state(self: Self, state: TrainingState) -> None:
         """Update the widget according to the training state.
 
@@ -131,6 +178,70 @@ class TrainProgressWidget(QGroupBox):
             f"Batch {self.train_status.batch_idx+1}/{self.train_status.max_batches}"
         )
 
+    def _update_throughput(self: Self) -> None:
+        """Update the throughput label."""
+        status = self.train_status
+        if status.patches_per_second < 0:
+            self.throughput_label.setText("")
+            return
+
+        text = f"{status.patches_per_second:.1f} patches/s"
+        if status.eta >= 0:
+            minutes, seconds = divmod(int(status.eta), 60)
+            hours, minutes = divmod(minutes, 60)
+            text += f", ETA {hours}:{minutes:02d}:{seconds:02d}"
+        if status.data_share >= 0:
+            text += f", data loading {100 * status.data_share:.0f}%"
+
+        self.throughput_label.setText(text)
+
+    def _update_budget(self: Self) -> None:
+        """Update the time budget label."""
+        status = self.train_status
+        if status.remaining_budget < 0:
+            self.budget_label.setVisible(False)
+            return
+
+        minutes, seconds = divmod(int(status.remaining_budget), 60)
+        hours, minutes = divmod(minutes, 60)
+        text = f"Budget left {hours}:{minutes:02d}:{seconds:02d}"
+        if status.projected_epochs >= 0:
+            text += f", {status.projected_epochs} epochs projected"
+
+        self.budget_label.setText(text)
+        self.budget_label.setVisible(True)
+
+    def _update_patches(self: Self) -> None:
+        """Update the foreground patch selection label."""
+        status = self.train_status
+        if status.patches_kept < 0:
+            self.patches_label.setVisible(False)
+            return
+
+        text = f"Patches kept {100 * status.patches_kept:.0f}%"
+        if status.epoch_time_saved >= 0:
+            text += f", {status.epoch_time_saved:.1f} s saved per epoch"
+        else:
+            text += f", epochs ~{100 * (1 - status.patches_kept):.0f}% shorter"
+
+        self.patches_label.setText(text)
+        self.patches_label.setVisible(True)
+
+    def _update_stop_reason(self: Self) -> None:
+        """Update the label showing why the training stopped early."""
+        status = self.train_status
+        if status.stop_reason == "":
+            self.stop_label.setVisible(False)
+            return
+
+        text = status.stop_reason
+        if status.saved_epochs > 0:
+            plural = "s" if status.saved_epochs > 1 else ""
+            text += f" ({status.saved_epochs} epoch{plural} saved)."
+
+        self.stop_label.setText(text)
+        self.stop_label.setVisible(True)
+
     def _update_loss(self: Self) -> None:
         """Update the loss plot."""
         self.plot.update_plot(
@@ -65,12 +65,30 @@ class ConfigurationWidget(QGroupBox):
         self.n_epochs_spin = create_int_spinbox(1, 1000, 30, tooltip="Number of epochs")
         self.n_epochs = self.n_epochs_spin.value()
 
+        # time budget
+        self.time_budget_spin = create_int_spinbox(0, 10_000, 0, 5)
+        self.time_budget_spin.setSpecialValueText("Off")
+        self.time_budget_spin.setSuffix(" min")
+        self.time_budget_spin.setToolTip(
+            "Stop the training at the end of the last epoch expected to finish\n"
+            "within the time budget, or after the number of epochs, whichever\n"
+            "comes first. The weights with the best validation loss are kept."
+        )
+
         # batch size
         self.batch_size_spin = create_int_spinbox(1, 512, 16, 1)
         self.batch_size_spin.setToolTip(
             "Number of patches per batch (decrease if GPU memory is insufficient)"
         )
 
+        # auto-tuning
+        self.auto_tune = QCheckBox()
+        self.auto_tune.setToolTip(
+            "Choose the batch size and the learning rate with a short probe before\n"
+            "training. The probe duration is capped in the expert settings. Only\n"
+            "applies to new models, not when continuing a training."
+        )
+
         # patch size
         self.patch_XY_spin = PowerOfTwoSpinBox(16, 512, 64)
         self.patch_XY_spin.setToolTip("Dimension of the patches in XY.")
@@ -89,7 +107,9 @@ class ConfigurationWidget(QGroupBox):
         formLayout.addRow("Enable 3D", self.enable_3d)
         formLayout.addRow(self.axes_widget.label.text(), self.axes_widget.text_field)
         formLayout.addRow("N epochs", self.n_epochs_spin)
+        formLayout.addRow("Time budget", self.time_budget_spin)
         formLayout.addRow("Batch size", self.batch_size_spin)
+        formLayout.addRow("Auto-tune", self.auto_tune)
         formLayout.addRow("Patch XY", self.patch_XY_spin)
         formLayout.addRow("Patch Z", self.patch_Z_spin)
         formLayout.minimumSize()
@@ -108,10 +128,16 @@ class ConfigurationWidget(QGroupBox):
         self.enable_3d.clicked.connect(self._enable_3d_changed)
         self.axes_widget.text_field.textChanged.connect(self._update_axes)
         self.n_epochs_spin.valueChanged.connect(self._update_n_epochs)
+        self.time_budget_spin.valueChanged.connect(self._update_time_budget)
         self.batch_size_spin.valueChanged.connect(self._update_batch_size)
+        self.auto_tune.clicked.connect(self._update_auto_tune)
         self.patch_XY_spin.valueChanged.connect(self._update_patch_size_XY)
         self.patch_Z_spin.valueChanged.connect(self._update_patch_size_Z)
 
+        if self.configuration_signal is not None:
+            # the batch size can be changed by the auto-tuning
+            self.configuration_signal.events.batch_size.connect(self._set_batch_size)
+
     def _show_configuration_window(self: Self) -> None:
         """Show the advanced configuration window."""
         if self.config_window is None or self.config_window.isHidden():
@@ -157,6 +183,17 @@ class ConfigurationWidget(QGroupBox):
         if self.configuration_signal is not None:
             self.configuration_signal.n_epochs = n_epochs
 
+    def _update_time_budget(self: Self, time_budget: int) -> None:
+        """Update the signal time budget.
+
+        Parameters
+        ----------
+        time_budget : int
+            Time budget, in minutes, 0 to train all epochs.
+        """
+        if self.configuration_signal is not None:
+            self.configuration_signal.time_budget = time_budget
+
     def _update_batch_size(self: Self, batch_size: int) -> None:
         """Update the signal batch size.
 
@@ -168,6 +205,27 @@ class ConfigurationWidget(QGroupBox):
         if self.configuration_signal is not None:
             self.configuration_signal.batch_size = batch_size
 
+    def _set_batch_size(self: Self, batch_size: int) -> None:
+        """Update the batch size spin box from the signal.
+
+        Parameters
+        ----------
+        batch_size : int
+            Batch size.
+        """
+        self.batch_size_spin.setValue(batch_size)
+
+    def _update_auto_tune(self: Self, state: bool) -> None:
+        """Update the signal auto-tuning state.
+
+        Parameters
+        ----------
+        state : bool
+            Whether to auto-tune the batch size and learning rate.
+        """
+        if self.configuration_signal is not None:
+            self.configuration_signal.auto_tune = state
+
     def _update_patch_size_XY(self: Self, patch_size: int) -> None:
         """Update the signal patch size in XY.
 
@@ -14,6 +14,8 @@ from typing_extensions import Self
 
 from careamics_napari.signals import TrainingState, TrainingStatus
 
+from .qt_widgets import create_int_spinbox
+
 
 class TrainingWidget(QGroupBox):
     """Training widget.
@@ -56,17 +58,41 @@ class TrainingWidget(QGroupBox):
         )
 
         train_buttons.layout().addWidget(self.train_button, alignment=Qt.AlignLeft)
-        train_buttons.layout().addWidget(self.reset_model_button, alignment=Qt.AlignLeft)
+        train_buttons.layout().addWidget(
+            self.reset_model_button, alignment=Qt.AlignLeft
+        )
         self.layout().addWidget(train_buttons)
 
+        # profiling
+        profile_buttons = QWidget()
+        profile_buttons.setLayout(QHBoxLayout())
+
+        self.profile_button = QPushButton("Profile", self)
+        self.profile_button.setMinimumWidth(120)
+        self.profile_button.setEnabled(False)
+        self.profile_button.setToolTip(
+            "Profile the next training batches, the Chrome trace and the table of "
+            "operators are saved in the logs folder of the working directory."
+        )
+
+        self.profile_batches = create_int_spinbox(1, 1000, 10, 1)
+        self.profile_batches.setToolTip("Number of batches to profile.")
+
+        profile_buttons.layout().addWidget(self.profile_button, alignment=Qt.AlignLeft)
+        profile_buttons.layout().addWidget(self.profile_batches, alignment=Qt.AlignLeft)
+        self.layout().addWidget(profile_buttons)
+
         # actions
         if self.train_status is not None:
             # what to do when the buttons are clicked
             self.train_button.clicked.connect(self._train_stop_clicked)
             self.reset_model_button.clicked.connect(self._reset_clicked)
+            self.profile_button.clicked.connect(self._profile_clicked)
 
             # listening to the signal
             self.train_status.events.state.connect(self._update_button)
+            self.train_status.events.state.connect(self._update_profile_button)
+            self.train_status.events.profiling.connect(self._update_profile_button)
 
     def _train_stop_clicked(self) -> None:
         """Update the UI and training status when the train button is clicked."""
@@ -98,6 +124,18 @@ class TrainingWidget(QGroupBox):
                 self.train_button.setText("Train")
                 self.reset_model_button.setEnabled(False)
 
+    def _profile_clicked(self) -> None:
+        """Request the profiling of the next batches."""
+        if self.train_status.state == TrainingState.TRAINING:
+            self.train_status.profiling = self.profile_batches.value()
+
+    def _update_profile_button(self) -> None:
+        """Enable the profile button while training and not already profiling."""
+        self.profile_button.setEnabled(
+            self.train_status.state == TrainingState.TRAINING
+            and self.train_status.profiling == 0
+        )
+
     def _update_button(self, new_state: TrainingState) -> None:
         """Update the button text based on the training state.
 
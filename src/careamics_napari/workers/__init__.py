@@ -1,7 +1,23 @@
 """Callable used to run the workers in a new thread."""
 
-__all__ = ["predict_worker", "save_worker", "train_worker"]
+__all__ = [
+    "ProcessCommand",
+    "create_command_queue",
+    "live_worker",
+    "predict_worker",
+    "save_worker",
+    "train_process_worker",
+    "train_worker",
+    "watch_worker",
+]
 
+from .live_worker import live_worker
 from .prediction_worker import predict_worker
 from .saving_worker import save_worker
+from .training_process import (
+    ProcessCommand,
+    create_command_queue,
+    train_process_worker,
+)
 from .training_worker import train_worker
+from .watch_worker import watch_worker
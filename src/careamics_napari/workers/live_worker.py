@@ -0,0 +1,103 @@
+"""A thread worker function denoising a napari layer as it is updated."""
+
+from collections.abc import Generator
+from threading import Event
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from careamics import CAREamist
+from superqt.utils import thread_worker
+
+from careamics_napari.careamics_utils import StreamingDenoiser
+from careamics_napari.signals import (
+    PredictionState,
+    PredictionUpdate,
+    PredictionUpdateType,
+)
+from careamics_napari.utils import LayerFeed
+
+if TYPE_CHECKING:
+    from napari.layers import Image
+
+LIVE_INTERVAL = 0.5
+"""Time, in seconds, between two updates of the live mode status."""
+
+
+@thread_worker
+def live_worker(
+    careamist: CAREamist,
+    layer: "Image",
+    output: "Image",
+    stop_event: Event,
+) -> Generator[PredictionUpdate, None, None]:
+    """Live prediction worker.
+
+    The latest frame of `layer` is denoised every time its data is replaced, for
+    instance by an acquisition software, and the prediction is displayed in
+    `output`. Frames arriving faster than they are denoised are dropped, so that
+    the display keeps up with the acquisition.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    layer : napari.layers.Image
+        Layer whose frames are denoised.
+    output : napari.layers.Image
+        Layer displaying the latest prediction.
+    stop_event : Event
+        Event set to stop the live prediction.
+
+    Yields
+    ------
+    Generator[PredictionUpdate, None, None]
+        Updates.
+    """
+    denoiser = StreamingDenoiser(careamist, callback=LayerFeed(output))
+    n_axes = len([a for a in careamist.cfg.data_config.axes if a not in "ST"])
+
+    def push(event: Any = None) -> None:
+        """Push the latest frame of the layer to the denoiser.
+
+        Parameters
+        ----------
+        event : Any, default=None
+            Data event of the layer, ignored.
+        """
+        # the data may be a stack of frames, e.g. a growing time-lapse
+        frame = layer.data
+        while frame.ndim > n_axes:
+            frame = frame[-1]
+
+        try:
+            denoiser.push(np.asarray(frame))
+        except RuntimeError:
+            # the denoiser crashed, the exception is reported by the worker
+            pass
+
+    denoiser.start()
+    layer.events.data.connect(push)
+    try:
+        push()
+
+        while not stop_event.wait(LIVE_INTERVAL):
+            if denoiser.exception is not None:
+                yield PredictionUpdate(
+                    PredictionUpdateType.EXCEPTION, denoiser.exception
+                )
+                return
+
+            latency = denoiser.latency_percentiles((50,))[50]
+            yield PredictionUpdate(
+                PredictionUpdateType.WATCH_QUEUE, denoiser.queue_depth
+            )
+            yield PredictionUpdate(
+                PredictionUpdateType.WATCH_LATENCY,
+                -1 if np.isnan(latency) else latency,
+            )
+    finally:
+        layer.events.data.disconnect(push)
+        denoiser.stop(drain=False)
+
+    # signify end of the live prediction
+    yield PredictionUpdate(PredictionUpdateType.STATE, PredictionState.STOPPED)
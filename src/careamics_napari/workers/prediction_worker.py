@@ -6,15 +6,22 @@ from queue import Queue
 from threading import Thread
 from typing import Optional, Union
 
+import numpy as np
 from careamics import CAREamist
 from superqt.utils import thread_worker
 
+from careamics_napari.careamics_utils import PredictionCache
 from careamics_napari.signals import (
     PredictionSignal,
     PredictionState,
     PredictionUpdate,
     PredictionUpdateType,
 )
+from careamics_napari.utils.axes_utils import reshape_prediction
+from careamics_napari.utils.display_utils import (
+    estimate_contrast_limits,
+    prepare_for_display,
+)
 
 
 # TODO register CAREamist to continue training and predict
@@ -25,6 +32,7 @@ def predict_worker(
     careamist: CAREamist,
     config_signal: PredictionSignal,
     update_queue: Queue,
+    cache: Optional[PredictionCache] = None,
 ) -> Generator[PredictionUpdate, None, None]:
     """Model prediction worker.
 
@@ -36,6 +44,9 @@ def predict_worker(
         Prediction signal.
     update_queue : Queue
         Queue used to send updates to the UI.
+    cache : PredictionCache or None, default=None
+        Cache of the previous prediction, used to only predict the tiles whose
+        input changed if `config_signal.incremental` is set.
 
     Yields
     ------
@@ -49,6 +60,7 @@ def predict_worker(
             careamist,
             config_signal,
             update_queue,
+            cache,
         ),
     )
     training.start()
@@ -84,10 +96,58 @@ def _push_exception(queue: Queue, e: Exception) -> None:
     queue.put(PredictionUpdate(PredictionUpdateType.EXCEPTION, e))
 
 
+def _get_tiling(
+    config_signal: PredictionSignal,
+) -> tuple[
+    Optional[Union[tuple[int, int, int], tuple[int, int]]],
+    Optional[Union[tuple[int, int, int], tuple[int, int]]],
+    int,
+]:
+    """Get the tiling parameters from the prediction signal.
+
+    Parameters
+    ----------
+    config_signal : PredictionSignal
+        Prediction signal.
+
+    Returns
+    -------
+    tuple
+        Tile size, tile overlap (both None if the prediction is not tiled) and
+        batch size.
+    """
+    if config_signal.tiled:
+        if config_signal.is_3d:
+            tile_size: Optional[Union[tuple[int, int, int], tuple[int, int]]] = (
+                config_signal.tile_size_z,
+                config_signal.tile_size_xy,
+                config_signal.tile_size_xy,
+            )
+            tile_overlap: Optional[Union[tuple[int, int, int], tuple[int, int]]] = (
+                config_signal.tile_overlap_z,
+                config_signal.tile_overlap_xy,
+                config_signal.tile_overlap_xy,
+            )
+        else:
+            tile_size = (config_signal.tile_size_xy, config_signal.tile_size_xy)
+            tile_overlap = (
+                config_signal.tile_overlap_xy,
+                config_signal.tile_overlap_xy,
+            )
+        batch_size = config_signal.batch_size
+    else:
+        tile_size = None
+        tile_overlap = None
+        batch_size = 1
+
+    return tile_size, tile_overlap, batch_size
+
+
 def _predict(
     careamist: CAREamist,
     config_signal: PredictionSignal,
     update_queue: Queue,
+    cache: Optional[PredictionCache] = None,
 ) -> None:
     """Run the prediction.
 
@@ -99,6 +159,9 @@ def _predict(
         Prediction signal.
     update_queue : Queue
         Queue used to send updates to the UI.
+    cache : PredictionCache or None, default=None
+        Cache of the previous prediction, used to only predict the tiles whose
+        input changed if `config_signal.incremental` is set.
     """
     # Format data
     if config_signal.load_from_disk:
@@ -128,41 +191,60 @@ def _predict(
             pred_data = config_signal.layer_pred.data
 
     # tiling
-    if config_signal.tiled:
-        if config_signal.is_3d:
-            tile_size: Optional[Union[tuple[int, int, int], tuple[int, int]]] = (
-                config_signal.tile_size_z,
-                config_signal.tile_size_xy,
-                config_signal.tile_size_xy,
+    tile_size, tile_overlap, batch_size = _get_tiling(config_signal)
+
+    # Predict with CAREamist
+    try:
+        if (
+            config_signal.incremental
+            and cache is not None
+            and not isinstance(pred_data, str)
+        ):
+            result = cache.predict(
+                careamist,
+                pred_data,
+                tile_size=tile_size,
+                tile_overlap=tile_overlap,
+                batch_size=batch_size,
             )
-            tile_overlap: Optional[Union[tuple[int, int, int], tuple[int, int]]] = (
-                config_signal.tile_overlap_z,
-                config_signal.tile_overlap_xy,
-                config_signal.tile_overlap_xy,
+            update_queue.put(
+                PredictionUpdate(
+                    PredictionUpdateType.DEBUG,
+                    f"Predicted {cache.n_predicted}/{cache.n_tiles} tiles.",
+                )
+            )
+
+            # only part of the image may have gone through the callback
+            update_queue.put(
+                PredictionUpdate(
+                    PredictionUpdateType.CONTRAST_LIMITS,
+                    estimate_contrast_limits(result),
+                )
             )
         else:
-            tile_size = (config_signal.tile_size_xy, config_signal.tile_size_xy)
-            tile_overlap = (
-                config_signal.tile_overlap_xy,
-                config_signal.tile_overlap_xy,
+            result = careamist.predict(  # type: ignore
+                pred_data,
+                data_type="tiff" if config_signal.load_from_disk else "array",
+                tile_size=tile_size,
+                tile_overlap=tile_overlap,
+                batch_size=batch_size,
             )
-        batch_size = config_signal.batch_size
-    else:
-        tile_size = None
-        tile_overlap = None
-        batch_size = 1
 
-    # Predict with CAREamist
-    try:
-        result = careamist.predict(  # type: ignore
-            pred_data,
-            data_type="tiff" if config_signal.load_from_disk else "array",
-            tile_size=tile_size,
-            tile_overlap=tile_overlap,
-            batch_size=batch_size,
-        )
+        # result is either a numpy array or a list of numpy arrays, with each
+        # sample/time-point as an element
+        if isinstance(result, list):
+            result = np.concatenate(result, axis=0)
+
+        # reshape the prediction to match the input axes
+        axes = careamist.cfg.data_config.axes
+        result = reshape_prediction(result, axes, config_signal.is_3d)
 
-        update_queue.put(PredictionUpdate(PredictionUpdateType.SAMPLE, result))
+        # large predictions are sent as a multiscale pyramid
+        update_queue.put(
+            PredictionUpdate(
+                PredictionUpdateType.SAMPLE, prepare_for_display(result, axes)
+            )
+        )
 
         # # TODO can we use this to monkey patch the training process?
         # import time
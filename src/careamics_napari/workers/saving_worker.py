@@ -2,10 +2,23 @@
 
 import traceback
 from collections.abc import Generator
+from pathlib import Path
+from typing import Any
 
 from careamics import CAREamist
+from careamics.file_io.read import read_tiff
 from superqt.utils import thread_worker
 
+from careamics_napari.careamics_utils import (
+    WEIGHTS_SUFFIX,
+    crop_test_input,
+    export_bmz,
+    open_chunked,
+    save_weights,
+    wait_for_checkpoints,
+    weights_hash,
+)
+from careamics_napari.careamics_utils.chunked_dataset import is_zarr_path
 from careamics_napari.signals import (
     ExportType,
     SavingSignal,
@@ -15,6 +28,11 @@ from careamics_napari.signals import (
     TrainingSignal,
 )
 
+from .training_worker import _layer_data
+
+_saved_checkpoints: dict[Path, tuple[str, float]] = {}
+"""Hash of the weights and modification time of the checkpoints already saved."""
+
 
 @thread_worker
 def save_worker(
@@ -37,11 +55,6 @@ def save_worker(
     ------
     Generator[SavingUpdate, None, None]
         Updates.
-
-    Raises
-    ------
-    NotImplementedError
-        Export to BMZ not implemented yet.
     """
     dims = "3D" if training_signal.is_3d else "2D"
     name = f"{training_signal.algorithm}_{dims}_{training_signal.experiment_name}"
@@ -49,15 +62,35 @@ def save_worker(
     # save model
     try:
         if config_signal.export_type == ExportType.BMZ:
+            data_config = careamist.cfg.data_config
+            input_array = crop_test_input(
+                _load_training_image(training_signal),
+                data_config.axes,
+                list(data_config.patch_size),
+            )
 
-            raise NotImplementedError("Export to BMZ not implemented yet (but soon).")
+            export_bmz(
+                careamist,
+                Path(config_signal.path_model) / (name + ".zip"),
+                name=name,
+                input_array=input_array,
+                authors=[{"name": "CAREamics napari"}],
+                general_description=careamist.cfg.get_algorithm_description(),
+                data_description=_data_description(training_signal),
+                torchscript=config_signal.torchscript,
+                onnx=config_signal.onnx,
+            )
+
+        elif config_signal.export_type in (ExportType.WEIGHTS, ExportType.WEIGHTS_FP16):
+            save_weights(
+                careamist,
+                Path(config_signal.path_model) / (name + WEIGHTS_SUFFIX),
+                half=config_signal.export_type == ExportType.WEIGHTS_FP16,
+            )
 
         else:
             name = name + ".ckpt"
-            # TODO: should we reexport the model every time?
-            careamist.trainer.save_checkpoint(
-                config_signal.path_model / name,
-            )
+            _save_checkpoint(careamist, Path(config_signal.path_model) / name)
 
     except Exception as e:
         traceback.print_exc()
@@ -65,3 +98,94 @@ def save_worker(
         yield SavingUpdate(SavingUpdateType.EXCEPTION, e)
 
     yield SavingUpdate(SavingUpdateType.STATE, SavingState.DONE)
+
+
+def _load_training_image(training_signal: TrainingSignal) -> Any:
+    """Load the training image, or the first training file.
+
+    Layers are taken at full resolution, and neither layers nor Zarr stores are
+    converted, so that lazy data is only read within the crop of the test input.
+
+    Parameters
+    ----------
+    training_signal : TrainingSignal
+        Training signal.
+
+    Returns
+    -------
+    Any
+        Training image.
+
+    Raises
+    ------
+    ValueError
+        If no training data is found.
+    """
+    if not training_signal.load_from_disk:
+        if training_signal.layer_train is None:
+            raise ValueError("Training layer has not been selected.")
+
+        return _layer_data(training_signal.layer_train)
+
+    path = Path(training_signal.path_train)
+    if is_zarr_path(path):
+        return open_chunked(path)
+
+    files = sorted(path.glob("*.tif*")) if path.is_dir() else [path]
+    if len(files) == 0 or not files[0].is_file():
+        raise ValueError(f"No training image found in {path}.")
+
+    return read_tiff(files[0])
+
+
+def _data_description(training_signal: TrainingSignal) -> str:
+    """Describe the training data.
+
+    Parameters
+    ----------
+    training_signal : TrainingSignal
+        Training signal.
+
+    Returns
+    -------
+    str
+        Description of the training data.
+    """
+    if training_signal.load_from_disk:
+        source = Path(training_signal.path_train).name
+    elif training_signal.layer_train is not None:
+        source = training_signal.layer_train.name
+    else:
+        source = "unknown"
+
+    return f"Trained in napari on {source}, with axes {training_signal.axes}."
+
+
+def _save_checkpoint(careamist: CAREamist, path: Path) -> bool:
+    """Save a checkpoint, unless the same weights were already saved at `path`.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    path : pathlib.Path
+        Path to the checkpoint.
+
+    Returns
+    -------
+    bool
+        Whether the checkpoint was written.
+    """
+    path = path.resolve()
+    digest = weights_hash(careamist.model)
+
+    # skip if the file was neither retrained nor modified since the last save
+    saved = _saved_checkpoints.get(path)
+    if saved is not None and path.exists() and saved == (digest, path.stat().st_mtime):
+        return False
+
+    careamist.trainer.save_checkpoint(path)
+    wait_for_checkpoints(careamist.trainer)
+    _saved_checkpoints[path] = (digest, path.stat().st_mtime)
+
+    return True
@@ -0,0 +1,595 @@
+"""A thread worker function running CAREamics training in a separate process.
+
+Training in the napari process competes with the Qt event loop for the GIL, both
+the data loading and the UI are then slowed down. Here, training runs in a spawned
+process: the configuration is sent to the child, the images are passed through
+shared memory (or as paths when loaded from disk), and the updates are sent back
+through a queue. The model is handed over through checkpoints.
+"""
+
+import pickle
+import queue
+import traceback
+from collections.abc import Generator
+from enum import Enum
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import Any, Optional, Union
+
+import napari.utils.notifications as ntf
+import numpy as np
+import pytorch_lightning as pl
+import torch
+from careamics import CAREamist
+from careamics.config import Configuration
+from pytorch_lightning import LightningModule, Trainer
+from pytorch_lightning.callbacks import Callback
+from superqt.utils import thread_worker
+from typing_extensions import Self
+
+from careamics_napari.careamics_utils import (
+    EarlyStoppingCallBack,
+    ForegroundPatchCallBack,
+    PackedFiles,
+    ProfilerCallBack,
+    TimeBudgetCallBack,
+    UpdaterCallBack,
+    ValidationSplitCallBack,
+    configure_checkpointing,
+    is_chunked,
+    wait_for_checkpoints,
+)
+from careamics_napari.careamics_utils.configuration import (
+    create_configuration,
+    create_early_stopping,
+)
+from careamics_napari.signals import (
+    TrainingSignal,
+    TrainingState,
+    TrainUpdate,
+    TrainUpdateType,
+)
+
+from .training_worker import (
+    _apply_auto_tune,
+    _apply_packed_cache,
+    _apply_statistics_cache,
+    _fit,
+    _get_training_data,
+    _load_checkpoint,
+    _push_exception,
+)
+
+CHECKPOINT_NAME = "process_handoff.ckpt"
+"""Name of the checkpoints used to pass the model between the processes."""
+
+# name, shape and dtype of an array in shared memory
+SharedArray = tuple[str, tuple[int, ...], str]
+
+
+class ProcessCommand(str, Enum):
+    """Commands sent to the training process."""
+
+    STOP = "stop"
+    """Stop the training at the end of the current batch."""
+
+    PROFILE = "profile"
+    """Profile the next batches, followed by the number of batches and log dir."""
+
+
+@thread_worker
+def train_process_worker(
+    train_config_signal: TrainingSignal,
+    training_queue: Queue,
+    predict_queue: Queue,
+    commands: Any,
+    careamist: Optional[CAREamist] = None,
+) -> Generator[TrainUpdate, None, None]:
+    """Model training worker, training in a separate process.
+
+    Parameters
+    ----------
+    train_config_signal : TrainingSignal
+        Training signal.
+    training_queue : Queue
+        Training update queue.
+    predict_queue : Queue
+        Prediction update queue, passed to the callbacks of the trained CAREamist.
+    commands : multiprocessing.Queue
+        Queue used to send `ProcessCommand` to the training process, created from
+        the spawn context (see `create_command_queue`).
+    careamist : CAREamist or None, default=None
+        CAREamist instance whose training is continued, if not None.
+
+    Yields
+    ------
+    Generator[TrainUpdate, None, None]
+        Updates.
+    """
+    # start the thread running and relaying the training process
+    training = Thread(
+        target=_run_process,
+        args=(
+            train_config_signal,
+            training_queue,
+            predict_queue,
+            commands,
+            careamist,
+        ),
+    )
+    training.start()
+
+    # look for updates
+    while True:
+        update: TrainUpdate = training_queue.get(block=True)
+
+        yield update
+
+        if (
+            update.type == TrainUpdateType.STATE and update.value == TrainingState.DONE
+        ) or (update.type == TrainUpdateType.EXCEPTION):
+            break
+
+    # wait for the other thread to finish
+    training.join()
+
+
+def create_command_queue() -> Any:
+    """Create a queue used to send commands to the training process.
+
+    Returns
+    -------
+    multiprocessing.Queue
+        Queue compatible with the spawned training processes.
+    """
+    return get_context("spawn").Queue()
+
+
+def _run_process(
+    config_signal: TrainingSignal,
+    training_queue: Queue,
+    predict_queue: Queue,
+    commands: Any,
+    careamist: Optional[CAREamist] = None,
+) -> None:
+    """Run the training process and relay its updates.
+
+    Parameters
+    ----------
+    config_signal : TrainingSignal
+        Training signal.
+    training_queue : Queue
+        Training update queue.
+    predict_queue : Queue
+        Prediction update queue.
+    commands : multiprocessing.Queue
+        Queue used to send commands to the training process.
+    careamist : CAREamist or None, default=None
+        CAREamist instance whose training is continued, if not None.
+    """
+    work_dir = Path(config_signal.work_dir)
+    checkpoint_out = work_dir / "checkpoints" / CHECKPOINT_NAME
+    checkpoint_in: Optional[Path] = None
+    shared: list[SharedMemory] = []
+
+    try:
+        # create_configuration can raise an exception
+        config = create_configuration(config_signal)
+
+        if careamist is not None:
+            if config_signal.layer_val is None and config_signal.path_val == "":
+                ntf.show_error(
+                    "Continuing training is currently not supported without "
+                    "explicitely passing validation. The reason is that otherwise, "
+                    "the data used for validation will be different and there will "
+                    "be data leakage in the training set."
+                )
+
+            if config_signal.auto_tune:
+                ntf.show_info(
+                    "Auto-tuning only applies to new models, the batch size and the "
+                    "learning rate of the trained model are kept."
+                )
+
+            checkpoint_in = work_dir / "checkpoints" / f"input_{CHECKPOINT_NAME}"
+            _save_model(careamist, checkpoint_in)
+
+        sources = _apply_packed_cache(
+            config_signal, _get_training_data(config_signal), training_queue
+        )
+        if careamist is None and not config_signal.resume_training:
+            _apply_statistics_cache(config, sources[0], sources[2], training_queue)
+
+        data: list[Union[str, SharedArray, Any, None]] = []
+        for source in sources:
+            if source is None or isinstance(source, (str, Path)):
+                data.append(None if source is None else str(source))
+            elif is_chunked(source) or isinstance(source, PackedFiles):
+                # pickled to the process, read lazily there
+                data.append(source)
+            else:
+                memory, descriptor = _share_array(source)
+                shared.append(memory)
+                data.append(descriptor)
+
+    except Exception as e:
+        traceback.print_exc()
+
+        for memory in shared:
+            memory.close()
+            memory.unlink()
+
+        _push_exception(training_queue, e)
+        return
+
+    # discard commands sent while no training was running
+    while True:
+        try:
+            commands.get_nowait()
+        except queue.Empty:
+            break
+
+    # new models can be resumed from the last checkpoint of the working directory
+    resume = config_signal.resume_training and careamist is None
+
+    context = get_context("spawn")
+    updates = context.Queue()
+    process = context.Process(
+        target=_train_in_process,
+        args=(
+            config,
+            work_dir,
+            data,
+            config_signal.val_minimum_split,
+            config_signal.val_percentage,
+            config_signal.n_epochs,
+            checkpoint_in,
+            checkpoint_out,
+            updates,
+            commands,
+            create_early_stopping(config_signal),
+            60 * config_signal.time_budget,
+            resume,
+            (
+                config_signal.auto_tune_budget
+                if config_signal.auto_tune and checkpoint_in is None and not resume
+                else None
+            ),
+            config_signal.checkpoint_top_k,
+            config_signal.checkpoint_last_k,
+            (
+                config_signal.background_fraction
+                if config_signal.foreground_patches
+                else None
+            ),
+        ),
+    )
+    process.start()
+
+    # relay the updates until the process signals its end (None) or dies
+    failed = False
+    while True:
+        try:
+            update = updates.get(timeout=0.5)
+        except queue.Empty:
+            if not process.is_alive():
+                break
+            continue
+
+        if update is None:
+            break
+
+        failed = failed or update.type == TrainUpdateType.EXCEPTION
+        training_queue.put(update)
+
+    process.join()
+
+    for memory in shared:
+        memory.close()
+        memory.unlink()
+
+    if not failed and process.exitcode != 0:
+        failed = True
+        _push_exception(
+            training_queue,
+            RuntimeError(f"Training process exited with code {process.exitcode}."),
+        )
+
+    # load the trained model for prediction and saving
+    if not failed:
+        try:
+            careamist = CAREamist(
+                checkpoint_out,
+                work_dir=work_dir,
+                callbacks=[UpdaterCallBack(training_queue, predict_queue)],
+            )
+            training_queue.put(TrainUpdate(TrainUpdateType.CAREAMIST, careamist))
+        except Exception as e:
+            traceback.print_exc()
+
+            _push_exception(training_queue, e)
+
+    training_queue.put(TrainUpdate(TrainUpdateType.STATE, TrainingState.DONE))
+
+
+def _save_model(careamist: CAREamist, path: Path) -> None:
+    """Save the weights and configuration of a CAREamist as a checkpoint.
+
+    The Lightning trainer can only save checkpoints once a model was fitted, the
+    checkpoint is therefore assembled directly.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    path : pathlib.Path
+        Path to the checkpoint.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    torch.save(
+        {
+            "state_dict": careamist.model.state_dict(),
+            "hyper_parameters": careamist.cfg.model_dump(),
+            "pytorch-lightning_version": pl.__version__,
+        },
+        path,
+    )
+
+
+def _share_array(array: Any) -> tuple[SharedMemory, SharedArray]:
+    """Copy an array into shared memory.
+
+    Parameters
+    ----------
+    array : Any
+        Array-like data, e.g. napari layer data.
+
+    Returns
+    -------
+    tuple of (SharedMemory, SharedArray)
+        Shared memory block, and name, shape and dtype used to attach to it.
+    """
+    array = np.asarray(array)
+    memory = SharedMemory(create=True, size=max(1, array.nbytes))
+    shared: np.ndarray = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+    shared[...] = array
+
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def _attach_array(descriptor: SharedArray) -> tuple[SharedMemory, np.ndarray]:
+    """Attach to an array in shared memory.
+
+    Parameters
+    ----------
+    descriptor : SharedArray
+        Name, shape and dtype of the array.
+
+    Returns
+    -------
+    tuple of (SharedMemory, numpy.ndarray)
+        Shared memory block, to be closed once the array is no longer used, and
+        array.
+    """
+    name, shape, dtype = descriptor
+    memory = SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+
+
+def _picklable(e: Exception) -> Exception:
+    """Return the exception, or a `RuntimeError` if it cannot be pickled.
+
+    Parameters
+    ----------
+    e : Exception
+        Exception.
+
+    Returns
+    -------
+    Exception
+        Exception that can be sent to the parent process.
+    """
+    try:
+        pickle.loads(pickle.dumps(e))
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+    return e
+
+
+class _CommandCallBack(Callback):
+    """PyTorch Lightning callback applying the commands sent to the process.
+
+    Parameters
+    ----------
+    commands : multiprocessing.Queue
+        Queue of commands.
+    profiler : ProfilerCallBack
+        Callback used to profile the training.
+    """
+
+    def __init__(self: Self, commands: Any, profiler: ProfilerCallBack) -> None:
+        """Initialize the callback.
+
+        Parameters
+        ----------
+        commands : multiprocessing.Queue
+            Queue of commands.
+        profiler : ProfilerCallBack
+            Callback used to profile the training.
+        """
+        self.commands = commands
+        self.profiler = profiler
+
+    def on_train_batch_start(
+        self, trainer: Trainer, pl_module: LightningModule, batch: Any, batch_idx: int
+    ) -> None:
+        """Method called at the beginning of each batch.
+
+        Parameters
+        ----------
+        trainer : Trainer
+            PyTorch Lightning trainer.
+        pl_module : LightningModule
+            PyTorch Lightning module.
+        batch : Any
+            Batch.
+        batch_idx : int
+            Index of the batch.
+        """
+        while True:
+            try:
+                command, *args = self.commands.get_nowait()
+            except queue.Empty:
+                break
+
+            if command == ProcessCommand.STOP:
+                trainer.should_stop = True
+            elif command == ProcessCommand.PROFILE:
+                self.profiler.request(*args)
+
+
+def _train_in_process(
+    config: Configuration,
+    work_dir: Path,
+    data: list[Union[str, SharedArray, Any, None]],
+    val_minimum_split: int,
+    val_percentage: float,
+    n_epochs: int,
+    checkpoint_in: Optional[Path],
+    checkpoint_out: Path,
+    updates: Any,
+    commands: Any,
+    early_stopping: Optional[EarlyStoppingCallBack] = None,
+    time_budget: float = 0,
+    resume: bool = False,
+    auto_tune_budget: Optional[float] = None,
+    top_k: int = 3,
+    last_k: int = 0,
+    background_fraction: Optional[float] = None,
+) -> None:
+    """Train in the child process.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration.
+    work_dir : pathlib.Path
+        Directory where the checkpoints and logs are saved.
+    data : list of (None or str or SharedArray or Any)
+        Training data, validation data, training target and validation target, as
+        paths, arrays in shared memory, chunked arrays or packed files.
+    val_minimum_split : int
+        Minimum number of patches or images in the validation set.
+    val_percentage : float
+        Percentage of the training data used for validation.
+    n_epochs : int
+        Number of epochs.
+    checkpoint_in : pathlib.Path or None
+        Checkpoint of the model whose training is continued, if not None.
+    checkpoint_out : pathlib.Path
+        Path to the checkpoint of the trained model.
+    updates : multiprocessing.Queue
+        Queue used to send the `TrainUpdate` to the parent process.
+    commands : multiprocessing.Queue
+        Queue of `ProcessCommand` sent by the parent process.
+    early_stopping : EarlyStoppingCallBack or None, default=None
+        Callback stopping the training when the validation loss plateaus.
+    time_budget : float, default=0
+        Time budget of the training, in seconds, 0 to train all epochs.
+    resume : bool, default=False
+        Whether to resume the training from the last checkpoint of `work_dir`,
+        ignored if `checkpoint_in` is not None.
+    auto_tune_budget : float or None, default=None
+        Maximum duration, in seconds, of the batch size and learning rate probe
+        run before training. No probe is run if None.
+    top_k : int, default=3
+        Number of checkpoints with the lowest validation loss kept.
+    last_k : int, default=0
+        Number of checkpoints of the last epochs kept.
+    background_fraction : float or None, default=None
+        Fraction of the background patches kept by the foreground selection,
+        all patches are used if None.
+    """
+    shared: list[SharedMemory] = []
+
+    try:
+        sources: list[Any] = []
+        for source in data:
+            if (
+                source is None
+                or isinstance(source, (str, PackedFiles))
+                or is_chunked(source)
+            ):
+                sources.append(source)
+            else:
+                memory, array = _attach_array(source)
+                shared.append(memory)
+                sources.append(array)
+
+        profiler = ProfilerCallBack(updates)
+        callbacks: list[Callback] = [
+            UpdaterCallBack(updates, updates, log_dir=work_dir / "throughput_logs"),
+            profiler,
+            _CommandCallBack(commands, profiler),
+            ValidationSplitCallBack(),
+        ]
+        if early_stopping is not None:
+            callbacks.append(early_stopping)
+        if time_budget > 0:
+            callbacks.append(TimeBudgetCallBack(time_budget, updates))
+        if background_fraction is not None:
+            callbacks.append(ForegroundPatchCallBack(updates, background_fraction))
+
+        careamist: Optional[CAREamist]
+        resume_from: Optional[Path] = None
+        if checkpoint_in is not None:
+            careamist = CAREamist(checkpoint_in, work_dir=work_dir, callbacks=callbacks)
+            careamist.cfg.training_config.num_epochs = n_epochs
+            careamist.trainer.fit_loop.max_epochs = n_epochs
+        elif resume:
+            careamist, resume_from = _load_checkpoint(work_dir, n_epochs, callbacks)
+        else:
+            careamist = CAREamist(config, work_dir=work_dir, callbacks=callbacks)
+        configure_checkpointing(careamist, top_k=top_k, last_k=last_k)
+
+        train_data, _, train_data_target, _ = sources
+        if auto_tune_budget is not None:
+            _apply_auto_tune(
+                careamist, train_data, train_data_target, auto_tune_budget, updates
+            )
+
+        _fit(
+            careamist,
+            tuple(sources),  # type: ignore[arg-type]
+            val_minimum_split,
+            val_percentage,
+            resume_from,
+        )
+
+        checkpoint_out.parent.mkdir(parents=True, exist_ok=True)
+        careamist.trainer.save_checkpoint(checkpoint_out)
+        wait_for_checkpoints(careamist.trainer)
+
+    except Exception as e:
+        traceback.print_exc()
+
+        updates.put(TrainUpdate(TrainUpdateType.EXCEPTION, _picklable(e)))
+
+    finally:
+        # release the arrays before closing the shared memory
+        sources = []
+        careamist = None
+        for memory in shared:
+            try:
+                memory.close()
+            except BufferError:
+                # the data is still referenced, released at exit
+                pass
+
+        updates.put(None)
+        updates.close()
+        updates.join_thread()
@@ -2,17 +2,44 @@
 
 import traceback
 from collections.abc import Generator
+from pathlib import Path
 from queue import Queue
 from threading import Thread
-from typing import Optional
+from typing import Any, Optional
 
 import napari.utils.notifications as ntf
 from careamics import CAREamist
+from careamics.config import Configuration
 from careamics.config.support import SupportedAlgorithm
+from careamics.dataset.dataset_utils import get_files_size, list_files
+from careamics.lightning import TrainDataModule
+from careamics.utils import get_ram_size
+from pytorch_lightning.callbacks import Callback
 from superqt.utils import thread_worker
 
-from careamics_napari.careamics_utils import UpdaterCallBack
-from careamics_napari.careamics_utils.configuration import create_configuration
+from careamics_napari.careamics_utils import (
+    ChunkedDataModule,
+    EarlyStoppingCallBack,
+    ForegroundPatchCallBack,
+    PackedDataModule,
+    PackedFiles,
+    ProfilerCallBack,
+    StatisticsCache,
+    TimeBudgetCallBack,
+    UpdaterCallBack,
+    ValidationSplitCallBack,
+    auto_tune,
+    configure_checkpointing,
+    find_last_checkpoint,
+    is_chunked,
+    pack_files,
+)
+from careamics_napari.careamics_utils.configuration import (
+    create_configuration,
+    create_early_stopping,
+    limit_torch_threads,
+)
+from careamics_napari.careamics_utils.packed_cache import PACKED_CACHE_DIR
 from careamics_napari.signals import (
     TrainingSignal,
     TrainingState,
@@ -30,6 +57,7 @@ def train_worker(
     training_queue: Queue,
     predict_queue: Queue,
     careamist: Optional[CAREamist] = None,
+    profiler: Optional[ProfilerCallBack] = None,
 ) -> Generator[TrainUpdate, None, None]:
     """Model training worker.
 
@@ -43,6 +71,9 @@ def train_worker(
         Prediction update queue.
     careamist : CAREamist or None, default=None
         CAREamist instance.
+    profiler : ProfilerCallBack or None, default=None
+        Callback used to profile the training on request, added to the callbacks
+        of new CAREamist instances.
 
     Yields
     ------
@@ -57,6 +88,7 @@ def train_worker(
             training_queue,
             predict_queue,
             careamist,
+            profiler,
         ),
     )
     training.start()
@@ -89,13 +121,46 @@ def _push_exception(queue: Queue, e: Exception) -> None:
     queue.put(TrainUpdate(TrainUpdateType.EXCEPTION, e))
 
 
-def _train(
-    config_signal: TrainingSignal,
+def _apply_auto_tune(
+    careamist: CAREamist,
+    train_data: Any,
+    train_data_target: Optional[Any],
+    time_budget: float,
     training_queue: Queue,
-    predict_queue: Queue,
-    careamist: Optional[CAREamist] = None,
 ) -> None:
-    """Run the training.
+    """Choose the batch size and learning rate of a new model with a short probe.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance, not trained yet.
+    train_data : Any
+        Training data, path or array.
+    train_data_target : Any or None
+        Training target, path or array.
+    time_budget : float
+        Maximum duration of the probe, in seconds.
+    training_queue : Queue
+        Training update queue, receiving the results.
+    """
+    training_queue.put(
+        TrainUpdate(TrainUpdateType.DEBUG, "Auto-tuning batch size and learning rate.")
+    )
+    result = auto_tune(
+        careamist.cfg, train_data, train_data_target, time_budget=time_budget
+    )
+
+    careamist.cfg.data_config.batch_size = result.batch_size
+    careamist.cfg.algorithm_config.optimizer.parameters["lr"] = result.learning_rate
+    careamist.model.optimizer_params["lr"] = result.learning_rate
+
+    training_queue.put(TrainUpdate(TrainUpdateType.AUTOTUNE, result.to_dict()))
+
+
+def _training_callbacks(
+    config_signal: TrainingSignal, training_queue: Queue
+) -> list[Callback]:
+    """Create the callbacks of the options chosen for a training.
 
     Parameters
     ----------
@@ -103,50 +168,338 @@ def _train(
         Training signal.
     training_queue : Queue
         Training update queue.
-    predict_queue : Queue
-        Prediction update queue.
-    careamist : CAREamist or None, default=None
-        CAREamist instance.
+
+    Returns
+    -------
+    list of Callback
+        Early stopping, time budget and foreground patch callbacks, if selected.
     """
-    # get configuration and queue
-    try:
-        # create_configuration can raise an exception
-        config = create_configuration(config_signal)
+    callbacks: list[Callback] = []
 
-        # Create CAREamist
-        if careamist is None:
-            careamist = CAREamist(
-                config, callbacks=[UpdaterCallBack(training_queue, predict_queue)]
+    early_stopping = create_early_stopping(config_signal)
+    if early_stopping is not None:
+        callbacks.append(early_stopping)
+
+    if config_signal.time_budget > 0:
+        callbacks.append(
+            TimeBudgetCallBack(60 * config_signal.time_budget, training_queue)
+        )
+
+    if config_signal.foreground_patches:
+        callbacks.append(
+            ForegroundPatchCallBack(training_queue, config_signal.background_fraction)
+        )
+
+    return callbacks
+
+
+def _replace_training_callbacks(
+    careamist: CAREamist, callbacks: list[Callback]
+) -> None:
+    """Replace the callbacks of the previous training options of a CAREamist.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist whose training is continued.
+    callbacks : list of Callback
+        Callbacks of the options chosen for the continued training.
+    """
+    options = (EarlyStoppingCallBack, TimeBudgetCallBack, ForegroundPatchCallBack)
+
+    # set by the callback connector of the trainer
+    trainer_callbacks: list[Callback] = careamist.trainer.callbacks  # type: ignore[attr-defined]
+    trainer_callbacks[:] = [
+        callback for callback in trainer_callbacks if not isinstance(callback, options)
+    ] + callbacks
+
+
+def _apply_statistics_cache(
+    config: Configuration,
+    train_data: Any,
+    train_data_target: Any,
+    training_queue: Queue,
+) -> None:
+    """Set the normalization statistics of training files from the cache.
+
+    CAREamics reads the files too large to fit in memory one by one, and then
+    computes the statistics in a full pass over the files before training. This
+    pass is replaced by the statistics of `StatisticsCache`, streamed from the
+    files plane by plane and cached across trainings. Statistics of data
+    loaded in memory are computed while extracting the patches, and are left to
+    CAREamics.
+
+    Parameters
+    ----------
+    config : Configuration
+        CAREamics configuration, updated in place.
+    train_data : Any
+        Training data, only paths to TIFF files are considered.
+    train_data_target : Any
+        Training target, None for unsupervised algorithms.
+    training_queue : Queue
+        Training update queue.
+    """
+    data_config = config.data_config
+    if (
+        not isinstance(train_data, (str, Path))
+        or is_chunked(train_data)
+        or data_config.image_means is not None
+    ):
+        return
+
+    files = list_files(train_data, data_config.data_type)
+    if get_files_size(files) < get_ram_size() * 0.8:
+        return
+
+    cache = StatisticsCache()
+    statistics, saved = cache.dataset_statistics(files, data_config.axes)
+
+    target_means, target_stds = None, None
+    if train_data_target is not None:
+        target_files = list_files(train_data_target, data_config.data_type)
+        target_statistics, saved_target = cache.dataset_statistics(
+            target_files, data_config.axes
+        )
+        target_means, target_stds = target_statistics.means, target_statistics.stds
+        saved += saved_target
+
+    data_config.set_means_and_stds(
+        image_means=statistics.means,
+        image_stds=statistics.stds,
+        target_means=target_means,
+        target_stds=target_stds,
+    )
+
+    percentiles = ", ".join(
+        f"[{low:.3g}, {high:.3g}]" for low, high in statistics.percentiles([1, 99])
+    )
+    training_queue.put(
+        TrainUpdate(
+            TrainUpdateType.DEBUG,
+            f"Normalization statistics computed without loading the files, "
+            f"1st-99th percentiles per channel: {percentiles}.",
+        )
+    )
+    if saved > 0:
+        training_queue.put(
+            TrainUpdate(
+                TrainUpdateType.DEBUG,
+                f"Normalization statistics read from the cache, {saved:.1f} s saved.",
+            )
+        )
+
+
+def _apply_packed_cache(
+    config_signal: TrainingSignal,
+    data: tuple[Any, Any, Any, Any],
+    training_queue: Queue,
+) -> tuple[Any, Any, Any, Any]:
+    """Replace the training files by their packing in the working directory.
+
+    Files are decoded once into a memory-mapped array (see `pack_files`), which is
+    reused by the following trainings as long as the files do not change. Only
+    TIFF files loaded from disk are packed, if requested in the training signal.
+
+    Parameters
+    ----------
+    config_signal : TrainingSignal
+        Training signal.
+    data : tuple of Any
+        Training data, validation data, training target and validation target.
+    training_queue : Queue
+        Training update queue.
+
+    Returns
+    -------
+    tuple of Any
+        Data, with the paths to TIFF files replaced by `PackedFiles`.
+    """
+    if not config_signal.load_from_disk or not config_signal.pack_files:
+        return data
+
+    directory = Path(config_signal.work_dir) / PACKED_CACHE_DIR
+    packed: list[Any] = []
+    for source in data:
+        if source is None or is_chunked(source):
+            packed.append(source)
+            continue
+
+        files, reused = pack_files(source, config_signal.axes, directory)
+        packed.append(files)
+        training_queue.put(
+            TrainUpdate(
+                TrainUpdateType.DEBUG,
+                f"{len(files)} files of {source} "
+                f"{'read from' if reused else 'packed into'} {files.data_path}.",
+            )
+        )
+
+    return packed[0], packed[1], packed[2], packed[3]
+
+
+def _load_checkpoint(
+    work_dir: Path, n_epochs: int, callbacks: list[Callback]
+) -> tuple[CAREamist, Path]:
+    """Load the last checkpoint of the working directory to resume its training.
+
+    Parameters
+    ----------
+    work_dir : pathlib.Path
+        Working directory of the interrupted training.
+    n_epochs : int
+        Total number of epochs, including the epochs already trained.
+    callbacks : list of Callback
+        Callbacks of the CAREamist instance.
+
+    Returns
+    -------
+    tuple of (CAREamist, pathlib.Path)
+        CAREamist instance and path to the checkpoint.
+
+    Raises
+    ------
+    ValueError
+        If there is no checkpoint in the working directory.
+    """
+    checkpoint = find_last_checkpoint(work_dir)
+    if checkpoint is None:
+        raise ValueError(
+            f"No checkpoint to resume from in {Path(work_dir) / 'checkpoints'}."
+        )
+
+    careamist = CAREamist(checkpoint, work_dir=work_dir, callbacks=callbacks)
+    careamist.cfg.training_config.num_epochs = n_epochs
+    careamist.trainer.fit_loop.max_epochs = n_epochs
+
+    return careamist, checkpoint
+
+
+def _fit(
+    careamist: CAREamist,
+    data: tuple[Any, Any, Any, Any],
+    val_minimum_split: int,
+    val_percentage: float,
+    checkpoint: Optional[Path] = None,
+) -> None:
+    """Train CAREamist, optionally resuming from a checkpoint.
+
+    Chunked data (Zarr stores and dask arrays, see `is_chunked`) is sampled
+    lazily through a `ChunkedDataModule` instead of being loaded in memory, and
+    packed files through a `PackedDataModule`. The torch threads are lowered
+    during training to leave a core to each dataloader worker.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    data : tuple of Any
+        Training data, validation data, training target and validation target.
+    val_minimum_split : int
+        Minimum number of patches or images in the validation set.
+    val_percentage : float
+        Percentage of the training data used for validation.
+    checkpoint : pathlib.Path or None, default=None
+        Checkpoint from which the model, optimizer, learning rate scheduler and
+        epoch counter are restored, if not None.
+    """
+    # leave a core to each dataloader worker
+    num_workers = careamist.cfg.data_config.train_dataloader_params.get(
+        "num_workers", 0
+    )
+    with limit_torch_threads(num_workers):
+        train_data, val_data, train_data_target, val_data_target = data
+        chunked = is_chunked(train_data)
+        packed = isinstance(train_data, PackedFiles)
+
+        if checkpoint is None and not chunked and not packed:
+            careamist.train(
+                train_source=train_data,
+                val_source=val_data,
+                train_target=train_data_target,
+                val_target=val_data_target,
+                val_minimum_split=val_minimum_split,
+                val_percentage=val_percentage,
             )
+            return
 
+        datamodule_class: Any = TrainDataModule
+        if chunked:
+            datamodule_class = ChunkedDataModule
+        elif packed:
+            datamodule_class = PackedDataModule
+
+        datamodule = datamodule_class(
+            data_config=careamist.cfg.data_config,
+            train_data=train_data,
+            val_data=val_data,
+            train_data_target=train_data_target,
+            val_data_target=val_data_target,
+            val_percentage=val_percentage,
+            val_minimum_split=val_minimum_split,
+        )
+
+        if checkpoint is None:
+            careamist.train(datamodule=datamodule)
         else:
-            # only update the number of epochs
-            careamist.cfg.training_config.num_epochs = config.training_config.num_epochs
+            careamist.train_datamodule = datamodule
+            careamist.trainer.should_stop = False
+            careamist.trainer.fit(
+                careamist.model, datamodule=datamodule, ckpt_path=checkpoint
+            )
 
-            if config_signal.layer_val == "" and config_signal.path_val == "":
-                ntf.show_error(
-                    "Continuing training is currently not supported without explicitely "
-                    "passing validation. The reason is that otherwise, the data used for "
-                    "validation will be different and there will be data leakage in the "
-                    "training set."
-                )
-    except Exception as e:
-        traceback.print_exc()
 
-        training_queue.put(TrainUpdate(TrainUpdateType.EXCEPTION, e))
+def _layer_data(layer: Any) -> Any:
+    """Return the data of a layer, at full resolution for multiscale layers.
 
-    # Register CAREamist
-    training_queue.put(TrainUpdate(TrainUpdateType.CAREAMIST, careamist))
+    Dask and Zarr backed layers are returned as is, to be read lazily.
 
-    # Format data
+    Parameters
+    ----------
+    layer : napari.layers.Layer
+        Layer.
+
+    Returns
+    -------
+    Any
+        Layer data.
+    """
+    if getattr(layer, "multiscale", False):
+        return layer.data[0]
+
+    return layer.data
+
+
+def _get_training_data(
+    config_signal: TrainingSignal,
+) -> tuple[Any, Optional[Any], Optional[Any], Optional[Any]]:
+    """Get the training and validation data from the training signal.
+
+    Parameters
+    ----------
+    config_signal : TrainingSignal
+        Training signal.
+
+    Returns
+    -------
+    tuple of (Any, Any or None, Any or None, Any or None)
+        Training data, validation data, training target and validation target, as
+        paths or arrays depending on whether the data is loaded from disk. Paths
+        to Zarr stores and dask or Zarr backed layers are chunked arrays, see
+        `is_chunked`.
+
+    Raises
+    ------
+    ValueError
+        If the training data or targets are missing.
+    """
     train_data_target = None
     val_data_target = None
 
     if config_signal.load_from_disk:
 
         if config_signal.path_train == "":
-            _push_exception(training_queue, ValueError("Training data path is empty."))
-            return
+            raise ValueError("Training data path is empty.")
 
         train_data = config_signal.path_train
         val_data = config_signal.path_val if config_signal.path_val != "" else None
@@ -156,10 +509,7 @@ def _train(
 
         if config_signal.algorithm != SupportedAlgorithm.N2V:
             if config_signal.path_train_target == "":
-                _push_exception(
-                    training_queue, ValueError("Training target data path is empty.")
-                )
-                return
+                raise ValueError("Training target data path is empty.")
 
             train_data_target = config_signal.path_train_target
 
@@ -172,24 +522,16 @@ def _train(
 
     else:
         if config_signal.layer_train is None:
-            _push_exception(
-                training_queue, ValueError("Training layer has not been selected.")
-            )
-            return
-
+            raise ValueError("Training layer has not been selected.")
         elif config_signal.layer_train.data is None:
-            _push_exception(
-                training_queue,
-                ValueError(
-                    f"Training layer {config_signal.layer_train.name} is empty."
-                ),
+            raise ValueError(
+                f"Training layer {config_signal.layer_train.name} is empty."
             )
-            return
         else:
-            train_data = config_signal.layer_train.data
+            train_data = _layer_data(config_signal.layer_train)
 
         val_data = (
-            config_signal.layer_val.data
+            _layer_data(config_signal.layer_val)
             if config_signal.layer_val is not None
             and config_signal.layer_val.data is not None
             else None
@@ -205,26 +547,18 @@ def _train(
         if config_signal.algorithm != SupportedAlgorithm.N2V:
 
             if config_signal.layer_train_target is None:
-                _push_exception(
-                    training_queue,
-                    ValueError("Training target layer has not been selected."),
-                )
-                return
+                raise ValueError("Training target layer has not been selected.")
             elif config_signal.layer_train_target.data is None:
-                _push_exception(
-                    training_queue,
-                    ValueError(
-                        f"Training target layer {config_signal.layer_train_target.name}"
-                        f" is empty."
-                    ),
+                raise ValueError(
+                    f"Training target layer {config_signal.layer_train_target.name}"
+                    f" is empty."
                 )
-                return
             else:
-                train_data_target = config_signal.layer_train_target.data
+                train_data_target = _layer_data(config_signal.layer_train_target)
 
             if val_data is not None:
                 val_data_target = (
-                    config_signal.layer_val_target.data
+                    _layer_data(config_signal.layer_val_target)
                     if config_signal.layer_val_target is not None
                     and config_signal.layer_val_target.data is not None
                     else None
@@ -232,16 +566,142 @@ def _train(
             else:
                 val_data_target = None
 
+    return train_data, val_data, train_data_target, val_data_target
+
+
+def _train(
+    config_signal: TrainingSignal,
+    training_queue: Queue,
+    predict_queue: Queue,
+    careamist: Optional[CAREamist] = None,
+    profiler: Optional[ProfilerCallBack] = None,
+) -> None:
+    """Run the training.
+
+    Parameters
+    ----------
+    config_signal : TrainingSignal
+        Training signal.
+    training_queue : Queue
+        Training update queue.
+    predict_queue : Queue
+        Prediction update queue.
+    careamist : CAREamist or None, default=None
+        CAREamist instance. If None, a new instance is created, or loaded from
+        the last checkpoint of the working directory if resuming.
+    profiler : ProfilerCallBack or None, default=None
+        Callback used to profile the training on request, added to the callbacks
+        of new CAREamist instances.
+    """
+    # new models can be resumed from a checkpoint, or auto-tuned
+    resume = config_signal.resume_training and careamist is None
+    tune = config_signal.auto_tune and careamist is None and not resume
+    checkpoint: Optional[Path] = None
+
+    # get configuration and queue
+    try:
+        # create_configuration can raise an exception
+        config = create_configuration(config_signal)
+
+        # Create CAREamist
+        if careamist is None:
+            callbacks: list[Callback] = [
+                UpdaterCallBack(
+                    training_queue,
+                    predict_queue,
+                    log_dir=Path(config_signal.work_dir) / "throughput_logs",
+                ),
+                ValidationSplitCallBack(),
+            ]
+            if profiler is not None:
+                callbacks.append(profiler)
+
+            callbacks.extend(_training_callbacks(config_signal, training_queue))
+
+            if resume:
+                careamist, checkpoint = _load_checkpoint(
+                    Path(config_signal.work_dir),
+                    config.training_config.num_epochs,
+                    callbacks,
+                )
+            else:
+                careamist = CAREamist(
+                    config, work_dir=config_signal.work_dir, callbacks=callbacks
+                )
+
+        else:
+            # only update the number of epochs and the callbacks of the training
+            careamist.cfg.training_config.num_epochs = config.training_config.num_epochs
+            _replace_training_callbacks(
+                careamist, _training_callbacks(config_signal, training_queue)
+            )
+
+            if config_signal.auto_tune:
+                ntf.show_info(
+                    "Auto-tuning only applies to new models, the batch size and the "
+                    "learning rate of the trained model are kept."
+                )
+
+            if config_signal.layer_val == "" and config_signal.path_val == "":
+                ntf.show_error(
+                    "Continuing training is currently not supported without explicitely "
+                    "passing validation. The reason is that otherwise, the data used for "
+                    "validation will be different and there will be data leakage in the "
+                    "training set."
+                )
+
+        configure_checkpointing(
+            careamist,
+            top_k=config_signal.checkpoint_top_k,
+            last_k=config_signal.checkpoint_last_k,
+        )
+    except Exception as e:
+        traceback.print_exc()
+
+        training_queue.put(TrainUpdate(TrainUpdateType.EXCEPTION, e))
+        if careamist is None:
+            return
+
+    # Register CAREamist
+    training_queue.put(TrainUpdate(TrainUpdateType.CAREAMIST, careamist))
+
+    # Format data
+    try:
+        train_data, val_data, train_data_target, val_data_target = _get_training_data(
+            config_signal
+        )
+    except ValueError as e:
+        _push_exception(training_queue, e)
+        return
+
     # TODO add val percentage and val minimum
     # Train CAREamist
     try:
-        careamist.train(
-            train_source=train_data,
-            val_source=val_data,
-            train_target=train_data_target,
-            val_target=val_data_target,
-            val_minimum_split=config_signal.val_minimum_split,
-            val_percentage=config_signal.val_percentage,
+        train_data, val_data, train_data_target, val_data_target = _apply_packed_cache(
+            config_signal,
+            (train_data, val_data, train_data_target, val_data_target),
+            training_queue,
+        )
+
+        if tune:
+            _apply_auto_tune(
+                careamist,
+                train_data,
+                train_data_target,
+                config_signal.auto_tune_budget,
+                training_queue,
+            )
+
+        _apply_statistics_cache(
+            careamist.cfg, train_data, train_data_target, training_queue
+        )
+
+        _fit(
+            careamist,
+            (train_data, val_data, train_data_target, val_data_target),
+            config_signal.val_minimum_split,
+            config_signal.val_percentage,
+            checkpoint,
         )
 
         # # TODO can we use this to monkey patch the training process?
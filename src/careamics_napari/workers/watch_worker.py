@@ -0,0 +1,204 @@
+"""A thread worker function predicting the images written in a watched folder."""
+
+import os
+import time
+import traceback
+from collections import deque
+from collections.abc import Generator
+from pathlib import Path
+from queue import Queue
+from threading import Event, Thread
+
+import numpy as np
+import tifffile
+from careamics import CAREamist
+from superqt.utils import thread_worker
+
+from careamics_napari.signals import (
+    PredictionSignal,
+    PredictionState,
+    PredictionUpdate,
+    PredictionUpdateType,
+)
+from careamics_napari.utils import FolderWatcher
+from careamics_napari.utils.axes_utils import reshape_prediction
+
+from .prediction_worker import _get_tiling, _push_exception
+
+DENOISED_SUFFIX = "_denoised"
+"""Suffix appended to the name of the predicted files."""
+
+POLL_INTERVAL = 0.5
+"""Time, in seconds, between two polls of the watched folder."""
+
+
+@thread_worker
+def watch_worker(
+    careamist: CAREamist,
+    config_signal: PredictionSignal,
+    update_queue: Queue,
+    stop_event: Event,
+) -> Generator[PredictionUpdate, None, None]:
+    """Folder watching prediction worker.
+
+    The new images written in the prediction folder are predicted as soon as they
+    are completely written, and the predictions are saved next to them. The same
+    CAREamist instance is used throughout, so that the model stays loaded.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    config_signal : PredictionSignal
+        Prediction signal.
+    update_queue : Queue
+        Queue used to send updates to the UI.
+    stop_event : Event
+        Event set to stop watching the folder.
+
+    Yields
+    ------
+    Generator[PredictionUpdate, None, None]
+        Updates.
+    """
+    # start watching thread
+    watching = Thread(
+        target=_watch,
+        args=(
+            careamist,
+            config_signal,
+            update_queue,
+            stop_event,
+        ),
+    )
+    watching.start()
+
+    # look for updates
+    while True:
+        update: PredictionUpdate = update_queue.get(block=True)
+
+        yield update
+
+        if (
+            update.type == PredictionUpdateType.STATE
+            or update.type == PredictionUpdateType.EXCEPTION
+        ):
+            break
+
+
+def _watch(
+    careamist: CAREamist,
+    config_signal: PredictionSignal,
+    update_queue: Queue,
+    stop_event: Event,
+) -> None:
+    """Watch the folder and predict the new images.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    config_signal : PredictionSignal
+        Prediction signal.
+    update_queue : Queue
+        Queue used to send updates to the UI.
+    stop_event : Event
+        Event set to stop watching the folder.
+    """
+    if config_signal.path_pred == "":
+        _push_exception(update_queue, ValueError("Prediction data path is empty."))
+        return
+
+    watcher = FolderWatcher(
+        config_signal.path_pred, exclude=[f"*{DENOISED_SUFFIX}.tif*"]
+    )
+
+    # files ready to be predicted, with the time at which they were detected
+    queue: deque[tuple[Path, float]] = deque()
+    queue_depth = -1
+
+    while not stop_event.is_set():
+        detection_time = time.perf_counter()
+        queue.extend((path, detection_time) for path in watcher.poll())
+
+        if len(queue) != queue_depth:
+            queue_depth = len(queue)
+            update_queue.put(
+                PredictionUpdate(PredictionUpdateType.WATCH_QUEUE, queue_depth)
+            )
+
+        if len(queue) == 0:
+            stop_event.wait(POLL_INTERVAL)
+            continue
+
+        path, detection_time = queue.popleft()
+        try:
+            _predict_file(careamist, config_signal, path)
+        except Exception as e:
+            # a single corrupted file should not interrupt the acquisition
+            traceback.print_exc()
+            update_queue.put(
+                PredictionUpdate(
+                    PredictionUpdateType.DEBUG, f"Could not predict {path}: {e}"
+                )
+            )
+        else:
+            update_queue.put(
+                PredictionUpdate(
+                    PredictionUpdateType.WATCH_LATENCY,
+                    time.perf_counter() - detection_time,
+                )
+            )
+
+    # signify end of watching
+    update_queue.put(
+        PredictionUpdate(PredictionUpdateType.STATE, PredictionState.STOPPED)
+    )
+
+
+def _predict_file(
+    careamist: CAREamist,
+    config_signal: PredictionSignal,
+    path: Path,
+) -> Path:
+    """Predict an image file and save the prediction next to it.
+
+    The prediction is first written to a temporary file and then renamed, so that
+    other processes watching the folder never see incomplete files.
+
+    Parameters
+    ----------
+    careamist : CAREamist
+        CAREamist instance.
+    config_signal : PredictionSignal
+        Prediction signal.
+    path : pathlib.Path
+        Path to the image.
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the prediction.
+    """
+    tile_size, tile_overlap, batch_size = _get_tiling(config_signal)
+
+    result = careamist.predict(  # type: ignore
+        tifffile.imread(path),
+        data_type="array",
+        tile_size=tile_size,
+        tile_overlap=tile_overlap,
+        batch_size=batch_size,
+    )
+    if isinstance(result, list):
+        result = np.concatenate(result, axis=0)
+
+    result = reshape_prediction(
+        result, careamist.cfg.data_config.axes, config_signal.is_3d
+    )
+
+    output = path.with_name(f"{path.stem}{DENOISED_SUFFIX}.tif")
+    temporary = output.with_name(f".{output.name}.part")
+    tifffile.imwrite(temporary, result)
+    os.replace(temporary, output)
+
+    return output
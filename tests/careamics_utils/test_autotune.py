@@ -0,0 +1,27 @@
+import numpy as np
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import auto_tune
+
+
+def test_auto_tune():
+    """Test that the probe returns a valid batch size and learning rate in time."""
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    train_data = np.random.default_rng(42).random((4, 64, 64)).astype(np.float32)
+
+    result = auto_tune(config, train_data, time_budget=5)
+
+    assert result.batch_size >= 1
+    assert result.learning_rate > 0
+    assert result.patches_per_second > 0
+    assert result.duration < 5 + 5
+
+    # the configuration is not modified
+    assert config.data_config.batch_size == 2
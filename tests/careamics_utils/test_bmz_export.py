@@ -0,0 +1,90 @@
+import zipfile
+
+import dask.array as da
+import numpy as np
+import pytest
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import (
+    crop_test_input,
+    export_bmz,
+    is_onnx_available,
+)
+
+
+@pytest.mark.parametrize(
+    "shape, axes, patch_size, expected",
+    [
+        ((64, 48), "YX", [16, 16], (16, 16)),
+        ((5, 64, 48), "SYX", [32, 16], (1, 32, 16)),
+        ((3, 2, 20, 64, 48), "TCZYX", [8, 16, 16], (1, 2, 8, 16, 16)),
+    ],
+)
+def test_crop_test_input(shape, axes, patch_size, expected):
+    """Test that the crop keeps one sample and the patch size."""
+    crop = crop_test_input(np.zeros(shape), axes, patch_size)
+    assert crop.shape == expected
+
+
+def test_crop_test_input_lazy():
+    """Test that lazy arrays are cropped before being converted."""
+    array = da.arange(5 * 64 * 48).reshape((5, 64, 48)).rechunk((1, 16, 16))
+
+    crop = crop_test_input(array, "SYX", [16, 16])
+    assert isinstance(crop, np.ndarray)
+    np.testing.assert_array_equal(crop, array[:1, :16, :16].compute())
+
+
+@pytest.fixture
+def careamist(tmp_path) -> CAREamist:
+    """CAREamist trained for one epoch."""
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32)
+    )
+    return careamist
+
+
+def test_export_bmz_torchscript(tmp_path, careamist):
+    """Test that the archive includes TorchScript weights and is verified."""
+    image = np.random.default_rng(0).random((2, 32, 32)).astype(np.float32)
+    path = export_bmz(
+        careamist,
+        tmp_path / "model",
+        name="N2V 2D test",
+        input_array=crop_test_input(image, "SYX", [16, 16]),
+        authors=[{"name": "Test"}],
+        general_description="Test model.",
+        data_description="Random images.",
+    )
+
+    assert path.name == "model.zip"
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+    assert "weights.pth" in names
+    assert "weights_torchscript.pt" in names
+
+
+@pytest.mark.skipif(is_onnx_available(), reason="onnx is installed")
+def test_export_bmz_onnx_unavailable(tmp_path, careamist):
+    """Test that requesting ONNX weights without onnx raises an error."""
+    with pytest.raises(ImportError):
+        export_bmz(
+            careamist,
+            tmp_path / "model.zip",
+            name="N2V_2D_test",
+            input_array=np.zeros((1, 16, 16), dtype=np.float32),
+            authors=[{"name": "Test"}],
+            general_description="Test model.",
+            data_description="Random images.",
+            onnx=True,
+        )
@@ -0,0 +1,63 @@
+from queue import Queue
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import EarlyStoppingCallBack, UpdaterCallBack
+from careamics_napari.signals import TrainUpdateType
+
+
+def test_early_stopping_reason(tmp_path):
+    """Test that the reason of an early stop and the saved epochs are sent."""
+    queue = Queue()
+
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=5,
+    )
+    # no decrease of the validation loss is large enough
+    early_stopping = EarlyStoppingCallBack(patience=1, min_delta=1e6)
+    careamist = CAREamist(
+        config,
+        work_dir=tmp_path,
+        callbacks=[UpdaterCallBack(queue, Queue()), early_stopping],
+    )
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32),
+        val_minimum_split=1,
+    )
+
+    updates = [queue.get() for _ in range(queue.qsize())]
+    reasons = [u.value for u in updates if u.type == TrainUpdateType.STOP_REASON]
+    saved = [u.value for u in updates if u.type == TrainUpdateType.SAVED_EPOCHS]
+
+    # the first validation sets the best loss, the second stops the training
+    assert careamist.trainer.current_epoch == 2
+    assert reasons[-1] == early_stopping.stop_reason
+    assert reasons[-1].startswith("Early stopping")
+    assert saved[-1] == 3
+
+
+def test_synchronize_only_reported_batches(monkeypatch):
+    """Test that the GPU is only synchronized before reporting the throughput."""
+    synchronized = []
+    monkeypatch.setattr(torch.cuda, "synchronize", synchronized.append)
+
+    callback = UpdaterCallBack(Queue(), Queue())
+    trainer = SimpleNamespace(
+        train_dataloader=range(1_000), current_epoch=0, max_epochs=1
+    )
+    pl_module = SimpleNamespace(device=torch.device("cuda"))
+
+    for i in range(1_000):
+        callback.on_train_batch_start(trainer, pl_module, None, i)
+        callback.on_train_batch_end(trainer, pl_module, None, None, i)
+
+    assert len(synchronized) == 1
@@ -0,0 +1,91 @@
+import numpy as np
+import torch
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import (
+    BackgroundCheckpointIO,
+    configure_checkpointing,
+    wait_for_checkpoints,
+    weights_hash,
+)
+from careamics_napari.workers.saving_worker import _save_checkpoint
+
+
+def _careamist(work_dir, n_epochs: int = 4) -> CAREamist:
+    """Create a CAREamist for a short N2V training."""
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=n_epochs,
+    )
+    return CAREamist(config, work_dir=work_dir)
+
+
+def _train(careamist: CAREamist) -> None:
+    """Train on random images with a validation image."""
+    rng = np.random.default_rng(42)
+    careamist.train(
+        train_source=rng.random((4, 32, 32)).astype(np.float32),
+        val_source=rng.random((1, 32, 32)).astype(np.float32),
+    )
+
+
+def test_background_io_writes_and_loads(tmp_path):
+    """Test that checkpoints are written atomically and loaded after the write."""
+    io = BackgroundCheckpointIO()
+    weights = torch.ones(4)
+    io.save_checkpoint({"weights": weights}, tmp_path / "model.ckpt")
+
+    # the snapshot is not affected by later updates of the weights
+    weights += 1
+    checkpoint = io.load_checkpoint(tmp_path / "model.ckpt")
+    assert torch.equal(checkpoint["weights"], torch.ones(4))
+
+    io.remove_checkpoint(tmp_path / "model.ckpt")
+    io.teardown()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_retention(tmp_path):
+    """Test that the top-k and last-k checkpoints are kept."""
+    careamist = _careamist(tmp_path)
+    configure_checkpointing(careamist, top_k=1, last_k=2)
+    _train(careamist)
+    wait_for_checkpoints(careamist.trainer)
+
+    names = sorted(path.name for path in (tmp_path / "checkpoints").iterdir())
+    top_k = [name for name in names if name.startswith("test_")]
+    assert len(top_k) == 1
+    assert "last.ckpt" in names
+    assert "epoch_0002.ckpt" in names
+    assert "epoch_0003.ckpt" in names
+    assert not any(name.endswith(".tmp") for name in names)
+
+
+def test_weights_hash(tmp_path):
+    """Test that the hash only changes with the weights."""
+    careamist = _careamist(tmp_path)
+    digest = weights_hash(careamist.model)
+    assert weights_hash(careamist.model) == digest
+
+    with torch.no_grad():
+        next(careamist.model.parameters()).add_(1)
+    assert weights_hash(careamist.model) != digest
+
+
+def test_save_unchanged_weights(tmp_path):
+    """Test that saving the same weights twice writes the checkpoint once."""
+    careamist = _careamist(tmp_path, n_epochs=1)
+    _train(careamist)
+
+    path = tmp_path / "model.ckpt"
+    assert _save_checkpoint(careamist, path)
+    assert not _save_checkpoint(careamist, path)
+
+    # written again if the file was removed
+    path.unlink()
+    assert _save_checkpoint(careamist, path)
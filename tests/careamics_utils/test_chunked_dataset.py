@@ -0,0 +1,108 @@
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import (
+    ChunkCache,
+    ChunkedDataModule,
+    ChunkedPatchDataset,
+    is_chunked,
+    open_chunked,
+)
+
+
+@pytest.fixture
+def volume() -> np.ndarray:
+    """Random ZYX volume."""
+    return np.random.default_rng(42).random((16, 64, 48)).astype(np.float32)
+
+
+def _config(axes: str, patch_size: list[int]):
+    """Noise2Void configuration."""
+    return create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes=axes,
+        patch_size=patch_size,
+        batch_size=4,
+        num_epochs=1,
+    )
+
+
+@pytest.mark.parametrize("chunked", ["zarr", "dask"])
+def test_chunk_cache(volume, chunked):
+    """Test that regions are read across chunks, and chunks are cached."""
+    if chunked == "zarr":
+        array = zarr.array(volume, chunks=(4, 16, 16))
+    else:
+        array = da.from_array(volume, chunks=((3, 13), (10, 30, 24), (48,)))
+
+    cache = ChunkCache(array, max_bytes=volume.nbytes)
+    region = (slice(2, 6), slice(5, 45), slice(7, 40))
+    np.testing.assert_array_equal(cache.read(region), volume[region])
+    misses = cache.misses
+
+    np.testing.assert_array_equal(cache.read(region), volume[region])
+    assert cache.misses == misses
+    assert cache.hits == misses
+
+
+def test_chunk_cache_eviction(volume):
+    """Test that the cache does not exceed its size."""
+    array = zarr.array(volume, chunks=(1, 64, 48))
+    cache = ChunkCache(array, max_bytes=2 * 64 * 48 * 4)
+
+    for z in range(8):
+        cache.read((slice(z, z + 1), slice(0, 64), slice(0, 48)))
+    assert len(cache._chunks) == 2
+
+    cache.read((slice(0, 1), slice(0, 64), slice(0, 48)))
+    assert cache.misses == 9
+
+
+def test_open_ome_zarr(tmp_path, volume):
+    """Test that OME-Zarr images are opened at full resolution."""
+    group = zarr.open_group(str(tmp_path / "image.zarr"), mode="w")
+    group.array("0", volume, chunks=(4, 16, 16))
+    group.array("1", volume[:, ::2, ::2], chunks=(4, 16, 16))
+    group.attrs["multiscales"] = [{"datasets": [{"path": "0"}, {"path": "1"}]}]
+
+    assert is_chunked(str(tmp_path / "image.zarr"))
+    assert not is_chunked(volume)
+    assert open_chunked(tmp_path / "image.zarr").shape == volume.shape
+
+
+def test_patches(volume):
+    """Test the shape, number and normalization of the patches."""
+    config = _config("ZYX", [8, 16, 16])
+    array = zarr.array(volume, chunks=(4, 32, 32))
+    dataset = ChunkedPatchDataset(config.data_config, array)
+
+    # non-overlapping patches
+    assert len(dataset) == 2 * 4 * 3
+    np.testing.assert_allclose(config.data_config.image_means, [volume.mean()], 1e-5)
+
+    patches = list(dataset)
+    assert len(patches) == len(dataset)
+    (patch,) = patches[0]
+    assert patch.shape == (1, 8, 16, 16)
+    assert patch.dtype == np.float32
+
+
+def test_train_from_zarr(tmp_path, volume):
+    """Test training from a Zarr store, with a validation region split off."""
+    zarr.save_array(str(tmp_path / "train.zarr"), volume[0:4], chunks=(1, 32, 32))
+
+    config = _config("SYX", [16, 16])
+    datamodule = ChunkedDataModule(
+        config.data_config, str(tmp_path / "train.zarr"), val_percentage=0.25
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.train(datamodule=datamodule)
+
+    assert datamodule.train_dataset.bounds["S"] == (0, 3)
+    assert datamodule.val_dataset.bounds["S"] == (3, 4)
+    assert careamist.trainer.current_epoch == 1
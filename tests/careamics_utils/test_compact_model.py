@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import torch
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import load_weights, save_weights
+
+
+@pytest.fixture
+def careamist(tmp_path) -> CAREamist:
+    """CAREamist trained for one epoch."""
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32)
+    )
+    return careamist
+
+
+@pytest.mark.parametrize("half", [False, True])
+def test_save_load_weights(tmp_path, careamist, half):
+    """Test that the weights and configuration are restored."""
+    path = save_weights(careamist, tmp_path / "model", half=half)
+    assert path.name == "model.pt"
+
+    checkpoint = tmp_path / "model.ckpt"
+    careamist.trainer.save_checkpoint(checkpoint)
+    assert path.stat().st_size < checkpoint.stat().st_size
+
+    loaded = load_weights(path, work_dir=tmp_path)
+    assert loaded.cfg.model_dump() == careamist.cfg.model_dump()
+
+    tolerance = 1e-3 if half else 0
+    for name, tensor in careamist.model.state_dict().items():
+        restored = loaded.model.state_dict()[name]
+        assert restored.dtype == tensor.dtype
+        assert torch.allclose(restored, tensor.cpu(), rtol=tolerance, atol=tolerance)
+
+
+def test_load_weights_wrong_file(tmp_path):
+    """Test that loading another file raises an error."""
+    torch.save({"weights": torch.ones(2)}, tmp_path / "other.pt")
+
+    with pytest.raises(ValueError):
+        load_weights(tmp_path / "other.pt")
@@ -1,6 +1,15 @@
 import pytest
+import torch
 
-from careamics_napari.careamics_utils.configuration import create_configuration
+from careamics_napari.careamics_utils import configuration
+from careamics_napari.careamics_utils.configuration import (
+    auto_num_workers,
+    create_configuration,
+    create_early_stopping,
+    limit_torch_threads,
+    oversubscription_warning,
+    torch_num_threads,
+)
 from careamics_napari.signals import TrainingSignal
 
 
@@ -12,3 +21,117 @@ def test_creating_configuration(algorithm):
 
     # create configuration (runs through Pydantic validation)
     create_configuration(config_signal)
+
+
+@pytest.mark.parametrize("precision", ["32", "16-mixed", "bf16-mixed"])
+def test_configuration_precision(precision):
+    """Test that the precision is passed to the training configuration."""
+    config_signal = TrainingSignal()  # type: ignore
+    config_signal.precision = precision
+
+    config = create_configuration(config_signal)
+    assert config.training_config.precision == precision
+
+
+def test_configuration_unsupported_precision():
+    """Test that an error is raised for unsupported precisions."""
+    config_signal = TrainingSignal()  # type: ignore
+    config_signal.precision = "8"
+
+    with pytest.raises(ValueError):
+        create_configuration(config_signal)
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_configuration_dataloader(num_workers):
+    """Test that the dataloader parameters are passed to the configuration."""
+    config_signal = TrainingSignal()  # type: ignore
+    config_signal.num_workers = num_workers
+    config_signal.prefetch_factor = 4
+
+    config = create_configuration(config_signal)
+    train_params = config.data_config.train_dataloader_params
+    val_params = config.data_config.val_dataloader_params
+
+    assert train_params["shuffle"]
+    assert train_params["num_workers"] == val_params["num_workers"] == num_workers
+
+    # prefetching is only valid with workers
+    if num_workers > 0:
+        assert train_params["prefetch_factor"] == 4
+    else:
+        assert "prefetch_factor" not in train_params
+
+
+def test_configuration_auto_workers():
+    """Test that the number of workers is chosen from the number of cores."""
+    config_signal = TrainingSignal()  # type: ignore
+    config_signal.num_workers = -1
+
+    config = create_configuration(config_signal)
+    assert config.data_config.train_dataloader_params["num_workers"] == (
+        auto_num_workers()
+    )
+
+
+def test_configuration_default_workers(monkeypatch):
+    """Test that the number of workers is derived from the cores by default."""
+    monkeypatch.setattr(configuration, "available_cores", lambda: 32)
+    monkeypatch.setattr(torch, "get_num_threads", lambda: 32)
+
+    config = create_configuration(TrainingSignal())  # type: ignore
+
+    params = config.data_config.train_dataloader_params
+    assert params["num_workers"] == 8
+    assert not params["pin_memory"]
+
+    # the torch threads leave a core to each worker
+    assert torch_num_threads(8) == 24
+    assert oversubscription_warning(-1) is None
+
+
+@pytest.mark.parametrize("n_cores, n_threads", [(16, 8), (16, 16), (8, 8), (1, 1)])
+def test_auto_workers_not_oversubscribed(monkeypatch, n_cores, n_threads):
+    """Test that the automatic number of workers and the lowered torch threads fit
+    in the cores."""
+    monkeypatch.setattr(configuration, "available_cores", lambda: n_cores)
+    monkeypatch.setattr(torch, "get_num_threads", lambda: n_threads)
+
+    num_workers = auto_num_workers()
+    assert num_workers == min(8, n_cores // 2)
+    assert num_workers + torch_num_threads(num_workers) <= max(n_cores, 1)
+    assert oversubscription_warning(-1) is None
+
+
+def test_limit_torch_threads():
+    """Test that the torch threads are lowered during training and restored."""
+    n_threads = torch.get_num_threads()
+    with limit_torch_threads(configuration.available_cores()):
+        assert torch.get_num_threads() == 1
+    assert torch.get_num_threads() == n_threads
+
+
+@pytest.mark.parametrize("early_stopping", [True, False])
+def test_configuration_early_stopping(early_stopping):
+    """Test that the plateau parameters are passed to the configuration and that
+    the early stopping callback is created if selected."""
+    config_signal = TrainingSignal()  # type: ignore
+    config_signal.early_stopping = early_stopping
+    config_signal.early_stopping_patience = 5
+    config_signal.early_stopping_min_delta = 0.01
+    config_signal.lr_plateau_factor = 0.5
+    config_signal.lr_plateau_patience = 3
+
+    config = create_configuration(config_signal)
+    assert config.algorithm_config.lr_scheduler.parameters == {
+        "factor": 0.5,
+        "patience": 3,
+    }
+
+    callback = create_early_stopping(config_signal)
+    if early_stopping:
+        assert callback is not None
+        assert callback.patience == 5
+        assert callback.min_delta == 0.01
+    else:
+        assert callback is None
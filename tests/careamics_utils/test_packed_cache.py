@@ -0,0 +1,138 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+import tifffile
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import (
+    PackedDataModule,
+    PackedFiles,
+    pack_files,
+)
+from careamics_napari.careamics_utils.packed_cache import (
+    PackedPatchDataset,
+    split_images,
+)
+
+
+def _write_images(folder, shapes):
+    """Write random YX images."""
+    rng = np.random.default_rng(42)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    images = []
+    for i, shape in enumerate(shapes):
+        image = rng.integers(0, 1000, shape).astype(np.uint16)
+        tifffile.imwrite(folder / f"image_{i}.tif", image)
+        images.append(image)
+
+    return images
+
+
+def _config():
+    """Noise2Void configuration."""
+    return create_n2v_configuration(
+        experiment_name="test",
+        data_type="tiff",
+        axes="YX",
+        patch_size=[16, 16],
+        batch_size=4,
+        num_epochs=1,
+    )
+
+
+def test_pack_files(tmp_path):
+    """Test that files are packed, reused, and repacked when they change."""
+    images = _write_images(tmp_path / "data", [(32, 40), (16, 16), (48, 24)])
+
+    packed, reused = pack_files(tmp_path / "data", "YX", tmp_path / "cache")
+    assert not reused
+    assert len(packed) == 3
+    for i, image in enumerate(images):
+        np.testing.assert_array_equal(packed.image(i), image)
+
+    values = np.concatenate([image.ravel() for image in images])
+    np.testing.assert_allclose(packed.statistics.means, [values.mean()])
+
+    # memory map not pickled
+    restored = pickle.loads(pickle.dumps(packed))
+    assert restored._array is None
+    np.testing.assert_array_equal(restored.image(2), images[2])
+
+    again, reused = pack_files(tmp_path / "data", "YX", tmp_path / "cache")
+    assert reused
+    assert again.key == packed.key
+
+    # modified file
+    tifffile.imwrite(tmp_path / "data" / "image_1.tif", images[1] + 1)
+    stat = os.stat(tmp_path / "data" / "image_1.tif")
+    os.utime(
+        tmp_path / "data" / "image_1.tif",
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9),
+    )
+
+    repacked, reused = pack_files(tmp_path / "data", "YX", tmp_path / "cache")
+    assert not reused
+    assert repacked.key != packed.key
+    np.testing.assert_array_equal(repacked.image(1), images[1] + 1)
+    assert not packed.index_path.exists()
+    assert len(list((tmp_path / "cache").glob("*.npy"))) == 1
+
+
+def test_pack_files_cleanup(tmp_path):
+    """Test that a failed packing does not leave a partial array."""
+    (tmp_path / "data").mkdir()
+    tifffile.imwrite(tmp_path / "data" / "image_0.tif", np.zeros((2, 16, 16)))
+    tifffile.imwrite(tmp_path / "data" / "image_1.tif", np.zeros((3, 16, 16)))
+
+    with pytest.raises(ValueError):
+        pack_files(tmp_path / "data", "CYX", tmp_path / "cache")
+
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_split_images():
+    """Test that the last images, or the end of a single image, are held out."""
+    train, val = split_images([(32, 32)] * 10, "YX", [16, 16], 0.2)
+    assert [i for i, _ in train] == list(range(8))
+    assert [i for i, _ in val] == [8, 9]
+
+    train, val = split_images([(32, 64)], "YX", [16, 16], 0.25)
+    assert train == [(0, {"X": (0, 48)})]
+    assert val == [(0, {"X": (48, 64)})]
+
+
+def test_patches(tmp_path):
+    """Test the shape and number of the patches, ignoring too small images."""
+    _write_images(tmp_path / "data", [(32, 40), (8, 8), (48, 24)])
+    packed, _ = pack_files(tmp_path / "data", "YX", tmp_path / "cache")
+
+    config = _config()
+    dataset = PackedPatchDataset(config.data_config, packed, seed=1)
+    assert [index for index, _ in dataset.regions] == [0, 2]
+    assert len(dataset) == 2 * 2 + 3 * 1
+    assert config.data_config.image_means == packed.statistics.means
+
+    patches = list(dataset)
+    assert len(patches) == len(dataset)
+    (patch,) = patches[0]
+    assert patch.shape == (1, 16, 16)
+    assert patch.dtype == np.float32
+
+
+def test_train_from_packed(tmp_path):
+    """Test training from packed files."""
+    _write_images(tmp_path / "data", [(32, 32)] * 6)
+    packed, _ = pack_files(tmp_path / "data", "YX", tmp_path / "cache")
+
+    config = _config()
+    careamist = CAREamist(config, work_dir=tmp_path)
+    datamodule = PackedDataModule(config.data_config, packed, val_percentage=0.2)
+    careamist.train(datamodule=datamodule)
+
+    assert isinstance(datamodule.train_dataset.images, PackedFiles)
+    assert [i for i, _ in datamodule.val_dataset.regions] == [5]
+    assert careamist.trainer.current_epoch == 1
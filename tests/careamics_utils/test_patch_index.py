@@ -0,0 +1,108 @@
+from queue import Queue
+
+import numpy as np
+import pytest
+import tifffile
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import (
+    ForegroundPatchCallBack,
+    patch_index,
+    patch_scores,
+    select_patches,
+)
+from careamics_napari.signals import TrainUpdateType
+
+
+def _sparse_image(rng: np.random.Generator) -> np.ndarray:
+    """Flat background with a single textured region."""
+    image = np.full((4, 64, 64), 0.1, dtype=np.float32)
+    image[:, :16, :16] = rng.random((4, 16, 16))
+    return image
+
+
+def test_patch_scores():
+    """Test that the scores are the standard deviations of the patches."""
+    patches = np.random.default_rng(42).random((2050, 1, 8, 8)).astype(np.float32)
+    patches[3] = 0.5
+
+    scores = patch_scores(patches)
+    np.testing.assert_allclose(scores, patches.reshape(2050, -1).std(axis=1), 1e-5)
+    assert scores[3] == 0
+
+
+@pytest.mark.parametrize("background_fraction", [0, 0.5])
+def test_select_patches(background_fraction):
+    """Test that the foreground and a share of the background are kept."""
+    scores = np.concatenate([np.full(900, 0.01), np.full(100, 1.0)])
+    scores += np.random.default_rng(42).random(1000) * 1e-3
+
+    mask = select_patches(scores, background_fraction)
+    assert mask[900:].all()
+    assert abs(mask[:900].mean() - background_fraction) < 0.05
+
+    # no threshold on uniform scores
+    assert select_patches(np.ones(10), 0).all()
+
+
+def test_foreground_callback(tmp_path):
+    """Test that the background patches are removed from the training set."""
+    queue = Queue()
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(
+        config, work_dir=tmp_path, callbacks=[ForegroundPatchCallBack(queue, 0)]
+    )
+
+    rng = np.random.default_rng(42)
+    careamist.train(train_source=_sparse_image(rng), val_source=_sparse_image(rng))
+
+    # a single patch of each of the 4 samples is textured
+    assert len(careamist.train_datamodule.train_dataset) == 4
+
+    updates = [queue.get() for _ in range(queue.qsize())]
+    kept = [u.value for u in updates if u.type == TrainUpdateType.PATCHES_KEPT]
+    saved = [u.value for u in updates if u.type == TrainUpdateType.EPOCH_TIME_SAVED]
+    assert kept == [4 / 64]
+    assert len(saved) == 1 and saved[0] > 0
+
+
+def test_patch_index_cache(tmp_path, monkeypatch):
+    """Test that the scores of training files are cached in the working directory."""
+    rng = np.random.default_rng(42)
+    for folder in ("train", "val"):
+        (tmp_path / folder).mkdir()
+        tifffile.imwrite(tmp_path / folder / "image.tif", _sparse_image(rng))
+
+    def train() -> int:
+        config = create_n2v_configuration(
+            experiment_name="test",
+            data_type="tiff",
+            axes="SYX",
+            patch_size=[16, 16],
+            batch_size=2,
+            num_epochs=1,
+        )
+        careamist = CAREamist(
+            config,
+            work_dir=tmp_path / "work_dir",
+            callbacks=[ForegroundPatchCallBack(Queue(), 0)],
+        )
+        careamist.train(train_source=tmp_path / "train", val_source=tmp_path / "val")
+        return len(careamist.train_datamodule.train_dataset)
+
+    assert train() == 4
+    assert len(list((tmp_path / "work_dir" / "patch_index").glob("*.npy"))) == 1
+
+    def fail(patches):
+        raise AssertionError("The scores should be read from the cache.")
+
+    monkeypatch.setattr(patch_index, "patch_scores", fail)
+    assert train() == 4
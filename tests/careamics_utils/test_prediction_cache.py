@@ -0,0 +1,76 @@
+import numpy as np
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import PredictionCache
+
+
+def _careamist(tmp_path) -> CAREamist:
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.cfg.data_config.set_means_and_stds([0.5], [0.3])
+    return careamist
+
+
+def test_prediction_cache(tmp_path):
+    """Test that only the tiles whose input changed are predicted again."""
+    careamist = _careamist(tmp_path)
+
+    rng = np.random.default_rng(42)
+    data = rng.random((2, 64, 64)).astype(np.float32)
+    tiling = {"tile_size": (32, 32), "tile_overlap": (16, 16), "batch_size": 2}
+
+    cache = PredictionCache()
+    first = cache.predict(careamist, data, **tiling)
+    assert first.shape == (2, 1, 64, 64)
+    assert cache.n_predicted == cache.n_tiles == 18
+
+    # nothing changed
+    second = cache.predict(careamist, data, **tiling)
+    assert cache.n_predicted == 0
+    np.testing.assert_array_equal(first, second)
+
+    # change a pixel only seen by the top-left tile, which is stitched in [:24, :24]
+    data[1, 10, 10] += 1
+    third = cache.predict(careamist, data, **tiling)
+    assert cache.n_predicted == 1
+    np.testing.assert_array_equal(third[0], first[0])
+    np.testing.assert_array_equal(third[1, :, 24:], first[1, :, 24:])
+    np.testing.assert_array_equal(third[1, :, :, 24:], first[1, :, :, 24:])
+    assert not np.array_equal(third[1, :, :24, :24], first[1, :, :24, :24])
+
+    # append a frame
+    data = np.concatenate([data, data[:1]], axis=0)
+    fourth = cache.predict(careamist, data, **tiling)
+    assert fourth.shape == (3, 1, 64, 64)
+    assert cache.n_predicted == 9
+    np.testing.assert_array_equal(fourth[:2], third)
+
+
+def test_prediction_cache_matches_tiled_prediction(tmp_path):
+    """Test that an incremental prediction matches a full tiled prediction."""
+    careamist = _careamist(tmp_path)
+
+    rng = np.random.default_rng(42)
+    data = rng.random((2, 64, 64)).astype(np.float32)
+    tiling = {"tile_size": (32, 32), "tile_overlap": (16, 16), "batch_size": 2}
+
+    cache = PredictionCache()
+    cache.predict(careamist, data, **tiling)
+
+    # change the input of several tiles, including border and corner tiles
+    data[0, 20:40, 20:40] = rng.random((20, 20))
+    data[1, 60:, :10] = 0
+    incremental = cache.predict(careamist, data, **tiling)
+    assert 0 < cache.n_predicted < cache.n_tiles
+
+    full = careamist.predict(data, data_type="array", axes="SYX", **tiling)
+    full = np.concatenate(full, axis=0) if isinstance(full, list) else full
+    np.testing.assert_allclose(incremental, full, rtol=1e-5, atol=1e-5)
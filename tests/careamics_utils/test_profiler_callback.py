@@ -0,0 +1,68 @@
+from pathlib import Path
+from queue import Queue
+
+import numpy as np
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import ProfilerCallBack
+from careamics_napari.signals import TrainUpdateType
+
+
+def test_profiler_callback(tmp_path):
+    """Test that the requested batches are profiled and the results saved."""
+    queue = Queue()
+    profiler = ProfilerCallBack(queue)
+
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path, callbacks=[profiler])
+
+    profiler.request(2, tmp_path / "logs")
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32),
+        val_minimum_split=1,
+    )
+
+    updates = [queue.get() for _ in range(queue.qsize())]
+    profiles = [u.value for u in updates if u.type == TrainUpdateType.PROFILE]
+    assert len(profiles) == 1
+
+    profile = profiles[0]
+    assert profile["n_batches"] == 2
+    assert Path(profile["trace"]).parent == tmp_path / "logs"
+    assert Path(profile["trace"]).exists()
+    assert Path(profile["table"]).exists()
+    assert len(profile["top_operators"]) > 0
+
+
+def test_profiler_callback_cancel(tmp_path):
+    """Test that a cancelled request is not profiled."""
+    queue = Queue()
+    profiler = ProfilerCallBack(queue)
+
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path, callbacks=[profiler])
+
+    profiler.request(2, tmp_path / "logs")
+    profiler.cancel()
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32),
+        val_minimum_split=1,
+    )
+
+    updates = [queue.get() for _ in range(queue.qsize())]
+    assert not any(u.type == TrainUpdateType.PROFILE for u in updates)
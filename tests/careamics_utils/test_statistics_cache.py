@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+import pytest
+import tifffile
+
+from careamics_napari.careamics_utils import StatisticsCache, statistics_cache
+from careamics_napari.careamics_utils.statistics_cache import CACHE_HISTOGRAM_BINS
+
+
+@pytest.fixture
+def files(tmp_path):
+    """Write TIFF files with different numbers of samples."""
+    rng = np.random.default_rng(42)
+    paths = []
+    for i, n_samples in enumerate([2, 3, 1]):
+        path = tmp_path / f"image_{i}.tif"
+        tifffile.imwrite(path, rng.normal(i, i + 1, (n_samples, 2, 16, 16)))
+        paths.append(path)
+    return paths
+
+
+def _counted(calls: list):
+    """Statistics function counting its calls."""
+
+    original = statistics_cache.file_statistics
+
+    def compute(path, axes):
+        calls.append(path)
+        return original(path, axes)
+
+    return compute
+
+
+def test_dataset_statistics(tmp_path, files):
+    """Test that the merged statistics are the per-channel statistics."""
+    cache = StatisticsCache(tmp_path / "cache.json")
+    statistics, saved = cache.dataset_statistics(files, "SCYX")
+
+    data = np.concatenate([tifffile.imread(path) for path in files])
+    np.testing.assert_allclose(statistics.means, data.mean(axis=(0, 2, 3)))
+    np.testing.assert_allclose(statistics.stds, data.std(axis=(0, 2, 3)))
+    assert saved == 0
+
+    # the estimated percentiles have the expected ranks
+    channels = data.transpose(1, 0, 2, 3).reshape(2, -1)
+    for channel, percentiles in enumerate(statistics.percentiles([1, 50, 99])):
+        ranks = [np.mean(channels[channel] <= value) for value in percentiles]
+        np.testing.assert_allclose(ranks, [0.01, 0.5, 0.99], atol=2e-3)
+
+
+def test_cached_files_not_read(tmp_path, files, monkeypatch):
+    """Test that only new or modified files are read again."""
+    StatisticsCache(tmp_path / "cache.json").dataset_statistics(files, "SCYX")
+
+    calls: list = []
+    monkeypatch.setattr(statistics_cache, "file_statistics", _counted(calls))
+    cache = StatisticsCache(tmp_path / "cache.json")
+    _, saved = cache.dataset_statistics(files, "SCYX")
+    assert calls == []
+    assert saved > 0
+
+    tifffile.imwrite(files[1], np.ones((2, 2, 16, 16)))
+    statistics, _ = cache.dataset_statistics(files, "SCYX")
+    assert calls == [files[1].resolve()]
+
+    data = np.concatenate([tifffile.imread(path) for path in files])
+    np.testing.assert_allclose(statistics.means, data.mean(axis=(0, 2, 3)))
+
+
+def test_corrupted_cache(tmp_path, files):
+    """Test that a corrupted cache is rebuilt."""
+    (tmp_path / "cache.json").write_text("{not json")
+
+    cache = StatisticsCache(tmp_path / "cache.json")
+    statistics, _ = cache.dataset_statistics(files, "SCYX")
+    assert statistics.n_channels == 2
+
+
+def test_cache_pruned(tmp_path, files):
+    """Test that the cache stores coarse histograms and prunes deleted files."""
+    cache = StatisticsCache(tmp_path / "cache.json")
+    cache.dataset_statistics(files, "SCYX")
+
+    entries = json.loads((tmp_path / "cache.json").read_text())
+    assert len(entries) == 3
+    for entry in entries.values():
+        assert np.shape(entry["histogram"]) == (2, CACHE_HISTOGRAM_BINS)
+
+    # not written again if nothing changed
+    mtime = (tmp_path / "cache.json").stat().st_mtime_ns
+    cache.dataset_statistics(files, "SCYX")
+    assert (tmp_path / "cache.json").stat().st_mtime_ns == mtime
+
+    files[0].unlink()
+    cache.dataset_statistics(files[1:], "SCYX")
+    entries = json.loads((tmp_path / "cache.json").read_text())
+    assert sorted(entries) == sorted(str(path.resolve()) for path in files[1:])
@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+import pytest
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import StreamingDenoiser, StreamingPolicy
+
+
+@pytest.fixture
+def careamist(tmp_path):
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.cfg.data_config.set_means_and_stds([0.5], [0.3])
+    return careamist
+
+
+def test_streaming_denoiser(careamist):
+    """Test that all frames are denoised in order when blocking."""
+    frames = np.random.default_rng(42).random((10, 32, 32)).astype(np.float32)
+
+    emitted = []
+    with StreamingDenoiser(
+        careamist,
+        callback=lambda i, frame: emitted.append((i, frame)),
+        buffer_size=2,
+        batch_size=3,
+        policy=StreamingPolicy.BLOCK,
+    ) as denoiser:
+        for frame in frames:
+            denoiser.push(frame)
+
+    assert [i for i, _ in emitted] == list(range(10))
+    assert all(frame.shape == (32, 32) for _, frame in emitted)
+    assert denoiser.n_dropped == 0
+    assert denoiser.n_denoised == 10
+
+    # same prediction as CAREamics
+    prediction = careamist.predict(frames[:1], data_type="array", axes="SYX")
+    np.testing.assert_allclose(
+        emitted[0][1], np.squeeze(prediction), rtol=1e-4, atol=1e-4
+    )
+
+    latencies = denoiser.latency_percentiles((50, 99))
+    assert 0 < latencies[50] <= latencies[99]
+
+    # e.g. after warm-up
+    denoiser.reset_statistics()
+    assert denoiser.n_denoised == denoiser.n_dropped == 0
+    assert np.isnan(denoiser.latency_percentiles((50,))[50])
+    assert denoiser.n_pushed == 10
+
+
+@pytest.mark.parametrize("policy", [StreamingPolicy.DROP_OLDEST, StreamingPolicy.SKIP])
+def test_streaming_denoiser_dropping(careamist, policy):
+    """Test that frames are dropped, but emitted in order, when falling behind."""
+    emitted = []
+
+    def slow_callback(index, frame):
+        assert frame.shape == (30, 30)
+        time.sleep(0.05)
+        emitted.append(index)
+
+    with StreamingDenoiser(
+        careamist, callback=slow_callback, buffer_size=2, batch_size=1, policy=policy
+    ) as denoiser:
+        for _ in range(20):
+            denoiser.push(np.zeros((30, 30), dtype=np.float32))
+
+    assert denoiser.n_dropped > 0
+    assert denoiser.n_denoised + denoiser.n_dropped == 20
+    assert len(emitted) == denoiser.n_denoised
+    assert emitted == sorted(emitted)
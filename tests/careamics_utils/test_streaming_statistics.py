@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import tifffile
+
+from careamics_napari.careamics_utils import StreamingStatistics, file_statistics
+
+
+def test_merge_chunks():
+    """Test that statistics merged chunk by chunk equal the full statistics."""
+    rng = np.random.default_rng(42)
+    chunks = [rng.normal(i, i + 1, (2, n)) for i, n in enumerate([100, 1, 2000])]
+    data = np.concatenate(chunks, axis=1)
+
+    statistics = StreamingStatistics(2)
+    for chunk in chunks:
+        statistics.update(chunk)
+
+    assert statistics.count == data.shape[1]
+    np.testing.assert_allclose(statistics.means, data.mean(axis=1))
+    np.testing.assert_allclose(statistics.stds, data.std(axis=1))
+    np.testing.assert_allclose(statistics.histogram.sum(axis=1), data.shape[1])
+
+    # the estimated percentiles have the expected ranks
+    for channel, percentiles in enumerate(statistics.percentiles([0.5, 50, 99.5])):
+        ranks = [np.mean(data[channel] <= value) for value in percentiles]
+        np.testing.assert_allclose(ranks, [0.005, 0.5, 0.995], atol=2e-3)
+
+    restored = StreamingStatistics.from_dict(statistics.to_dict())
+    assert restored.means == statistics.means
+    assert restored.percentiles([50]) == statistics.percentiles([50])
+
+
+def test_coarsened():
+    """Test that coarsened statistics merge into the full number of bins."""
+    data = np.random.default_rng(42).normal(0, 1, (1, 10_000))
+    statistics = StreamingStatistics(1)
+    statistics.update(data)
+
+    coarse = statistics.coarsened(128)
+    assert coarse.histogram.shape == (1, 128)
+    assert coarse.means == statistics.means
+    np.testing.assert_allclose(coarse.histogram.sum(), data.shape[1])
+
+    merged = StreamingStatistics(1)
+    merged.merge(coarse)
+    assert merged.histogram.shape == statistics.histogram.shape
+    ranks = [np.mean(data[0] <= value) for value in merged.percentiles([1, 50, 99])[0]]
+    np.testing.assert_allclose(ranks, [0.01, 0.5, 0.99], atol=2e-3)
+
+    with pytest.raises(ValueError):
+        statistics.coarsened(100)
+
+
+def test_merge_wrong_channels():
+    """Test that merging statistics of different channels raises an error."""
+    statistics = StreamingStatistics(1)
+    other = StreamingStatistics(2)
+    other.update(np.ones((2, 4)))
+
+    with pytest.raises(ValueError):
+        statistics.merge(other)
+
+
+@pytest.mark.parametrize(
+    "axes, shape",
+    [("YX", (16, 8)), ("ZYXC", (3, 16, 8, 2)), ("SCZYX", (2, 3, 4, 8, 8))],
+)
+def test_file_statistics(tmp_path, axes, shape):
+    """Test the statistics of a file read plane by plane."""
+    data = np.random.default_rng(42).random(shape).astype(np.float32)
+    tifffile.imwrite(tmp_path / "image.tif", data)
+
+    statistics = file_statistics(tmp_path / "image.tif", axes)
+
+    channels = np.moveaxis(data, axes.index("C"), 0) if "C" in axes else data[None]
+    channels = channels.reshape(channels.shape[0], -1)
+    np.testing.assert_allclose(statistics.means, channels.mean(axis=1), rtol=1e-6)
+    np.testing.assert_allclose(statistics.stds, channels.std(axis=1), rtol=1e-5)
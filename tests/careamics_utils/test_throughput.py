@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from careamics_napari.careamics_utils import ThroughputMeter
+
+
+def test_throughput_meter(tmp_path):
+    """Test the throughput statistics on synthetic timings."""
+    meter = ThroughputMeter(window=10)
+    assert meter.patches_per_second == -1
+    assert meter.eta(remaining_batches=5, remaining_epochs=0) == -1
+
+    # 1 s of data loading and 3 s of compute per batch of 8 patches
+    now = 0.0
+    meter.start_epoch(now)
+    for batch in range(4):
+        now += 1
+        meter.start_batch(now)
+        now += 3
+        meter.end_batch(now, epoch=0, batch=batch, n_patches=8)
+
+    assert meter.patches_per_second == pytest.approx(2)
+    assert meter.data_share == pytest.approx(0.25)
+    assert meter.eta(remaining_batches=2, remaining_epochs=0) == pytest.approx(8)
+
+    # no epoch duration yet
+    assert meter.eta(remaining_batches=2, remaining_epochs=1) == -1
+
+    # validation time is included in the epoch duration
+    now += 4
+    meter.end_epoch(now)
+    assert meter.eta(remaining_batches=0, remaining_epochs=2) == pytest.approx(40)
+
+    csv_path, json_path = meter.save(tmp_path / "logs" / "throughput")
+    assert len(csv_path.read_text().splitlines()) == 5
+    summary = json.loads(json_path.read_text())
+    assert summary["n_patches"] == 32
+    assert summary["data_share"] == pytest.approx(0.25)
@@ -0,0 +1,44 @@
+import time
+from queue import Queue
+
+import numpy as np
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.careamics_utils import TimeBudgetCallBack
+from careamics_napari.signals import TrainUpdateType
+
+
+def test_time_budget(tmp_path):
+    """Test that the training stops at the time budget and reports its progress."""
+    queue = Queue()
+    budget = TimeBudgetCallBack(3, queue)
+
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=10_000,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path, callbacks=[budget])
+
+    start = time.perf_counter()
+    careamist.train(
+        train_source=np.random.default_rng(42).random((4, 32, 32)).astype(np.float32),
+        val_minimum_split=1,
+    )
+    duration = time.perf_counter() - start
+
+    assert budget.stop_reason.startswith("Time budget")
+    assert careamist.trainer.current_epoch < 10_000
+    assert duration < 3 + 5
+
+    updates = [queue.get() for _ in range(queue.qsize())]
+    remaining = [u.value for u in updates if u.type == TrainUpdateType.REMAINING_BUDGET]
+    projected = [u.value for u in updates if u.type == TrainUpdateType.PROJECTED_EPOCHS]
+
+    assert remaining[0] <= 3
+    assert remaining[-1] < remaining[0]
+    assert projected[-1] == careamist.trainer.current_epoch
@@ -0,0 +1,92 @@
+import time
+from queue import Queue
+from threading import Thread
+
+from careamics_napari.careamics_utils import UpdaterCallBack
+from careamics_napari.signals import (
+    TrainingState,
+    TrainUpdate,
+    TrainUpdateType,
+    UpdateChannel,
+)
+
+
+def test_update_channel_coalescing():
+    """Test that only the latest value of coalesced types is delivered."""
+    channel = UpdateChannel([TrainUpdateType.BATCH])
+
+    channel.put(TrainUpdate(TrainUpdateType.BATCH, 0))
+    channel.put(TrainUpdate(TrainUpdateType.LOSS, 1.0))
+    channel.put(TrainUpdate(TrainUpdateType.BATCH, 1))
+    channel.put(TrainUpdate(TrainUpdateType.BATCH, 2))
+    channel.put(TrainUpdate(TrainUpdateType.LOSS, 0.5))
+    assert channel.qsize() == 3
+
+    updates = [channel.get() for _ in range(3)]
+    assert [(u.type, u.value) for u in updates] == [
+        (TrainUpdateType.LOSS, 1.0),
+        (TrainUpdateType.BATCH, 2),
+        (TrainUpdateType.LOSS, 0.5),
+    ]
+    assert channel.empty()
+
+    # coalescing restarts once the pending value has been delivered
+    channel.put(TrainUpdate(TrainUpdateType.BATCH, 3))
+    assert channel.get().value == 3
+
+
+def test_slow_consumer_does_not_stall_training():
+    """Test that the callback is not slowed down by a slow consumer."""
+    n_batches = 5_000
+    channel = UpdateChannel([TrainUpdateType.BATCH])
+    callback = UpdaterCallBack(channel, Queue())
+
+    received = []
+
+    def slow_consumer():
+        while True:
+            update = channel.get()
+            received.append(update)
+            if update.type == TrainUpdateType.STATE:
+                break
+            time.sleep(0.01)
+
+    consumer = Thread(target=slow_consumer)
+    consumer.start()
+
+    start = time.perf_counter()
+    for i in range(n_batches):
+        callback.on_train_batch_start(None, None, None, i)
+        if i % 1_000 == 0:
+            channel.put(TrainUpdate(TrainUpdateType.LOSS, float(i)))
+    channel.put(TrainUpdate(TrainUpdateType.STATE, TrainingState.DONE))
+    duration = time.perf_counter() - start
+
+    consumer.join(timeout=10)
+
+    # a blocking Queue(10) would take at least n_batches * 10 ms
+    assert duration < 0.1 * n_batches * 0.01
+
+    # losses and states are all delivered, in order, with the last batch index
+    losses = [u.value for u in received if u.type == TrainUpdateType.LOSS]
+    assert losses == [0.0, 1_000.0, 2_000.0, 3_000.0, 4_000.0]
+    batches = [u.value for u in received if u.type == TrainUpdateType.BATCH]
+    assert batches == sorted(batches)
+    assert batches[-1] == n_batches - 1
+    assert received[-1].type == TrainUpdateType.STATE
+
+
+def test_superseded_updates_dropped():
+    """Test that superseded updates do not accumulate in the queue."""
+    channel = UpdateChannel([TrainUpdateType.BATCH])
+    channel.put(TrainUpdate(TrainUpdateType.EPOCH, 0))
+
+    for i in range(1000):
+        channel.put(TrainUpdate(TrainUpdateType.BATCH, i))
+
+    assert channel.qsize() == 2
+    assert len(channel.queue) <= 2 * channel.qsize() + 1
+
+    assert channel.get_nowait().value == 0
+    assert channel.get_nowait().value == 999
+    assert channel.empty()
@@ -0,0 +1,60 @@
+import numpy as np
+from careamics import CAREamist
+from careamics.config import create_n2v_configuration
+
+from careamics_napari.prediction_plugin import PredictionPlugin
+from careamics_napari.signals import PredictionState, TrainingState
+
+
+def test_live_prediction(make_napari_viewer, qtbot, tmp_path):
+    """Test that the live layer displays the prediction of the latest frame."""
+    config = create_n2v_configuration(
+        experiment_name="test",
+        data_type="array",
+        axes="SYX",
+        patch_size=[16, 16],
+        batch_size=2,
+        num_epochs=1,
+    )
+    careamist = CAREamist(config, work_dir=tmp_path)
+    careamist.cfg.data_config.set_means_and_stds([0.5], [0.3])
+
+    rng = np.random.default_rng(42)
+    viewer = make_napari_viewer()
+    layer = viewer.add_image(rng.random((32, 32), dtype=np.float32), name="camera")
+
+    plugin = PredictionPlugin(viewer)
+    qtbot.addWidget(plugin)
+    # as when loading a model
+    plugin.careamist = careamist
+    plugin.train_status.state = TrainingState.DONE
+    plugin.prediction_widget.setEnabled(True)
+    plugin.pred_config_signal.load_from_disk = False
+    plugin.pred_config_signal.layer_pred = layer
+    plugin.pred_config_signal.live = True
+
+    plugin.prediction_widget.predict_button.click()
+    assert plugin.pred_status.state == PredictionState.PREDICTING
+
+    # the acquisition replaces the frame
+    frame = rng.random((32, 32), dtype=np.float32)
+    layer.data = frame
+    expected = np.squeeze(careamist.predict(frame[None], data_type="array"))
+
+    def _displayed() -> None:
+        live = viewer.layers["Live prediction"]
+        np.testing.assert_allclose(live.data, expected, rtol=1e-4, atol=1e-4)
+
+    qtbot.waitUntil(_displayed, timeout=10_000)
+
+    # stop the live prediction, the button is enabled once the worker finished
+    plugin.prediction_widget.predict_button.click()
+    qtbot.waitUntil(
+        lambda: plugin.pred_status.state == PredictionState.STOPPED, timeout=5_000
+    )
+    qtbot.waitUntil(plugin.prediction_widget.predict_button.isEnabled)
+
+    # frames are no longer predicted
+    layer.data = rng.random((32, 32), dtype=np.float32)
+    qtbot.wait(200)
+    _displayed()
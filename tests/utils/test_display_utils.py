@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from careamics_napari.utils import (
+    ContrastLimitsEstimator,
+    build_pyramid,
+    create_pyramid,
+    estimate_contrast_limits,
+)
+
+
+def test_streaming_contrast_limits():
+    """Test that the streaming estimate is close to the exact percentiles."""
+    rng = np.random.default_rng(42)
+    array = rng.normal(100, 10, size=(16, 128, 128)).astype(np.float32)
+
+    estimator = ContrastLimitsEstimator(percentiles=(1, 99), seed=42)
+    for batch in array:
+        estimator.update(batch)
+
+    low, high = estimator.get_contrast_limits()
+    exact_low, exact_high = np.percentile(array, (1, 99))
+
+    assert estimator.min == array.min()
+    assert estimator.max == array.max()
+    assert low == pytest.approx(exact_low, abs=1)
+    assert high == pytest.approx(exact_high, abs=1)
+
+
+def test_contrast_limits_degenerate():
+    """Test that empty or constant arrays do not yield contrast limits."""
+    assert ContrastLimitsEstimator().get_contrast_limits() is None
+    assert estimate_contrast_limits(np.ones((8, 8))) is None
+    assert estimate_contrast_limits(np.full((8, 8), np.nan)) is None
+
+
+@pytest.mark.parametrize(
+    "axes, shape",
+    [("YX", (4096, 2048)), ("SYX", (2, 4096, 4096)), ("YXC", (4096, 4096, 3))],
+)
+def test_create_pyramid(axes, shape):
+    """Test that pyramid levels are views downsampled along Y and X only."""
+    array = np.zeros(shape, dtype=np.uint8)
+
+    levels = create_pyramid(array, axes, min_size=1024)
+    assert isinstance(levels, list)
+    assert len(levels) == 3
+
+    y, x = axes.index("Y"), axes.index("X")
+    for i, level in enumerate(levels):
+        assert np.shares_memory(level, array)
+        assert level.shape[y] == shape[y] // 2**i
+        assert level.shape[x] == shape[x] // 2**i
+
+
+def test_create_pyramid_small():
+    """Test that small arrays are returned as is."""
+    array = np.zeros((256, 256))
+    assert create_pyramid(array, "YX") is array
+
+
+@pytest.mark.parametrize(
+    "axes, shape", [("SYX", (2, 1030, 515)), ("YXC", (515, 1030, 3))]
+)
+def test_build_pyramid(axes, shape):
+    """Test that the averaged pyramid matches a direct 2x2 block averaging."""
+    rng = np.random.default_rng(42)
+    array = rng.random(shape).astype(np.float32)
+
+    levels = build_pyramid(array, axes, min_size=128, band_size=64)
+    assert levels[0] is array
+    assert len(levels) == 4
+
+    y, x = axes.index("Y"), axes.index("X")
+    expected = array
+    for level in levels[1:]:
+        ny, nx = expected.shape[y] // 2 * 2, expected.shape[x] // 2 * 2
+        expected = np.take(np.take(expected, range(ny), y), range(nx), x)
+        expected = (
+            np.take(expected, range(0, ny, 2), y)
+            + np.take(expected, range(1, ny, 2), y)
+        ) / 2
+        expected = (
+            np.take(expected, range(0, nx, 2), x)
+            + np.take(expected, range(1, nx, 2), x)
+        ) / 2
+
+        np.testing.assert_allclose(level, expected, rtol=1e-5)
@@ -0,0 +1,43 @@
+import numpy as np
+import tifffile
+
+from careamics_napari.utils import FolderWatcher
+
+
+def test_folder_watcher(tmp_path):
+    """Test that files are reported once, after their size is stable."""
+    tifffile.imwrite(tmp_path / "existing.tif", np.zeros((8, 8), dtype=np.uint8))
+
+    watcher = FolderWatcher(tmp_path, exclude=["*_denoised.tif*"])
+    assert watcher.poll() == []
+
+    # new file, reported once stable
+    path = tmp_path / "image.tif"
+    tifffile.imwrite(path, np.zeros((8, 8), dtype=np.uint8))
+    (tmp_path / "image_denoised.tif").write_bytes(b"0")
+    (tmp_path / "notes.txt").write_bytes(b"0")
+
+    assert watcher.poll() == []
+    assert watcher.n_pending == 1
+    assert watcher.poll() == [path]
+    assert watcher.poll() == []
+
+    # file still being written
+    growing = tmp_path / "growing.tiff"
+    growing.write_bytes(b"0")
+    assert watcher.poll() == []
+    with open(growing, "ab") as f:
+        f.write(b"1")
+    assert watcher.poll() == []
+    assert watcher.poll() == [growing]
+
+
+def test_folder_watcher_existing(tmp_path):
+    """Test reporting the files present when the watcher is created."""
+    path = tmp_path / "existing.TIF"
+    path.write_bytes(b"0")
+
+    watcher = FolderWatcher(tmp_path, stable_polls=2, include_existing=True)
+    assert watcher.poll() == []
+    assert watcher.poll() == []
+    assert watcher.poll() == [path]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from careamics_napari.utils import RingBuffer
+
+
+def test_ring_buffer_grows():
+    """Test that rows are kept in order while the storage grows."""
+    buffer = RingBuffer(capacity=100, initial_size=4)
+    for i in range(10):
+        buffer.append(i, 2 * i)
+
+    assert len(buffer) == 10
+    np.testing.assert_array_equal(buffer.data[0], np.arange(10))
+    np.testing.assert_array_equal(buffer.data[1], 2 * np.arange(10))
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 7, 25])
+def test_ring_buffer_drops_oldest(chunk):
+    """Test that only the newest rows are kept once the buffer is full."""
+    capacity = 20
+    buffer = RingBuffer(capacity=capacity, n_columns=1, initial_size=2)
+
+    values = np.arange(103)
+    for i in range(0, len(values), chunk):
+        end = min(i + chunk, len(values))
+        buffer.extend(values[np.newaxis, i:end])
+
+        expected = values[max(0, end - capacity) : end]
+        np.testing.assert_array_equal(buffer.data[0], expected)
+
+    # reading does not copy the storage
+    assert buffer.data.base is not None
+
+
+def test_ring_buffer_clear():
+    """Test that clearing the buffer removes all rows."""
+    buffer = RingBuffer(capacity=5)
+    buffer.extend(np.ones((2, 8)))
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.data.shape == (2, 0)
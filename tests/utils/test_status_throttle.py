@@ -0,0 +1,54 @@
+from careamics_napari.signals import (
+    TrainingState,
+    TrainingStatus,
+    TrainUpdate,
+    TrainUpdateType,
+)
+from careamics_napari.utils import StatusThrottle
+
+
+def test_status_throttle():
+    """Test that batch updates are rate limited and flushed on state changes."""
+    status = TrainingStatus()
+    emitted = []
+    status.events.batch_idx.connect(emitted.append)
+
+    throttle = StatusThrottle(status, [TrainUpdateType.BATCH], max_rate=1e-3)
+    for i in range(1_000):
+        throttle.update(TrainUpdate(TrainUpdateType.BATCH, i))
+
+    # only the first update went through
+    assert emitted == [0]
+    assert status.batch_idx == 0
+
+    # state changes are always applied, after the held back batch index
+    throttle.update(TrainUpdate(TrainUpdateType.STATE, TrainingState.DONE))
+    assert emitted == [0, 999]
+    assert status.state == TrainingState.DONE
+
+
+def test_status_throttle_unlimited():
+    """Test that updates are applied when they arrive slower than the rate."""
+    status = TrainingStatus()
+    emitted = []
+    status.events.batch_idx.connect(emitted.append)
+
+    throttle = StatusThrottle(status, [TrainUpdateType.BATCH], max_rate=1e9)
+    for i in range(10):
+        throttle.update(TrainUpdate(TrainUpdateType.BATCH, i))
+
+    assert emitted == list(range(10))
+
+
+def test_status_throttle_trailing_flush(qtbot):
+    """Test that the last held back update is applied without further updates."""
+    status = TrainingStatus()
+    emitted = []
+    status.events.batch_idx.connect(emitted.append)
+
+    throttle = StatusThrottle(status, [TrainUpdateType.BATCH], max_rate=20)
+    for i in range(10):
+        throttle.update(TrainUpdate(TrainUpdateType.BATCH, i))
+    assert emitted == [0]
+
+    qtbot.waitUntil(lambda: emitted == [0, 9], timeout=1_000)
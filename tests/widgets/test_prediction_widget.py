@@ -0,0 +1,44 @@
+from careamics_napari.signals import (
+    PredictionSignal,
+    PredictionState,
+    PredictionStatus,
+    PredictionUpdate,
+    PredictionUpdateType,
+    TrainingSignal,
+    TrainingState,
+    TrainingStatus,
+)
+from careamics_napari.widgets import PredictionWidget
+
+
+def test_watch_stop_and_restart(qtbot):
+    """Test that watching a folder can be stopped and restarted."""
+    train_status = TrainingStatus()
+    pred_status = PredictionStatus()
+    pred_signal = PredictionSignal(load_from_disk=True, watch_folder=True)
+
+    widget = PredictionWidget(train_status, pred_status, TrainingSignal(), pred_signal)
+    qtbot.addWidget(widget)
+    train_status.state = TrainingState.DONE
+
+    widget.predict_button.click()
+    assert pred_status.state == PredictionState.PREDICTING
+    assert widget.predict_button.text() == "Stop watching"
+    assert widget.watch_label.isVisibleTo(widget)
+
+    # the button is disabled until the watcher has finished
+    widget.predict_button.click()
+    assert pred_status.state == PredictionState.STOPPING
+    assert not widget.predict_button.isEnabled()
+    assert widget.predict_button.text() == "Stopping..."
+
+    pred_status.update(
+        PredictionUpdate(PredictionUpdateType.STATE, PredictionState.STOPPED)
+    )
+    assert widget.predict_button.isEnabled()
+    assert widget.predict_button.text() == "Predict"
+    assert not widget.watch_label.isVisibleTo(widget)
+
+    widget.predict_button.click()
+    assert pred_status.state == PredictionState.PREDICTING
+    assert widget.predict_button.text() == "Stop watching"
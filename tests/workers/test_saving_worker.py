@@ -0,0 +1,37 @@
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+from napari.layers import Image
+
+from careamics_napari.careamics_utils import crop_test_input
+from careamics_napari.signals import TrainingSignal
+from careamics_napari.workers.saving_worker import _load_training_image
+
+
+def _image() -> np.ndarray:
+    """Random SYX image."""
+    return np.random.default_rng(42).random((4, 64, 48)).astype(np.float32)
+
+
+@pytest.mark.parametrize("source", ["zarr", "dask", "multiscale"])
+def test_load_training_image(tmp_path, source):
+    """Test that the test input is cropped from Zarr, dask and multiscale data."""
+    image = _image()
+    signal = TrainingSignal(load_from_disk=source == "zarr", axes="SYX")  # type: ignore
+
+    if source == "zarr":
+        zarr.save_array(str(tmp_path / "train.zarr"), image, chunks=(1, 16, 16))
+        signal.path_train = str(tmp_path / "train.zarr")
+    elif source == "dask":
+        signal.layer_train = Image(da.from_array(image, chunks=(1, 16, 16)))
+    else:
+        signal.layer_train = Image([image, image[:, ::2, ::2]], multiscale=True)
+
+    # full resolution, not read yet if lazy
+    data = _load_training_image(signal)
+    assert data.shape == image.shape
+    assert isinstance(data, np.ndarray) == (source == "multiscale")
+
+    crop = crop_test_input(data, "SYX", [16, 16])
+    np.testing.assert_array_equal(crop, image[:1, :16, :16])
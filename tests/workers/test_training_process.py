@@ -0,0 +1,47 @@
+from queue import Queue
+
+import numpy as np
+from careamics import CAREamist
+from napari.layers import Image
+
+from careamics_napari.signals import (
+    TrainingSignal,
+    TrainingState,
+    TrainUpdateType,
+)
+from careamics_napari.workers import create_command_queue
+from careamics_napari.workers.training_process import _run_process
+
+
+def test_train_in_process(tmp_path):
+    """Test that the updates and the trained model are passed back from the
+    training process."""
+    signal = TrainingSignal(  # type: ignore
+        load_from_disk=False,
+        work_dir=tmp_path,
+        axes="SYX",
+        patch_size_xy=16,
+        batch_size=2,
+        n_epochs=2,
+        separate_process=True,
+    )
+    signal.layer_train = Image(
+        np.random.default_rng(42).random((4, 32, 32)).astype(np.float32)
+    )
+
+    queue = Queue()
+    _run_process(signal, queue, Queue(), create_command_queue())
+    updates = [queue.get() for _ in range(queue.qsize())]
+    types = [update.type for update in updates]
+
+    assert TrainUpdateType.EXCEPTION not in types
+    assert TrainUpdateType.EPOCH in types
+    assert TrainUpdateType.LOSS in types
+
+    assert updates[-1].type == TrainUpdateType.STATE
+    assert updates[-1].value == TrainingState.DONE
+
+    careamists = [u.value for u in updates if u.type == TrainUpdateType.CAREAMIST]
+    assert len(careamists) == 1
+    assert isinstance(careamists[0], CAREamist)
+    assert careamists[0].cfg.data_config.image_means is not None
@@ -0,0 +1,137 @@
+from queue import Queue
+from typing import Optional
+
+import numpy as np
+import pytest
+import tifffile
+from napari.layers import Image
+
+from careamics_napari.careamics_utils import StatisticsCache, TimeBudgetCallBack
+from careamics_napari.signals import TrainingSignal, TrainUpdateType
+from careamics_napari.workers import training_worker
+from careamics_napari.workers.training_worker import _train
+
+
+def _signal(
+    work_dir, n_epochs: int, resume: bool = False, val_seed: Optional[int] = 1
+) -> TrainingSignal:
+    """Create a training signal on random images, with a validation image if
+    `val_seed` is not None."""
+    signal = TrainingSignal(  # type: ignore
+        load_from_disk=False,
+        work_dir=work_dir,
+        axes="SYX",
+        patch_size_xy=16,
+        batch_size=2,
+        n_epochs=n_epochs,
+        resume_training=resume,
+    )
+    signal.layer_train = Image(
+        np.random.default_rng(42).random((4, 32, 32)).astype(np.float32),
+        name="train",
+    )
+    if val_seed is not None:
+        signal.layer_val = Image(
+            np.random.default_rng(val_seed).random((1, 32, 32)).astype(np.float32),
+            name="val",
+        )
+    return signal
+
+
+def _run(signal: TrainingSignal, careamist=None) -> list:
+    """Run the training and return its updates."""
+    queue = Queue()
+    _train(signal, queue, Queue(), careamist)
+    return [queue.get() for _ in range(queue.qsize())]
+
+
+def test_resume_training(tmp_path):
+    """Test that a new training resumes from the last checkpoint."""
+    _run(_signal(tmp_path, n_epochs=2))
+    assert (tmp_path / "checkpoints" / "last.ckpt").exists()
+
+    updates = _run(_signal(tmp_path, n_epochs=3, resume=True))
+    assert not any(u.type == TrainUpdateType.EXCEPTION for u in updates)
+
+    # only the remaining epoch is trained
+    epochs = [u.value for u in updates if u.type == TrainUpdateType.EPOCH]
+    assert min(epochs) == 2
+
+    careamist = next(u.value for u in updates if u.type == TrainUpdateType.CAREAMIST)
+    assert careamist.trainer.current_epoch == 3
+
+
+@pytest.mark.parametrize(
+    "checkpoint, val_seed",
+    [
+        (False, 1),  # no checkpoint
+        (True, 2),  # different validation data
+        (True, None),  # random validation split
+    ],
+)
+def test_resume_training_errors(tmp_path, checkpoint, val_seed):
+    """Test that resuming fails without checkpoint or with a different split."""
+    if checkpoint:
+        _run(_signal(tmp_path, n_epochs=1))
+
+    updates = _run(_signal(tmp_path, n_epochs=2, resume=True, val_seed=val_seed))
+    exceptions = [u.value for u in updates if u.type == TrainUpdateType.EXCEPTION]
+
+    assert len(exceptions) == 1
+    assert isinstance(exceptions[0], ValueError)
+
+
+def test_statistics_cache(tmp_path, monkeypatch):
+    """Test that the statistics of files read one by one are cached."""
+    rng = np.random.default_rng(42)
+    for folder in ("train", "val"):
+        (tmp_path / folder).mkdir()
+        for i in range(2):
+            image = rng.random((32, 32)).astype(np.float32)
+            tifffile.imwrite(tmp_path / folder / f"{i}.tif", image)
+
+    # force reading the files one by one, with a temporary cache
+    monkeypatch.setattr(training_worker, "get_ram_size", lambda: 0)
+    monkeypatch.setattr(
+        training_worker,
+        "StatisticsCache",
+        lambda: StatisticsCache(tmp_path / "statistics.json"),
+    )
+
+    def run() -> list:
+        signal = TrainingSignal(  # type: ignore
+            load_from_disk=True,
+            work_dir=tmp_path / "work_dir",
+            path_train=str(tmp_path / "train"),
+            path_val=str(tmp_path / "val"),
+            axes="YX",
+            patch_size_xy=16,
+            batch_size=2,
+            n_epochs=1,
+        )
+        updates = _run(signal)
+        assert not any(u.type == TrainUpdateType.EXCEPTION for u in updates)
+        return [u.value for u in updates if u.type == TrainUpdateType.DEBUG]
+
+    assert not any("cache" in message for message in run())
+    assert (tmp_path / "statistics.json").exists()
+    assert any("cache" in message for message in run())
+
+
+def test_continue_training_callbacks(tmp_path):
+    """Test that the time budget chosen when continuing a training is applied."""
+    updates = _run(_signal(tmp_path, n_epochs=1))
+    careamist = next(u.value for u in updates if u.type == TrainUpdateType.CAREAMIST)
+
+    for budget in (60, 30):
+        signal = _signal(tmp_path, n_epochs=careamist.trainer.current_epoch + 1)
+        signal.time_budget = budget
+        updates = _run(signal, careamist)
+        assert not any(u.type == TrainUpdateType.EXCEPTION for u in updates)
+
+        budgets = [
+            callback.budget
+            for callback in careamist.trainer.callbacks
+            if isinstance(callback, TimeBudgetCallBack)
+        ]
+        assert budgets == [60 * budget]